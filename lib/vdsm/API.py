@@ -1454,6 +1454,14 @@ class Global(APIBase):
         throttledlog.info('getStats', "Current getStats: %s", info)
         return {'status': doneCode, 'info': logutils.Suppressed(info)}
 
+    @api.logged(on="api.host")
+    def getRpcStats(self):
+        """
+        Report statistics of JSON-RPC calls.
+        """
+        stats = hostapi.get_rpc_stats(self._cif)
+        return response.success(stats=logutils.Suppressed(stats))
+
     @api.logged(on="api.host")
     def setLogLevel(self, level, name=''):
         """
@@ -1788,6 +1796,9 @@ class NBD(APIBase):
     def stop_server(self, server_id):
         return self._irs.stop_nbd_server(server_id)
 
+    def get_stats(self):
+        return self._irs.get_nbd_stats()
+
 
 class ManagedVolume(APIBase):
 
@@ -11,6 +11,8 @@ import pickle
 import sys
 import yaml
 
+from vdsm.api import vdsmapi
+
 
 def _load_yaml_file(file_path):
     if hasattr(yaml, 'CSafeLoader'):
@@ -21,13 +23,38 @@ def _load_yaml_file(file_path):
     return yaml_file
 
 
+def _pickle_entries(entries, data):
+    index = {}
+    for name, value in entries.items():
+        blob = pickle.dumps(value, protocol=4)
+        index[name] = (data.tell(), len(blob))
+        data.write(blob)
+    return index
+
+
+def dump_indexed_schema(loaded_schema, out):
+    """
+    Write loaded_schema to file object out using the indexed format read by
+    vdsmapi.Schema, so every method and type can be decoded on first use.
+    """
+    methods = dict(loaded_schema)
+    types = methods.pop('types')
+    data = io.BytesIO()
+    index = {
+        'types': _pickle_entries(types, data),
+        'methods': _pickle_entries(methods, data),
+    }
+    index_data = pickle.dumps(index, protocol=4)
+    out.write(vdsmapi.INDEX_HEADER.pack(vdsmapi.INDEX_MAGIC, len(index_data)))
+    out.write(index_data)
+    out.write(data.getvalue())
+
+
 def _dump_pickled_schema(schema_path, pickled_schema_path):
     with io.open(schema_path, 'rb') as f:
         loaded_schema = _load_yaml_file(f)
         with io.open(pickled_schema_path, 'wb') as pickled_schema:
-            pickle.dump(loaded_schema,
-                        pickled_schema,
-                        protocol=4)
+            dump_indexed_schema(loaded_schema, pickled_schema)
 
 
 def main():
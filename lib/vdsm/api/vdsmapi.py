@@ -7,10 +7,13 @@ from __future__ import division
 import io
 import json
 import logging
+import mmap
 import os
 import pickle
 import six
+import struct
 
+from collections.abc import Mapping
 from enum import Enum
 
 from vdsm import utils
@@ -39,6 +42,14 @@ DEFAULT_VALUES = {'{}': {},
 _log_inconsistency = logging.getLogger("schema.inconsistency").debug
 
 
+# Indexed schema file layout: a header with the magic and the index size,
+# the pickled index, and one pickled blob per method and per type. The index
+# maps every method and type name to the (offset, length) of its blob,
+# relative to the end of the index.
+INDEX_MAGIC = b"VDSMAPI\x01"
+INDEX_HEADER = struct.Struct("!8sQ")
+
+
 class SchemaNotFound(Exception):
     pass
 
@@ -108,6 +119,44 @@ class EventRep(object):
         return self._id
 
 
+class _SchemaSection(Mapping):
+    """
+    Read only mapping of schema entries, decoded on first access.
+
+    Entries added with add_indexed() are kept as (buffer, offset, length)
+    references into a memory mapped schema file until they are looked up.
+    """
+
+    def __init__(self):
+        self._index = {}
+        self._decoded = {}
+
+    def add_indexed(self, buf, base, index):
+        for name, (offset, length) in six.iteritems(index):
+            self._index[name] = (buf, base + offset, length)
+            self._decoded.pop(name, None)
+
+    def add_decoded(self, entries):
+        for name, value in six.iteritems(entries):
+            self._index[name] = None
+            self._decoded[name] = value
+
+    def __getitem__(self, name):
+        try:
+            return self._decoded[name]
+        except KeyError:
+            buf, offset, length = self._index[name]
+            value = pickle.loads(buf[offset:offset + length])
+            self._decoded[name] = value
+            return value
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+
 class Schema(object):
 
     log = logging.getLogger("SchemaCache")
@@ -120,19 +169,33 @@ class Schema(object):
         property from config.py
         """
         self._strict_mode = strict_mode
-        self._methods = {}
-        self._types = {}
+        self._methods = _SchemaSection()
+        self._types = _SchemaSection()
         try:
             for schema_type in schema_types:
-                with io.open(schema_type.path(), 'rb') as f:
-                    loaded_schema = pickle.loads(f.read())
-
-                types = loaded_schema.pop('types')
-                self._types.update(types)
-                self._methods.update(loaded_schema)
+                self._load(schema_type.path())
         except EnvironmentError:
             raise SchemaNotFound("Unable to find API schema file")
 
+    def _load(self, path):
+        with io.open(path, 'rb') as f:
+            header = f.read(INDEX_HEADER.size)
+            if not header.startswith(INDEX_MAGIC):
+                # Plain pickled schema, decode everything now.
+                loaded_schema = pickle.loads(header + f.read())
+                types = loaded_schema.pop('types')
+                self._types.add_decoded(types)
+                self._methods.add_decoded(loaded_schema)
+                return
+
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        _, index_size = INDEX_HEADER.unpack(header)
+        base = INDEX_HEADER.size + index_size
+        index = pickle.loads(buf[INDEX_HEADER.size:base])
+        self._types.add_indexed(buf, base, index['types'])
+        self._methods.add_indexed(buf, base, index['methods'])
+
     @staticmethod
     def vdsm_api(strict_mode, *args, **kwargs):
         schema_types = {SchemaType.VDSM_API}
@@ -173,7 +236,14 @@ class Schema(object):
 
     @property
     def get_methods(self):
-        return utils.picklecopy(self._methods)
+        return utils.picklecopy(dict(self._methods))
+
+    @property
+    def method_names(self):
+        """
+        Return the names of all methods without decoding them.
+        """
+        return list(self._methods)
 
     def get_method_description(self, rep):
         method = self.get_method(rep)
@@ -187,7 +257,7 @@ class Schema(object):
 
     @property
     def get_types(self):
-        return utils.picklecopy(self._types)
+        return utils.picklecopy(dict(self._types))
 
     def _check_primitive_type(self, t, value, name):
         condition = PRIMITIVE_TYPES.get(t)
@@ -80,6 +80,17 @@ log file:
      INFO  (jsonrpc/1) [vdsm.api] START getVMList() flow_id=myflowid, ...
      INFO  (jsonrpc/1) [vdsm.api] FINISH getVMList() flow_id=myflowid, ...
 
+The flow id is kept per thread. The client is thread safe; calls made from
+multiple threads are pipelined on the same connection.
+
+Several calls can be sent in one JSON-RPC batch request, waiting only once
+for all the responses. The results are returned in the same order::
+
+    stats, vms = cli.batch([
+        ("Host.getStats", {}),
+        ("Host.getVMList", {"onlyUUID": True}),
+    ])
+
 ConnectionError: client can't connect to vdsm::
 
     vdsm.client.ConnectionError: Connection to localhost:54321 with
@@ -114,6 +125,7 @@ from __future__ import absolute_import
 
 import contextlib
 import functools
+import threading
 import uuid
 
 from vdsm.api import vdsmapi
@@ -225,7 +237,7 @@ class _Client(object):
     def __init__(self, client, default_timeout, gluster_enabled=False):
         self._client = client
         self._default_timeout = default_timeout
-        self._flow_id = None
+        self._local = threading.local()
         self._init_schema(gluster_enabled)
         self._create_namespaces()
 
@@ -239,7 +251,7 @@ class _Client(object):
             raise MissingSchemaError(e)
 
     def _create_namespaces(self):
-        for method in self._schema.get_methods:
+        for method in self._schema.method_names:
             namespace, method = method.split('.', 1)
             if not hasattr(self, namespace):
                 setattr(self, namespace, Namespace(namespace, self._call))
@@ -277,8 +289,7 @@ class _Client(object):
         if not responses:
             raise TimeoutError(method, kwargs, timeout)
 
-        # jsonrpc can handle batch requests so it sends a list of responses,
-        # but we call only one verb at a time so responses contains only one
+        # We sent a batch with one request, so responses contains only one
         # item.
 
         resp = responses[0]
@@ -288,16 +299,67 @@ class _Client(object):
 
         return resp.result
 
+    def batch(self, calls, timeout=None):
+        """
+        Send several calls in one JSON-RPC batch request.
+
+        Args:
+            calls (list): (method, params) tuples, e.g.
+                ("Host.getStats", {})
+            timeout (int): seconds to wait for all the responses, the
+                client default timeout if not specified
+
+        Returns:
+            list of results, in the order of calls
+
+        Raises:
+            ClientError: in case of an error in the protocol.
+            TimeoutError: if not all responses were received in time.
+            ServerError: for the first call that failed.
+        """
+        if timeout is None:
+            timeout = self._default_timeout
+
+        reqs = [
+            yajsonrpc.JsonRpcRequest(method, params, reqId=str(uuid.uuid4()))
+            for method, params in calls
+        ]
+        methods = [req.method for req in reqs]
+
+        try:
+            responses = self._client.call(
+                *reqs, timeout=timeout, flow_id=self._flow_id)
+        except EnvironmentError as e:
+            raise ClientError(methods, calls, e)
+
+        if not responses:
+            raise TimeoutError(methods, calls, timeout)
+
+        by_id = {resp.id: resp for resp in responses}
+        results = []
+        for req in reqs:
+            resp = by_id[req.id]
+            if resp.error:
+                raise ServerError(
+                    req.method, req.params, resp.error.code, str(resp.error))
+            results.append(resp.result)
+
+        return results
+
     def close(self):
         self._client.close()
 
+    @property
+    def _flow_id(self):
+        return getattr(self._local, "flow_id", None)
+
     @contextlib.contextmanager
     def flow(self, flow_id):
         try:
-            self._flow_id = flow_id
+            self._local.flow_id = flow_id
             yield
         finally:
-            self._flow_id = None
+            self._local.flow_id = None
 
     def subscribe(self, queue_name, event_queue=None):
         """
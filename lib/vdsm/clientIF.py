@@ -18,16 +18,19 @@ import six
 
 from yajsonrpc.betterAsyncore import Reactor
 from yajsonrpc.exception import JsonRpcBindingsError
+from yajsonrpc.stompclient import ClientPool
 from yajsonrpc.stompclient import StompClient
 from yajsonrpc.stompserver import StompRpcServer
 from yajsonrpc import Notification
 from vdsm import sslutils
+from vdsm import utils
 from vdsm.config import config
 from vdsm.common import exception
 from vdsm.common.define import doneCode, errCode
 from vdsm.common.hostutils import host_in_shutdown
 import vdsm.common.time
 from vdsm.protocoldetector import MultiProtocolAcceptor
+from vdsm.rpc.notifications import EventAggregator
 from vdsm.momIF import MomClient
 from vdsm.virt import events
 from vdsm.virt import migration
@@ -98,6 +101,18 @@ class clientIF(object):
         self._subscriptions = defaultdict(list)
         self._scheduler = scheduler
         self._unknown_vm_ids = set()
+        self._events = EventAggregator(
+            self._send_notification,
+            scheduler,
+            config.getfloat('rpc', 'event_window'),
+            max_merged=config.getint('rpc', 'event_max_merged'))
+        self.destination_clients = ClientPool(
+            self._connectStompClient,
+            max_connections=config.getint(
+                'vars', 'migration_connections_per_host'),
+            idle_timeout=config.getint(
+                'vars', 'migration_connection_idle_timeout'),
+            scheduler=scheduler)
         if _glusterEnabled:
             self.gluster = gapi.GlusterApi()
         else:
@@ -184,6 +199,10 @@ class clientIF(object):
         event_id and a dictionary as event body. Before sending
         there is notify_time added on top level to the dictionary.
 
+        Events are aggregated for a short window (see rpc:event_window);
+        only the latest event with the same event_id is sent, and VM
+        status events are merged into one event.
+
         Please consult event-schema.yml in order to build an appropriate event.
         https://github.com/oVirt/vdsm/blob/master/lib/api/vdsm-events.yml
 
@@ -199,14 +218,17 @@ class clientIF(object):
                              event_id, params)
             return
 
+        self._events.notify(event_id, params)
+
+    def _send_notification(self, event_id, params):
         json_binding = self.servers['jsonrpc']
 
-        def _send_notification(message):
+        def send(message):
             json_binding.reactor.server.send(
                 message, config.get('addresses', 'event_queue'))
 
         try:
-            notification = Notification(event_id, _send_notification,
+            notification = Notification(event_id, send,
                                         json_binding.bridge.event_schema)
             notification.emit(params)
             self.log.debug("Sending notification %s with params %s ",
@@ -367,6 +389,8 @@ class clientIF(object):
             self._wait_for_shutting_down_vms()
 
             self._acceptor.stop()
+            self._events.flush()
+            self.destination_clients.close()
             for binding in self.servers.values():
                 binding.stop()
             self._reactor.stop()
@@ -589,6 +613,11 @@ class clientIF(object):
         else:
             raise JsonRpcBindingsError()
 
+    def _connectStompClient(self, host, port):
+        sslctx = sslutils.create_ssl_context()
+        client_socket = utils.create_connected_socket(host, port, sslctx)
+        return self.createStompClient(client_socket)
+
     def _recoverThread(self):
         # Trying to run recover process until it works. During that time vdsm
         # stays in recovery mode (_recover=True), means all api requests
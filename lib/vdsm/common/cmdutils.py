@@ -93,7 +93,7 @@ def _list2cmdline(args):
 _needs_quoting = re.compile(r'[^A-Za-z0-9_%+,\-./:=@]').search
 
 
-def exec_cmd(cmd, env=None):
+def exec_cmd(cmd, env=None, timeout=None):
     """
     Execute cmd in an external process, collect its output and returncode
 
@@ -101,6 +101,9 @@ def exec_cmd(cmd, env=None):
     :param env: an optional dictionary to be placed as environment variables
                 of the external process. If None, the environment of the
                 calling process is used.
+    :param timeout: an optional timeout in seconds. If the process does not
+                    terminate in time, it is killed and
+                    subprocess.TimeoutExpired is raised.
     :returns: a 3-tuple of the process's
               (returncode, stdout content, stderr content.)
 
@@ -117,7 +120,13 @@ def exec_cmd(cmd, env=None):
         cmd, close_fds=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
         env=env)
 
-    out, err = p.communicate()
+    try:
+        out, err = p.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        p.kill()
+        p.communicate()
+        logging.debug("Process %d killed after %s seconds", p.pid, timeout)
+        raise
 
     logging.debug(retcode_log_line(p.returncode, err=err))
 
@@ -0,0 +1,544 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+RPC over a unix socket, used for calling supervdsm.
+
+A client keeps a pool of connections to the server. A call checks out an
+idle connection, or opens a new one if all connections are in use, sends
+the call, reads the reply on the same connection, and returns the
+connection to the pool. The server serves every connection in a dedicated
+thread, reading calls and running them.
+
+Concurrent calls use different connections, so a slow call does not delay
+other calls, and a call wakes up only the server thread serving its
+connection and the calling thread; no thread hands messages to other
+threads. Connections idle for more than idle_timeout seconds are closed by
+the next call, and the server threads serving them exit.
+
+Every message is a fixed binary header followed by a pickled payload:
+
+    payload length (uint32) | call id (uint64) | message type (uint8)
+
+    CALL    (name, args, kwargs)
+    REPLY   result
+    ERROR   exception raised by the call
+
+Calls have no timeout by default. Waiting for a call with a timeout
+cancels the call if the timeout expires. A cancelled call keeps running on
+the server, but its connection is closed and its result is dropped.
+
+Usage:
+
+    client = muxrpc.Client(address)
+    result = client.call('ping')
+
+    call = client.submit('mount', args=(spec, path))
+    try:
+        call.result(timeout=30)
+    except muxrpc.Timeout:
+        ...
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import collections
+import errno
+import itertools
+import logging
+import pickle
+import select
+import socket
+import struct
+import threading
+import time
+import traceback
+
+from vdsm.common import concurrent
+from vdsm.common.time import monotonic_time
+
+CALL = 1
+REPLY = 2
+ERROR = 3
+
+# Seconds an idle connection is kept open.
+IDLE_TIMEOUT = 60
+
+RECV_SIZE = 64 * 1024
+
+# Seconds to wait before accepting again when out of file descriptors.
+ACCEPT_RETRY_DELAY = 0.1
+
+_HEADER = struct.Struct('=IQB')
+
+log = logging.getLogger("muxrpc")
+
+
+class Error(Exception):
+    """ Base class for muxrpc errors """
+
+
+class ConnectionClosed(Error):
+    """ Raised when the connection was closed before the call returned """
+
+
+class Timeout(Error):
+    """ Raised when a call did not return within the timeout """
+
+
+class Cancelled(Error):
+    """ Raised when waiting for a cancelled call """
+
+
+class RemoteError(Error):
+    """
+    Raised when the result or the error of a call could not be sent by the
+    server, or could not be received by the client.
+    """
+
+
+class Call(object):
+    """
+    A call in flight, returned by Client.submit().
+    """
+
+    def __init__(self, client, conn, call_id, name):
+        self._client = client
+        self._conn = conn
+        self._id = call_id
+        self._name = name
+        # Protects the call state.
+        self._lock = threading.Lock()
+        # Held by the thread reading the reply.
+        self._read_lock = threading.Lock()
+        self._done = False
+        self._result = None
+        self._error = None
+
+    @property
+    def name(self):
+        return self._name
+
+    def done(self):
+        return self._done
+
+    def result(self, timeout=None):
+        """
+        Wait until the call returns, and return its result. If the call
+        raised, raise the same exception.
+
+        If timeout expires, cancel the call and raise Timeout.
+        """
+        deadline = None if timeout is None else monotonic_time() + timeout
+        if self._read_lock.acquire(timeout=-1 if timeout is None else timeout):
+            try:
+                self._read_reply(_remaining(deadline))
+            finally:
+                self._read_lock.release()
+
+        # If the call cannot be cancelled, the reply arrived after the
+        # timeout expired.
+        if not self._done and self.cancel():
+            raise Timeout("Timeout waiting for %s after %s seconds"
+                          % (self._name, timeout))
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def cancel(self):
+        """
+        Stop waiting for the call. Threads waiting for the call will raise
+        Cancelled. The call keeps running on the server, and its result is
+        dropped.
+
+        Return True if the call was cancelled, False if it already returned.
+        """
+        with self._lock:
+            if self._done:
+                return False
+            self._done = True
+            self._error = Cancelled("Call %s was cancelled" % self._name)
+            conn = self._conn
+            self._conn = None
+        # The reply will never be read, so the connection cannot be reused.
+        # Closing it also wakes up the thread reading the reply.
+        self._client._discard(conn)
+        return True
+
+    def _read_reply(self, timeout):
+        with self._lock:
+            if self._done:
+                return
+            conn = self._conn
+
+        try:
+            msg = conn.reader.read(timeout)
+        except ConnectionClosed:
+            self._finish(conn, ERROR, ConnectionClosed(
+                "Connection closed by server"))
+            return
+        except OSError as e:
+            self._finish(conn, ERROR, ConnectionClosed(
+                "Error receiving reply: %s" % e))
+            return
+
+        if msg is None:
+            return  # Timeout expired.
+
+        msg_type, call_id, payload = msg
+        if call_id != self._id:
+            self._finish(conn, ERROR, RemoteError(
+                "Unexpected reply id %s for call id %s"
+                % (call_id, self._id)))
+            return
+
+        try:
+            value = pickle.loads(payload)
+        except Exception as e:
+            msg_type = ERROR
+            value = RemoteError("Cannot unpickle reply: %s" % e)
+
+        self._finish(conn, msg_type, value, reuse=True)
+
+    def _finish(self, conn, msg_type, value, reuse=False):
+        with self._lock:
+            if self._done:
+                return  # Cancelled, the connection was discarded.
+            self._done = True
+            self._conn = None
+            if msg_type == REPLY:
+                self._result = value
+            else:
+                self._error = value
+        if reuse:
+            self._client._checkin(conn)
+        else:
+            self._client._discard(conn)
+
+    def __repr__(self):
+        return "<Call %s id=%s done=%s>" % (self._name, self._id, self._done)
+
+
+class Client(object):
+    """
+    Client sending calls to a server listening on unix socket address.
+
+    Closed connections are replaced on the next call, so the client
+    reconnects after the server was restarted.
+    """
+
+    def __init__(self, address, idle_timeout=IDLE_TIMEOUT):
+        self._address = address
+        self._idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        # Idle connections, most recently used last.
+        self._idle = collections.deque()
+        # All open connections, idle or used by a call.
+        self._connections = set()
+        self._ids = itertools.count(1)
+        self._closed = False
+
+    def connect(self):
+        """
+        Ensure that the client has at least one open connection.
+
+        Raises OSError if the server cannot be reached.
+        """
+        conn, _ = self._checkout()
+        self._checkin(conn)
+
+    def submit(self, name, args=(), kwargs=None):
+        """
+        Send a call to function name and return a Call, without waiting for
+        the reply.
+
+        Raises OSError if the server cannot be reached, and ConnectionClosed
+        if the client was closed.
+        """
+        payload = pickle.dumps((name, args, kwargs or {}),
+                               protocol=pickle.HIGHEST_PROTOCOL)
+        while True:
+            conn, reused = self._checkout()
+            call = Call(self, conn, next(self._ids), name)
+            try:
+                _send(conn.sock, CALL, call._id, payload)
+            except OSError as e:
+                self._discard(conn)
+                if reused:
+                    # The server closed the idle connection, the call was
+                    # not sent.
+                    continue
+                raise ConnectionClosed("Error sending call: %s" % e)
+            return call
+
+    def call(self, name, args=(), kwargs=None, timeout=None):
+        """
+        Call function name on the server and return the result.
+        """
+        return self.submit(name, args, kwargs).result(timeout)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            connections = self._connections
+            self._connections = set()
+            self._idle.clear()
+        for conn in connections:
+            conn.close()
+
+    def _checkout(self):
+        """
+        Return (connection, reused) tuple, reusing the most recently used
+        idle connection, or opening a new connection.
+        """
+        deadline = monotonic_time() - self._idle_timeout
+        expired = []
+        with self._lock:
+            if self._closed:
+                raise ConnectionClosed("Client was closed")
+            while self._idle and self._idle[0].last_used <= deadline:
+                expired.append(self._idle.popleft())
+            conn = self._idle.pop() if self._idle else None
+
+        for c in expired:
+            self._discard(c)
+
+        if conn is not None:
+            return conn, True
+
+        conn = _ClientConnection(_connect(self._address))
+        with self._lock:
+            if not self._closed:
+                self._connections.add(conn)
+                return conn, False
+        conn.close()
+        raise ConnectionClosed("Client was closed")
+
+    def _checkin(self, conn):
+        conn.last_used = monotonic_time()
+        with self._lock:
+            if conn in self._connections:
+                self._idle.append(conn)
+                return
+        # The client was closed.
+        conn.close()
+
+    def _discard(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+        conn.close()
+
+
+class _ClientConnection(object):
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.reader = _Reader(sock)
+        self.last_used = monotonic_time()
+
+    def close(self):
+        try:
+            # Wakes up a thread reading a reply.
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class Server(object):
+    """
+    Serve calls to the public methods of instance on unix socket address.
+
+    The socket is created and bound when the server is created, so the
+    caller can change its ownership before serving.
+    """
+
+    def __init__(self, address, instance):
+        self._address = address
+        self._instance = instance
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._sock = socket.socket(
+            socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+        try:
+            self._sock.bind(address)
+            self._sock.listen(socket.SOMAXCONN)
+        except BaseException:
+            self._sock.close()
+            raise
+
+    def serve_forever(self):
+        """
+        Accept connections until stop() is called.
+        """
+        try:
+            while True:
+                try:
+                    sock, _ = self._sock.accept()
+                except OSError as e:
+                    if self._stopping:
+                        break
+                    if e.errno in (errno.EMFILE, errno.ENFILE):
+                        # The pending connection stays in the backlog, so
+                        # accepting again fails immediately until a file
+                        # descriptor is closed.
+                        log.error("Cannot accept connection: %s", e)
+                        time.sleep(ACCEPT_RETRY_DELAY)
+                        continue
+                    raise
+                conn = _ServerConnection(self, sock)
+                with self._lock:
+                    self._connections.add(conn)
+                t = concurrent.thread(
+                    conn.serve, name="muxrpc/conn", log=log)
+                t.start()
+        finally:
+            self._sock.close()
+            with self._lock:
+                connections = list(self._connections)
+            for conn in connections:
+                conn.close()
+
+    def stop(self):
+        self._stopping = True
+        try:
+            # Wakes up serve_forever().
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _dispatch(self, name, args, kwargs):
+        if name.startswith('_'):
+            raise AttributeError("Cannot call private method %r" % name)
+        return getattr(self._instance, name)(*args, **kwargs)
+
+    def _remove(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+
+
+class _ServerConnection(object):
+    """
+    A connection served by a dedicated thread, running the calls in the
+    order they are received. The client sends the next call only after
+    reading the reply.
+    """
+
+    def __init__(self, server, sock):
+        self._server = server
+        self._sock = sock
+        self._reader = _Reader(sock)
+
+    def close(self):
+        try:
+            # Wakes up the serving thread.
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def serve(self):
+        try:
+            while True:
+                msg_type, call_id, payload = self._reader.read()
+                if msg_type == CALL:
+                    msg_type, value = self._call(payload)
+                    self._reply(call_id, msg_type, value)
+                else:
+                    log.warning("Ignoring unexpected message type %s",
+                                msg_type)
+        except ConnectionClosed:
+            pass
+        except OSError as e:
+            log.debug("Error serving connection: %s", e)
+        finally:
+            self._server._remove(self)
+            self._sock.close()
+
+    def _call(self, payload):
+        try:
+            name, args, kwargs = pickle.loads(payload)
+            return REPLY, self._server._dispatch(name, args, kwargs)
+        except Exception as e:
+            return ERROR, e
+
+    def _reply(self, call_id, msg_type, value):
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            msg_type = ERROR
+            payload = pickle.dumps(
+                RemoteError("Cannot pickle %s:\n%s"
+                            % (value, traceback.format_exc())),
+                protocol=pickle.HIGHEST_PROTOCOL)
+        _send(self._sock, msg_type, call_id, payload)
+
+
+class _Reader(object):
+    """
+    Read messages from a socket, keeping partly received messages between
+    reads.
+    """
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._buf = bytearray()
+
+    def read(self, timeout=None):
+        """
+        Return the next message (type, call id, payload), or None if timeout
+        expired.
+
+        Raises ConnectionClosed if the connection was closed.
+        """
+        deadline = None if timeout is None else monotonic_time() + timeout
+        while True:
+            msg = self._parse()
+            if msg is not None:
+                return msg
+            if deadline is not None and not self._wait(deadline):
+                return None
+            data = self._sock.recv(RECV_SIZE)
+            if not data:
+                raise ConnectionClosed("Connection closed")
+            self._buf += data
+
+    def _parse(self):
+        if len(self._buf) < _HEADER.size:
+            return None
+        length, call_id, msg_type = _HEADER.unpack_from(self._buf)
+        end = _HEADER.size + length
+        if len(self._buf) < end:
+            return None
+        payload = bytes(self._buf[_HEADER.size:end])
+        del self._buf[:end]
+        return msg_type, call_id, payload
+
+    def _wait(self, deadline):
+        poller = select.poll()
+        poller.register(self._sock, select.POLLIN)
+        timeout = max(0, deadline - monotonic_time())
+        return bool(poller.poll(timeout * 1000))
+
+
+def _remaining(deadline):
+    if deadline is None:
+        return None
+    return max(0, deadline - monotonic_time())
+
+
+def _connect(address):
+    sock = socket.socket(
+        socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+    try:
+        sock.connect(address)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def _send(sock, msg_type, call_id, payload):
+    header = _HEADER.pack(len(payload), call_id, msg_type)
+    sock.sendall(header + payload)
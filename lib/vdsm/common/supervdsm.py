@@ -5,12 +5,12 @@ from __future__ import absolute_import
 from __future__ import division
 
 import os
-from multiprocessing.managers import BaseManager, RemoteError
 import logging
 import threading
 
 from vdsm.common import constants
 from vdsm.common import function
+from vdsm.common import muxrpc
 from vdsm.common.panic import panic
 
 _g_singletonSupervdsmInstance = None
@@ -20,10 +20,6 @@ _g_singletonSupervdsmInstance_lock = threading.Lock()
 ADDRESS = os.path.join(constants.P_VDSM_RUN, "svdsm.sock")
 
 
-class _SuperVdsmManager(BaseManager):
-    pass
-
-
 class ProxyCaller(object):
 
     def __init__(self, supervdsmProxy, funcName):
@@ -31,17 +27,27 @@ class ProxyCaller(object):
         self._supervdsmProxy = supervdsmProxy
 
     def __call__(self, *args, **kwargs):
-        callMethod = lambda: \
-            getattr(self._supervdsmProxy._svdsm, self._funcName)(*args,
-                                                                 **kwargs)
         try:
-            return callMethod()
-        except RemoteError:
-            self._supervdsmProxy._connect()
+            return self.submit(*args, **kwargs).result()
+        except muxrpc.ConnectionClosed:
             raise RuntimeError(
                 "Broken communication with supervdsm. Failed call to %s"
                 % self._funcName)
 
+    def submit(self, *args, **kwargs):
+        """
+        Send the call without waiting for the result, and return a
+        muxrpc.Call. Use Call.result(timeout) to wait for the result with a
+        timeout, and Call.cancel() to stop waiting for it.
+        """
+        try:
+            return self._supervdsmProxy._client.submit(
+                self._funcName, args, kwargs)
+        except OSError as e:
+            raise RuntimeError(
+                "Cannot connect to supervdsm. Failed call to %s: %s"
+                % (self._funcName, e))
+
 
 class SuperVdsmProxy(object):
     """
@@ -50,29 +56,19 @@ class SuperVdsmProxy(object):
     _log = logging.getLogger("SuperVdsmProxy")
 
     def __init__(self):
-        self._manager = None
-        self._svdsm = None
+        self._client = None
         self._connect()
 
-    def open(self, *args, **kwargs):
-        # pylint: disable=no-member
-        return self._manager.open(*args, **kwargs)
-
     def _connect(self):
-        self._manager = _SuperVdsmManager(address=ADDRESS, authkey=b'')
-        self._manager.register('instance')
-        self._manager.register('open')
+        self._client = muxrpc.Client(ADDRESS)
         self._log.debug("Trying to connect to Super Vdsm")
         try:
             function.retry(
-                self._manager.connect, Exception, timeout=60, tries=3)
+                self._client.connect, Exception, timeout=60, tries=3)
         except Exception as ex:
             msg = "Connect to supervdsm service failed: %s" % ex
             panic(msg)
 
-        # pylint: disable=no-member
-        self._svdsm = self._manager.instance()
-
     def __getattr__(self, name):
         return ProxyCaller(self, name)
 
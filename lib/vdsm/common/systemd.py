@@ -20,7 +20,7 @@ class Accounting(object):
 
 
 def run(cmd, scope=False, unit=None, slice=None, uid=None, gid=None,
-        accounting=None):
+        accounting=None, collect=False):
     """
     Run a command using systemd-run.
 
@@ -33,13 +33,14 @@ def run(cmd, scope=False, unit=None, slice=None, uid=None, gid=None,
         slice=slice,
         uid=uid,
         gid=gid,
-        accounting=accounting)
+        accounting=accounting,
+        collect=collect)
 
     return commands.run(cmd)
 
 
 def wrap(cmd, scope=False, unit=None, slice=None, uid=None, gid=None,
-         accounting=None):
+         accounting=None, collect=False):
     """
     Wrap a command with systemd-run invocation.
 
@@ -60,5 +61,7 @@ def wrap(cmd, scope=False, unit=None, slice=None, uid=None, gid=None,
     if accounting is not None:
         command.extend(['--property={}Accounting=1'.format(acct)
                         for acct in accounting])
+    if collect:
+        command.append('--collect')
     command.extend(cmd)
     return command
@@ -282,9 +282,11 @@ class GlusterApi(object):
         self.svdsmProxy = svdsm.getProxy()
 
     @exportAsVerb
-    def volumesList(self, volumeName=None, remoteServer=None, options=None):
+    def volumesList(self, volumeName=None, remoteServer=None, refresh=False,
+                    options=None):
         return {'volumes': self.svdsmProxy.glusterVolumeInfo(volumeName,
-                                                             remoteServer)}
+                                                             remoteServer,
+                                                             refresh)}
 
     @exportAsVerb
     def volumeCreate(self, volumeName, brickList, replicaCount=0,
@@ -394,9 +396,9 @@ class GlusterApi(object):
 
     @exportAsVerb
     def volumeStatus(self, volumeName, brick=None, statusOption=None,
-                     options=None):
+                     refresh=False, options=None):
         status = self.svdsmProxy.glusterVolumeStatus(volumeName, brick,
-                                                     statusOption)
+                                                     statusOption, refresh)
         if statusOption == 'detail':
             data = self.svdsmProxy.glusterVolumeStatvfs(volumeName)
             status['volumeStatsInfo'] = self._computeVolumeStats(data)
@@ -493,8 +495,8 @@ class GlusterApi(object):
         return {'services': status}
 
     @exportAsVerb
-    def tasksList(self, taskIds=[], options=None):
-        status = self.svdsmProxy.glusterTasksList(taskIds)
+    def tasksList(self, taskIds=[], refresh=False, options=None):
+        status = self.svdsmProxy.glusterTasksList(taskIds, refresh)
         return {'tasks': status}
 
     @exportAsVerb
@@ -99,22 +99,24 @@ class GlusterTask(GlusterApiBase):
     def __init__(self):
         GlusterApiBase.__init__(self)
 
-    def list(self, taskIds=[]):
-        return self._gluster.tasksList(taskIds)
+    def list(self, taskIds=[], refresh=False):
+        return self._gluster.tasksList(taskIds, refresh)
 
 
 class GlusterVolume(GlusterApiBase):
     def __init__(self):
         GlusterApiBase.__init__(self)
 
-    def status(self, volumeName, brick=None, statusOption=None):
-        return self._gluster.volumeStatus(volumeName, brick, statusOption)
+    def status(self, volumeName, brick=None, statusOption=None,
+               refresh=False):
+        return self._gluster.volumeStatus(volumeName, brick, statusOption,
+                                          refresh)
 
     def healInfo(self, volumeName):
         return self._gluster.volumeHealInfo(volumeName)
 
-    def list(self, volumeName=None, remoteServer=None):
-        return self._gluster.volumesList(volumeName, remoteServer)
+    def list(self, volumeName=None, remoteServer=None, refresh=False):
+        return self._gluster.volumesList(volumeName, remoteServer, refresh)
 
     def create(self, volumeName, brickList, replicaCount=0, stripeCount=0,
                transportList=[], force=False, arbiter=False):
@@ -5,16 +5,21 @@ from __future__ import absolute_import
 from __future__ import division
 
 import calendar
+import copy
 import errno
+import io
 import logging
 import os
 import socket
 import subprocess
+import threading
 import time
 import xml.etree.ElementTree as etree
 
 from vdsm.common import cmdutils
 from vdsm.common import commands
+from vdsm.common.config import config
+from vdsm.common.time import monotonic_time
 from vdsm.network.netinfo import addresses
 
 from . import exception as ge
@@ -94,6 +99,28 @@ def _execGluster(cmd):
         return commands.run(cmd)
     except cmdutils.Error as e:
         raise ge.GlusterCmdFailedException(rc=e.rc, err=[e.msg])
+    finally:
+        if not _isQueryCmd(cmd):
+            _statusSnapshot.invalidate()
+
+
+# Commands not modifying volumes, keeping the status snapshot valid.
+_QUERY_CMDS = frozenset([
+    ('volume', 'info'),
+    ('volume', 'status'),
+    ('volume', 'list'),
+    ('peer', 'status'),
+    ('snapshot', 'info'),
+    ('snapshot', 'list'),
+    ('snapshot', 'status'),
+])
+
+
+def _isQueryCmd(cmd):
+    args = [arg for arg in cmd[1:] if not arg.startswith('-')]
+    if tuple(args[:2]) == ('volume', 'heal'):
+        return 'info' in args
+    return tuple(args[:2]) in _QUERY_CMDS
 
 
 def _getTree(out):
@@ -137,6 +164,173 @@ def _execGlusterXmlWithTimeout(cmd, timeout=_DEFAULT_TIMEOUT):
     return _getTree(out)
 
 
+def _iterXmlVolumes(out, path):
+    """
+    Parse gluster xml output incrementally, yielding a tree for every
+    volume element at path (e.g. 'volInfo/volumes/volume'). The tree has
+    the same structure as the tree of the output of a single volume, and is
+    dropped once the next volume is parsed.
+    """
+    tags = ['cliOutput'] + path.split('/')
+    result = {}
+    stack = []
+    try:
+        for event, el in etree.iterparse(io.BytesIO(out),
+                                         events=('start', 'end')):
+            if event == 'start':
+                if len(stack) == 1 and el.tag not in _OP_TAGS:
+                    _checkOpResult(result, out)
+                stack.append(el)
+                continue
+            stack.pop()
+            if len(stack) == 1 and el.tag in _OP_TAGS:
+                result[el.tag] = el.text
+            elif [e.tag for e in stack] + [el.tag] == tags:
+                yield _volumeTree(tags[1:-1], el)
+                stack[-1].remove(el)
+    except _etreeExceptions:  # pylint: disable=catching-non-exception
+        raise ge.GlusterXmlErrorException(err=out)
+    _checkOpResult(result, out)
+
+
+_OP_TAGS = ('opRet', 'opErrno', 'opErrstr')
+
+
+def _checkOpResult(result, out):
+    try:
+        rv = int(result['opRet'])
+        msg = result.get('opErrstr')
+        errNo = int(result['opErrno'])
+    except (KeyError, TypeError, ValueError):
+        raise ge.GlusterXmlErrorException(err=out)
+    if rv != 0:
+        if errNo != 0:
+            rv = errNo
+        raise ge.GlusterCmdFailedException(rc=rv, err=[msg])
+
+
+def _volumeTree(parents, volume):
+    root = etree.Element('cliOutput')
+    parent = root
+    for tag in parents:
+        parent = etree.SubElement(parent, tag)
+    parent.append(volume)
+    return root
+
+
+def _fetchVolumeInfo():
+    volumes = {}
+    out = _execGluster(_getGlusterVolCmd() + ["info", "all", "--xml"])
+    for tree in _iterXmlVolumes(out, 'volInfo/volumes/volume'):
+        volumes.update(_parseVolumeInfo(tree))
+    return volumes
+
+
+def _fetchVolumesStatus():
+    status = {}
+    tasks = {}
+    out = _execGluster(_getGlusterVolCmd() + ["status", "all", "--xml"])
+    for tree in _iterXmlVolumes(out, 'volStatus/volumes/volume'):
+        volume = _parseVolumeStatus(tree)
+        status[volume['name']] = volume
+        tasks.update(_parseVolumeTasks(tree))
+    return status, tasks
+
+
+def _fetchVolumesStatusDetail():
+    status = {}
+    out = _execGluster(
+        _getGlusterVolCmd() + ["status", "all", "detail", "--xml"])
+    for tree in _iterXmlVolumes(out, 'volStatus/volumes/volume'):
+        volume = _parseVolumeStatusDetail(tree)
+        status[volume['name']] = volume
+    return status
+
+
+# Errors fetching a part of the snapshot; the verbs using the part run their
+# own command, reporting the error.
+_snapshotErrors = (ge.GlusterException,) + _etreeExceptions
+
+
+class _StatusSnapshot(object):
+    """
+    Information and status of all volumes, fetched with a single gluster
+    command for every kind of information, and shared by the volume info,
+    status and tasks verbs.
+
+    The snapshot expires after [gluster] status_cache_ttl seconds, and is
+    invalidated when a gluster command that may modify the volumes is run.
+    Parts of the snapshot that could not be fetched (e.g. the status when no
+    volume is started) are None, and the verbs run their own command.
+    """
+
+    def __init__(self):
+        # Protects the snapshot.
+        self._lock = threading.Lock()
+        # Serializes fetching, so concurrent verbs share a single fetch.
+        self._fetch_lock = threading.Lock()
+        self._generation = 0
+        self._snapshot = None
+        self._expires = 0
+
+    def get(self, refresh=False):
+        """
+        Return the snapshot, fetching it if it expired or if refresh is
+        True. Return None if the snapshot is disabled.
+        """
+        ttl = config.getint('gluster', 'status_cache_ttl')
+        if ttl <= 0:
+            return None
+        with self._fetch_lock:
+            with self._lock:
+                if (not refresh and self._snapshot is not None and
+                        monotonic_time() < self._expires):
+                    return self._snapshot
+                generation = self._generation
+
+            snapshot = self._fetch()
+
+            with self._lock:
+                # If invalidated while we were fetching, keep it stale, so
+                # the next verb fetches it again.
+                if generation == self._generation:
+                    self._snapshot = snapshot
+                    self._expires = monotonic_time() + ttl
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def _fetch(self):
+        snapshot = {'info': None, 'status': None, 'tasks': None,
+                    'detail': None}
+        try:
+            snapshot['info'] = _fetchVolumeInfo()
+        except _snapshotErrors as e:
+            logging.debug("Cannot fetch volumes info: %s", e)
+        try:
+            snapshot['status'], snapshot['tasks'] = _fetchVolumesStatus()
+        except _snapshotErrors as e:
+            logging.debug("Cannot fetch volumes status: %s", e)
+        try:
+            snapshot['detail'] = _fetchVolumesStatusDetail()
+        except _snapshotErrors as e:
+            logging.debug("Cannot fetch volumes status detail: %s", e)
+        return snapshot
+
+
+_statusSnapshot = _StatusSnapshot()
+
+
+def _getSnapshot(refresh):
+    snapshot = _statusSnapshot.get(refresh)
+    if snapshot is None:
+        return {'info': None, 'status': None, 'tasks': None, 'detail': None}
+    return snapshot
+
+
 def _getLocalIpAddress():
     for ip in addresses.getIpAddresses():
         if not ip.startswith('127.'):
@@ -289,7 +483,7 @@ def _parseVolumeStatusMem(tree):
 
 
 @gluster_mgmt_api
-def volumeStatus(volumeName, brick=None, option=None):
+def volumeStatus(volumeName, brick=None, option=None, refresh=False):
     """
     Get volume status
 
@@ -297,6 +491,7 @@ def volumeStatus(volumeName, brick=None, option=None):
        * VolumeName
        * brick
        * option = 'detail' or 'clients' or 'mem' or None
+       * refresh = fetch the status snapshot even if it did not expire
     Returns:
        When option=None,
          {'name': NAME,
@@ -360,6 +555,11 @@ def volumeStatus(volumeName, brick=None, option=None):
                                    'padddedSizeOf': int,
                                    'poolMisses': int},...]}, ...]}
     """
+    if not brick and option in (None, 'detail'):
+        volumes = _getSnapshot(refresh)[option or 'status']
+        if volumes is not None and volumeName in volumes:
+            return copy.deepcopy(volumes[volumeName])
+
     command = _getGlusterVolCmd() + ["status", volumeName]
     if brick:
         command.append(brick)
@@ -500,8 +700,11 @@ def _parseVolumeProfileInfo(tree, nfs):
 
 @gluster_api
 @gluster_mgmt_api
-def volumeInfo(volumeName=None, remoteServer=None):
+def volumeInfo(volumeName=None, remoteServer=None, refresh=False):
     """
+    If refresh is True, the status snapshot is fetched even if it did not
+    expire.
+
     Returns:
         {VOLUMENAME: {'brickCount': BRICKCOUNT,
                       'bricks': [BRICK1, BRICK2, ...],
@@ -512,6 +715,14 @@ def volumeInfo(volumeName=None, remoteServer=None):
                       'volumeStatus': STATUS,
                       'volumeType': TYPE}, ...}
     """
+    if not remoteServer:
+        volumes = _getSnapshot(refresh)['info']
+        if volumes is not None:
+            if not volumeName:
+                return copy.deepcopy(volumes)
+            if volumeName in volumes:
+                return {volumeName: copy.deepcopy(volumes[volumeName])}
+
     command = _getGlusterVolCmd() + ["info"]
     if remoteServer:
         command += ['--remote-host=%s' % remoteServer]
@@ -1067,7 +1278,17 @@ def _parseVolumeTasks(tree):
 
 
 @gluster_mgmt_api
-def volumeTasks(volumeName="all"):
+def volumeTasks(volumeName="all", refresh=False):
+    snapshot = _getSnapshot(refresh)
+    tasks = snapshot['tasks']
+    if tasks is not None:
+        if volumeName == "all":
+            return copy.deepcopy(tasks)
+        if volumeName in snapshot['status']:
+            return copy.deepcopy(
+                {taskId: task for taskId, task in tasks.items()
+                 if task['volumeName'] == volumeName})
+
     command = _getGlusterVolCmd() + ["status", volumeName, "tasks"]
     try:
         xmltree = _execGlusterXml(command)
@@ -1,24 +1,49 @@
 # SPDX-FileCopyrightText: Red Hat, Inc.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
+"""
+Gluster volumes access using libgfapi.
+
+Initializing a glfs handle brings up a full gluster client graph, which is
+much more expensive than the operations done with it. Initialized handles
+are kept in a pool per (volume, host, port, protocol), and reused by the
+following operations on the same volume. Handles idle for more than
+[gluster] gfapi_idle_timeout seconds are released.
+
+libgfapi leaks memory on every init/fini cycle (BZ:1142647), and a crash in
+the library would kill the calling process. The library is never loaded in
+supervdsm; the pool lives in a helper process running this module, serving
+requests sent by supervdsm over its stdin and stdout. The helper is replaced
+after initializing MAX_HELPER_INITS handles, bounding the leak, and a helper
+terminated unexpectedly fails only the operations in flight; the next
+operation starts a new helper.
+
+A handle is used by a single thread at a time. A handle failing an
+operation is released, since the volume may have been restarted or
+removed since it was initialized, and the operation is retried once with a
+new handle.
+"""
+
 from __future__ import absolute_import
 from __future__ import division
 
 import ctypes
+import itertools
+import json
+import logging
 import os
-
-from vdsm.gluster import exception as ge
-
-from . import gluster_mgmt_api
-
-
+import subprocess
 import sys
-import json
-import argparse
+import threading
 
 from vdsm import constants
 from vdsm.common import commands
-from vdsm.common import cmdutils
+from vdsm.common import concurrent
+from vdsm.common.config import config
+from vdsm.common.time import monotonic_time
+from vdsm.gluster import exception as ge
+
+from . import gluster_mgmt_api
 
 
 GLUSTER_VOL_PROTOCOL = 'tcp'
@@ -26,6 +51,16 @@ GLUSTER_VOL_HOST = 'localhost'
 GLUSTER_VOL_PORT = 24007
 GLUSTER_VOL_PATH = "/"
 
+# Maximum number of idle handles kept for every volume.
+MAX_IDLE_HANDLES = 4
+
+# Number of handles initialized by a helper process before it is replaced.
+MAX_HELPER_INITS = 100
+
+# Interval in seconds for releasing idle handles in the helper process, so
+# handles are released when volumes are not used anymore.
+EXPIRE_INTERVAL = 60
+
 
 class StatVfsStruct(ctypes.Structure):
     _fields_ = [
@@ -55,24 +90,34 @@ class DirentStruct(ctypes.Structure):
 
 
 def glfsInit(volumeId, host, port, protocol):
-    fs = _glfs_new(volumeId.encode('utf-8'))
+    lib = _gfapi()
+    fs = lib.glfs_new(volumeId.encode('utf-8'))
     if fs is None:
         raise ge.GlfsInitException(
             err=['glfs_new(%s) failed' % volumeId]
         )
 
-    rc = _glfs_set_volfile_server(fs,
-                                  protocol.encode('utf-8'),
-                                  host.encode('utf-8'),
-                                  port)
+    try:
+        _glfsSetup(lib, fs, volumeId, host, port, protocol)
+    except BaseException:
+        lib.glfs_fini(fs)
+        raise
+    return fs
+
+
+def _glfsSetup(lib, fs, volumeId, host, port, protocol):
+    rc = lib.glfs_set_volfile_server(fs,
+                                     protocol.encode('utf-8'),
+                                     host.encode('utf-8'),
+                                     port)
     if rc != 0:
         raise ge.GlfsInitException(
             rc=rc, err=["setting volfile server failed"]
         )
 
-    rc = _glfs_init(fs)
+    rc = lib.glfs_init(fs)
     if rc == 0:
-        return fs
+        return
     elif rc == 1:
         raise ge.GlfsInitException(
             rc=rc, err=["Volume:%s is stopped." % volumeId]
@@ -86,7 +131,7 @@ def glfsInit(volumeId, host, port, protocol):
 
 
 def glfsFini(fs, volumeId):
-    rc = _glfs_fini(fs)
+    rc = _gfapi().glfs_fini(fs)
     if rc != 0:
         raise ge.GlfsFiniException(rc=rc)
 
@@ -95,16 +140,38 @@ def glfsFini(fs, volumeId):
 def volumeStatvfsGet(volumeId, host=GLUSTER_VOL_HOST,
                      port=GLUSTER_VOL_PORT,
                      protocol=GLUSTER_VOL_PROTOCOL):
+    res = _helper.call('statvfs', volumeId, host, port, protocol)
+    return os.statvfs_result(res)
+
+
+def checkVolumeEmpty(volumeId, host=GLUSTER_VOL_HOST,
+                     port=GLUSTER_VOL_PORT,
+                     protocol=GLUSTER_VOL_PROTOCOL):
+    return _helper.call('empty', volumeId, host, port, protocol)
+
+
+@gluster_mgmt_api
+def volumeStatvfs(volumeName, host=GLUSTER_VOL_HOST,
+                  port=GLUSTER_VOL_PORT,
+                  protocol=GLUSTER_VOL_PROTOCOL):
+    return volumeStatvfsGet(volumeName, host, int(port), protocol)
+
+
+@gluster_mgmt_api
+def volumeEmptyCheck(volumeName, host=GLUSTER_VOL_HOST,
+                     port=GLUSTER_VOL_PORT,
+                     protocol=GLUSTER_VOL_PROTOCOL):
+    return checkVolumeEmpty(volumeName, host, int(port), protocol)
+
+
+def _statvfs(fs, volumeId):
     statvfsdata = StatVfsStruct()
 
-    fs = glfsInit(volumeId, host, port, protocol)
-    rc = _glfs_statvfs(fs, GLUSTER_VOL_PATH.encode('utf-8'),
-                       ctypes.byref(statvfsdata))
+    rc = _gfapi().glfs_statvfs(fs, GLUSTER_VOL_PATH.encode('utf-8'),
+                               ctypes.byref(statvfsdata))
     if rc != 0:
         raise ge.GlfsStatvfsException(rc=rc)
 
-    glfsFini(fs, volumeId)
-
     # To convert to os.statvfs_result we need to pass tuple/list in
     # following order: bsize, frsize, blocks, bfree, bavail, files,
     #                  ffree, favail, flag, namemax
@@ -120,124 +187,236 @@ def volumeStatvfsGet(volumeId, host=GLUSTER_VOL_HOST,
                               statvfsdata.f_namemax))
 
 
-def checkVolumeEmpty(volumeId, host=GLUSTER_VOL_HOST,
-                     port=GLUSTER_VOL_PORT,
-                     protocol=GLUSTER_VOL_PROTOCOL):
-    data = ctypes.POINTER(DirentStruct)()
-    fs = glfsInit(volumeId, host, port, protocol)
-
-    fd = _glfs_opendir(fs, b"/")
-
-    if fd is None:
-        glfsFini(fs, volumeId)
+def _isEmpty(fs, volumeId):
+    lib = _gfapi()
+    fd = lib.glfs_opendir(fs, b"/")
+    if not fd:
         raise ge.GlusterVolumeEmptyCheckFailedException(
             err=['glfs_opendir() failed'])
 
-    entry = "."
-    flag = False
-
-    while entry in [".", "..", ".trashcan"]:
-        data = _glfs_readdir(fd)
-        if data is None:
-            glfsFini(fs, volumeId)
-            raise ge.GlusterVolumeEmptyCheckFailedException(
-                err=['glfs_readdir() failed'])
-
-        # When there are no more entries in directory _glfs_readdir()
-        # will return a null pointer. bool of null pointer will be false
-        # Using this to conclude that no more entries in volume.
-        if not bool(data):
-            flag = True
-            break
-
-        entry = data.contents.d_name
-    else:
-        flag = False
-
-    glfsFini(fs, volumeId)
-    return flag
-
-
-# C function prototypes for using the library gfapi
+    try:
+        while True:
+            ctypes.set_errno(0)
+            data = lib.glfs_readdir(fd)
+
+            # When there are no more entries in directory glfs_readdir()
+            # will return a null pointer without setting errno. bool of
+            # null pointer will be false. Using this to conclude that no
+            # more entries in volume.
+            if not bool(data):
+                if ctypes.get_errno() != 0:
+                    raise ge.GlusterVolumeEmptyCheckFailedException(
+                        err=['glfs_readdir() failed'])
+                return True
+
+            if data.contents.d_name not in (b".", b"..", b".trashcan"):
+                return False
+    finally:
+        lib.glfs_closedir(fd)
+
+
+class _HandlePool(object):
+    """
+    Initialized glfs handles, keyed by (volumeId, host, port, protocol).
+
+    Handles are checked out for the duration of a single operation, so
+    concurrent operations on the same volume use different handles. Idle
+    handles are expired when the pool is used, and when calling expire();
+    handles are initialized and released without holding the pool lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> list of (fs, last used time), most recently used last.
+        self._idle = {}
+        # Number of handles initialized by this pool.
+        self.inits = 0
+
+    def call(self, func, volumeId, host, port, protocol):
+        """
+        Call func(fs, volumeId) with a handle of volumeId, and return the
+        result.
+        """
+        key = (volumeId, host, port, protocol)
+        fs = self._checkout(key)
+        if fs is None:
+            return self._call(func, key, self._init(key))
 
-_lib = ctypes.CDLL("libgfapi.so.0", use_errno=True)
+        try:
+            return self._call(func, key, fs)
+        except ge.GlusterException as e:
+            logging.debug("Operation on reused glfs handle of volume %s "
+                          "failed, retrying with a new handle: %s",
+                          volumeId, e)
+        return self._call(func, key, self._init(key))
+
+    def expire(self):
+        """
+        Release handles idle for more than gfapi_idle_timeout seconds.
+        """
+        expired = []
+        with self._lock:
+            self._expire(expired)
+        self._releaseAll(expired)
+
+    def clear(self):
+        """
+        Release all idle handles.
+        """
+        with self._lock:
+            released = [(key, fs)
+                        for key, handles in self._idle.items()
+                        for fs, _ in handles]
+            self._idle.clear()
+        for key, fs in released:
+            self._release(key, fs)
+
+    def _init(self, key):
+        with self._lock:
+            self.inits += 1
+        return glfsInit(*key)
+
+    def _call(self, func, key, fs):
+        try:
+            result = func(fs, key[0])
+        except BaseException:
+            self._release(key, fs)
+            raise
+        self._checkin(key, fs)
+        return result
+
+    def _checkout(self, key):
+        """
+        Return an idle handle of key, or None if there is no idle handle.
+        """
+        expired = []
+        with self._lock:
+            self._expire(expired)
+            handles = self._idle.get(key)
+            fs = handles.pop()[0] if handles else None
+        self._releaseAll(expired)
+        return fs
 
-_glfs_new = ctypes.CFUNCTYPE(
-    ctypes.c_void_p, ctypes.c_char_p)(('glfs_new', _lib))
+    def _checkin(self, key, fs):
+        expired = []
+        with self._lock:
+            handles = self._idle.setdefault(key, [])
+            if len(handles) < MAX_IDLE_HANDLES:
+                handles.append((fs, monotonic_time()))
+                fs = None
+            self._expire(expired)
+        if fs is not None:
+            expired.append((key, fs))
+        self._releaseAll(expired)
+
+    def _expire(self, expired):
+        # Must be called with the lock held.
+        deadline = monotonic_time() - config.getint('gluster',
+                                                    'gfapi_idle_timeout')
+        for key in list(self._idle):
+            handles = self._idle[key]
+            # Handles are ordered by last use time.
+            while handles and handles[0][1] <= deadline:
+                expired.append((key, handles.pop(0)[0]))
+            if not handles:
+                del self._idle[key]
+
+    def _releaseAll(self, handles):
+        for key, fs in handles:
+            self._release(key, fs)
+
+    def _release(self, key, fs):
+        try:
+            glfsFini(fs, key[0])
+        except ge.GlusterException as e:
+            logging.warning("Cannot release glfs handle of volume %s: %s",
+                            key[0], e)
 
-_glfs_set_volfile_server = ctypes.CFUNCTYPE(
-    ctypes.c_int,
-    ctypes.c_void_p,
-    ctypes.c_char_p,
-    ctypes.c_char_p,
-    ctypes.c_int)(('glfs_set_volfile_server', _lib))
 
-_glfs_init = ctypes.CFUNCTYPE(
-    ctypes.c_int, ctypes.c_void_p)(('glfs_init', _lib))
+_pool = _HandlePool()
 
-_glfs_fini = ctypes.CFUNCTYPE(
-    ctypes.c_int, ctypes.c_void_p)(('glfs_fini', _lib))
 
-_glfs_statvfs = ctypes.CFUNCTYPE(ctypes.c_int,
-                                 ctypes.c_void_p,
-                                 ctypes.c_char_p,
-                                 ctypes.c_void_p)(('glfs_statvfs', _lib))
+# Helper process
 
-_glfs_opendir = ctypes.CFUNCTYPE(ctypes.c_void_p,
-                                 ctypes.c_void_p,
-                                 ctypes.c_char_p)(('glfs_opendir', _lib))
 
-_glfs_readdir = ctypes.CFUNCTYPE(ctypes.POINTER(DirentStruct),
-                                 ctypes.c_void_p)(('glfs_readdir', _lib))
+_OPS = {
+    'statvfs': _statvfs,
+    'empty': _isEmpty,
+}
 
 
-# This is a workaround for memory leak caused by the
-# libgfapi(BZ:1093594) used to get volume statistics.
-# Memory accumulates every time the api is invoked to
-# avoid that, this file is executed as script.This is
-# a temporary fix for BZ:1142647. This can be reverted
-# back once the memory leak issue is fixed in libgfapi.
+def _serve(infile, outfile, pool):
+    """
+    Serve requests read from infile using pool, writing the replies to
+    outfile, until infile is closed.
 
+    Requests and replies are JSON objects, one per line. A request is
+    {"id": id, "op": name, "args": [volumeId, host, port, protocol]}, and
+    the reply is {"id": id, "result": value, "retire": bool}, or
+    {"id": id, "error": {"type": name, "rc": rc, "err": err}, "retire":
+    bool} if the operation failed. "retire" is true when the helper
+    initialized MAX_HELPER_INITS handles and should be replaced.
 
-@gluster_mgmt_api
-def volumeStatvfs(volumeName, host=GLUSTER_VOL_HOST,
-                  port=GLUSTER_VOL_PORT,
-                  protocol=GLUSTER_VOL_PROTOCOL):
-    module = "vdsm.gluster.gfapi"
-    command = [sys.executable, '-m', module, '-v', volumeName,
-               '-p', str(port), '-H', host, '-t', protocol, '-c', 'statvfs']
+    Idle handles are released every EXPIRE_INTERVAL seconds, even if no
+    request is received.
+    """
+    lock = threading.Lock()
+    threads = []
+    done = threading.Event()
 
-    # to include /usr/share/vdsm in python path
-    env = os.environ.copy()
-    env['PYTHONPATH'] = "%s:%s" % (
-        env.get("PYTHONPATH", ""), constants.P_VDSM)
-    env['PYTHONPATH'] = ":".join(map(os.path.abspath,
-                                     env['PYTHONPATH'].split(":")))
+    def expire():
+        while not done.wait(EXPIRE_INTERVAL):
+            pool.expire()
 
+    def run(request):
+        try:
+            result = pool.call(_OPS[request['op']], *request['args'])
+        except ge.GlusterException as e:
+            reply = {'error': {'type': type(e).__name__,
+                               'rc': e.rc,
+                               'err': e.err}}
+        except Exception as e:
+            logging.exception("Operation %s failed", request)
+            reply = {'error': {'type': 'GlusterLibgfapiException',
+                               'rc': 0,
+                               'err': [str(e)]}}
+        else:
+            if isinstance(result, os.statvfs_result):
+                result = list(result)
+            reply = {'result': result}
+
+        reply['id'] = request['id']
+        reply['retire'] = pool.inits >= MAX_HELPER_INITS
+        data = json.dumps(reply).encode('utf-8') + b'\n'
+        with lock:
+            try:
+                outfile.write(data)
+                outfile.flush()
+            except (OSError, ValueError) as e:
+                logging.warning("Cannot send reply %s: %s", reply, e)
+
+    expirer = concurrent.thread(expire, name="gfapi/expire",
+                                log=logging.getLogger())
+    expirer.start()
     try:
-        out = commands.run(command, env=env)
-    except cmdutils.Error as e:
-        raise ge.GlfsStatvfsException(e.rc, [e.err])
-    res = json.loads(out)
-    return os.statvfs_result((res['f_bsize'],
-                              res['f_frsize'],
-                              res['f_blocks'],
-                              res['f_bfree'],
-                              res['f_bavail'],
-                              res['f_files'],
-                              res['f_ffree'],
-                              res['f_favail'],
-                              res['f_flag'],
-                              res['f_namemax']))
+        for line in infile:
+            request = json.loads(line)
+            threads = [t for t in threads if t.is_alive()]
+            t = concurrent.thread(run, args=(request,), name="gfapi/serve")
+            t.start()
+            threads.append(t)
 
+        for t in threads:
+            t.join()
+    finally:
+        done.set()
+        expirer.join()
+        pool.clear()
+        outfile.close()
 
-@gluster_mgmt_api
-def volumeEmptyCheck(volumeName, host=GLUSTER_VOL_HOST,
-                     port=GLUSTER_VOL_PORT,
-                     protocol=GLUSTER_VOL_PROTOCOL):
-    module = "vdsm.gluster.gfapi"
-    command = [sys.executable, '-m', module, '-v', volumeName,
-               '-p', str(port), '-H', host, '-t', protocol, '-c', 'readdir']
+
+def _start():
+    command = [sys.executable, '-m', __name__]
 
     # to include /usr/share/vdsm in python path
     env = os.environ.copy()
@@ -246,55 +425,189 @@ def volumeEmptyCheck(volumeName, host=GLUSTER_VOL_HOST,
     env['PYTHONPATH'] = ":".join(map(os.path.abspath,
                                      env['PYTHONPATH'].split(":")))
 
-    try:
-        out = commands.run(command, env=env)
-    except cmdutils.Error as e:
-        raise ge.GlusterVolumeEmptyCheckFailedException(e.rc, [e.err])
-    return out.upper() == "TRUE"
-
-
-# This file is modified to act as a script which can retrive
-# volume statistics using libgfapi. This can be reverted
-# after the memory leak issue is resolved in libgfapi.
-def parse_cmdargs():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("-v", "--volume", action="store", type=str,
-                        help="volumeName")
-    parser.add_argument("-H", "--host", action="store", type=str,
-                        default=GLUSTER_VOL_HOST, help="host name")
-    parser.add_argument("-p", "--port", action="store", type=str,
-                        default=str(GLUSTER_VOL_PORT), help="port number")
-    parser.add_argument("-t", "--protocol", action="store", type=str,
-                        default=GLUSTER_VOL_PROTOCOL, help="protocol")
-    parser.add_argument("-c", "--command", action="store", type=str,
-                        help="command to be executed")
-    args = parser.parse_args()
-    return args
+    return commands.start(command, stdin=subprocess.PIPE,
+                          stdout=subprocess.PIPE, env=env)
+
+
+class _Retired(Exception):
+    """
+    Raised when sending a request to a helper that does not accept
+    requests anymore.
+    """
+
+
+class _HelperProcess(object):
+    """
+    Connection to a helper process, sending requests and dispatching the
+    replies to the waiting callers.
+    """
+
+    def __init__(self, proc):
+        self._proc = proc
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        # id -> [threading.Event, reply]
+        self._pending = {}
+        self._retired = False
+        self._closed = False
+        self._reader = concurrent.thread(self._read, name="gfapi/helper",
+                                         log=logging.getLogger())
+        self._reader.start()
+
+    @property
+    def accepting(self):
+        with self._lock:
+            return not (self._retired or self._closed)
+
+    def call(self, op, args):
+        waiter = [threading.Event(), None]
+        with self._lock:
+            if self._retired or self._closed:
+                raise _Retired
+            id = next(self._ids)
+            data = json.dumps({'id': id, 'op': op, 'args': args})
+            try:
+                self._proc.stdin.write(data.encode('utf-8') + b'\n')
+                self._proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                logging.warning("Cannot send request to gfapi helper: %s", e)
+                raise _Retired
+            self._pending[id] = waiter
+
+        waiter[0].wait()
+        reply = waiter[1]
+        if 'error' in reply:
+            raise _error(reply['error'])
+        return reply['result']
+
+    def _read(self):
+        try:
+            for line in self._proc.stdout:
+                reply = json.loads(line)
+                with self._lock:
+                    waiter = self._pending.pop(reply['id'])
+                    if reply['retire'] and not self._retired:
+                        logging.info("Replacing gfapi helper pid=%s",
+                                     self._proc.pid)
+                        self._retired = True
+                    # Retired helper exits when its stdin is closed.
+                    if self._retired and not self._pending:
+                        self._proc.stdin.close()
+                waiter[1] = reply
+                waiter[0].set()
+        finally:
+            with self._lock:
+                self._closed = True
+                pending = list(self._pending.values())
+                self._pending.clear()
+                self._proc.stdin.close()
+            rc = self._proc.wait()
+            if pending or not self._retired:
+                logging.error("gfapi helper pid=%s terminated (rc=%s)",
+                              self._proc.pid, rc)
+            for waiter in pending:
+                waiter[1] = {'error': {'type': 'GlusterLibgfapiException',
+                                       'rc': rc,
+                                       'err': ['gfapi helper terminated']}}
+                waiter[0].set()
+
+
+def _error(error):
+    cls = getattr(ge, error['type'], None)
+    if not (isinstance(cls, type) and issubclass(cls, ge.GlusterException)):
+        cls = ge.GlusterLibgfapiException
+    return cls(rc=error['rc'], err=error['err'])
+
+
+class _Helper(object):
+    """
+    Run operations in a helper process, started on demand.
+    """
+
+    def __init__(self, start=_start):
+        self._start = start
+        self._lock = threading.Lock()
+        self._process = None
+
+    def call(self, op, *args):
+        while True:
+            with self._lock:
+                if self._process is None or not self._process.accepting:
+                    try:
+                        self._process = _HelperProcess(self._start())
+                    except OSError as e:
+                        raise ge.GlusterLibgfapiException(
+                            err=["Cannot start gfapi helper: %s" % e])
+                process = self._process
+            try:
+                return process.call(op, list(args))
+            except _Retired:
+                continue
+
+
+_helper = _Helper()
+
+
+class _Gfapi(object):
+    """
+    C function prototypes for using the library gfapi.
+    """
+
+    def __init__(self, lib):
+        self.glfs_new = ctypes.CFUNCTYPE(
+            ctypes.c_void_p, ctypes.c_char_p)(('glfs_new', lib))
+
+        self.glfs_set_volfile_server = ctypes.CFUNCTYPE(
+            ctypes.c_int,
+            ctypes.c_void_p,
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_int)(('glfs_set_volfile_server', lib))
+
+        self.glfs_init = ctypes.CFUNCTYPE(
+            ctypes.c_int, ctypes.c_void_p)(('glfs_init', lib))
+
+        self.glfs_fini = ctypes.CFUNCTYPE(
+            ctypes.c_int, ctypes.c_void_p)(('glfs_fini', lib))
+
+        self.glfs_statvfs = ctypes.CFUNCTYPE(
+            ctypes.c_int,
+            ctypes.c_void_p,
+            ctypes.c_char_p,
+            ctypes.c_void_p)(('glfs_statvfs', lib))
+
+        self.glfs_opendir = ctypes.CFUNCTYPE(
+            ctypes.c_void_p,
+            ctypes.c_void_p,
+            ctypes.c_char_p)(('glfs_opendir', lib))
+
+        self.glfs_readdir = ctypes.CFUNCTYPE(
+            ctypes.POINTER(DirentStruct),
+            ctypes.c_void_p,
+            use_errno=True)(('glfs_readdir', lib))
+
+        self.glfs_closedir = ctypes.CFUNCTYPE(
+            ctypes.c_int, ctypes.c_void_p)(('glfs_closedir', lib))
+
+
+_lib = None
+_lib_lock = threading.Lock()
+
+
+def _gfapi():
+    """
+    Return the gfapi functions, loading the library on the first call.
+    """
+    global _lib
+    with _lib_lock:
+        if _lib is None:
+            _lib = _Gfapi(ctypes.CDLL("libgfapi.so.0", use_errno=True))
+        return _lib
 
 
 if __name__ == '__main__':
-    args = parse_cmdargs()
-    if args.command.upper() == 'STATVFS':
-        try:
-            res = volumeStatvfsGet(args.volume, args.host,
-                                   int(args.port), args.protocol)
-        except ge.GlusterException as e:
-            sys.stderr.write(str(e))
-            sys.exit(1)
-        json.dump({'f_blocks': res.f_blocks, 'f_bfree': res.f_bfree,
-                   'f_bsize': res.f_bsize, 'f_frsize': res.f_frsize,
-                   'f_bavail': res.f_bavail, 'f_files': res.f_files,
-                   'f_ffree': res.f_ffree, 'f_favail': res.f_favail,
-                   'f_flag': res.f_flag, 'f_namemax': res.f_namemax},
-                  sys.stdout)
-    elif args.command.upper() == 'READDIR':
-        try:
-            result = checkVolumeEmpty(args.volume,
-                                      args.host,
-                                      int(args.port),
-                                      args.protocol)
-        except ge.GlusterException as e:
-            sys.stderr.write(str(e))
-            sys.exit(1)
-
-        sys.stdout.write(str(result))
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)-7s (%(threadName)s) "
+               "[gfapi-helper] %(message)s")
+    _serve(sys.stdin.buffer, sys.stdout.buffer, _pool)
@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Snapshot of the host storage devices reported by the gluster device verbs.
+
+The snapshot has a part for every source of information: the blivet device
+tree, the LVM report and the VDO statistics. Every part is read once, by a
+single command, and shared by the verbs using it until the snapshot expires
+after [gluster] storage_devices_cache_ttl seconds.
+
+The entire snapshot is invalidated when a kernel event is received for a
+block device (e.g. a device was added, removed or resized), or when
+gluster modifies the devices. The snapshot is used only while the event
+monitor is running.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import copy
+import logging
+import threading
+
+from vdsm.common.config import config
+from vdsm.common.time import monotonic_time
+from vdsm.storage import uevent
+
+
+log = logging.getLogger("Gluster")
+
+
+class Inventory(object):
+
+    def __init__(self):
+        # Protects the snapshot.
+        self._lock = threading.Lock()
+        # Serializes reading, so concurrent verbs share a single read.
+        self._read_lock = threading.Lock()
+        # Part name -> (expiration time, value).
+        self._parts = {}
+        # Incremented on every invalidation, so we don't add stale parts
+        # read before an invalidation.
+        self._generation = 0
+        self._monitor = None
+
+    @property
+    def enabled(self):
+        return self._monitor is not None and self._monitor.running
+
+    def start(self):
+        monitor = uevent.Monitor(self._on_event, self.invalidate)
+        try:
+            monitor.start()
+        except OSError as e:
+            log.warning("Cannot monitor device events, storage devices "
+                        "cache disabled: %s", e)
+            return
+        self._monitor = monitor
+        log.info("Storage devices cache enabled")
+
+    def stop(self):
+        if self._monitor is not None:
+            self._monitor.stop()
+            self._monitor = None
+        self.invalidate()
+
+    def get(self, name, read):
+        """
+        Return a copy of part name of the snapshot. If the part is not
+        cached or expired, call read() and cache the result.
+        """
+        ttl = config.getint('gluster', 'storage_devices_cache_ttl')
+        if ttl <= 0 or not self._sync():
+            return read()
+
+        with self._read_lock:
+            with self._lock:
+                part = self._parts.get(name)
+                if part is not None and monotonic_time() < part[0]:
+                    return copy.deepcopy(part[1])
+                generation = self._generation
+
+            value = read()
+
+            with self._lock:
+                if generation == self._generation:
+                    self._parts[name] = (monotonic_time() + ttl, value)
+        return copy.deepcopy(value)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._parts.clear()
+
+    def _sync(self):
+        """
+        Wait until events for device changes before this call were handled.
+        If the events cannot be handled, disable the cache, since we cannot
+        tell if it is up to date.
+
+        Returns True if the cache can be used.
+        """
+        if not self.enabled:
+            return False
+        if not self._monitor.sync():
+            log.warning("Timeout waiting for device events, storage devices "
+                        "cache disabled")
+            self.stop()
+            return False
+        return True
+
+    def _on_event(self, event):
+        log.debug("Device %s %s, invalidating storage devices cache",
+                  event.devpath, event.action)
+        self.invalidate()
+
+
+_inventory = Inventory()
+
+
+def start():
+    _inventory.start()
+
+
+def stop():
+    _inventory.stop()
+
+
+def get(name, read):
+    return _inventory.get(name, read)
+
+
+def invalidate():
+    _inventory.invalidate()
@@ -26,6 +26,7 @@ from vdsm.common import cmdutils
 from vdsm.common import commands
 from vdsm.gluster import exception as ge
 from vdsm.gluster import fstab
+from vdsm.gluster import inventory
 from . import gluster_mgmt_api
 
 
@@ -158,6 +159,10 @@ def _reset_blivet(blivetEnv):
 
 @gluster_mgmt_api
 def storageDevicesList():
+    return inventory.get('devices', _readDevices)
+
+
+def _readDevices():
     blivetEnv = blivet.Blivet()
     _reset_blivet(blivetEnv)
     return _parseDevices(blivetEnv.devices)
@@ -166,6 +171,15 @@ def storageDevicesList():
 @gluster_mgmt_api
 def createBrick(brickName, mountPoint, devNameList, fsType=DEFAULT_FS_TYPE,
                 raidParams={}):
+    try:
+        return _createBrick(brickName, mountPoint, devNameList, fsType,
+                            raidParams)
+    finally:
+        # Mounting the brick does not generate device events.
+        inventory.invalidate()
+
+
+def _createBrick(brickName, mountPoint, devNameList, fsType, raidParams):
     def _getDeviceList(devNameList):
         return [blivetEnv.devicetree.getDeviceByName(devName.split("/")[-1])
                 for devName in devNameList]
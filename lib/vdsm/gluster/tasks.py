@@ -35,9 +35,9 @@ def _getTasksData(value):
 
 
 @gluster_mgmt_api
-def tasksList(taskIds=[]):
+def tasksList(taskIds=[], refresh=False):
     details = {}
-    tasks = cli.volumeTasks()
+    tasks = cli.volumeTasks(refresh=refresh)
     for tid in tasks:
         if taskIds and tid not in taskIds:
             continue
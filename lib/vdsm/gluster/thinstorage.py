@@ -15,15 +15,13 @@ from vdsm.common.units import KiB
 
 from . import exception as ge
 from . import gluster_mgmt_api
+from . import inventory
 
 
 log = logging.getLogger("Gluster")
-_lvsCommandPath = cmdutils.CommandPath("lvs",
-                                       "/sbin/lvs",
-                                       "/usr/sbin/lvs",)
-_pvsCommandPath = cmdutils.CommandPath("pvs",
-                                       "/sbin/pvs",
-                                       "/usr/sbin/pvs",)
+_lvmCommandPath = cmdutils.CommandPath("lvm",
+                                       "/sbin/lvm",
+                                       "/usr/sbin/lvm",)
 _vdoCommandPath = cmdutils.CommandPath("vdo",
                                        "/bin/vdo",
                                        "/usr/bin/vdo",)
@@ -31,39 +29,49 @@ _vdoCommandPath = cmdutils.CommandPath("vdo",
 
 @gluster_mgmt_api
 def logicalVolumeList():
-    try:
-        out = commands.run([_lvsCommandPath.cmd,
-                            "--reportformat", "json",
-                            "--units", "b",
-                            "--nosuffix",
-                            "-o",
-                            "lv_size,data_percent,lv_name,vg_name,pool_lv"])
-    except cmdutils.Error as e:
-        raise ge.GlusterCmdExecFailedException(e.rc, e.err)
-    volumes = []
-    for lv in json.loads(out)["report"][0]["lv"]:
-        lv["lv_size"] = int(lv["lv_size"])
-        if not lv["pool_lv"] and lv["data_percent"]:
-            lv["lv_free"] = int(
-                (1 - float(lv.pop("data_percent")) / 100) * lv["lv_size"]
-            )
-        else:
-            lv["lv_free"] = 0
-            lv.pop("data_percent")
-        volumes.append(lv)
-    return volumes
+    return inventory.get('lvm', _readLvmReport)['lv']
 
 
 @gluster_mgmt_api
 def physicalVolumeList():
+    return inventory.get('lvm', _readLvmReport)['pv']
+
+
+def _readLvmReport():
+    """
+    Return the logical and physical volumes of all volume groups, reported
+    by a single lvm command.
+    """
     try:
-        out = commands.run([_pvsCommandPath.cmd,
+        out = commands.run([_lvmCommandPath.cmd, "fullreport",
                             "--reportformat", "json",
-                            "--units", "b", "--nosuffix",
-                            "-o", "pv_name,vg_name"])
+                            "--units", "b",
+                            "--nosuffix",
+                            "--configreport", "lv", "-o",
+                            "lv_size,data_percent,lv_name,vg_name,pool_lv",
+                            "--configreport", "pv", "-o",
+                            "pv_name,vg_name"])
     except cmdutils.Error as e:
         raise ge.GlusterCmdExecFailedException(e.rc, e.err)
-    return json.loads(out)["report"][0]["pv"]
+    report = {'lv': [], 'pv': []}
+    # The full report has a separate report for every volume group.
+    for vgReport in json.loads(out)["report"]:
+        for lv in vgReport.get("lv", []):
+            report['lv'].append(_parseLogicalVolume(lv))
+        report['pv'].extend(vgReport.get("pv", []))
+    return report
+
+
+def _parseLogicalVolume(lv):
+    lv["lv_size"] = int(lv["lv_size"])
+    if not lv["pool_lv"] and lv["data_percent"]:
+        lv["lv_free"] = int(
+            (1 - float(lv.pop("data_percent")) / 100) * lv["lv_size"]
+        )
+    else:
+        lv["lv_free"] = 0
+        lv.pop("data_percent")
+    return lv
 
 
 def _process_vdo_statistics(data):
@@ -107,6 +115,10 @@ def _process_vdo_statistics(data):
 
 @gluster_mgmt_api
 def vdoVolumeList():
+    return inventory.get('vdo', _readVdoVolumes)
+
+
+def _readVdoVolumes():
     try:
         out = commands.run([_vdoCommandPath.cmd, "status"])
     except cmdutils.Error as e:
@@ -11,7 +11,10 @@ import threading
 
 from vdsm.common import concurrent
 from vdsm.common import cpuarch
+from vdsm.storage import fileindex
 from vdsm.storage import lvm
+from vdsm.storage import multipath
+from vdsm.storage import taskpool
 
 from . config import config
 from . import metrics
@@ -77,6 +80,9 @@ class Monitor(object):
         self._check_garbage()
         self._check_resources()
         self._check_lvm_stats()
+        self._check_file_index_stats()
+        self._check_device_inventory_stats()
+        self._check_task_stats()
         self._report_stats()
 
     def _check_garbage(self):
@@ -113,6 +119,37 @@ class Monitor(object):
         self.log.info("LVM cache hit ratio: %.2f%% (hits: %d misses: %d)",
                       stats["hit_ratio"], stats["hits"], stats["misses"])
 
+    def _check_file_index_stats(self):
+        stats = fileindex.cache_stats()
+        self.log.info("File domains index hit ratio: %.2f%% (hits: %d "
+                      "misses: %d inconsistencies: %d)",
+                      stats["hit_ratio"], stats["hits"], stats["misses"],
+                      stats["inconsistencies"])
+
+    def _check_device_inventory_stats(self):
+        stats = multipath.inventory_stats()
+        if stats["enabled"]:
+            self.log.info("Device inventory hit ratio: %.2f%% (hits: %d "
+                          "misses: %d devices: %d)",
+                          stats["hit_ratio"], stats["hits"], stats["misses"],
+                          stats["devices"])
+
+    def _check_task_stats(self):
+        self._stats['task_pools'] = taskpool.stats()
+        for name, stats in self._stats['task_pools'].items():
+            queue_time = stats["queue_time"]
+            run_time = stats["run_time"]
+            self.log.info(
+                "Task pool %s: workers=%d, idle=%d, queued=%d, running=%d, "
+                "groups=%s, avg queue time=%.2f, avg run time=%.2f, "
+                "queue time buckets=%s, run time buckets=%s",
+                name, stats["workers"], stats["idle"], stats["queued"],
+                stats["running"], stats["groups"],
+                queue_time["total"] / max(queue_time["count"], 1),
+                run_time["total"] / max(run_time["count"], 1),
+                _format_buckets(queue_time["buckets"]),
+                _format_buckets(run_time["buckets"]))
+
     def _report_stats(self):
         prefix = "hosts.vdsm"
         report = {}
@@ -122,9 +159,35 @@ class Monitor(object):
         report[prefix + '.cpu.sys_pct'] = self._stats['stime_pct']
         report[prefix + '.memory.rss'] = self._stats['rss']
         report[prefix + '.threads_count'] = self._stats['threads']
+        for name, stats in self._stats.get('task_pools', {}).items():
+            pool_prefix = "%s.task_pools.%s" % (prefix, name)
+            for key in ('workers', 'queued', 'running'):
+                report[pool_prefix + '.' + key] = stats[key]
+            for key in ('queue_time', 'run_time'):
+                hist = stats[key]
+                hist_prefix = pool_prefix + '.' + key
+                report[hist_prefix + '.count'] = hist['count']
+                report[hist_prefix + '.total'] = hist['total']
+                for bound, count in hist['buckets'].items():
+                    report[hist_prefix + '.' + _bucket_name(bound)] = count
         metrics.send(report)
 
 
+def _format_buckets(buckets):
+    """
+    Format histogram bucket counts as "bound:count ...".
+    """
+    return " ".join("%s:%d" % item for item in buckets.items())
+
+
+def _bucket_name(bound):
+    """
+    Return metric name for histogram bucket bound, without the dots used
+    as metric path separator (e.g. "0.1" -> "le_0_1", "+Inf" -> "le_inf").
+    """
+    return "le_" + bound.replace(".", "_").replace("+Inf", "inf")
+
+
 class ProcStat(object):
 
     _TICKS_PER_SEC = os.sysconf("SC_CLK_TCK")
@@ -80,6 +80,25 @@ def send_metrics(hoststats):
         logging.exception('Host metrics collection failed')
 
 
+def get_rpc_stats(cif):
+    """
+    Retrieve statistics of JSON-RPC calls.
+    """
+    try:
+        json_binding = cif.servers['jsonrpc']
+    except KeyError:
+        return {'verbs': {}, 'slow_call_threshold': 0.0, 'slow_calls': []}
+    return json_binding.stats.info()
+
+
+def send_rpc_metrics(cif):
+    try:
+        json_binding = cif.servers['jsonrpc']
+    except KeyError:
+        return
+    metrics.send(json_binding.stats.report("hosts.vdsm.rpc"))
+
+
 def _readSwapTotalFree():
     meminfo = utils.readMemInfo()
     return meminfo['SwapTotal'] // 1024, meminfo['SwapFree'] // 1024
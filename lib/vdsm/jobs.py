@@ -89,6 +89,18 @@ class Job(object):
     def progress(self):
         return None
 
+    @property
+    def throughput(self):
+        return None
+
+    @property
+    def eta(self):
+        return None
+
+    @property
+    def stalled(self):
+        return None
+
     @property
     def job_type(self):
         return self._JOB_TYPE
@@ -106,6 +118,15 @@ class Job(object):
         if self.progress is not None:
             ret['progress'] = self.progress
 
+        if self.throughput is not None:
+            ret['throughput'] = self.throughput
+
+        if self.eta is not None:
+            ret['eta'] = self.eta
+
+        if self.stalled is not None:
+            ret['stalled'] = self.stalled
+
         if self.error:
             ret['error'] = self.error.info()
 
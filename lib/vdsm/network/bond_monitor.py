@@ -5,7 +5,7 @@ import logging
 import threading
 
 from vdsm.common import concurrent
-from vdsm.network.netlink import monitor
+from vdsm.network.netlink import hub
 
 _monitor_instance = None
 _monitor_lock = threading.Lock()
@@ -14,7 +14,7 @@ _monitor_lock = threading.Lock()
 class Monitor(object):
     def __init__(self):
         self._handlers = []
-        self._nl_monitor = monitor.ifla_monitor(groups=('link',))
+        self._subscription = hub.ifla_subscription(groups=('link',))
         self._thread = concurrent.thread(
             self.serve_forever, name='bond-monitor'
         )
@@ -30,13 +30,12 @@ class Monitor(object):
 
     def start(self):
         logging.info('Starting Bond monitor.')
-        self._nl_monitor.start()
+        self._subscription.start()
         self._thread.start()
 
     def stop(self):
         logging.info('Stopping Bond monitor.')
-        self._nl_monitor.stop()
-        self._nl_monitor.wait()
+        self._subscription.close()
         self._thread.join()
 
     def add_handler(self, handler):
@@ -47,7 +46,12 @@ class Monitor(object):
             handler(event)
 
     def serve_forever(self):
-        for event in self._nl_monitor:
+        for event in self._subscription:
+            if event.get('event') == hub.OVERFLOW:
+                logging.warning(
+                    'Bond monitor lost %s link events', event['dropped']
+                )
+                continue
             self.handle_event(event)
 
 
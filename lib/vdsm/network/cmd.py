@@ -8,11 +8,14 @@ from vdsm.common.cmdutils import exec_cmd as exec_sync_bytes
 from vdsm.network.common import conversion_util
 
 
-def exec_sync(cmds):
+def exec_sync(cmds, timeout=None):
     """Execute a command and convert returned values to native string.
 
     Note that this function should not be used if output data could be
     undecodable bytes.
+
+    If timeout is set and the command does not terminate in timeout seconds,
+    it is killed and subprocess.TimeoutExpired is raised.
     """
-    retcode, out, err = exec_sync_bytes(cmds)
+    retcode, out, err = exec_sync_bytes(cmds, timeout=timeout)
     return retcode, conversion_util.to_str(out), conversion_util.to_str(err)
@@ -103,28 +103,32 @@ def _fresh_qdisc_conf_out(dev, vlan_tag, class_id, qos):
         ):  # No ingress exists
             raise
 
-    tc.qdisc.add(
-        dev,
-        _SHAPING_QDISC_KIND,
-        handle='0x' + _ROOT_QDISC_HANDLE,
-        default='%#x' % _NON_VLANNED_ID,
-    )
-    tc.qdisc.add(dev, 'ingress')
-
-    # Add traffic classes
-    _add_hfsc_cls(dev, _ROOT_QDISC_HANDLE, class_id, **qos)
-    if class_id != _DEFAULT_CLASSID:  # We need to add a default class
-        _add_hfsc_cls(dev, _ROOT_QDISC_HANDLE, _DEFAULT_CLASSID, ls=qos['ls'])
-
-    # Add filters to move the traffic into the classes we just created
-    _add_non_vlanned_filter(dev, _ROOT_QDISC_HANDLE)
-    if class_id != _DEFAULT_CLASSID:
-        _add_vlan_filter(dev, vlan_tag, _ROOT_QDISC_HANDLE, class_id)
-
-    # Add inside intra-class fairness qdisc (fq_codel)
-    _add_fair_qdisc(dev, _ROOT_QDISC_HANDLE, class_id)
-    if class_id != _DEFAULT_CLASSID:
-        _add_fair_qdisc(dev, _ROOT_QDISC_HANDLE, _DEFAULT_CLASSID)
+    # Program the new configuration in a single netlink exchange
+    with tc.batch():
+        tc.qdisc.add(
+            dev,
+            _SHAPING_QDISC_KIND,
+            handle='0x' + _ROOT_QDISC_HANDLE,
+            default='%#x' % _NON_VLANNED_ID,
+        )
+        tc.qdisc.add(dev, 'ingress')
+
+        # Add traffic classes
+        _add_hfsc_cls(dev, _ROOT_QDISC_HANDLE, class_id, **qos)
+        if class_id != _DEFAULT_CLASSID:  # We need to add a default class
+            _add_hfsc_cls(
+                dev, _ROOT_QDISC_HANDLE, _DEFAULT_CLASSID, ls=qos['ls']
+            )
+
+        # Add filters to move the traffic into the classes we just created
+        _add_non_vlanned_filter(dev, _ROOT_QDISC_HANDLE)
+        if class_id != _DEFAULT_CLASSID:
+            _add_vlan_filter(dev, vlan_tag, _ROOT_QDISC_HANDLE, class_id)
+
+        # Add inside intra-class fairness qdisc (fq_codel)
+        _add_fair_qdisc(dev, _ROOT_QDISC_HANDLE, class_id)
+        if class_id != _DEFAULT_CLASSID:
+            _add_fair_qdisc(dev, _ROOT_QDISC_HANDLE, _DEFAULT_CLASSID)
 
 
 def _qdisc_conf_out(dev, root_qdisc_handle, vlan_tag, class_id, qos):
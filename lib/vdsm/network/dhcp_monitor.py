@@ -6,7 +6,7 @@ import logging
 import threading
 
 from vdsm.common import concurrent
-from vdsm.network.netlink import monitor
+from vdsm.network.netlink import hub
 from vdsm.network.ip.address import IPAddressData
 
 
@@ -58,8 +58,9 @@ class Monitor(object):
 
     def __init__(self):
         self._handlers = []
-        self._nl_monitor = monitor.object_monitor(
-            groups=('ipv4-ifaddr', 'ipv6-ifaddr')
+        self._subscription = hub.object_subscription(
+            groups=('ipv4-ifaddr', 'ipv6-ifaddr'),
+            types=(EventField.Event.NEW_ADDR,),
         )
         self._thread = concurrent.thread(
             self.serve_forever, name='dhcp-monitor'
@@ -76,13 +77,12 @@ class Monitor(object):
 
     def start(self):
         logging.info('Starting DHCP monitor.')
-        self._nl_monitor.start()
+        self._subscription.start()
         self._thread.start()
 
     def stop(self):
         logging.info('Stopping DHCP monitor.')
-        self._nl_monitor.stop()
-        self._nl_monitor.wait()
+        self._subscription.close()
         self._thread.join()
 
     def add_handler(self, handler):
@@ -93,7 +93,12 @@ class Monitor(object):
             handler(event)
 
     def serve_forever(self):
-        for event in self._nl_monitor:
+        for event in self._subscription:
+            if event['event'] == hub.OVERFLOW:
+                logging.warning(
+                    'DHCP monitor lost %s address events', event['dropped']
+                )
+                continue
             self.handle_event(event)
 
 
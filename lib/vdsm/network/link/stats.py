@@ -5,36 +5,165 @@ from __future__ import absolute_import
 from __future__ import division
 
 import errno
+import logging
+import threading
 
+from vdsm.common import concurrent
 from vdsm.network.link import bond
 from vdsm.network.link import iface
 from vdsm.network.link import nic
 from vdsm.network.link import vlan
+from vdsm.network.netlink import link as nl_link
+from vdsm.network.netlink import hub
 
 
 def report():
+    """
+    Report statistics of all links, fetched in a single netlink dump.
+
+    Speed and duplex require sysfs reads and ioctls per link, so they are
+    cached and refreshed only when a link event is received for the link or
+    a link it depends on.
+    """
+    _speed_cache.start()
+    links = list(nl_link.iter_links(with_stats=True))
+    slaves = {}
+    for properties in links:
+        master = properties.get('master')
+        if master:
+            slaves.setdefault(master, set()).add(properties['name'])
+
     stats = {}
-    for iface_properties in iface.list():
+    for properties in links:
+        name = properties['name']
         try:
-            interface = iface.iface(iface_properties['name'])
-            stats[interface.device] = _generate_iface_stats(interface)
+            speed, duplex = _speed_cache.get(properties, slaves.get(name, ()))
         except IOError as e:
             if e.errno != errno.ENODEV:
                 raise
+            continue
+        stats[name] = _generate_iface_stats(properties, speed, duplex)
     return stats
 
 
-def _generate_iface_stats(interface):
-    stats = interface.statistics()
+def _generate_iface_stats(properties, speed, duplex):
+    link_stats = properties['stats']
+    is_up = nl_link.is_link_up(properties['flags'], check_oper_status=True)
+    return {
+        'name': properties['name'],
+        'rx': link_stats['rx_bytes'],
+        'tx': link_stats['tx_bytes'],
+        'state': 'up' if is_up else 'down',
+        'rxDropped': link_stats['rx_dropped'],
+        'txDropped': link_stats['tx_dropped'],
+        'rxErrors': link_stats['rx_errors'],
+        'txErrors': link_stats['tx_errors'],
+        'speed': speed,
+        'duplex': duplex,
+    }
+
+
+def _speed_duplex(properties):
+    name = properties['name']
+    link_type = properties.get('type') or iface.get_alternative_type(name)
     speed = 0
-    if interface.type() == iface.Type.NIC:
-        speed = nic.speed(interface.device)
-    elif interface.type() == iface.Type.BOND:
-        speed = bond.speed(interface.device)
-    elif interface.type() == iface.Type.VLAN:
-        speed = vlan.speed(interface.device)
+    if link_type == iface.Type.NIC:
+        speed = nic.speed(name)
+    elif link_type == iface.Type.BOND:
+        speed = bond.speed(name)
+    elif link_type == iface.Type.VLAN:
+        speed = vlan.speed(name)
 
-    stats['speed'] = speed
-    stats['duplex'] = nic.duplex(interface.device)
+    return speed, nic.duplex(name)
 
-    return stats
+
+class _SpeedCache(object):
+    """
+    Cache of links speed and duplex, invalidated by netlink link events.
+
+    A cached entry depends on the link itself, and on the underlying device
+    of a VLAN or the slaves of a bond. An event on any of these links
+    invalidates the entry. The cache is used only while the event monitor is
+    running.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+        self._monitor = None
+        self._running = False
+
+    def start(self):
+        with self._lock:
+            if self._monitor is not None:
+                return
+            self._monitor = hub.object_subscription(groups=('link',))
+        try:
+            self._monitor.start()
+        except Exception:
+            logging.exception(
+                'Cannot monitor link events, link speed will not be cached'
+            )
+            return
+        self._running = True
+        t = concurrent.thread(self._run, name='link-stats')
+        t.start()
+
+    def get(self, properties, slaves):
+        """
+        Return (speed, duplex) for the link described by properties, dict
+        returned by netlink.link.iter_links().
+        """
+        if not self._running:
+            return _speed_duplex(properties)
+
+        name = properties['name']
+        deps = {name}
+        deps.update(slaves)
+        if properties.get('device'):
+            deps.add(properties['device'])
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == deps:
+                return entry[1]
+            generation = self._generation
+
+        value = _speed_duplex(properties)
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[name] = (deps, value)
+
+        return value
+
+    def invalidate(self, name=None):
+        with self._lock:
+            self._generation += 1
+            if name is None:
+                self._entries.clear()
+            else:
+                for key, (deps, _) in list(self._entries.items()):
+                    if name in deps:
+                        del self._entries[key]
+
+    def _run(self):
+        try:
+            for event in self._monitor:
+                if event['event'] == hub.OVERFLOW:
+                    self.invalidate()
+                    continue
+                name = event.get('name')
+                if name:
+                    self.invalidate(name)
+        except Exception:
+            logging.exception(
+                'Link events monitor failed, link speed will not be cached'
+            )
+        finally:
+            self._running = False
+            self.invalidate()
+
+
+_speed_cache = _SpeedCache()
@@ -36,13 +36,15 @@ class LldpAPI(object):
         raise NotImplementedError
 
     @staticmethod
-    def is_lldp_enabled_on_iface(iface):
+    def is_lldp_enabled_on_iface(iface, timeout=None):
         raise NotImplementedError
 
     @staticmethod
-    def get_tlvs(iface):
+    def get_tlvs(iface, timeout=None):
         """
         Report all tlv identifiers.
+        :param timeout: seconds to wait for the report, or None to wait
+                        forever. TlvReportLldpError is raised on timeout.
         :return: TLV reports in a dict format where the TLV ID/s are the keys.
         """
         raise NotImplementedError
@@ -4,22 +4,212 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import logging
+import threading
+
+from vdsm.common import concurrent
+from vdsm.common.time import monotonic_time
 from vdsm.network import lldp
 from vdsm.network.link.iface import iface
+from vdsm.network.netlink import hub
 
 Lldp = lldp.driver()
 
+# Seconds to wait for lldptool on a single device.
+TIMEOUT = 10
+
+# Seconds to keep the information of a device without a TTL TLV.
+DEFAULT_TTL = 30
+
+MAX_WORKERS = 10
+
+TTL_TLV_TYPE = 3
+
 
 def get_info(filter):
     """
     Get LLDP information for all devices.
+
+    The information of the devices is collected concurrently, and cached
+    until the TTL announced by the LLDP neighbor expires or a link event is
+    received for the device.
     """
-    return {device: _get_info(device) for device in filter['devices']}
+    _collector.start()
+    return _collector.get(filter['devices'])
 
 
 def _get_info(device):
     dev_info = {'enabled': False, 'tlvs': []}
-    if iface(device).is_oper_up() and Lldp.is_lldp_enabled_on_iface(device):
+    if iface(device).is_oper_up() and Lldp.is_lldp_enabled_on_iface(
+        device, TIMEOUT
+    ):
         dev_info['enabled'] = True
-        dev_info['tlvs'] = Lldp.get_tlvs(device)
+        dev_info['tlvs'] = Lldp.get_tlvs(device, TIMEOUT)
     return dev_info
+
+
+def _ttl(dev_info):
+    for tlv in dev_info['tlvs']:
+        if tlv['type'] == TTL_TLV_TYPE:
+            try:
+                return int(tlv['properties']['time to live'])
+            except (KeyError, ValueError):
+                break
+    return DEFAULT_TTL
+
+
+def _collect(devices):
+    """
+    Collect the information of devices concurrently.
+
+    Return a dict of the information of the devices collected successfully,
+    and the first error raised, or None.
+    """
+    info = {}
+    error = None
+    results = concurrent.tmap(
+        lambda device: (device, _get_info(device)),
+        devices,
+        max_workers=MAX_WORKERS,
+        name='lldp',
+    )
+    for result in results:
+        if result.succeeded:
+            device, dev_info = result.value
+            info[device] = dev_info
+        elif error is None:
+            error = result.value
+    return info, error
+
+
+class _Collector(object):
+    """
+    Cache of devices LLDP information, expired after the LLDP TTL and
+    invalidated by netlink link events.
+
+    When a link event is received for a cached device, its information is
+    refreshed in the background. The cache is used only while the event
+    monitor is running.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+        self._refreshing = set()
+        self._monitor = None
+        self._running = False
+
+    def start(self):
+        with self._lock:
+            if self._monitor is not None:
+                return
+            self._monitor = hub.object_subscription(groups=('link',))
+        try:
+            self._monitor.start()
+        except Exception:
+            logging.exception(
+                'Cannot monitor link events, LLDP information will not be '
+                'cached'
+            )
+            return
+        self._running = True
+        t = concurrent.thread(self._run, name='lldp-info')
+        t.start()
+
+    def get(self, devices):
+        """
+        Return a dict of the information of devices. If the information of
+        a device cannot be collected, the error is raised after the
+        information of the other devices is cached.
+        """
+        devices = list(devices)
+        if not self._running:
+            info, error = _collect(devices)
+        else:
+            info, error = self._get(devices)
+        if error is not None:
+            raise error
+        return {device: info[device] for device in devices}
+
+    def _get(self, devices):
+        now = monotonic_time()
+        info = {}
+        with self._lock:
+            for device in devices:
+                entry = self._entries.get(device)
+                if entry is not None and entry[0] > now:
+                    info[device] = entry[1]
+        stale = [device for device in devices if device not in info]
+        if not stale:
+            return info, None
+        collected, error = self._update(stale)
+        info.update(collected)
+        return info, error
+
+    def _update(self, devices):
+        with self._lock:
+            generation = self._generation
+
+        info, error = _collect(devices)
+
+        now = monotonic_time()
+        with self._lock:
+            if generation == self._generation:
+                for device, dev_info in info.items():
+                    self._entries[device] = (now + _ttl(dev_info), dev_info)
+        return info, error
+
+    def invalidate(self, name=None):
+        """
+        Invalidate the information of device name, or of all devices if name
+        is None. Return True if the information of the device was cached.
+        """
+        with self._lock:
+            self._generation += 1
+            if name is None:
+                self._entries.clear()
+                return False
+            return self._entries.pop(name, None) is not None
+
+    def _refresh(self, name):
+        with self._lock:
+            if name in self._refreshing:
+                return
+            self._refreshing.add(name)
+        t = concurrent.thread(
+            self._refresh_device, args=(name,), name='lldp-refresh'
+        )
+        t.start()
+
+    def _refresh_device(self, name):
+        try:
+            _, error = self._update([name])
+            if error is not None:
+                logging.debug(
+                    'Cannot refresh LLDP information of %s: %s', name, error
+                )
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+    def _run(self):
+        try:
+            for event in self._monitor:
+                if event['event'] == hub.OVERFLOW:
+                    self.invalidate()
+                    continue
+                name = event.get('name')
+                if name and self.invalidate(name):
+                    self._refresh(name)
+        except Exception:
+            logging.exception(
+                'Link events monitor failed, LLDP information will not be '
+                'cached'
+            )
+        finally:
+            self._running = False
+            self.invalidate()
+
+
+_collector = _Collector()
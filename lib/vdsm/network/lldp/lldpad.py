@@ -19,12 +19,12 @@ class Lldp(LldpAPI):
         lldptool.disable_lldp_on_iface(iface)
 
     @staticmethod
-    def is_lldp_enabled_on_iface(iface):
-        return lldptool.is_lldp_enabled_on_iface(iface)
+    def is_lldp_enabled_on_iface(iface, timeout=None):
+        return lldptool.is_lldp_enabled_on_iface(iface, timeout)
 
     @staticmethod
-    def get_tlvs(iface):
-        return lldptool.get_tlvs(iface)
+    def get_tlvs(iface, timeout=None):
+        return lldptool.get_tlvs(iface, timeout)
 
     @staticmethod
     def is_active():
@@ -5,6 +5,7 @@ from __future__ import absolute_import
 from __future__ import division
 
 import abc
+import subprocess
 
 import six
 
@@ -51,10 +52,14 @@ def disable_lldp_on_iface(iface):
         raise DisableLldpError(rc, out, err, iface)
 
 
-def is_lldp_enabled_on_iface(iface):
-    rc, out, err = cmd.exec_sync(
-        [LLDPTOOL, 'get-lldp', '-i', iface, 'adminStatus']
-    )
+def is_lldp_enabled_on_iface(iface, timeout=None):
+    try:
+        rc, out, err = cmd.exec_sync(
+            [LLDPTOOL, 'get-lldp', '-i', iface, 'adminStatus'],
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise TlvReportLldpError(_timeout_message(timeout), iface)
     if rc:
         return False
     keyval = out.strip().split('=', 1)
@@ -63,20 +68,30 @@ def is_lldp_enabled_on_iface(iface):
     return False
 
 
-def get_tlvs(iface):
+def get_tlvs(iface, timeout=None):
     """
     Report the specified tlv identifiers.
 
     :param iface: The interface to query.
+    :param timeout: Seconds to wait for lldptool, or None to wait forever.
     :return: TLV reports in a dict format where the TLV ID/s are the keys.
     """
-    rc, stdout, err = cmd.exec_sync([LLDPTOOL, 'get-tlv', '-n', '-i', iface])
+    try:
+        rc, stdout, err = cmd.exec_sync(
+            [LLDPTOOL, 'get-tlv', '-n', '-i', iface], timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        raise TlvReportLldpError(_timeout_message(timeout), iface)
     if rc == 0:
         return _parse_tlvs(stdout)
     else:
         raise TlvReportLldpError(rc, stdout, err, iface)
 
 
+def _timeout_message(timeout):
+    return 'lldptool did not respond in %s seconds' % timeout
+
+
 def _parse_tlvs(text):
     tlvs_report = []
     for description, properties in _separate_tlvs(text):
@@ -4,16 +4,21 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import collections
 import errno
 import logging
+import threading
 
 import six
 
+from vdsm.common import concurrent
+from vdsm.common.time import monotonic_time
 from vdsm.network import ipwrapper
 from vdsm.network import link
 from vdsm.network import nmstate
 from vdsm.network.ip.address import ipv6_supported
 from vdsm.network.netconfpersistence import RunningConfig
+from vdsm.network.netlink import hub
 
 from . import bonding
 from . import bridges
@@ -23,6 +28,11 @@ from .qos import report_network_qos
 from .routes import get_routes, get_gateway, is_default_route
 
 
+# nmstate current state includes the DNS configuration and the DHCP and IPv6
+# autoconf settings, which may change without any netlink event, so it is
+# kept only for this number of seconds.
+STATE_TTL = 10
+
 # By default all networks are 'legacy', it can be optionaly changed to 'ovs' in
 # OVS capabilities handling.
 # TODO: Get switch type from the system.
@@ -40,8 +50,7 @@ def _get(vdsmnets=None):
     retrieving data from the running config.
     :return: Dict of networking devices with all their details.
     """
-    ipaddrs = getIpAddrs()
-    routes = get_routes()
+    ipaddrs, routes, current_state = _model.update()
 
     devices_info = _devices_report(ipaddrs, routes)
     nets_info = _networks_report(vdsmnets, routes, ipaddrs, devices_info)
@@ -52,7 +61,6 @@ def _get(vdsmnets=None):
     devices = _get_dev_names(nets_info, flat_devs_info)
     extra_info = _create_default_extra_info(devices)
 
-    current_state = nmstate.get_current_state()
     extra_info.update(
         _get_devices_info_from_nmstate(
             current_state.filtered_interfaces(devices)
@@ -63,7 +71,7 @@ def _get(vdsmnets=None):
 
     networking_report = {'networks': nets_info}
     networking_report.update(devices_info)
-    networking_report['nameservers'] = current_state.dns_state
+    networking_report['nameservers'] = list(current_state.dns_state)
     networking_report['supportsIPv6'] = ipv6_supported()
 
     return networking_report
@@ -211,23 +219,12 @@ def _update_net_vlanid_info(network_info, vlans_info):
 def _devices_report(ipaddrs, routes):
     devs_report = {'bondings': {}, 'bridges': {}, 'nics': {}, 'vlans': {}}
 
-    for dev in ipwrapper.visible_links():
-        if dev.isBRIDGE():
-            devinfo = devs_report['bridges'][dev.name] = bridges.info(dev)
-        elif dev.isNICLike():
-            devinfo = devs_report['nics'][dev.name] = nics.info(dev)
+    for dev, (kind, info) in _model.devices():
+        devinfo = devs_report[kind][dev.name] = dict(info)
+        if kind == 'nics':
             devinfo.update(bonding.get_bond_slave_agg_info(dev.name))
-        elif dev.isBOND():
-            devinfo = devs_report['bondings'][dev.name] = bonding.info(dev)
+        elif kind == 'bondings':
             devinfo.update(bonding.get_bond_agg_info(dev.name))
-            devinfo.update(LEGACY_SWITCH)
-        elif dev.isVLAN():
-            devinfo = devs_report['vlans'][dev.name] = {
-                'iface': dev.device,
-                'vlanid': dev.vlanid,
-            }
-        else:
-            continue
         devinfo.update(_devinfo(dev, routes, ipaddrs))
 
     _permanent_hwaddr_info(devs_report)
@@ -235,6 +232,25 @@ def _devices_report(ipaddrs, routes):
     return devs_report
 
 
+def _device_info(dev):
+    """
+    Return (kind, info) tuple with the information of the device which is
+    modified only when the link changes, or None if the device is not
+    reported.
+    """
+    if dev.isBRIDGE():
+        return 'bridges', bridges.info(dev)
+    elif dev.isNICLike():
+        return 'nics', nics.info(dev)
+    elif dev.isBOND():
+        info = bonding.info(dev)
+        info.update(LEGACY_SWITCH)
+        return 'bondings', info
+    elif dev.isVLAN():
+        return 'vlans', {'iface': dev.device, 'vlanid': dev.vlanid}
+    return None
+
+
 def _permanent_hwaddr_info(devs_report):
     paddr = bonding.permanent_address()
     nics_info = devs_report.get('nics', {})
@@ -243,6 +259,16 @@ def _permanent_hwaddr_info(devs_report):
             nicinfo['permhwaddr'] = paddr[nic]
 
 
+def invalidate(devices=()):
+    """
+    Invalidate cached information about devices, and the cached addresses,
+    routes and nmstate state, after changing the network configuration.
+    Network changes are also detected using netlink events, but the events
+    may be received after this call returns.
+    """
+    _model.invalidate(devices)
+
+
 def get(vdsmnets=None, compatibility=None):
     if compatibility is None:
         return _get(vdsmnets)
@@ -409,3 +435,227 @@ class CachingNetInfo(NetInfo):
         if _netinfo is None:
             _netinfo = get()
         super(CachingNetInfo, self).__init__(_netinfo)
+
+
+class _Model(object):
+    """
+    Networking state used to generate the report, updated incrementally
+    using netlink link, address and route events.
+
+    The model keeps the links, the information of every device read from
+    sysfs, the addresses, the routes and nmstate current state. A link event
+    invalidates the link, its master, and the devices using it as a port or
+    slave. Address events invalidate the addresses, and route events
+    invalidate the routes. Since nmstate state includes DHCP configuration,
+    it is invalidated by link and address events, and it expires after
+    state_ttl seconds, since DNS changes do not trigger any event.
+
+    If the events monitor is not running, the model is built from scratch
+    on every update.
+    """
+
+    _GROUPS = (
+        'link',
+        'ipv4-ifaddr',
+        'ipv6-ifaddr',
+        'ipv4-route',
+        'ipv6-route',
+    )
+
+    def __init__(self, state_ttl=STATE_TTL, clock=monotonic_time):
+        # Protects the state modified by the events thread.
+        self._lock = threading.Lock()
+        # Serializes updates.
+        self._update_lock = threading.Lock()
+        self._monitor = None
+        self._running = False
+        self._generation = 0
+        self._links = None
+        self._devices = {}
+        self._dirty = set()
+        # Cached 'ipaddrs', 'routes' and 'state', and their versions,
+        # incremented when they are invalidated.
+        self._cached = {}
+        self._versions = collections.Counter()
+        # Expiration time of cached values kept for limited time.
+        self._ttl = {'state': state_ttl}
+        self._expires = {}
+        self._clock = clock
+
+    def start(self):
+        with self._lock:
+            if self._monitor is not None:
+                return
+            self._monitor = hub.object_subscription(groups=self._GROUPS)
+        try:
+            self._monitor.start()
+        except Exception:
+            logging.exception('Cannot monitor network events')
+            with self._lock:
+                self._monitor = None
+            return
+        self._running = True
+        t = concurrent.thread(self._run, name='netinfo-model')
+        t.start()
+
+    def resync(self):
+        """Drop the model, rebuilding it on the next update."""
+        with self._lock:
+            self._generation += 1
+            self._links = None
+            self._devices = {}
+            self._dirty = set()
+            self._invalidate_cached('ipaddrs', 'routes', 'state')
+
+    def invalidate(self, devices=()):
+        with self._lock:
+            self._dirty.update(devices)
+            self._invalidate_cached('ipaddrs', 'routes', 'state')
+
+    def update(self):
+        """
+        Update stale parts of the model, and return (ipaddrs, routes,
+        current_state) tuple.
+        """
+        self.start()
+        if not self._running:
+            self.resync()
+
+        readers = {
+            'ipaddrs': getIpAddrs,
+            'routes': get_routes,
+            'state': nmstate.get_current_state,
+        }
+
+        with self._update_lock:
+            now = self._clock()
+            with self._lock:
+                expired = [
+                    name
+                    for name, expires in self._expires.items()
+                    if now >= expires
+                ]
+                self._invalidate_cached(*expired)
+                cached = dict(self._cached)
+                versions = dict(self._versions)
+
+            values = {}
+            for name, read in readers.items():
+                values[name] = cached[name] if name in cached else read()
+
+            with self._lock:
+                # If invalidated while we were reading, keep it stale, so
+                # the next update reads it again.
+                for name, value in values.items():
+                    if self._versions[name] == versions.get(name, 0):
+                        self._cached[name] = value
+                        if name in self._ttl and name not in cached:
+                            self._expires[name] = now + self._ttl[name]
+
+            return values['ipaddrs'], values['routes'], values['state']
+
+    def devices(self):
+        """
+        Return list of (link, (kind, info)) tuples for visible devices
+        reported in the networking report.
+        """
+        with self._update_lock:
+            generation, links, devices = self._update_links()
+
+            result = []
+            for dev in links.values():
+                if dev.isHidden():
+                    continue
+                if dev.name not in devices:
+                    devices[dev.name] = _device_info(dev)
+                if devices[dev.name] is not None:
+                    result.append((dev, devices[dev.name]))
+
+            with self._lock:
+                # If the model was invalidated while we were reading, keep
+                # it stale, so the next update reads it again.
+                if self._generation == generation:
+                    self._links = links
+                    self._devices = devices
+
+            return result
+
+    def _update_links(self):
+        with self._lock:
+            generation = self._generation
+            full = self._links is None
+            links = dict(self._links or {})
+            devices = dict(self._devices)
+            dirty = self._dirty
+            self._dirty = set()
+
+        if full:
+            links = {dev.name: dev for dev in ipwrapper.getLinks()}
+            return generation, links, {}
+
+        for name in dirty:
+            devices.pop(name, None)
+            links.pop(name, None)
+            try:
+                dev = ipwrapper.getLink(name)
+            except IOError as e:
+                if e.errno != errno.ENODEV:
+                    raise
+                continue
+            # The link may have been renamed.
+            for old in [
+                n for n, lnk in links.items() if lnk.index == dev.index
+            ]:
+                links.pop(old)
+                devices.pop(old, None)
+            links[name] = dev
+
+        return generation, links, devices
+
+    def _run(self):
+        try:
+            for event in self._monitor:
+                if event['event'] == hub.OVERFLOW:
+                    self.resync()
+                    continue
+                self._handle_event(event)
+        except Exception:
+            logging.exception('Network events monitor failed')
+        finally:
+            with self._lock:
+                self._monitor = None
+                self._running = False
+            self.resync()
+
+    def _handle_event(self, event):
+        kind = event.get('event', '')
+        with self._lock:
+            if kind.endswith('_link'):
+                name = event.get('name')
+                if name:
+                    self._dirty.add(name)
+                if event.get('master'):
+                    self._dirty.add(event['master'])
+                for devname, device in self._devices.items():
+                    if device is None:
+                        continue
+                    _, info = device
+                    if name in info.get('ports', ()) or name in info.get(
+                        'slaves', ()
+                    ):
+                        self._dirty.add(devname)
+                self._invalidate_cached('state')
+            elif kind.endswith('_addr'):
+                self._invalidate_cached('ipaddrs', 'state')
+            elif kind.endswith('_route'):
+                self._invalidate_cached('routes')
+
+    def _invalidate_cached(self, *names):
+        # Must be called with the lock held.
+        for name in names:
+            self._cached.pop(name, None)
+            self._expires.pop(name, None)
+            self._versions[name] += 1
+
+
+_model = _Model()
@@ -0,0 +1,384 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Host wide netlink events hub.
+
+Subscribers monitoring the same groups share a single netlink socket, read
+by a single thread. The reader drains all the messages available on the
+socket, and dispatches the parsed events to the subscribers in a single
+batch. Events are shared by all the subscribers and must not be modified.
+
+Every subscription has a bounded queue. When a subscriber does not consume
+its events fast enough, its queued events are dropped and replaced by an
+overflow event, telling the subscriber that events were lost and that any
+state derived from them must be rebuilt. An overflow event is also sent
+when the kernel drops events because the socket buffer is full.
+
+Usage:
+
+    with hub.object_subscription(groups=('link',), names=('eth0',)) as sub:
+        for event in sub:
+            if event['event'] == hub.OVERFLOW:
+                resync()
+            else:
+                handle event
+
+A subscription receives events once started, and stops when it is closed,
+possibly by another thread.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+from collections import deque
+from contextlib import closing
+import logging
+import os
+import select
+import sys
+import threading
+
+from vdsm.common import concurrent
+from vdsm.common.osutils import uninterruptible
+from vdsm.common.osutils import uninterruptible_poll
+
+from . import libnl
+from . import monitor
+
+OVERFLOW = 'overflow'
+
+# Maximum number of events queued by a subscription.
+DEFAULT_MAXSIZE = 1000
+
+# Maximum number of events read before dispatching a batch.
+MAX_BATCH = 256
+
+_OBJECT = 'object'
+_IFLA = 'ifla'
+
+_CALLBACKS = {
+    _OBJECT: monitor._c_event_input,
+    _IFLA: monitor._c_ifla_event_input,
+}
+
+_lock = threading.Lock()
+_readers = {}
+
+
+def object_subscription(
+    groups=frozenset(), names=None, types=None, maxsize=DEFAULT_MAXSIZE
+):
+    """
+    Return a subscription to the events of groups, in the format of
+    monitor.object_monitor(). If names is set, only events of these links
+    (or addresses of these links) are received. If types is set, only events
+    of these types (e.g. 'new_link', 'del_addr') are received.
+    """
+    return Subscription(_OBJECT, groups, names, types, maxsize)
+
+
+def ifla_subscription(groups=frozenset(), types=None, maxsize=DEFAULT_MAXSIZE):
+    """
+    Return a subscription to the IFLA events of groups, in the format of
+    monitor.ifla_monitor().
+    """
+    return Subscription(_IFLA, groups, None, types, maxsize)
+
+
+def _attach(subscription, key):
+    """
+    Add subscription to the reader of key, starting a reader if needed.
+    """
+    with _lock:
+        reader = _readers.get(key)
+        # A stopping reader does not accept subscriptions, and is replaced.
+        if reader is None or not reader.add(subscription):
+            reader = _Reader(*key)
+            reader.add(subscription)
+            _readers[key] = reader
+    return reader
+
+
+def _groups(groups):
+    if not groups:
+        return frozenset(libnl.GROUPS)
+    groups = frozenset(groups)
+    unknown_groups = groups.difference(libnl.GROUPS)
+    if unknown_groups:
+        raise AttributeError('Invalid groups: %s' % (unknown_groups,))
+    return groups
+
+
+def _remove_reader(reader):
+    with _lock:
+        if _readers.get(reader.key) is reader:
+            del _readers[reader.key]
+
+
+class Subscription(object):
+    """
+    Stream of events received by the hub, starting when the subscription is
+    started. Iterating over a subscription yields events until the
+    subscription is closed. If the hub reader fails, iteration raises
+    monitor.MonitorError.
+    """
+
+    def __init__(self, kind, groups, names, types, maxsize):
+        if maxsize < 1:
+            raise ValueError('Invalid maxsize %r, must be positive' % maxsize)
+        self._key = (kind, _groups(groups))
+        self._names = frozenset(names) if names is not None else None
+        self._types = frozenset(types) if types is not None else None
+        self._maxsize = maxsize
+        self._cond = threading.Condition(threading.Lock())
+        self._batches = deque()
+        self._size = 0
+        self._dropped = 0
+        self._error = None
+        self._closed = False
+        self._reader = None
+
+    @property
+    def dropped(self):
+        """
+        Number of events dropped since the subscription was created.
+        """
+        with self._cond:
+            return self._dropped
+
+    def __iter__(self):
+        while True:
+            batch = self.get_batch()
+            if batch is None:
+                return
+            for event in batch:
+                yield event
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def start(self):
+        if self._reader is not None:
+            raise monitor.MonitorError('Subscription already started')
+        self._reader = _attach(self, self._key)
+        try:
+            self._reader.start()
+        except Exception:
+            self.close()
+            raise
+
+    def get_batch(self, timeout=None):
+        """
+        Return the next list of events, waiting until events are available.
+        Return an empty list if timeout expired, and None if the subscription
+        is closed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(self._ready, timeout):
+                return []
+            if self._batches:
+                batch = self._batches.popleft()
+                if batch[0].get('event') != OVERFLOW:
+                    self._size -= len(batch)
+                return batch
+            if self._error is not None:
+                _, val, tb = self._error
+                raise monitor.MonitorError(val).with_traceback(tb)
+            return None
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._batches.clear()
+            self._size = 0
+            self._cond.notify_all()
+        if self._reader is not None:
+            self._reader.remove(self)
+
+    def _ready(self):
+        return self._batches or self._closed or self._error is not None
+
+    def _put(self, batch):
+        """
+        Queue the events of batch matching the subscription, dropping the
+        queued events if the queue is full.
+        """
+        if self._names is not None or self._types is not None:
+            batch = [event for event in batch if self._match(event)]
+            if not batch:
+                return
+        with self._cond:
+            if self._closed:
+                return
+            if self._size + len(batch) > self._maxsize:
+                self._overflow(len(batch))
+            else:
+                self._batches.append(batch)
+                self._size += len(batch)
+            self._cond.notify()
+
+    def _put_overflow(self):
+        with self._cond:
+            if not self._closed:
+                self._overflow(0)
+                self._cond.notify()
+
+    def _put_error(self, exc_info):
+        with self._cond:
+            self._error = exc_info
+            self._cond.notify_all()
+
+    def _overflow(self, dropped):
+        # Must be called with the lock held.
+        dropped += self._size
+        self._dropped += dropped
+        self._batches.clear()
+        self._batches.append([{'event': OVERFLOW, 'dropped': dropped}])
+        self._size = 0
+
+    def _match(self, event):
+        if self._types is not None and event.get('event') not in self._types:
+            return False
+        if self._names is not None:
+            name = event.get('name') or event.get('label')
+            if name not in self._names:
+                return False
+        return True
+
+
+class _Reader(object):
+    """
+    Read the events of groups from a single netlink socket, and dispatch
+    them to the subscriptions. The reader stops when the last subscription
+    is closed.
+    """
+
+    def __init__(self, kind, groups):
+        self.key = (kind, groups)
+        self._c_callback_function = _CALLBACKS[kind]
+        self._groups = groups
+        self._lock = threading.Lock()
+        self._subscriptions = []
+        self._stopping = False
+        self._batch = []
+        self._overrun = False
+        self._pipetrick = None
+        self._error = None
+        self._started = threading.Event()
+        self._thread = concurrent.thread(self._run, name='netlink/hub')
+        self._thread_started = False
+
+    def add(self, subscription):
+        """
+        Add subscription, return False if the reader is stopping.
+        """
+        with self._lock:
+            if self._stopping:
+                return False
+            self._subscriptions.append(subscription)
+            return True
+
+    def remove(self, subscription):
+        with self._lock:
+            try:
+                self._subscriptions.remove(subscription)
+            except ValueError:
+                return
+            if self._subscriptions or self._stopping:
+                return
+            self._stopping = True
+        _remove_reader(self)
+        if not self._thread_started:
+            return
+        self._started.wait()
+        pipetrick = self._pipetrick
+        if pipetrick is not None:
+            uninterruptible(os.write, pipetrick[1], b'c')
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def start(self):
+        with self._lock:
+            if not self._thread_started:
+                self._thread_started = True
+                self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            _, val, tb = self._error
+            raise monitor.MonitorError(val).with_traceback(tb)
+
+    def put(self, event):
+        """
+        Called by the netlink callback for every event.
+        """
+        self._batch.append(event.data)
+
+    def _run(self):
+        try:
+            epoll = select.epoll()
+            with closing(epoll):
+                with monitor._monitoring_socket(
+                    self, self._groups, epoll, self._c_callback_function
+                ) as sock:
+                    with monitor._pipetrick(epoll) as self._pipetrick:
+                        self._started.set()
+                        self._serve(sock, epoll)
+        except Exception:
+            self._error = sys.exc_info()
+            logging.exception('Netlink events reader failed')
+            self._fail()
+        finally:
+            self._pipetrick = None
+            self._started.set()
+
+    def _serve(self, sock, epoll):
+        sock_fd = libnl.nl_socket_get_fd(sock)
+        while True:
+            events = uninterruptible_poll(epoll.poll)
+            if (self._pipetrick[0], select.POLLIN) in events:
+                return
+            self._receive(sock, sock_fd, epoll)
+            self._dispatch()
+
+    def _receive(self, sock, sock_fd, epoll):
+        """
+        Parse all the messages available on the socket into self._batch.
+        """
+        while len(self._batch) < MAX_BATCH:
+            try:
+                libnl.nl_recvmsgs_default(sock)
+            except IOError as e:
+                if e.errno != libnl.NLE_NOMEM:
+                    raise
+                # The kernel dropped events since the socket receive
+                # buffer is full.
+                self._overrun = True
+            events = uninterruptible_poll(epoll.poll, timeout=0)
+            if (sock_fd, select.POLLIN) not in events:
+                return
+
+    def _dispatch(self):
+        batch, self._batch = self._batch, []
+        overrun, self._overrun = self._overrun, False
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if overrun:
+                subscription._put_overflow()
+            if batch:
+                subscription._put(batch)
+
+    def _fail(self):
+        with self._lock:
+            self._stopping = True
+            subscriptions = list(self._subscriptions)
+        _remove_reader(self)
+        for subscription in subscriptions:
+            subscription._put_error(self._error)
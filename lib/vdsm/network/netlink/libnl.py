@@ -28,6 +28,7 @@ from ctypes import c_char_p
 from ctypes import c_int
 from ctypes import c_size_t
 from ctypes import c_uint32
+from ctypes import c_uint64
 from ctypes import c_ushort
 from ctypes import c_void_p
 from ctypes import get_errno
@@ -46,6 +47,10 @@ HWADDRSIZE = 60  # InfiniBand HW address needs 59+1 bytes
 # include/linux-private/linux/netlink.h
 NETLINK_ROUTE = 0  # Routing/device hook
 
+# libnl error code, reported also when the kernel drops messages since the
+# socket receive buffer is full (ENOBUFS).
+NLE_NOMEM = 5
+
 # libnl/include/linux/rtnetlink.h
 GROUPS = {
     'link': 1,  # RTNLGRP_LINK
@@ -171,6 +176,18 @@ class NlCbKind(object):
     NL_CB_CUSTOM = 3  # Customized handler specified by user
 
 
+# libnl/include/netlink/route/link.h
+class RtnlLinkStat(object):
+    RX_PACKETS = 0
+    TX_PACKETS = 1
+    RX_BYTES = 2
+    TX_BYTES = 3
+    RX_ERRORS = 4
+    TX_ERRORS = 5
+    RX_DROPPED = 6
+    TX_DROPPED = 7
+
+
 class RtnlObjectType(object):
     BASE = 'route'
     ADDR = BASE + '/addr'  # libnl/lib/route/addr.c
@@ -861,6 +878,23 @@ def rtnl_link_get_operstate(link):
     return _rtnl_link_get_operstate(link)
 
 
+def rtnl_link_get_stat(link, stat_id):
+    """Return statistical counter of link object.
+
+    @arg link            Link object
+    @arg stat_id         Identifier of statistical counter (RtnlLinkStat)
+
+    The counters are filled from IFLA_STATS64 when the link is received from
+    the kernel.
+
+    @return Value of counter or 0 if not specified.
+    """
+    _rtnl_link_get_stat = _libnl_route(
+        'rtnl_link_get_stat', c_uint64, c_void_p, c_int
+    )
+    return _rtnl_link_get_stat(link, stat_id)
+
+
 def rtnl_link_get_qdisc(link):
     """Return name of queueing discipline of link object.
 
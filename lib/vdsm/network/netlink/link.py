@@ -25,14 +25,18 @@ def get_link(name):
         return link_info
 
 
-def iter_links():
+def iter_links(with_stats=False):
     """Generator that yields an information dictionary for each link of the
-    system."""
+    system. If with_stats is set, the dictionary includes the link
+    statistics, received in the same dump."""
     with _pool.socket() as sock:
         with _nl_link_cache(sock) as cache:
             link = libnl.nl_cache_get_first(cache)
             while link:
-                yield _link_info(link, cache=cache)
+                info = _link_info(link, cache=cache)
+                if with_stats:
+                    info['stats'] = _link_stats(link)
+                yield info
                 link = libnl.nl_cache_get_next(link)
 
 
@@ -92,6 +96,30 @@ def _link_info(link, cache=None):
     return info
 
 
+def _link_stats(link):
+    """Returns a dictionary with the statistics of the link object."""
+    return {
+        'rx_bytes': libnl.rtnl_link_get_stat(
+            link, libnl.RtnlLinkStat.RX_BYTES
+        ),
+        'tx_bytes': libnl.rtnl_link_get_stat(
+            link, libnl.RtnlLinkStat.TX_BYTES
+        ),
+        'rx_dropped': libnl.rtnl_link_get_stat(
+            link, libnl.RtnlLinkStat.RX_DROPPED
+        ),
+        'tx_dropped': libnl.rtnl_link_get_stat(
+            link, libnl.RtnlLinkStat.TX_DROPPED
+        ),
+        'rx_errors': libnl.rtnl_link_get_stat(
+            link, libnl.RtnlLinkStat.RX_ERRORS
+        ),
+        'tx_errors': libnl.rtnl_link_get_stat(
+            link, libnl.RtnlLinkStat.TX_ERRORS
+        ),
+    }
+
+
 def _link_index_to_name(link_index, cache=None):
     """Returns the textual name of the link with index equal to link_index."""
     if cache is None:
@@ -8,6 +8,8 @@ import logging
 
 import six
 
+from vdsm.common.config import config as vdsm_config
+from vdsm.common.time import Clock
 from vdsm.common.time import monotonic_time
 from vdsm.network import connectivity
 from vdsm.network import errors as ne
@@ -24,6 +26,7 @@ from vdsm.network.link import bond
 from vdsm.network.netinfo import bridges
 from vdsm.network.netinfo.cache import get as netinfo_get, NetInfo
 from vdsm.network.netinfo.cache import get_net_iface_from_config
+from vdsm.network.netinfo.cache import invalidate as netinfo_invalidate
 
 from . import validator
 
@@ -70,12 +73,44 @@ def _setup_nmstate(networks, bondings, options, in_rollback):
     used (the Transaction context).
     """
     logging.info('Processing setup through nmstate')
-    desired_state = nmstate.generate_state(networks, bondings)
-    logging.info('Desired state: %s', desired_state)
-    _setup_dynamic_src_routing(networks)
-    nmstate.setup(desired_state, verify_change=not in_rollback)
-    net_info = NetInfo(netinfo_get())
+    clock = Clock()
+    with clock.run('total'):
+        with clock.run('current-state'):
+            current_state = nmstate.get_current_state()
+        with clock.run('generate'):
+            desired_state = nmstate.generate_state(
+                networks, bondings, current_state
+            )
+            desired_state = nmstate.minimize_state(
+                desired_state, current_state
+            )
+        logging.info('Desired state: %s', desired_state)
+        _setup_dynamic_src_routing(networks)
+        with clock.run('apply'):
+            if desired_state:
+                nmstate.setup(
+                    desired_state, verify_change=_verify_change(in_rollback)
+                )
+        netinfo_invalidate(
+            ifstate[nmstate.Interface.NAME]
+            for ifstate in desired_state.get(nmstate.Interface.KEY, ())
+        )
+        with clock.run('netinfo'):
+            net_info = NetInfo(netinfo_get())
+        with clock.run('running-config'):
+            _update_running_config(
+                networks, bondings, options, in_rollback, net_info
+            )
+    logging.info('Setup networks through nmstate: %s', clock)
+
+
+def _verify_change(in_rollback):
+    return not in_rollback and vdsm_config.getboolean(
+        'vars', 'nmstate_verify_change'
+    )
+
 
+def _update_running_config(networks, bondings, options, in_rollback, net_info):
     with Transaction(in_rollback=in_rollback, persistent=False) as config:
         _setup_qos(networks, net_info, config.networks)
         for net_name, net_attrs in six.viewitems(networks):
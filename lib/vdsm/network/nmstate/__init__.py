@@ -11,6 +11,7 @@ from .api import ovs_netinfo
 from .api import setup
 from .api import state_show
 from .api import update_num_vfs
+from .state import minimize_state
 
 # Re-export nmstate schema
 from .schema import BondSchema
@@ -35,6 +36,7 @@ __all__ = [
     'get_current_state',
     'is_autoconf_enabled',
     'is_dhcp_enabled',
+    'minimize_state',
     'ovs_netinfo',
     'setup',
     'state_show',
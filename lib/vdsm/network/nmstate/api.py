@@ -29,10 +29,11 @@ def setup(desired_state, verify_change):
     state_apply(desired_state, verify_change=verify_change)
 
 
-def generate_state(networks, bondings):
+def generate_state(networks, bondings, current_state=None):
     """Generate a new nmstate state given VDSM setup state format"""
     rconfig = RunningConfig()
-    current_state = get_current_state()
+    if current_state is None:
+        current_state = get_current_state()
 
     ovs_nets, linux_br_nets = split_switch_type(networks, rconfig.networks)
     ovs_bonds, linux_br_bonds = split_switch_type(bondings, rconfig.bonds)
@@ -175,6 +175,45 @@ class NetworkingState(object):
             slave_state[Interface.MTU] = max(bond_mtu, slave_mtu)
 
 
+def minimize_state(desired_state, current_state):
+    """
+    Return the desired state without the interfaces already matching the
+    current state, so nmstate changes and verifies only the modified ones.
+
+    An interface matches when it should be absent and does not exist, or
+    when all its desired attributes are equal to the current ones.
+    Interfaces missing from the desired state are left unchanged by nmstate.
+    """
+    state = dict(desired_state)
+    current_ifstates = current_state.interfaces_state
+    ifstates = [
+        ifstate
+        for ifstate in desired_state.get(Interface.KEY, ())
+        if not _is_ifstate_applied(ifstate, current_ifstates)
+    ]
+    if ifstates:
+        state[Interface.KEY] = ifstates
+    else:
+        state.pop(Interface.KEY, None)
+    return state
+
+
+def _is_ifstate_applied(ifstate, current_ifstates):
+    current_ifstate = current_ifstates.get(ifstate[Interface.NAME])
+    if is_iface_absent(ifstate):
+        return current_ifstate is None
+    return current_ifstate is not None and _is_subset(ifstate, current_ifstate)
+
+
+def _is_subset(desired, current):
+    if isinstance(desired, dict):
+        return isinstance(current, dict) and all(
+            key in current and _is_subset(value, current[key])
+            for key, value in desired.items()
+        )
+    return desired == current
+
+
 class CurrentState(object):
     def __init__(self, state):
         self._interfaces_state = self._get_interfaces_state(state)
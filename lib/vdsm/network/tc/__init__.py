@@ -10,6 +10,7 @@ import errno
 from vdsm.network import ipwrapper
 
 from . import filter as tc_filter
+from . import _netlink
 from . import _parser
 from . import cls
 from . import qdisc
@@ -18,6 +19,8 @@ from ._wrapper import TrafficControlException
 QDISC_INGRESS = 'ffff:'
 MISSING_OBJ_ERR_CODES = (errno.EINVAL, errno.ENOENT, errno.EOPNOTSUPP)
 
+batch = _netlink.batch
+
 
 def _addTarget(network, parent, target):
     fs = list(filters(network, parent))
@@ -168,11 +171,13 @@ def filters(dev, parent, out=None):
 
 def _iterate(module, dev, out=None, **kwargs):
     """
-    Generates information dictionaries for a device or on a specific
-    output.
+    Generates information dictionaries for a device, dumped from the kernel,
+    or on a specific tc output.
     """
     if out is None:
-        out = module.show(dev, **kwargs)
+        for data in module.dump(dev, **kwargs):
+            yield data
+        return
 
     for line in _parser.linearize(out.splitlines()):
         if len(line) >= 2 and line[0] == 'qdisc' and line[1] == 'noqueue':
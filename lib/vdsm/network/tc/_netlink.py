@@ -0,0 +1,425 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+rtnetlink backend for traffic control.
+
+Qdiscs, classes and filters are dumped and programmed by exchanging
+rtnetlink messages with the kernel, instead of running the tc binary for
+every object and parsing its textual output. Kind specific options are
+encoded and decoded by the qdisc, cls and filter modules.
+
+Requests sent inside a batch() context are queued and sent to the kernel
+in a single exchange when the context exits.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+from collections import namedtuple
+from contextlib import closing
+from contextlib import contextmanager
+import errno
+import os
+import socket
+import struct
+import threading
+
+from ._wrapper import TrafficControlException
+
+RTM_NEWQDISC = 36
+RTM_DELQDISC = 37
+RTM_GETQDISC = 38
+RTM_NEWTCLASS = 40
+RTM_DELTCLASS = 41
+RTM_GETTCLASS = 42
+RTM_NEWTFILTER = 44
+RTM_DELTFILTER = 45
+RTM_GETTFILTER = 46
+
+NLM_F_REQUEST = 0x1
+NLM_F_ACK = 0x4
+NLM_F_REPLACE = 0x100
+NLM_F_EXCL = 0x200
+NLM_F_CREATE = 0x400
+NLM_F_DUMP = 0x300
+
+# Flags of error messages
+NLM_F_CAPPED = 0x100
+NLM_F_ACK_TLVS = 0x200
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+NLA_TYPE_MASK = 0x3FFF
+
+SOL_NETLINK = 270
+NETLINK_CAP_ACK = 10
+NETLINK_EXT_ACK = 11
+NLMSGERR_ATTR_MSG = 1
+
+TCA_KIND = 1
+TCA_OPTIONS = 2
+TCA_CHAIN = 11
+
+TC_H_ROOT = 0xFFFFFFFF
+TC_H_INGRESS = 0xFFFFFFF1
+
+# Flags for add, replace and delete requests.
+ADD = NLM_F_CREATE | NLM_F_EXCL
+REPLACE = NLM_F_CREATE | NLM_F_REPLACE
+DELETE = 0
+
+_NLMSGHDR = struct.Struct('=IHHII')
+_TCMSG = struct.Struct('=BxxxiIII')
+_RTATTR = struct.Struct('=HH')
+_NLMSGERR = struct.Struct('=i')
+
+_RECV_SIZE = 64 * 1024
+
+# Large batches are split to keep every message under the socket send
+# buffer size.
+_MAX_SEND_SIZE = 32 * 1024
+
+_tls = threading.local()
+
+Message = namedtuple('Message', 'dev, handle, parent, info, kind, attrs')
+
+
+class Request(object):
+    """
+    tc request for the object identified by ifindex, handle and parent.
+    command is a tc like description of the request, reported in errors.
+    """
+
+    def __init__(
+        self,
+        msg_type,
+        flags,
+        ifindex,
+        handle=0,
+        parent=0,
+        info=0,
+        attrs=(),
+        command=(),
+    ):
+        self.msg_type = msg_type
+        self.flags = flags
+        self.ifindex = ifindex
+        self.handle = handle
+        self.parent = parent
+        self.info = info
+        self.attrs = attrs
+        self.command = list(command)
+
+    def encode(self, seq, flags=0):
+        payload = _TCMSG.pack(
+            socket.AF_UNSPEC, self.ifindex, self.handle, self.parent, self.info
+        ) + b''.join(self.attrs)
+        return (
+            _NLMSGHDR.pack(
+                _NLMSGHDR.size + len(payload),
+                self.msg_type,
+                self.flags | flags | NLM_F_REQUEST,
+                seq,
+                0,
+            )
+            + payload
+        )
+
+
+@contextmanager
+def batch():
+    """
+    Queue the requests made by this thread inside the context, and send
+    them in a single exchange when the context exits. The kernel handles
+    every request even if a previous one failed; the first failure is raised
+    as TrafficControlException.
+
+    Dumps inside the context do not see the queued requests.
+    """
+    if getattr(_tls, 'requests', None) is not None:
+        yield
+        return
+
+    _tls.requests = []
+    try:
+        yield
+        requests = _tls.requests
+    finally:
+        _tls.requests = None
+    if requests:
+        _execute(requests)
+
+
+def request(req):
+    """
+    Send req to the kernel, or queue it if a batch is active.
+    """
+    requests = getattr(_tls, 'requests', None)
+    if requests is not None:
+        requests.append(req)
+    else:
+        _execute([req])
+
+
+def dump(msg_type, dev=None, parent=0, info=0, command=()):
+    """
+    Return a list of Message of the objects of dev, or of all devices if dev
+    is None. Message.dev is set only when dev is None.
+
+    The kernel dumps qdiscs of all devices regardless of the requested
+    device, so messages of other devices are filtered out here.
+    """
+    ifindex = ifindex_of(dev, command) if dev else 0
+    req = Request(
+        msg_type,
+        NLM_F_DUMP,
+        ifindex,
+        parent=parent,
+        info=info,
+        command=command,
+    )
+    messages = []
+    with closing(_open_socket()) as sock:
+        sock.send(req.encode(1))
+        while True:
+            for msg_type, flags, _, payload in _recv(sock):
+                if msg_type == NLMSG_DONE:
+                    return messages
+                if msg_type == NLMSG_ERROR:
+                    error, message = _parse_error(flags, payload)
+                    if error:
+                        raise TrafficControlException(error, message, command)
+                    continue
+                msg = _parse_tcmsg(payload, ifindex)
+                if msg is not None:
+                    messages.append(msg)
+
+
+def ifindex_of(dev, command=()):
+    try:
+        return socket.if_nametoindex(dev)
+    except OSError:
+        raise TrafficControlException(
+            errno.ENODEV, 'Cannot find device "%s"' % dev, command
+        )
+
+
+def dev_name(ifindex):
+    """
+    Return the name of the device ifindex, or None if it does not exist.
+    """
+    try:
+        return socket.if_indextoname(ifindex)
+    except OSError:
+        return None
+
+
+def attr(attr_type, data=b''):
+    length = _RTATTR.size + len(data)
+    padding = b'\0' * (-length % 4)
+    return _RTATTR.pack(length, attr_type) + data + padding
+
+
+def nested(attr_type, attrs):
+    return attr(attr_type, b''.join(attrs))
+
+
+def u32_attr(attr_type, value):
+    return attr(attr_type, struct.pack('=I', value))
+
+
+def str_attr(attr_type, value):
+    return attr(attr_type, value.encode('utf-8') + b'\0')
+
+
+def kind_attr(kind):
+    return str_attr(TCA_KIND, kind)
+
+
+def iter_attrs(data):
+    """
+    Generate (type, payload) of the attributes in data.
+    """
+    offset = 0
+    while offset + _RTATTR.size <= len(data):
+        length, attr_type = _RTATTR.unpack_from(data, offset)
+        if length < _RTATTR.size:
+            break
+        yield (
+            attr_type & NLA_TYPE_MASK,
+            data[offset + _RTATTR.size : offset + length],  # noqa: E203
+        )
+        offset += (length + 3) & ~3
+
+
+def parse_attrs(data):
+    return dict(iter_attrs(data))
+
+
+def get_u32(data):
+    return struct.unpack_from('=I', data)[0]
+
+
+def get_str(data):
+    return data.split(b'\0', 1)[0].decode('utf-8')
+
+
+def parse_handle(handle):
+    """
+    Parse tc class id (e.g. "1389:1388", "1389:", ":a8", "0x1388") into
+    an integer, like tc does.
+    """
+    if handle == 'root':
+        return TC_H_ROOT
+    if handle == 'ingress':
+        return TC_H_INGRESS
+    if handle == 'none':
+        return 0
+    major, sep, minor = handle.partition(':')
+    if not sep:
+        return int(handle, 16)
+    major = int(major, 16) if major else 0
+    minor = int(minor, 16) if minor else 0
+    if major > 0xFFFF or minor > 0xFFFF:
+        raise ValueError('Invalid tc handle: %r' % handle)
+    return (major << 16) | minor
+
+
+def parse_qdisc_handle(handle):
+    """
+    Parse tc qdisc handle (e.g. "0x1389:", "1388:") into an integer.
+    """
+    major = int(handle.rstrip(':'), 16)
+    if major > 0xFFFF:
+        raise ValueError('Invalid qdisc handle: %r' % handle)
+    return major << 16
+
+
+def format_handle(handle):
+    """
+    Format integer class id like tc does (e.g. "1389:1388", "1389:").
+    """
+    if handle == TC_H_ROOT:
+        return 'root'
+    if handle == 0:
+        return 'none'
+    major, minor = handle >> 16, handle & 0xFFFF
+    if major == 0:
+        return ':%x' % minor
+    if minor == 0:
+        return '%x:' % major
+    return '%x:%x' % (major, minor)
+
+
+def format_qdisc_handle(handle):
+    return '%x:' % (handle >> 16)
+
+
+def _open_socket():
+    sock = socket.socket(
+        socket.AF_NETLINK,
+        socket.SOCK_RAW | socket.SOCK_CLOEXEC,
+        socket.NETLINK_ROUTE,
+    )
+    try:
+        for option in (NETLINK_CAP_ACK, NETLINK_EXT_ACK):
+            try:
+                sock.setsockopt(SOL_NETLINK, option, 1)
+            except OSError:
+                pass  # Not supported by old kernels, not required.
+        sock.bind((0, 0))
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def _execute(requests):
+    errors = []
+    with closing(_open_socket()) as sock:
+        for chunk in _chunks(requests):
+            pending = set(seq for seq, _ in chunk)
+            sock.send(b''.join(msg for _, msg in chunk))
+            while pending:
+                for msg_type, flags, seq, payload in _recv(sock):
+                    if msg_type != NLMSG_ERROR:
+                        continue
+                    pending.discard(seq)
+                    error, message = _parse_error(flags, payload)
+                    if error:
+                        errors.append((seq, error, message))
+    if errors:
+        seq, error, message = min(errors)
+        raise TrafficControlException(
+            error, message, requests[seq - 1].command
+        )
+
+
+def _chunks(requests):
+    chunk = []
+    size = 0
+    for seq, req in enumerate(requests, 1):
+        msg = req.encode(seq, NLM_F_ACK)
+        if chunk and size + len(msg) > _MAX_SEND_SIZE:
+            yield chunk
+            chunk = []
+            size = 0
+        chunk.append((seq, msg))
+        size += len(msg)
+    if chunk:
+        yield chunk
+
+
+def _recv(sock):
+    data = sock.recv(_RECV_SIZE)
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        length, msg_type, flags, seq, _ = _NLMSGHDR.unpack_from(data, offset)
+        if length < _NLMSGHDR.size:
+            break
+        yield (
+            msg_type,
+            flags,
+            seq,
+            data[offset + _NLMSGHDR.size : offset + length],  # noqa: E203
+        )
+        offset += (length + 3) & ~3
+
+
+def _parse_error(flags, payload):
+    """
+    Return errno and message of an error message. errno is 0 for
+    acknowledgements.
+    """
+    (error,) = _NLMSGERR.unpack_from(payload)
+    error = -error
+    if not error:
+        return 0, None
+    message = None
+    if flags & NLM_F_ACK_TLVS:
+        if flags & NLM_F_CAPPED:
+            offset = _NLMSGERR.size + _NLMSGHDR.size
+        else:
+            (length,) = struct.unpack_from('=I', payload, _NLMSGERR.size)
+            offset = _NLMSGERR.size + length
+        tlvs = parse_attrs(payload[offset:])
+        if NLMSGERR_ATTR_MSG in tlvs:
+            message = get_str(tlvs[NLMSGERR_ATTR_MSG])
+    return error, message or os.strerror(error)
+
+
+def _parse_tcmsg(payload, requested_ifindex):
+    _, ifindex, handle, parent, info = _TCMSG.unpack_from(payload)
+    if requested_ifindex:
+        if ifindex != requested_ifindex:
+            return None
+        dev = None
+    else:
+        dev = dev_name(ifindex)
+        if dev is None:
+            return None  # Removed during the dump.
+    attrs = parse_attrs(payload[_TCMSG.size :])  # noqa: E203
+    kind = get_str(attrs[TCA_KIND]) if TCA_KIND in attrs else None
+    return Message(dev, handle, parent, info, kind, attrs)
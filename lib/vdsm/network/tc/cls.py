@@ -6,14 +6,23 @@ from __future__ import division
 from __future__ import division
 
 from copy import deepcopy
+import struct
 
 import six
 
+from . import _netlink
 from . import _parser
 from . import _wrapper
 
 _TC_PRIO_MAX = 15
 
+_TCA_HFSC_RSC = 1
+_TCA_HFSC_FSC = 2
+_TCA_HFSC_USC = 3
+
+# struct tc_service_curve: m1 and m2 in bytes per second, d in microseconds
+_HFSC_CURVE = struct.Struct('=III')
+
 
 def add(dev, kind, parent, classid, **opts):
     """Adds a class to a device. Opts should be used with list values for
@@ -36,14 +45,72 @@ def add(dev, kind, parent, classid, **opts):
         else:
             command.append(key)
             command += value
-    _wrapper.process_request(command)
+    try:
+        encode = _encoders[kind]
+    except KeyError:
+        raise ValueError('Unsupported class kind: %s' % kind)
+    _netlink.request(
+        _netlink.Request(
+            _netlink.RTM_NEWTCLASS,
+            _netlink.ADD,
+            _netlink.ifindex_of(dev, command),
+            handle=_netlink.parse_handle(classid),
+            parent=_netlink.parse_handle(parent),
+            attrs=[
+                _netlink.kind_attr(kind),
+                _netlink.nested(_netlink.TCA_OPTIONS, encode(adapted_ops)),
+            ],
+            command=command,
+        )
+    )
 
 
 def delete(dev, classid, parent=None):
     command = ['class', 'del', 'dev', dev, 'classid', classid]
     if parent is not None:
         command += ['parent', parent]
-    _wrapper.process_request(command)
+    _netlink.request(
+        _netlink.Request(
+            _netlink.RTM_DELTCLASS,
+            _netlink.DELETE,
+            _netlink.ifindex_of(dev, command),
+            handle=_netlink.parse_handle(classid),
+            parent=0 if parent is None else _netlink.parse_handle(parent),
+            command=command,
+        )
+    )
+
+
+def dump(dev, parent=None, classid=None):
+    """Returns a generator of dictionaries of the classes of a device
+    reported by the kernel. The dictionaries have the same structure as the
+    ones returned by parse()"""
+    command = ['class', 'show', 'dev', dev]
+    handle = None if classid is None else _netlink.parse_handle(classid)
+    for msg in _netlink.dump(
+        _netlink.RTM_GETTCLASS,
+        dev,
+        parent=0 if parent is None else _netlink.parse_handle(parent),
+        command=command,
+    ):
+        if handle is not None and msg.handle != handle:
+            continue
+        data = {
+            'kind': msg.kind,
+            'handle': _netlink.format_handle(msg.handle),
+        }
+        if msg.parent == _netlink.TC_H_ROOT:
+            data['root'] = True
+        elif msg.parent:
+            data['parent'] = _netlink.format_handle(msg.parent)
+        if msg.info:
+            data['leaf'] = '%x:' % (msg.info >> 16)
+        decode = _decoders.get(msg.kind)
+        if decode is not None and _netlink.TCA_OPTIONS in msg.attrs:
+            options = decode(msg.attrs[_netlink.TCA_OPTIONS])
+            if options:
+                data[msg.kind] = options
+        yield _adapt_qos_options_link_share_for_reporting(data)
 
 
 def show(dev, parent=None, classid=None):
@@ -154,3 +221,45 @@ _spec = {
         'ul': _parse_hfsc_curve,
     }
 }
+
+
+def _encode_hfsc(qos):
+    attrs = []
+    for curve, attrs_types in _HFSC_CURVE_ATTRS.items():
+        if curve in qos:
+            data = _encode_hfsc_curve(qos[curve])
+            for attr_type in attrs_types:
+                attrs.append(_netlink.attr(attr_type, data))
+    return attrs
+
+
+def _encode_hfsc_curve(curve):
+    return _HFSC_CURVE.pack(
+        curve.get('m1', 0) // 8, curve.get('d', 0), curve.get('m2', 0) // 8
+    )
+
+
+def _decode_hfsc(data):
+    attrs = _netlink.parse_attrs(data)
+    qos = {}
+    for curve, attr_type in (
+        ('rt', _TCA_HFSC_RSC),
+        ('ls', _TCA_HFSC_FSC),
+        ('ul', _TCA_HFSC_USC),
+    ):
+        if attr_type in attrs:
+            m1, d, m2 = _HFSC_CURVE.unpack_from(attrs[attr_type])
+            qos[curve] = {'m1': m1 * 8, 'd': d, 'm2': m2 * 8}
+    return qos
+
+
+_HFSC_CURVE_ATTRS = {
+    'sc': (_TCA_HFSC_RSC, _TCA_HFSC_FSC),
+    'rt': (_TCA_HFSC_RSC,),
+    'ls': (_TCA_HFSC_FSC,),
+    'ul': (_TCA_HFSC_USC,),
+}
+
+_encoders = {'hfsc': _encode_hfsc}
+
+_decoders = {'hfsc': _decode_hfsc}
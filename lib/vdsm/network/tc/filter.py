@@ -3,11 +3,94 @@
 
 from __future__ import absolute_import
 from __future__ import division
+from functools import partial
 import logging
+import re
+import socket
+import struct
 
+from . import _netlink
 from . import _parser
 from . import _wrapper
 
+_ETH_P_ALL = 0x0003
+_PROTOCOLS = {
+    'all': _ETH_P_ALL,
+    'ip': 0x0800,
+    'arp': 0x0806,
+    '802.1q': 0x8100,
+    'ipv6': 0x86DD,
+    '802.1ad': 0x88A8,
+}
+
+_TCA_U32_CLASSID = 1
+_TCA_U32_HASH = 2
+_TCA_U32_LINK = 3
+_TCA_U32_DIVISOR = 4
+_TCA_U32_SEL = 5
+_TCA_U32_ACT = 7
+_TC_U32_TERMINAL = 1
+# struct tc_u32_sel, followed by nkeys struct tc_u32_key
+_U32_SEL = struct.Struct('=BBBxHHhhI')
+# struct tc_u32_key: mask and val in network byte order, off and offmask
+_U32_KEY = struct.Struct('=4s4sii')
+_U32_KEY_BITS = {'u8': 8, 'u16': 16, 'u32': 32}
+
+_TCA_BASIC_CLASSID = 1
+_TCA_BASIC_EMATCHES = 2
+_TCA_BASIC_ACT = 3
+
+_TCA_EMATCH_TREE_HDR = 1
+_TCA_EMATCH_TREE_LIST = 2
+_EMATCH_TREE_HDR = struct.Struct('=HH')
+_EMATCH_HDR = struct.Struct('=HHHH')
+_TCF_EM_META = 4
+_EMATCH_KINDS = {
+    1: 'cmp',
+    2: 'nbyte',
+    3: 'u32',
+    _TCF_EM_META: 'meta',
+    5: 'text',
+    6: 'vlan',
+    7: 'canid',
+    8: 'ipset',
+    9: 'ipt',
+}
+
+_TCA_EM_META_HDR = 1
+_TCA_EM_META_LVALUE = 2
+_TCA_EM_META_RVALUE = 3
+_META_HDR = struct.Struct('=HBBHBB')
+_META_VLAN = (1 << 12) | 46  # TCF_META_TYPE_INT, TCF_META_ID_VLAN_TAG
+_META_VALUE = 1 << 12  # TCF_META_TYPE_INT, TCF_META_ID_VALUE
+_META_RELATIONS = {'eq': 0, 'gt': 1, 'lt': 2}
+_META_MATCH = re.compile(
+    r'meta\((?P<object>\w+)(\s+mask\s+(?P<mask>\S+))?'
+    r'\s+(?P<relation>eq|gt|lt)\s+(?P<value>\d+)\)$'
+)
+
+_TCA_ACT_KIND = 1
+_TCA_ACT_OPTIONS = 2
+_TCA_MIRRED_PARMS = 2
+# struct tc_mirred: index, capab, action, refcnt, bindcnt, eaction, ifindex
+_MIRRED_PARMS = struct.Struct('=IIiiiiI')
+_MIRRED_EACTIONS = {
+    ('egress', 'redirect'): 1,
+    ('egress', 'mirror'): 2,
+    ('ingress', 'redirect'): 3,
+    ('ingress', 'mirror'): 4,
+}
+_TC_ACT_PIPE = 3
+_TC_ACT_STOLEN = 4
+_TC_ACT_OPS = {
+    -1: 'continue',
+    0: 'pass',
+    1: 'reclassify',
+    2: 'drop',
+    _TC_ACT_PIPE: 'pipe',
+    _TC_ACT_STOLEN: 'stolen',
+}
+
 
 def delete(dev, pref, parent=None, protocol=None):
     command = ['filter', 'del', 'dev', dev, 'pref', str(pref)]
@@ -15,7 +98,16 @@ def delete(dev, pref, parent=None, protocol=None):
         command += ['parent', parent]
     if protocol is not None:
         command += ['protocol', protocol]
-    _wrapper.process_request(command)
+    _netlink.request(
+        _netlink.Request(
+            _netlink.RTM_DELTFILTER,
+            _netlink.DELETE,
+            _netlink.ifindex_of(dev, command),
+            parent=0 if parent is None else _netlink.parse_handle(parent),
+            info=_info(pref, protocol),
+            command=command,
+        )
+    )
 
 
 def replace(
@@ -52,7 +144,69 @@ def replace(
             command += value
     for action in actions:
         command += action
-    _wrapper.process_request(command)
+
+    if estimator is not None:
+        raise ValueError('Filter estimators are not supported')
+    if len(opts) != 1:
+        raise ValueError('Expected a single filter kind: %s' % opts)
+    ((kind, tokens),) = opts.items()
+    try:
+        encode, parse_handle = _ENCODERS[kind]
+    except KeyError:
+        raise ValueError('Unsupported filter kind: %s' % kind)
+    if isinstance(tokens, str):
+        tokens = [tokens]
+    actions = [_encode_action(action, command) for action in actions]
+
+    if root or parent is None:
+        parent = _netlink.TC_H_ROOT
+    else:
+        parent = _netlink.parse_handle(parent)
+    _netlink.request(
+        _netlink.Request(
+            _netlink.RTM_NEWTFILTER,
+            _netlink.NLM_F_CREATE,
+            _netlink.ifindex_of(dev, command),
+            handle=0 if handle is None else parse_handle(handle),
+            parent=parent,
+            info=_info(pref, protocol),
+            attrs=[
+                _netlink.kind_attr(kind),
+                _netlink.nested(
+                    _netlink.TCA_OPTIONS, encode(list(tokens), actions)
+                ),
+            ],
+            command=command,
+        )
+    )
+
+
+def dump(dev, parent=None, pref=None):
+    """Returns a generator of dictionaries of the filters of a device
+    reported by the kernel. The dictionaries have the same structure as the
+    ones returned by parse()"""
+    requested_parent = 0 if parent is None else _netlink.parse_handle(parent)
+    for msg in _netlink.dump(
+        _netlink.RTM_GETTFILTER,
+        dev,
+        parent=requested_parent,
+        info=_info(pref, None),
+        command=['filter', 'show', 'dev', dev],
+    ):
+        data = {
+            'protocol': _format_protocol(socket.ntohs(msg.info & 0xFFFF)),
+            'pref': msg.info >> 16,
+            'kind': msg.kind,
+        }
+        if msg.parent != requested_parent:
+            if msg.parent == _netlink.TC_H_ROOT:
+                data['root'] = True
+            else:
+                data['parent'] = _netlink.format_handle(msg.parent)
+        decode = _DECODERS.get(msg.kind)
+        if decode is not None:
+            data[msg.kind] = decode(msg)
+        yield data
 
 
 def show(dev, parent=None, pref=None):
@@ -239,6 +393,313 @@ def _parse_action_order(tokens):
     return int(next(tokens)[:-1])
 
 
+def _info(pref, protocol):
+    """Returns the tcm_info of a filter: its preference and its protocol in
+    network byte order"""
+    if protocol is None:
+        proto = 0
+    elif protocol in _PROTOCOLS:
+        proto = _PROTOCOLS[protocol]
+    else:
+        proto = int(protocol, 16)
+    return (int(pref or 0) << 16) | socket.htons(proto)
+
+
+def _format_protocol(proto):
+    for name, value in _PROTOCOLS.items():
+        if value == proto:
+            return name
+    return '%04x' % proto
+
+
+def _encode_u32(tokens, actions):
+    """Encodes u32 tokens, e.g. ['match', 'u8', '0', '0', 'flowid', '1:5'],
+    into u32 filter options"""
+    attrs = []
+    keys = {}
+    flags = 0
+    while tokens:
+        token = tokens.pop(0)
+        if token == 'match':
+            size, value, mask = tokens[:3]
+            del tokens[:3]
+            offset = 0
+            if tokens[:1] == ['at']:
+                offset = int(tokens[1], 0)
+                del tokens[:2]
+            _add_u32_key(keys, size, int(value, 0), int(mask, 0), offset)
+        elif token in ('classid', 'flowid'):
+            flags |= _TC_U32_TERMINAL
+            classid = _netlink.parse_handle(tokens.pop(0))
+            attrs.append(_netlink.u32_attr(_TCA_U32_CLASSID, classid))
+        else:
+            raise ValueError('Unsupported u32 filter token: %s' % token)
+    sel = _U32_SEL.pack(flags, 0, len(keys), 0, 0, 0, 0, 0)
+    for offset, (value, mask) in sorted(keys.items()):
+        sel += _U32_KEY.pack(_be32(mask), _be32(value), offset, 0)
+    attrs.append(_netlink.attr(_TCA_U32_SEL, sel))
+    if actions:
+        attrs.append(_encode_actions(_TCA_U32_ACT, actions))
+    return attrs
+
+
+def _add_u32_key(keys, size, value, mask, offset):
+    """Adds a match of value under mask at offset to keys, aligned to 32 bits
+    words like tc does"""
+    bits = _U32_KEY_BITS.get(size)
+    if bits is None:
+        raise ValueError('Unsupported u32 match: %s' % size)
+    if value >> bits or mask >> bits or offset % (bits // 8):
+        raise ValueError(
+            'Invalid u32 match: %s %s %s at %s' % (size, value, mask, offset)
+        )
+    shift = 32 - bits - (offset % 4) * 8
+    offset -= offset % 4
+    old_value, old_mask = keys.get(offset, (0, 0))
+    keys[offset] = (
+        old_value | (value & mask) << shift,
+        old_mask | mask << shift,
+    )
+
+
+def _be32(value):
+    return struct.pack('>I', value)
+
+
+def _from_be32(data):
+    return struct.unpack('>I', data)[0]
+
+
+def _parse_u32_handle(handle):
+    """Parses a u32 filter handle, htid:hash:node, e.g., '800::800'"""
+    parts = (handle.split(':') + ['', ''])[:3]
+    htid, bucket, node = [int(part, 16) if part else 0 for part in parts]
+    return (htid << 20) | (bucket << 12) | node
+
+
+def _format_u32_handle(handle):
+    """Formats a u32 filter handle like tc does, e.g., '800::800'"""
+    htid = handle >> 20
+    bucket = (handle >> 12) & 0xFF
+    node = handle & 0xFFF
+    formatted = '%x:' % htid if htid else ''
+    if bucket:
+        formatted += '%x' % bucket
+    if node:
+        formatted += ':%x' % node
+    return formatted
+
+
+def _encode_basic(tokens, actions):
+    """Encodes basic tokens, e.g. ['match', 'meta(vlan eq 16)', 'flowid',
+    '1:10'], into basic filter options"""
+    attrs = []
+    while tokens:
+        token = tokens.pop(0)
+        if token == 'match':
+            attrs.append(_encode_ematch(tokens.pop(0)))
+        elif token in ('classid', 'flowid'):
+            classid = _netlink.parse_handle(tokens.pop(0))
+            attrs.append(_netlink.u32_attr(_TCA_BASIC_CLASSID, classid))
+        else:
+            raise ValueError('Unsupported basic filter token: %s' % token)
+    if actions:
+        attrs.append(_encode_actions(_TCA_BASIC_ACT, actions))
+    return attrs
+
+
+def _encode_ematch(expression):
+    """Encodes an ematch tree of a single meta vlan match, e.g.,
+    'meta(vlan eq 16)'. Other ematches are not supported"""
+    match = _META_MATCH.match(expression)
+    if match is None or match.group('object') != 'vlan':
+        raise ValueError('Unsupported ematch: %s' % expression)
+    relation = _META_RELATIONS[match.group('relation')]
+    mask = match.group('mask')
+    meta = [
+        _netlink.attr(
+            _TCA_EM_META_HDR,
+            _META_HDR.pack(_META_VLAN, 0, relation, _META_VALUE, 0, 0),
+        ),
+        _netlink.u32_attr(
+            _TCA_EM_META_LVALUE, 0 if mask is None else int(mask, 0)
+        ),
+        _netlink.u32_attr(_TCA_EM_META_RVALUE, int(match.group('value'))),
+    ]
+    ematch = _EMATCH_HDR.pack(0, _TCF_EM_META, 0, 0) + b''.join(meta)
+    return _netlink.nested(
+        _TCA_BASIC_EMATCHES,
+        [
+            _netlink.attr(_TCA_EMATCH_TREE_HDR, _EMATCH_TREE_HDR.pack(1, 0)),
+            _netlink.nested(_TCA_EMATCH_TREE_LIST, [_netlink.attr(1, ematch)]),
+        ],
+    )
+
+
+def _encode_actions(attr_type, actions):
+    return _netlink.nested(
+        attr_type,
+        [
+            _netlink.nested(order, action)
+            for order, action in enumerate(actions, 1)
+        ],
+    )
+
+
+def _encode_action(tokens, command):
+    """Encodes the tokens of a mirred action, e.g., ['action', 'mirred',
+    'egress', 'mirror', 'dev', 'eth0']. Other actions are not supported"""
+    tokens = list(tokens)
+    if tokens[:1] == ['action']:
+        del tokens[0]
+    eaction = _MIRRED_EACTIONS.get(tuple(tokens[1:3]))
+    if (
+        len(tokens) != 5
+        or tokens[0] != 'mirred'
+        or eaction is None
+        or tokens[3] != 'dev'
+    ):
+        raise ValueError('Unsupported filter action: %s' % tokens)
+    op = _TC_ACT_PIPE if tokens[2] == 'mirror' else _TC_ACT_STOLEN
+    parms = _MIRRED_PARMS.pack(
+        0, 0, op, 0, 0, eaction, _netlink.ifindex_of(tokens[4], command)
+    )
+    return [
+        _netlink.str_attr(_TCA_ACT_KIND, 'mirred'),
+        _netlink.nested(
+            _TCA_ACT_OPTIONS, [_netlink.attr(_TCA_MIRRED_PARMS, parms)]
+        ),
+    ]
+
+
+def _decode_u32(msg):
+    data = {}
+    if _netlink.TCA_CHAIN in msg.attrs:
+        data['chain'] = _netlink.get_u32(msg.attrs[_netlink.TCA_CHAIN])
+    if _netlink.TCA_OPTIONS not in msg.attrs:
+        return data
+    attrs = _netlink.parse_attrs(msg.attrs[_netlink.TCA_OPTIONS])
+    if msg.handle:
+        data['fh'] = _format_u32_handle(msg.handle)
+        if msg.handle & 0xFFF:
+            data['order'] = msg.handle & 0xFFF
+    if _TCA_U32_DIVISOR in attrs:
+        data['ht_divisor'] = _netlink.get_u32(attrs[_TCA_U32_DIVISOR])
+    if _TCA_U32_HASH in attrs:
+        ht = _netlink.get_u32(attrs[_TCA_U32_HASH])
+        data['key_ht'] = ht >> 20
+        data['key_bkt'] = (ht >> 12) & 0xFF
+    if _TCA_U32_LINK in attrs:
+        link = _netlink.get_u32(attrs[_TCA_U32_LINK])
+        data['link'] = _format_u32_handle(link)
+    if _TCA_U32_CLASSID in attrs:
+        classid = _netlink.get_u32(attrs[_TCA_U32_CLASSID])
+        data['flowid'] = _netlink.format_handle(classid)
+    if _TCA_U32_SEL in attrs:
+        sel = attrs[_TCA_U32_SEL]
+        flags, _, nkeys = _U32_SEL.unpack_from(sel)[:3]
+        if flags & _TC_U32_TERMINAL and 'flowid' not in data:
+            data['terminal'] = True
+        for i in range(nkeys):
+            mask, value, offset, _ = _U32_KEY.unpack_from(
+                sel, _U32_SEL.size + i * _U32_KEY.size
+            )
+            # Like the text parser, report only the last key
+            data['match'] = {
+                'value': _from_be32(value),
+                'mask': _from_be32(mask),
+                'offset': offset,
+            }
+    if _TCA_U32_ACT in attrs:
+        data['actions'] = _decode_actions(attrs[_TCA_U32_ACT])
+    return data
+
+
+def _decode_basic(msg):
+    data = {}
+    if _netlink.TCA_OPTIONS not in msg.attrs:
+        return data
+    attrs = _netlink.parse_attrs(msg.attrs[_netlink.TCA_OPTIONS])
+    if msg.handle:
+        data['handle'] = '0x%x' % msg.handle
+    if _TCA_BASIC_CLASSID in attrs:
+        classid = _netlink.get_u32(attrs[_TCA_BASIC_CLASSID])
+        data['flowid'] = _netlink.format_handle(classid)
+    if _TCA_BASIC_EMATCHES in attrs:
+        data.update(_decode_ematch(attrs[_TCA_BASIC_EMATCHES]))
+    return data
+
+
+def _decode_ematch(data):
+    """Decodes the first ematch of an ematch tree. Currently only meta vlan
+    matches are decoded, like the text parser does"""
+    tree = _netlink.parse_attrs(data)
+    for _, ematch in _netlink.iter_attrs(tree.get(_TCA_EMATCH_TREE_LIST, b'')):
+        _, kind, _, _ = _EMATCH_HDR.unpack_from(ematch)
+        data = {'module': _EMATCH_KINDS.get(kind, str(kind))}
+        if kind == _TCF_EM_META:
+            data.update(_decode_meta(ematch[_EMATCH_HDR.size :]))  # noqa: E203
+        return data
+    return {}
+
+
+def _decode_meta(data):
+    attrs = _netlink.parse_attrs(data)
+    left, _, relation, _, _, _ = _META_HDR.unpack_from(attrs[_TCA_EM_META_HDR])
+    if left != _META_VLAN:
+        return {}
+    relations = dict((v, k) for k, v in _META_RELATIONS.items())
+    return {
+        'object': 'vlan',
+        'mask': _netlink.get_u32(attrs[_TCA_EM_META_LVALUE]),
+        'relation': relations.get(relation),
+        'value': _netlink.get_u32(attrs[_TCA_EM_META_RVALUE]),
+    }
+
+
+def _decode_actions(data):
+    actions = []
+    for order, action in _netlink.iter_attrs(data):
+        attrs = _netlink.parse_attrs(action)
+        data = {
+            'order': order,
+            'kind': _netlink.get_str(attrs.get(_TCA_ACT_KIND, b'')),
+        }
+        if data['kind'] == 'mirred' and _TCA_ACT_OPTIONS in attrs:
+            data.update(_decode_mirred(attrs[_TCA_ACT_OPTIONS]))
+        actions.append(data)
+    return actions
+
+
+def _decode_mirred(data):
+    attrs = _netlink.parse_attrs(data)
+    index, _, op, ref, bind, eaction, ifindex = _MIRRED_PARMS.unpack_from(
+        attrs[_TCA_MIRRED_PARMS]
+    )
+    for direction_action, value in _MIRRED_EACTIONS.items():
+        if value == eaction:
+            action = '%s_%s' % direction_action
+            break
+    else:
+        action = 'unkown'
+    return {
+        'action': action,
+        'target': _netlink.dev_name(ifindex),
+        'op': _TC_ACT_OPS.get(op, str(op)),
+        'index': index,
+        'ref': ref,
+        'bind': bind,
+    }
+
+
+_ENCODERS = {
+    'basic': (_encode_basic, partial(int, base=0)),
+    'u32': (_encode_u32, _parse_u32_handle),
+}
+
+_DECODERS = {'basic': _decode_basic, 'u32': _decode_u32}
+
+
 _ACTIONS = {
     'csum': None,
     'gact': None,
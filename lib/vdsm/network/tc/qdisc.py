@@ -4,30 +4,70 @@
 from __future__ import absolute_import
 from __future__ import division
 from functools import partial
+import struct
 
+from . import _netlink
 from . import _parser
 from . import _wrapper
 
 _TC_PRIO_MAX = 15
 
+_INGRESS_HANDLE = 0xFFFF0000
+
+_TCA_FQ_CODEL_TARGET = 1
+_TCA_FQ_CODEL_LIMIT = 2
+_TCA_FQ_CODEL_INTERVAL = 3
+_TCA_FQ_CODEL_ECN = 4
+_TCA_FQ_CODEL_FLOWS = 5
+_TCA_FQ_CODEL_QUANTUM = 6
+
+_HFSC_QOPT = struct.Struct('=H')
+# struct tc_prio_qopt, used by prio and pfifo_fast
+_PRIO_QOPT = struct.Struct('=i16B')
+_PRIO_DEFAULT_PRIOMAP = (1, 2, 2, 2, 1, 2, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1)
+
 
 def add(dev, kind, parent=None, handle=None, **opts):
-    command = ['qdisc', 'add', 'dev', dev]
-    if kind != 'ingress':
-        if parent is None:
-            command.append('root')
-        else:
-            command += ['parent', parent]
-    if handle is not None:
-        command += ['handle', handle]
-    command.append(kind)
-    for key, value in opts.items():
-        command += [key, value]
-    _wrapper.process_request(command)
+    _modify(
+        'add',
+        _netlink.RTM_NEWQDISC,
+        _netlink.ADD,
+        dev,
+        kind,
+        parent,
+        handle,
+        opts,
+    )
 
 
 def delete(dev, kind=None, parent=None, handle=None, **opts):
-    command = ['qdisc', 'del', 'dev', dev]
+    _modify(
+        'del',
+        _netlink.RTM_DELQDISC,
+        _netlink.DELETE,
+        dev,
+        kind,
+        parent,
+        handle,
+        opts,
+    )
+
+
+def replace(dev, kind, parent=None, handle=None, **opts):
+    _modify(
+        'replace',
+        _netlink.RTM_NEWQDISC,
+        _netlink.REPLACE,
+        dev,
+        kind,
+        parent,
+        handle,
+        opts,
+    )
+
+
+def _modify(action, msg_type, flags, dev, kind, parent, handle, opts):
+    command = ['qdisc', action, 'dev', dev]
     if kind != 'ingress':
         if parent is None:
             command.append('root')
@@ -39,22 +79,66 @@ def delete(dev, kind=None, parent=None, handle=None, **opts):
         command.append(kind)
     for key, value in opts.items():
         command += [key, value]
-    _wrapper.process_request(command)
-
 
-def replace(dev, kind, parent=None, handle=None, **opts):
-    command = ['qdisc', 'replace', 'dev', dev]
-    if kind != 'ingress':
-        if parent is None:
-            command.append('root')
-        else:
-            command += ['parent', parent]
+    attrs = []
+    if kind is not None:
+        attrs.append(_netlink.kind_attr(kind))
+    if msg_type == _netlink.RTM_NEWQDISC:
+        options = _encode_options(kind, opts)
+        if options is not None:
+            attrs.append(_netlink.attr(_netlink.TCA_OPTIONS, options))
     if handle is not None:
-        command += ['handle', handle]
-    command.append(kind)
-    for key, value in opts.items():
-        command += [key, value]
-    _wrapper.process_request(command)
+        handle = _netlink.parse_qdisc_handle(handle)
+    elif kind == 'ingress':
+        handle = _INGRESS_HANDLE
+    else:
+        handle = 0
+    if kind == 'ingress':
+        parent = _netlink.TC_H_INGRESS
+    elif parent is None:
+        parent = _netlink.TC_H_ROOT
+    else:
+        parent = _netlink.parse_handle(parent)
+    _netlink.request(
+        _netlink.Request(
+            msg_type,
+            flags,
+            _netlink.ifindex_of(dev, command),
+            handle=handle,
+            parent=parent,
+            attrs=attrs,
+            command=command,
+        )
+    )
+
+
+def dump(dev=None):
+    """Returns a generator of dictionaries of the qdiscs reported by the
+    kernel for a device, or for all devices if dev is None. The dictionaries
+    have the same structure as the ones returned by parse()"""
+    for msg in _netlink.dump(
+        _netlink.RTM_GETQDISC, dev, command=['qdisc', 'show']
+    ):
+        if msg.kind == 'noqueue':
+            continue
+        data = {
+            'kind': msg.kind,
+            'handle': _netlink.format_qdisc_handle(msg.handle),
+        }
+        if msg.dev is not None:
+            data['dev'] = msg.dev
+        if msg.parent == _netlink.TC_H_ROOT:
+            data['root'] = True
+        elif msg.parent:
+            data['parent'] = _netlink.format_handle(msg.parent)
+        if msg.info != 1:  # Like tc, omit the default refcnt
+            data['refcnt'] = msg.info
+        decode = _decoders.get(msg.kind)
+        if decode is not None and _netlink.TCA_OPTIONS in msg.attrs:
+            options = decode(msg.attrs[_netlink.TCA_OPTIONS])
+            if options:
+                data[msg.kind] = options
+        yield data
 
 
 def show(dev=None):
@@ -121,3 +205,89 @@ _spec = {
         'priomap': _parse_pfifo_fast_priomap,
     },
 }
+
+
+def _encode_options(kind, opts):
+    """Returns the TCA_OPTIONS payload for a qdisc of kind with opts, tc
+    command line options, or None if the qdisc has no options"""
+    encode = _encoders.get(kind)
+    if encode is None:
+        if opts:
+            raise ValueError(
+                'Unsupported options for %s qdisc: %s' % (kind, opts)
+            )
+        return None
+    return encode(**opts)
+
+
+def _encode_hfsc(default=None):
+    return _HFSC_QOPT.pack(0 if default is None else int(default, 16))
+
+
+def _encode_fq_codel(**opts):
+    attrs = []
+    for key, value in opts.items():
+        try:
+            attr_type, convert = _FQ_CODEL_OPTIONS[key]
+        except KeyError:
+            raise ValueError('Unsupported fq_codel option: %s' % key)
+        attrs.append(_netlink.u32_attr(attr_type, convert(value)))
+    return b''.join(attrs)
+
+
+def _encode_prio(bands=3, priomap=_PRIO_DEFAULT_PRIOMAP):
+    return _PRIO_QOPT.pack(int(bands), *priomap)
+
+
+def _decode_hfsc(data):
+    (default,) = _HFSC_QOPT.unpack_from(data)
+    return {'default': default} if default else {}
+
+
+def _decode_fq_codel(data):
+    attrs = _netlink.parse_attrs(data)
+    options = {}
+    for key, (attr_type, _) in _FQ_CODEL_OPTIONS.items():
+        if attr_type in attrs:
+            options[key] = _netlink.get_u32(attrs[attr_type])
+    if options.pop('ecn', 0):
+        options['ecn'] = True
+    return options
+
+
+def _decode_pfifo_fast(data):
+    qopt = _PRIO_QOPT.unpack_from(data)
+    priomap = list(qopt[1 : _TC_PRIO_MAX + 1])  # noqa: E203
+    return {'bands': qopt[0], 'priomap': priomap}
+
+
+def _parse_time_option(value):
+    """Converts a tc time option (e.g. '5ms', '100us', '1s') to
+    microseconds"""
+    return _parser.parse_time(iter([value]))
+
+
+def _parse_packets_option(value):
+    return int(str(value).rstrip('p'))
+
+
+_FQ_CODEL_OPTIONS = {
+    'ecn': (_TCA_FQ_CODEL_ECN, int),
+    'flows': (_TCA_FQ_CODEL_FLOWS, int),
+    'interval': (_TCA_FQ_CODEL_INTERVAL, _parse_time_option),
+    'limit': (_TCA_FQ_CODEL_LIMIT, _parse_packets_option),
+    'quantum': (_TCA_FQ_CODEL_QUANTUM, int),
+    'target': (_TCA_FQ_CODEL_TARGET, _parse_time_option),
+}
+
+_encoders = {
+    'fq_codel': _encode_fq_codel,
+    'hfsc': _encode_hfsc,
+    'prio': _encode_prio,
+}
+
+_decoders = {
+    'fq_codel': _decode_fq_codel,
+    'hfsc': _decode_hfsc,
+    'pfifo_fast': _decode_pfifo_fast,
+}
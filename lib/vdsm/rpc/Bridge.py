@@ -331,6 +331,7 @@ command_info = {
     'Host_getHardwareInfo': {'ret': 'info'},
     'Host_getLVMVolumeGroups': {'ret': 'vglist'},
     'Host_getStats': {'ret': 'info'},
+    'Host_getRpcStats': {'ret': 'stats'},
     'Host_getStorageDomains': {'ret': 'domlist'},
     'Host_getStorageRepoStats': {'ret': Host_getStorageRepoStats_Ret},
     'Host_hostdevListByCaps': {'ret': 'deviceList'},
@@ -427,6 +428,7 @@ command_info = {
     'Lease_info': {'ret': 'result'},
     'Lease_status': {'ret': 'result'},
     'NBD_start_server': {'ret': 'result'},
+    'NBD_get_stats': {'ret': 'result'},
     'ManagedVolume_attach_volume': {'ret': 'result'},
     'ManagedVolume_volumes_info': {'ret': 'result'},
     'VM_start_backup': {'ret': 'result'},
@@ -8,6 +8,7 @@ import functools
 import logging
 
 from yajsonrpc import JsonRpcServer
+from yajsonrpc.rpcstats import RpcStats
 from yajsonrpc.stompserver import StompReactor
 
 from vdsm import executor
@@ -20,6 +21,8 @@ _TIMEOUT = config.getint('rpc', 'worker_timeout')
 _THREADS = config.getint('rpc', 'worker_threads')
 _TASK_PER_WORKER = config.getint('rpc', 'tasks_per_worker')
 _TASKS = _THREADS * _TASK_PER_WORKER
+_SLOW_CALL_THRESHOLD = config.getfloat('rpc', 'slow_call_threshold')
+_SLOW_CALLS = config.getint('rpc', 'slow_calls')
 
 
 class BindingJsonRpc(object):
@@ -31,10 +34,14 @@ class BindingJsonRpc(object):
                                            max_tasks=_TASKS,
                                            scheduler=scheduler)
         self._bridge = bridge
+        self._stats = RpcStats(slow_call_threshold=_SLOW_CALL_THRESHOLD,
+                               max_slow_calls=_SLOW_CALLS,
+                               scheduler=scheduler)
         self._server = JsonRpcServer(
             bridge, timeout, cif,
             functools.partial(self._executor.dispatch,
-                              timeout=_TIMEOUT, discard=False))
+                              timeout=_TIMEOUT, discard=False),
+            stats=self._stats)
         self._reactor = StompReactor(subs)
         self.startReactor()
 
@@ -52,6 +59,10 @@ class BindingJsonRpc(object):
     def bridge(self):
         return self._bridge
 
+    @property
+    def stats(self):
+        return self._stats
+
     def start(self):
         self._executor.start()
 
@@ -0,0 +1,151 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Aggregation of events sent to clients.
+
+Events report the current state of an object, such as a VM or a job, so a
+client needs only the latest event for each object. During mass events,
+for example a storage outage pausing hundreds of VMs, sending every event
+separately floods the connection and the client.
+
+EventAggregator keeps the latest event for each event id during a short
+window. When the window expires, events of types whose parameters map
+object ids to their state are merged into one event, and all events are
+sent.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import collections
+import logging
+import threading
+
+# Event types whose parameters map an object id to its state. Events of
+# these types can be merged, using the event id of the first event.
+MERGEABLE_EVENTS = frozenset([
+    '|virt|VM_status|',
+    '|virt|VM_migration_status|',
+])
+
+
+def event_type(event_id):
+    """
+    Return the event type, the event id without the object id.
+
+    Example:
+        '|virt|VM_status|vm-id' -> '|virt|VM_status|'
+    """
+    return event_id[:event_id.rfind('|') + 1]
+
+
+class EventAggregator(object):
+
+    log = logging.getLogger("rpc.EventAggregator")
+
+    def __init__(self, send, scheduler, window, max_merged=100):
+        """
+        Arguments:
+            send (callable): called as send(event_id, params) to send an
+                event.
+            scheduler (vdsm.schedule.Scheduler): used to send pending events
+                when the window expires.
+            window (float): seconds to aggregate events. If 0, events are
+                sent immediately.
+            max_merged (int): maximum number of objects in one merged event.
+        """
+        self._send = send
+        self._scheduler = scheduler
+        self._window = window
+        self._max_merged = max_merged
+        self._lock = threading.Lock()
+        self._pending = collections.OrderedDict()
+        self._flush_call = None
+        self._received = 0
+        self._sent = 0
+        self._coalesced = 0
+        self._merged = 0
+
+    def notify(self, event_id, params):
+        """
+        Queue an event, replacing a pending event with the same id.
+        """
+        if self._window == 0:
+            with self._lock:
+                self._received += 1
+            self._send_event(event_id, params)
+            return
+
+        with self._lock:
+            self._received += 1
+            if event_id in self._pending:
+                self._coalesced += 1
+            self._pending[event_id] = params
+            if self._flush_call is None:
+                self._flush_call = self._scheduler.schedule(
+                    self._window, self.flush)
+
+    def flush(self):
+        """
+        Send all pending events.
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = collections.OrderedDict()
+            if self._flush_call is not None:
+                self._flush_call.cancel()
+                self._flush_call = None
+
+        for event_id, params in self._merge(pending):
+            self._send_event(event_id, params)
+
+    def stats(self):
+        """
+        Return event counters:
+            received: events passed to notify()
+            sent: events sent to clients
+            coalesced: events replaced by a newer event with the same id
+            merged: events merged into another event
+        """
+        with self._lock:
+            return {
+                "received": self._received,
+                "sent": self._sent,
+                "coalesced": self._coalesced,
+                "merged": self._merged,
+            }
+
+    def _merge(self, pending):
+        merged = collections.OrderedDict()
+        groups = {}
+        merged_count = 0
+
+        for event_id, params in pending.items():
+            etype = event_type(event_id)
+            if etype not in MERGEABLE_EVENTS:
+                merged[event_id] = params
+                continue
+
+            group = groups.get(etype)
+            if group is None or len(merged[group]) >= self._max_merged:
+                groups[etype] = event_id
+                merged[event_id] = dict(params)
+            else:
+                merged[group].update(params)
+                merged_count += 1
+
+        if merged_count:
+            with self._lock:
+                self._merged += merged_count
+
+        return merged.items()
+
+    def _send_event(self, event_id, params):
+        try:
+            self._send(event_id, params)
+        except Exception:
+            self.log.exception("Error sending event %s", event_id)
+        else:
+            with self._lock:
+                self._sent += 1
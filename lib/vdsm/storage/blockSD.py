@@ -746,7 +746,7 @@ class BlockStorageDomainManifest(sd.StorageDomainManifest):
                 vols[volName] = sd.ImgsPar(images, ip.parent)
         return vols, remnants
 
-    def getAllVolumes(self):
+    def getAllVolumes(self, imgUUID=None):
         vols, rems = self.getAllVolumesImages()
         return vols
 
@@ -1594,6 +1594,11 @@ class BlockStorageDomain(sd.StorageDomain):
 
         raise se.StorageDomainDoesNotExist(sdUUID)
 
+    @staticmethod
+    def findDomainPaths(sdUUIDs):
+        # Single vgs command for all domains.
+        return {vg.name: vg.name for vg in lvm.getVGs(sdUUIDs) if _isSD(vg)}
+
     def getVolumeClass(self):
         """
         Return a type specific volume generator object
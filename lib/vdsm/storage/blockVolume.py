@@ -17,6 +17,7 @@ from vdsm.storage import constants as sc
 from vdsm.storage import exception as se
 from vdsm.storage import lvm
 from vdsm.storage import qemuimg
+from vdsm.storage import qemuimgcache
 from vdsm.storage import resourceManager as rm
 from vdsm.storage import volume
 from vdsm.storage.sdc import sdCache
@@ -674,6 +675,7 @@ class BlockVolume(volume.Volume):
         # Backend APIs:
         sizemb = utils.round(new_size, MiB) // MiB
         lvm.extendLV(self.sdUUID, self.volUUID, sizemb)
+        qemuimgcache.invalidate(self.getVolumePath())
 
     def reduce(self, new_size, allowActive=False):
         """
@@ -0,0 +1,288 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Host level scheduler for qemu-img convert copies.
+
+Copies are admitted only if the number of running copies on the host and on
+every storage domain involved in the copy is below the configured limits.
+Other copies wait until a running copy finishes.
+
+Every admitted copy gets the qemu-img convert tuning for the copy:
+
+- rate_limit: the storage domain bandwidth budget divided by the number of
+  concurrent copies allowed on the domain, so running copies never exceed
+  the budget.
+- coroutines: number of parallel requests, based on source and destination
+  storage type.
+
+Typical usage:
+
+    copy = copyscheduler.copy(
+        domains=(src_sd_id, dst_sd_id),
+        src_type=copyscheduler.BLOCK,
+        dst_type=copyscheduler.FILE)
+
+    with copy:
+        operation = qemuimg.convert(
+            ...
+            coroutines=copy.coroutines,
+            rate_limit=copy.rate_limit,
+            size=capacity)
+        copy.run(operation)
+
+copy.cancel() may be called from another thread to cancel a waiting or
+running copy.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import collections
+import logging
+import threading
+
+from vdsm.common import exception
+from vdsm.common.config import config
+from vdsm.common.time import monotonic_time
+from vdsm.common.units import MiB
+from vdsm.storage import sd
+
+log = logging.getLogger("storage.copyscheduler")
+
+# Storage types
+BLOCK = "block"
+FILE = "file"
+NETWORK = "network"
+
+
+class Copy(object):
+    """
+    A copy managed by the scheduler. Entering the context waits until the
+    copy is admitted.
+    """
+
+    def __init__(self, scheduler, domains, src_type, dst_type):
+        self._scheduler = scheduler
+        self.domains = frozenset(d for d in domains if d is not None)
+        self.src_type = src_type
+        self.dst_type = dst_type
+        self.rate_limit = None
+        self.coroutines = None
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._operation = None
+
+    def __enter__(self):
+        self._scheduler._admit(self)
+        return self
+
+    def __exit__(self, t, v, tb):
+        self._scheduler._release(self)
+
+    def run(self, operation):
+        """
+        Run operation, a qemuimg.ProgressCommand.
+
+        Raises:
+            exception.ActionStopped if the copy was cancelled.
+        """
+        with self._lock:
+            if self._cancelled:
+                raise exception.ActionStopped()
+            self._operation = operation
+        try:
+            operation.run()
+        finally:
+            throughput = operation.throughput
+            if throughput is not None:
+                log.info("Copy finished in %.2f seconds (%.2f MiB/s)",
+                         operation.elapsed, throughput / MiB)
+
+    def cancel(self):
+        """
+        Cancel a waiting or running copy. May be called from any thread.
+        """
+        with self._lock:
+            self._cancelled = True
+            operation = self._operation
+        if operation is None:
+            self._scheduler._wakeup()
+        else:
+            operation.abort()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    @property
+    def progress(self):
+        """
+        Return copy progress (0-100), or None if the copy did not start yet.
+        """
+        return getattr(self._operation, "progress", None)
+
+    @property
+    def throughput(self):
+        """
+        Return achieved throughput in bytes per second, or None if not
+        available.
+        """
+        return getattr(self._operation, "throughput", None)
+
+    @property
+    def eta(self):
+        """
+        Return estimated seconds until the copy completes, or None if not
+        available.
+        """
+        return getattr(self._operation, "eta", None)
+
+    @property
+    def stalled(self):
+        """
+        Return True if the running copy did not make progress recently, or
+        None if the copy did not start yet.
+        """
+        return getattr(self._operation, "stalled", None)
+
+
+class CopyScheduler(object):
+    """
+    Admit copies under host and storage domain concurrency limits.
+
+    Arguments:
+        max_copies (int): maximum number of copies on this host, 0 for no
+            limit.
+        max_domain_copies (int): maximum number of copies reading or writing
+            to a storage domain, 0 for no limit.
+        domain_bandwidth (int): storage domain bandwidth budget in bytes per
+            second, 0 for no limit. Requires max_domain_copies.
+        coroutines (dict): number of qemu-img coroutines per storage type.
+            The smaller value of the source and destination types is used.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, max_copies=0, max_domain_copies=0,
+                 domain_bandwidth=0, coroutines=None, clock=monotonic_time):
+        if domain_bandwidth and not max_domain_copies:
+            raise ValueError(
+                "domain_bandwidth requires max_domain_copies")
+        self._max_copies = max_copies
+        self._max_domain_copies = max_domain_copies
+        self._domain_bandwidth = domain_bandwidth
+        self._coroutines = coroutines or {}
+        self._clock = clock
+        self._cond = threading.Condition(threading.Lock())
+        self._running = 0
+        self._domains = collections.Counter()
+        self._waiting = 0
+
+    def copy(self, domains, src_type, dst_type):
+        return Copy(self, domains, src_type, dst_type)
+
+    def info(self):
+        with self._cond:
+            return {
+                "running": self._running,
+                "waiting": self._waiting,
+                "domains": dict(self._domains),
+            }
+
+    def _admit(self, copy):
+        start = self._clock()
+        with self._cond:
+            self._waiting += 1
+            try:
+                while not self._can_run(copy):
+                    if copy.cancelled:
+                        raise exception.ActionStopped()
+                    self._cond.wait()
+                if copy.cancelled:
+                    raise exception.ActionStopped()
+            finally:
+                self._waiting -= 1
+
+            self._running += 1
+            for domain in copy.domains:
+                self._domains[domain] += 1
+
+        copy.rate_limit = self._rate_limit()
+        copy.coroutines = self._copy_coroutines(copy)
+
+        waited = self._clock() - start
+        log.info("Copy admitted after %.2f seconds (domains=%s, "
+                 "rate_limit=%s, coroutines=%s)", waited,
+                 sorted(copy.domains), copy.rate_limit, copy.coroutines)
+
+    def _release(self, copy):
+        with self._cond:
+            self._running -= 1
+            for domain in copy.domains:
+                self._domains[domain] -= 1
+                if self._domains[domain] == 0:
+                    del self._domains[domain]
+            self._cond.notify_all()
+
+    def _wakeup(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _can_run(self, copy):
+        # Must be called when holding the lock.
+        if self._max_copies and self._running >= self._max_copies:
+            return False
+        if self._max_domain_copies:
+            for domain in copy.domains:
+                if self._domains[domain] >= self._max_domain_copies:
+                    return False
+        return True
+
+    def _rate_limit(self):
+        if not self._domain_bandwidth:
+            return None
+        return self._domain_bandwidth // self._max_domain_copies
+
+    def _copy_coroutines(self, copy):
+        values = [self._coroutines[t]
+                  for t in (copy.src_type, copy.dst_type)
+                  if self._coroutines.get(t)]
+        return min(values) if values else None
+
+
+def _create_scheduler():
+    return CopyScheduler(
+        max_copies=config.getint("irs", "copy_max_copies"),
+        max_domain_copies=config.getint("irs", "copy_max_domain_copies"),
+        domain_bandwidth=config.getint("irs", "copy_domain_bandwidth") * MiB,
+        coroutines={
+            BLOCK: config.getint("irs", "copy_coroutines_block"),
+            FILE: config.getint("irs", "copy_coroutines_file"),
+            NETWORK: config.getint("irs", "copy_coroutines_network"),
+        })
+
+
+_scheduler = _create_scheduler()
+
+
+def copy(domains, src_type, dst_type):
+    """
+    Create a copy managed by the host copy scheduler.
+
+    Arguments:
+        domains (iterable): ids of storage domains read or written by the
+            copy. None values are ignored.
+        src_type (str): source storage type (BLOCK, FILE, NETWORK)
+        dst_type (str): destination storage type (BLOCK, FILE, NETWORK)
+    """
+    return _scheduler.copy(domains, src_type, dst_type)
+
+
+def storage_type(dom):
+    """
+    Return the storage type of storage domain dom.
+    """
+    if dom.getStorageType() in sd.BLOCK_DOMAIN_TYPES:
+        return BLOCK
+    return FILE
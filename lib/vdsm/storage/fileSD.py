@@ -3,7 +3,6 @@
 
 from __future__ import absolute_import
 
-import collections
 import os
 import errno
 import logging
@@ -18,10 +17,12 @@ import six
 from vdsm import utils
 from vdsm.common import concurrent
 from vdsm.common import supervdsm
+from vdsm.common.config import config
 from vdsm.common.units import MiB
 from vdsm.storage import clusterlock
 from vdsm.storage import constants as sc
 from vdsm.storage import exception as se
+from vdsm.storage import fileindex
 from vdsm.storage import fileUtils
 from vdsm.storage import fileVolume
 from vdsm.storage import mount
@@ -146,6 +147,16 @@ class FileStorageDomainManifest(sd.StorageDomainManifest):
         if not self.oop.fileUtils.pathExists(self.metafile):
             raise se.StorageDomainMetadataNotFound(self.sdUUID, self.metafile)
 
+        if config.getboolean("irs", "file_volume_index"):
+            self._volume_index = fileindex.VolumeIndex(
+                self.sdUUID,
+                self._getImagesDir(),
+                check=config.getboolean("irs", "file_volume_index_check"),
+                check_interval=config.getint(
+                    "irs", "file_volume_index_refresh_interval"))
+        else:
+            self._volume_index = None
+
     @classmethod
     def special_volumes(cls, version):
         if cls.supports_external_leases(version):
@@ -216,6 +227,8 @@ class FileStorageDomainManifest(sd.StorageDomainManifest):
         except OSError as e:
             self.log.error("image: %s can't be moved", currImgDir)
             raise se.ImageDeleteError("%s %s" % (imgUUID, str(e)))
+        finally:
+            self.invalidate_image(imgUUID)
 
     def purgeImage(self, sdUUID, imgUUID, volsImgs, discard):
         self.log.debug("Purging image %s", imgUUID)
@@ -239,6 +252,8 @@ class FileStorageDomainManifest(sd.StorageDomainManifest):
                 self.log.error("removed image dir: %s can't be removed",
                                toDelDir)
                 raise se.ImageDeleteError("%s %s" % (imgUUID, str(e)))
+        finally:
+            self.invalidate_image(os.path.basename(toDelDir))
 
     def _deleteVolumeFile(self, path):
         self.log.info("Removing file: %s", path)
@@ -250,10 +265,15 @@ class FileStorageDomainManifest(sd.StorageDomainManifest):
             else:
                 self.log.error("File %r cannot be removed: %s", path, e)
 
-    def getAllVolumes(self):
+    def getAllVolumes(self, imgUUID=None):
         """
         Return dict {volUUID: ((imgUUIDs,), parentUUID)} of the domain.
 
+        If imgUUID is specified, the volumes of this image are current even
+        if they were modified by another host recently; other images may be
+        reported as they were up to file_volume_index_refresh_interval
+        seconds ago.
+
         (imgUUIDs,) is a tuple of all the images that contain a certain
         volUUID.  For non-templates volumes, this tuple consists of a single
         image.  For template volume it consists of all the images that are
@@ -267,18 +287,11 @@ class FileStorageDomainManifest(sd.StorageDomainManifest):
         Template volumes have no parent, and thus we report BLANK_UUID as their
         parentUUID.
         """
-        volMetaPattern = os.path.join(glob.escape(self.mountpoint),
-                                      self.sdUUID,
-                                      sd.DOMAIN_IMAGES, "*", "*.meta")
-        volMetaPaths = self.oop.glob.glob(volMetaPattern)
-
         # First create mapping from images to volumes
-        images = collections.defaultdict(list)
-        for metaPath in volMetaPaths:
-            head, tail = os.path.split(metaPath)
-            volUUID, volExt = os.path.splitext(tail)
-            imgUUID = os.path.basename(head)
-            images[imgUUID].append(volUUID)
+        if self._volume_index is None:
+            images = fileindex.scan_volumes(self.oop, self._getImagesDir())
+        else:
+            images = self._volume_index.volumes(imgUUID)
 
         # Using images to volumes mapping, we can create volumes to images
         # mapping, detecting template volumes and template images, based on
@@ -318,15 +331,16 @@ class FileStorageDomainManifest(sd.StorageDomainManifest):
         """
         Fetch the set of the Image UUIDs in the SD.
         """
-        # Get Volumes of an image
-        pattern = os.path.join(glob.escape(self.mountpoint), self.sdUUID,
-                               sd.DOMAIN_IMAGES, UUID_GLOB_PATTERN)
-        files = self.oop.glob.glob(pattern)
-        images = set()
-        for i in files:
-            if self.oop.os.path.isdir(i):
-                images.add(os.path.basename(i))
-        return images
+        if self._volume_index is None:
+            return fileindex.scan_images(self.oop, self._getImagesDir())
+        return self._volume_index.images()
+
+    def invalidate_image(self, imgUUID):
+        if self._volume_index is not None:
+            self._volume_index.invalidate(imgUUID)
+
+    def _getImagesDir(self):
+        return os.path.join(self.domaindir, sd.DOMAIN_IMAGES)
 
     def getVolumeLease(self, imgUUID, volUUID):
         """
@@ -951,9 +965,28 @@ def _getMountsList(pattern="*"):
 
 
 def scanDomains(pattern="*"):
-    log = logging.getLogger("storage.scandomains")
+    return _scanMounts(_getMountsList(pattern))
 
-    mntList = _getMountsList(pattern)
+
+def findDomainPaths(sdUUIDs, mntList):
+    """
+    Look up domains sdUUIDs in the mounts in mntList, globbing every mount
+    once.
+
+    Returns dict mapping sdUUID to domain path for the domains found.
+    """
+    wanted = frozenset(sdUUIDs)
+    found = {}
+    for sdUUID, domainPath in _scanMounts(mntList):
+        if sdUUID in wanted and sdUUID not in found:
+            found[sdUUID] = domainPath
+            if len(found) == len(wanted):
+                break
+    return found
+
+
+def _scanMounts(mntList):
+    log = logging.getLogger("storage.scandomains")
 
     def collectMetaFiles(mountPoint):
         try:
@@ -642,6 +642,9 @@ class FileVolume(volume.Volume):
             eFound = e
             self.log.error("cannot remove volume's %s metadata",
                            self.volUUID, exc_info=True)
+        finally:
+            sdCache.produce_manifest(self.sdUUID).invalidate_image(
+                self.imgUUID)
 
         raise eFound
 
@@ -726,6 +729,8 @@ class FileVolume(volume.Volume):
         self._manifest.volUUID = newUUID
         self._manifest.volumePath = volPath
 
+        sdCache.produce_manifest(self.sdUUID).invalidate_image(self.imgUUID)
+
     def getMetaVolumePath(self, vol_path=None):
         # pylint: disable=no-member
         return self._manifest.getMetaVolumePath(vol_path)
@@ -0,0 +1,323 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Index of images and volumes in a file storage domain.
+
+Listing all volumes in a file storage domain requires globbing every image
+directory in the domain, which is slow on NFS domains with many volumes. The
+index keeps the images and volumes found in the domain, and refreshes
+incrementally:
+
+- The images directory is checked on every access using a single stat. If
+  its mtime did not change, no image was added or removed, and we do not
+  need to list the images directory.
+- Image directories are not checked on every access. Changes made by this
+  host must invalidate the modified image, and changes made by other hosts
+  are detected by checking the mtime of all image directories every
+  check_interval seconds. Callers that must see the current volumes of an
+  image, for example when preparing an image after the SPM created a new
+  leaf, specify the image, and its directory is checked on every access.
+
+A directory may be modified again after it was listed, without changing its
+mtime if the change happened in the same mtime granularity. Comparing the
+host clock with the mtime set by the storage server is not reliable, so a
+directory is trusted only when its mtime did not change between two
+refreshes; until then it is listed again on every refresh.
+
+Inotify is not used; it does not report changes made by other hosts on
+shared storage, and accessing storage from the vdsm process may block it if
+storage becomes non-responsive.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import errno
+import fnmatch
+import glob
+import logging
+import os
+import threading
+
+from vdsm.common import concurrent
+from vdsm.common.time import monotonic_time
+from vdsm.storage import constants as sc
+from vdsm.storage import outOfProcess as oop
+
+log = logging.getLogger("storage.fileindex")
+
+# Default interval in seconds between checks of all image directories.
+CHECK_INTERVAL = 60
+
+META_EXT = ".meta"
+
+
+class CacheStats(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def info(self):
+        with self._lock:
+            calls = self._hits + self._misses
+            hit_ratio = (100 * self._hits / calls) if calls > 0 else 0
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": hit_ratio,
+                "inconsistencies": self._inconsistencies,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._inconsistencies = 0
+
+    def hit(self, count=1):
+        with self._lock:
+            self._hits += count
+
+    def miss(self, count=1):
+        with self._lock:
+            self._misses += count
+
+    def inconsistency(self):
+        with self._lock:
+            self._inconsistencies += 1
+
+
+_stats = CacheStats()
+
+
+def cache_stats():
+    """
+    Return hits and misses of all file domains indexes. A hit is a directory
+    found unchanged, a miss is a directory that had to be listed.
+    """
+    return _stats.info()
+
+
+class _Entry(object):
+
+    def __init__(self, mtime, names, trusted):
+        self.mtime = mtime
+        self.names = names
+        self.trusted = trusted
+
+
+class VolumeIndex(object):
+    """
+    Index of images and volumes in images_dir of storage domain sd_id.
+
+    Changes made by other hosts inside existing images are detected within
+    check_interval seconds, or immediately for the image specified when
+    getting the volumes.
+
+    If check is True, the index is checked on every access against a full
+    scan of the images directory. Inconsistencies are logged and the index
+    is rebuilt from the scan results.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, sd_id, images_dir, check=False,
+                 check_interval=CHECK_INTERVAL, clock=monotonic_time):
+        self._sd_id = sd_id
+        self._images_dir = images_dir
+        self._check = check
+        self._check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._top = None
+        self._images = {}
+        self._next_check = None
+
+    def images(self):
+        """
+        Return set of images ids in the images directory.
+        """
+        with self._lock:
+            iop = oop.getProcessPool(self._sd_id)
+            self._refresh_images(iop)
+            images = set(img_id for img_id in self._images
+                         if fnmatch.fnmatch(img_id, sc.UUID_GLOB_PATTERN))
+            if self._check:
+                images = self._check_images(iop, images)
+            return images
+
+    def volumes(self, img_id=None):
+        """
+        Return dict mapping image id to list of volumes ids in this image.
+        Template volumes appear in every image linking to the template.
+
+        If img_id is specified, its directory is checked even if
+        check_interval did not expire, so its volumes are current.
+        """
+        with self._lock:
+            iop = oop.getProcessPool(self._sd_id)
+            self._refresh_images(iop)
+            now = self._clock()
+            if self._next_check is None or now >= self._next_check:
+                self._check_mtimes(iop, list(self._images))
+                self._next_check = now + self._check_interval
+            elif img_id in self._images:
+                self._check_mtimes(iop, [img_id])
+            self._refresh_volumes(iop)
+            volumes = {img_id: list(entry.names)
+                       for img_id, entry in self._images.items()}
+            if self._check:
+                volumes = self._check_volumes(iop, volumes)
+            return volumes
+
+    def invalidate(self, img_id=None):
+        """
+        Invalidate images list, and img_id volumes if specified. Must be
+        called after creating, removing or renaming images or volumes.
+        """
+        with self._lock:
+            if self._top is not None:
+                self._top.trusted = False
+            if img_id is not None:
+                entry = self._images.get(img_id)
+                if entry is not None:
+                    entry.trusted = False
+
+    def clear(self):
+        with self._lock:
+            self._top = None
+            self._images.clear()
+            self._next_check = None
+
+    # Must be called when holding the lock.
+
+    def _refresh_images(self, iop):
+        mtime = iop.os.stat(self._images_dir).st_mtime
+
+        top = self._top
+        if top is not None and top.trusted and top.mtime == mtime:
+            _stats.hit()
+            return
+
+        _stats.miss()
+        # Include also removed images (e.g. "_remove_me_<uuid>") since their
+        # volumes are reported until the image is purged.
+        pattern = os.path.join(glob.escape(self._images_dir), "*")
+        names = set(os.path.basename(p) for p in iop.glob.glob(pattern))
+
+        for img_id in list(self._images):
+            if img_id not in names:
+                del self._images[img_id]
+
+        for img_id in names:
+            if img_id in self._images:
+                continue
+            path = os.path.join(self._images_dir, img_id)
+            # Image directory is listed on the next volumes refresh.
+            if iop.os.path.isdir(path):
+                self._images[img_id] = _Entry(None, (), False)
+
+        trusted = top is not None and top.mtime == mtime
+        self._top = _Entry(mtime, names, trusted)
+
+    def _check_mtimes(self, iop, img_ids):
+        """
+        Distrust image directories modified since they were listed.
+        """
+        def stat(img_id):
+            path = os.path.join(self._images_dir, img_id)
+            return img_id, _mtime(iop, path)
+
+        for res in concurrent.tmap(
+                stat, img_ids, max_workers=oop.HELPERS_PER_DOMAIN,
+                name="fileindex"):
+            if not res.succeeded:
+                raise res.value
+            img_id, mtime = res.value
+            entry = self._images[img_id]
+            if mtime != entry.mtime:
+                entry.trusted = False
+
+    def _refresh_volumes(self, iop):
+        untrusted = [img_id for img_id, entry in self._images.items()
+                     if not entry.trusted]
+
+        _stats.hit(len(self._images) - len(untrusted))
+        _stats.miss(len(untrusted))
+
+        for img_id in untrusted:
+            path = os.path.join(self._images_dir, img_id)
+            mtime = _mtime(iop, path)
+            if mtime is None:
+                # Removed after listing the images directory.
+                del self._images[img_id]
+                continue
+            entry = self._images[img_id]
+            names = tuple(_list_volumes(iop, self._images_dir, img_id))
+            self._images[img_id] = _Entry(mtime, names, mtime == entry.mtime)
+
+    def _check_images(self, iop, images):
+        found = scan_images(iop, self._images_dir)
+        if found != images:
+            _stats.inconsistency()
+            log.warning("Inconsistent images index for %s: missing=%s "
+                        "stale=%s", self._images_dir,
+                        sorted(found - images), sorted(images - found))
+            self._top = None
+        return found
+
+    def _check_volumes(self, iop, volumes):
+        found = scan_volumes(iop, self._images_dir)
+        if _normalize(found) != _normalize(volumes):
+            _stats.inconsistency()
+            log.warning("Inconsistent volumes index for %s: index=%s "
+                        "scan=%s", self._images_dir, volumes, found)
+            self._top = None
+            self._images.clear()
+        return found
+
+
+def scan_images(iop, images_dir):
+    """
+    Return set of images ids in images_dir, without using an index.
+    """
+    pattern = os.path.join(glob.escape(images_dir), sc.UUID_GLOB_PATTERN)
+    return set(os.path.basename(p) for p in iop.glob.glob(pattern)
+               if iop.os.path.isdir(p))
+
+
+def scan_volumes(iop, images_dir):
+    """
+    Return dict mapping image id to list of volume ids, without using an
+    index. Images with no volumes are not included.
+    """
+    pattern = os.path.join(glob.escape(images_dir), "*", "*" + META_EXT)
+    volumes = {}
+    for path in iop.glob.glob(pattern):
+        head, tail = os.path.split(path)
+        img_id = os.path.basename(head)
+        volumes.setdefault(img_id, []).append(tail[:-len(META_EXT)])
+    return volumes
+
+
+def _mtime(iop, path):
+    try:
+        return iop.os.stat(path).st_mtime
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        return None
+
+
+def _list_volumes(iop, images_dir, img_id):
+    pattern = os.path.join(
+        glob.escape(images_dir), glob.escape(img_id), "*" + META_EXT)
+    for path in iop.glob.glob(pattern):
+        yield os.path.basename(path)[:-len(META_EXT)]
+
+
+def _normalize(volumes):
+    return {img_id: sorted(vol_ids)
+            for img_id, vol_ids in volumes.items() if vol_ids}
@@ -3,6 +3,7 @@
 
 from __future__ import absolute_import
 
+import glob
 import os
 
 from vdsm.common.config import config
@@ -40,6 +41,12 @@ class GlusterStorageDomain(nfsSD.NfsStorageDomain):
 
         raise se.StorageDomainDoesNotExist(sdUUID)
 
+    @staticmethod
+    def findDomainPaths(sdUUIDs):
+        pattern = os.path.join(sc.REPO_MOUNT_DIR, sd.GLUSTERSD_DIR, "*")
+        mntList = [mnt for mnt in glob.glob(pattern) if mount.isMounted(mnt)]
+        return fileSD.findDomainPaths(sdUUIDs, mntList)
+
 
 def findDomain(sdUUID):
     return GlusterStorageDomain(GlusterStorageDomain.findDomainPath(sdUUID))
@@ -59,6 +59,7 @@ from vdsm.storage import nbd
 from vdsm.storage import nfsSD
 from vdsm.storage import outOfProcess as oop
 from vdsm.storage import qemuimg
+from vdsm.storage import qemuimgcache
 from vdsm.storage import resourceManager as rm
 from vdsm.storage import sd
 from vdsm.storage import securable
@@ -234,6 +235,9 @@ class HSM(object):
         self.mpathhealth_monitor = mpathhealth.Monitor(monitorInterval)
         self.mpathhealth_monitor.start()
 
+        if config.getboolean('irs', 'device_inventory_cache'):
+            multipath.start_inventory()
+
         def storageRefresh():
             sdCache.refreshStorage()
             lvm.bootstrap(skiplvs=blockSD.SPECIAL_LVS_V4)
@@ -565,6 +569,7 @@ class HSM(object):
             # Uncommit the current size
             volToExtend.setCapacity(0)
             qemuimg.resize(volPath, newSizeBytes, qemuImgFormat)
+            qemuimgcache.invalidate(volPath)
             virtual_size = qemuimg.info(volPath,
                                         qemuImgFormat)['virtual-size']
         finally:
@@ -1318,7 +1323,7 @@ class HSM(object):
         # hence, we need a unique identifier.
         vars.task.getExclusiveLock(STORAGE, "%s_%s" % (imgUUID, sdUUID))
         vars.task.getSharedLock(STORAGE, sdUUID)
-        allVols = dom.getAllVolumes()
+        allVols = dom.getAllVolumes(imgUUID)
         volsByImg = sd.getVolsOfImage(allVols, imgUUID)
         if not volsByImg:
             self.log.error("Empty or not found image %s in SD %s. %s",
@@ -2499,6 +2504,8 @@ class HSM(object):
             # getSharedLock(connectionsResource...)
             domains = sdCache.getUUIDs()
 
+        sdCache.prefetch(domains)
+
         for sdUUID in domains[:]:
             try:
                 dom = sdCache.produce(sdUUID=sdUUID)
@@ -2846,10 +2853,11 @@ class HSM(object):
         # Using unsafe=True to allow measuring an active image. Measuring an
         # active image can give less accurate results since the guest may write
         # while we measure, but it is good enough for getting an estimate of
-        # the required size.
+        # the required size. Results for other volumes are cached.
 
-        result = qemuimg.measure(
+        result = qemuimgcache.measure(
             vol.getVolumePath(),
+            generation=qemuimgcache.volume_generation(vol),
             format=sc.fmt2str(vol.getFormat()),
             output_format=sc.fmt2str(dest_format),
             backing=backing,
@@ -2947,7 +2955,7 @@ class HSM(object):
 
         imgVolumesInfo = []
         dom = sdCache.produce(sdUUID)
-        allVols = dom.getAllVolumes()
+        allVols = dom.getAllVolumes(imgUUID)
         # Filter volumes related to this image
         imgVolumes = list(sd.getVolsOfImage(allVols, imgUUID))
 
@@ -3051,10 +3059,11 @@ class HSM(object):
         """
         vars.task.getSharedLock(STORAGE, sdUUID)
         dom = sdCache.produce(sdUUID=sdUUID)
-        vols = dom.getAllVolumes()
         if imgUUID == sc.BLANK_UUID:
+            vols = dom.getAllVolumes()
             volUUIDs = list(vols)
         else:
+            vols = dom.getAllVolumes(imgUUID)
             volUUIDs = [k for k, v in six.iteritems(vols) if imgUUID in v.imgs]
         return dict(uuidlist=volUUIDs)
 
@@ -3170,6 +3179,7 @@ class HSM(object):
             self.taskMng.prepareForShutdown()
             oop.stop()
             self.mpathhealth_monitor.stop()
+            multipath.stop_inventory()
         except:
             pass
 
@@ -3565,6 +3575,11 @@ class HSM(object):
     def stop_nbd_server(self, server_id):
         nbd.stop_server(server_id)
 
+    @public
+    def get_nbd_stats(self):
+        stats = nbd.server_stats()
+        return dict(result=stats)
+
     # Transient disk
 
     @public
@@ -16,10 +16,12 @@ from vdsm.common.marks import deprecated
 from vdsm.common.threadlocal import vars
 from vdsm.common.units import MiB
 from vdsm.storage import constants as sc
+from vdsm.storage import copyscheduler
 from vdsm.storage import exception as se
 from vdsm.storage import glance
 from vdsm.storage import imageSharing
 from vdsm.storage import qemuimg
+from vdsm.storage import qemuimgcache
 from vdsm.storage import resourceManager as rm
 from vdsm.storage import sd
 from vdsm.storage import volume
@@ -49,7 +51,7 @@ def _deleteImage(dom, imgUUID, postZero, discard):
 
     Replaces Image.delete() in Image.[copyCollapsed(), move(), multimove()].
     """
-    allVols = dom.getAllVolumes()
+    allVols = dom.getAllVolumes(imgUUID)
     imgVols = sd.getVolsOfImage(allVols, imgUUID)
     if not imgVols:
         log.warning("No volumes found for image %s. %s", imgUUID, allVols)
@@ -74,11 +76,33 @@ class Image:
     def repoPath(self):
         return self._repoPath
 
-    def _run_qemuimg_operation(self, operation):
-        self.log.debug('running qemu-img operation')
-        with vars.task.abort_callback(operation.abort):
-            operation.run()
-        self.log.debug('qemu-img operation has completed')
+    def _copy_volume(self, srcSdUUID, destDom, capacity, srcPath, dstPath,
+                     **kwargs):
+        """
+        Copy volume using qemu-img convert when the copy is admitted by the
+        host copy scheduler. Keyword arguments are passed to
+        qemuimg.convert().
+        """
+        srcDom = sdCache.produce_manifest(srcSdUUID)
+        copy = copyscheduler.copy(
+            domains=(srcSdUUID, destDom.sdUUID),
+            src_type=copyscheduler.storage_type(srcDom),
+            dst_type=copyscheduler.storage_type(destDom))
+        with vars.task.abort_callback(copy.cancel), copy:
+            operation = qemuimg.convert(
+                srcPath,
+                dstPath,
+                coroutines=copy.coroutines,
+                rate_limit=copy.rate_limit,
+                size=capacity,
+                **kwargs)
+            self.log.debug('running qemu-img operation')
+            try:
+                with vars.task.progress_operation(operation):
+                    copy.run(operation)
+            finally:
+                qemuimgcache.invalidate(dstPath)
+            self.log.debug('qemu-img operation has completed')
 
     def estimate_qcow2_size(self, src_vol_params, dst_sd_id):
         """
@@ -93,9 +117,17 @@ class Image:
         Returns:
             Volume allocation in bytes
         """
+        # Leaf volumes may be written by a running VM, so we cannot use cached
+        # results.
+        if src_vol_params.get('voltype') == sc.type2name(sc.LEAF_VOL):
+            generation = None
+        else:
+            generation = src_vol_params.get('generation')
+
         # measure required size.
-        qemu_measure = qemuimg.measure(
-            image=src_vol_params['path'],
+        qemu_measure = qemuimgcache.measure(
+            src_vol_params['path'],
+            generation=generation,
             format=sc.fmt2str(src_vol_params['volFormat']),
             output_format=qemuimg.FORMAT.QCOW2,
             is_block=src_vol_params["block"])
@@ -430,24 +462,28 @@ class Image:
                         backing = None
                         backingFormat = None
 
-                    operation = qemuimg.convert(
-                        srcVol.getVolumePath(),
-                        dstVol.getVolumePath(),
-                        srcFormat=srcFormat,
-                        dstFormat=dstFormat,
-                        dstQcow2Compat=destDom.qcow2_compat(),
-                        backing=backing,
-                        backingFormat=backingFormat,
-                        unordered_writes=destDom.recommends_unordered_writes(
-                            dstVol.getFormat()),
-                        create=dstVol.requires_create(),
-                        target_is_zero=dstVol.zero_initialized(),
-                    )
+                    unordered_writes = destDom.recommends_unordered_writes(
+                        dstVol.getFormat())
+
                     with utils.stopwatch(
                             "Copy volume {}".format(srcVol.volUUID),
                             level=logging.INFO,
                             log=self.log):
-                        self._run_qemuimg_operation(operation)
+                        self._copy_volume(
+                            srcSdUUID,
+                            destDom,
+                            srcVol.getCapacity(),
+                            srcVol.getVolumePath(),
+                            dstVol.getVolumePath(),
+                            srcFormat=srcFormat,
+                            dstFormat=dstFormat,
+                            dstQcow2Compat=destDom.qcow2_compat(),
+                            backing=backing,
+                            backingFormat=backingFormat,
+                            unordered_writes=unordered_writes,
+                            create=dstVol.requires_create(),
+                            target_is_zero=dstVol.zero_initialized(),
+                        )
                 except ActionStopped:
                     raise
                 except se.StorageException:
@@ -719,22 +755,26 @@ class Image:
                 dstVol.prepare(rw=True, setrw=True)
 
                 try:
-                    operation = qemuimg.convert(
-                        volParams['path'],
-                        dstVol.getVolumePath(),
-                        srcFormat=sc.fmt2str(volParams['volFormat']),
-                        dstFormat=sc.fmt2str(dstVolFormat),
-                        dstQcow2Compat=destDom.qcow2_compat(),
-                        unordered_writes=destDom.recommends_unordered_writes(
-                            dstVolFormat),
-                        create=dstVol.requires_create(),
-                        target_is_zero=dstVol.zero_initialized(),
-                    )
+                    unordered_writes = destDom.recommends_unordered_writes(
+                        dstVolFormat)
+
                     with utils.stopwatch(
                             "Copy volume {}".format(srcVol.volUUID),
                             level=logging.INFO,
                             log=self.log):
-                        self._run_qemuimg_operation(operation)
+                        self._copy_volume(
+                            sdUUID,
+                            destDom,
+                            volParams['capacity'],
+                            volParams['path'],
+                            dstVol.getVolumePath(),
+                            srcFormat=sc.fmt2str(volParams['volFormat']),
+                            dstFormat=sc.fmt2str(dstVolFormat),
+                            dstQcow2Compat=destDom.qcow2_compat(),
+                            unordered_writes=unordered_writes,
+                            create=dstVol.requires_create(),
+                            target_is_zero=dstVol.zero_initialized(),
+                        )
                 except ActionStopped:
                     raise
                 except cmdutils.Error as e:
@@ -927,7 +967,7 @@ class Image:
         """
         # Prepare volumes
         dom = sdCache.produce(sdUUID)
-        allVols = dom.getAllVolumes()
+        allVols = dom.getAllVolumes(imgUUID)
         imgVolumes = sd.getVolsOfImage(allVols, imgUUID).keys()
         dom.activateVolumes(imgUUID, imgVolumes)
 
@@ -126,6 +126,11 @@ class LocalFsStorageDomain(fileSD.FileStorageDomain):
         else:
             raise se.StorageDomainDoesNotExist(sdUUID)
 
+    @staticmethod
+    def findDomainPaths(sdUUIDs):
+        mntList = glob(os.path.join(sc.REPO_MOUNT_DIR, "_*"))
+        return fileSD.findDomainPaths(sdUUIDs, mntList)
+
     def getRealPath(self):
         return os.readlink(self.mountpoint)
 
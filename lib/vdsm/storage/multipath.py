@@ -12,6 +12,7 @@ from glob import glob
 import logging
 import re
 import subprocess
+import threading
 import time
 
 from collections import namedtuple
@@ -27,6 +28,7 @@ from vdsm.storage import devicemapper
 from vdsm.storage import hba
 from vdsm.storage import iscsi
 from vdsm.storage import managedvolumedb
+from vdsm.storage import uevent
 
 DEV_ISCSI = "iSCSI"
 DEV_FCP = "FCP"
@@ -372,11 +374,222 @@ def getHBTL(physdev):
     return HBTL(*hbtl[0].split(":"))
 
 
+class Inventory(object):
+    """
+    Cache of static attributes of multipath devices and their paths, such
+    as vendor, serial and block sizes, keyed by device name (e.g. "dm-3",
+    "sdb").
+
+    The cache is kept up to date using kernel events; a device is removed
+    from the cache when it is added, removed or changed. If events were
+    lost, the entire cache is invalidated. When the event monitor is not
+    running, the cache is not used.
+
+    Path state is not cached.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._devices = {}
+        # Incremented on every invalidation, so we don't add stale entries
+        # read before an invalidation.
+        self._generation = 0
+        self._monitor = None
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self):
+        return self._monitor is not None and self._monitor.running
+
+    def start(self):
+        monitor = uevent.Monitor(self._on_event, self.invalidate)
+        try:
+            monitor.start()
+        except OSError as e:
+            log.warning("Cannot monitor device events, device inventory "
+                        "cache disabled: %s", e)
+            return
+        self._monitor = monitor
+        log.info("Device inventory cache enabled")
+
+    def stop(self):
+        if self._monitor is not None:
+            self._monitor.stop()
+            self._monitor = None
+        self.invalidate()
+
+    def sync(self):
+        """
+        Wait until events for device changes before this call were handled.
+        If the events were not handled in time, invalidate the entire cache,
+        since we cannot tell which devices changed. Devices are read again,
+        and the pending events invalidate them again when handled later.
+
+        Returns True if the cache can be used.
+        """
+        if not self.enabled:
+            return False
+        if not self._monitor.sync():
+            log.warning("Timeout waiting for device events, invalidating "
+                        "device inventory cache")
+            self.invalidate()
+        return True
+
+    def get(self, name, read):
+        """
+        Return static attributes of device name. If the device is not
+        cached, call read(name), returning (info, cacheable) tuple, and
+        cache the info if it is cacheable.
+        """
+        if not self.enabled:
+            return read(name)[0]
+
+        with self._lock:
+            info = self._devices.get(name)
+            if info is not None:
+                self._hits += 1
+                return info
+            self._misses += 1
+            generation = self._generation
+
+        info, cacheable = read(name)
+
+        if cacheable:
+            with self._lock:
+                if generation == self._generation:
+                    self._devices[name] = info
+
+        return info
+
+    def invalidate(self, name=None):
+        """
+        Invalidate device name, or all devices if name is None.
+        """
+        with self._lock:
+            self._generation += 1
+            if name is None:
+                self._devices.clear()
+            else:
+                self._devices.pop(name, None)
+
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            hit_ratio = (self._hits / total * 100) if total else 0.0
+            return {
+                "enabled": self.enabled,
+                "devices": len(self._devices),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": hit_ratio,
+            }
+
+    def _on_event(self, event):
+        name = event.env.get("DEVNAME") or os.path.basename(event.devpath)
+        log.debug("Device %s %s, invalidating", name, event.action)
+        self.invalidate(os.path.basename(name))
+
+
+_inventory = Inventory()
+
+
+def start_inventory():
+    """
+    Start caching device inventory used by pathListIter().
+    """
+    _inventory.start()
+
+
+def stop_inventory():
+    _inventory.stop()
+
+
+def inventory_stats():
+    return _inventory.stats()
+
+
+def _read_device_info(dmId):
+    info = {
+        "capacity": str(getDeviceSize(dmId)),
+        "serial": get_scsi_serial(dmId),
+        "discard_max_bytes": getDeviceDiscardMaxBytes(dmId),
+    }
+    # scsi_id fails when the device has no valid path; try again later.
+    return info, info["serial"] != ""
+
+
+def _read_path_info(slave):
+    cacheable = True
+    info = {
+        "vendor": "",
+        "product": "",
+        "fwrev": "",
+        "logicalblocksize": "",
+        "physicalblocksize": "",
+    }
+
+    try:
+        info["vendor"] = getVendor(slave)
+    except Exception:
+        log.warn("Problem getting vendor from device `%s`",
+                 slave, exc_info=True)
+        cacheable = False
+
+    try:
+        info["product"] = getModel(slave)
+    except Exception:
+        log.warn("Problem getting model name from device `%s`",
+                 slave, exc_info=True)
+        cacheable = False
+
+    try:
+        info["fwrev"] = getFwRev(slave)
+    except Exception:
+        log.warn("Problem getting fwrev from device `%s`",
+                 slave, exc_info=True)
+        cacheable = False
+
+    try:
+        logBlkSize, phyBlkSize = getDeviceBlockSizes(slave)
+        info["logicalblocksize"] = str(logBlkSize)
+        info["physicalblocksize"] = str(phyBlkSize)
+    except Exception:
+        log.warn("Problem getting blocksize from device `%s`",
+                 slave, exc_info=True)
+        cacheable = False
+
+    info["capacity"] = str(getDeviceSize(slave))
+
+    try:
+        hbtl = getHBTL(slave)
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            log.warn("Device has no hbtl: %s", slave)
+            info["lun"] = 0
+        else:
+            log.error("Error: %s while trying to get hbtl of device: "
+                      "%s", e, slave)
+            raise
+    else:
+        info["lun"] = hbtl.lun
+
+    if iscsi.devIsiSCSI(slave):
+        info["type"] = DEV_ISCSI
+        info["session"] = iscsi.getiScsiSession(slave)
+    else:
+        info["type"] = DEV_FCP
+        info["session"] = None
+
+    return info, cacheable
+
+
 def pathListIter(filterGuids=()):
     filterLen = len(filterGuids) if filterGuids else -1
     devsFound = 0
     knownSessions = {}
     pathStatuses = devicemapper.getPathsStatus()
+    _inventory.sync()
 
     for dmId, guid in getMPDevsIter():
         if devsFound == filterLen:
@@ -387,11 +600,13 @@ def pathListIter(filterGuids=()):
 
         devsFound += 1
 
+        dmInfo = _inventory.get(dmId, _read_device_info)
+
         devInfo = {
             "guid": guid,
             "dm": dmId,
-            "capacity": str(getDeviceSize(dmId)),
-            "serial": get_scsi_serial(dmId),
+            "capacity": dmInfo["capacity"],
+            "serial": dmInfo["serial"],
             "paths": [],
             "connections": [],
             "devtypes": [],
@@ -401,7 +616,7 @@ def pathListIter(filterGuids=()):
             "fwrev": "",
             "logicalblocksize": "",
             "physicalblocksize": "",
-            "discard_max_bytes": getDeviceDiscardMaxBytes(dmId),
+            "discard_max_bytes": dmInfo["discard_max_bytes"],
         }
 
         for slave in devicemapper.getSlaves(dmId):
@@ -409,58 +624,27 @@ def pathListIter(filterGuids=()):
                 log.warning("No such physdev '%s' is ignored" % slave)
                 continue
 
-            if not devInfo["vendor"]:
-                try:
-                    devInfo["vendor"] = getVendor(slave)
-                except Exception:
-                    log.warn("Problem getting vendor from device `%s`",
-                             slave, exc_info=True)
-
-            if not devInfo["product"]:
-                try:
-                    devInfo["product"] = getModel(slave)
-                except Exception:
-                    log.warn("Problem getting model name from device `%s`",
-                             slave, exc_info=True)
-
-            if not devInfo["fwrev"]:
-                try:
-                    devInfo["fwrev"] = getFwRev(slave)
-                except Exception:
-                    log.warn("Problem getting fwrev from device `%s`",
-                             slave, exc_info=True)
+            slaveInfo = _inventory.get(slave, _read_path_info)
+
+            for key in ("vendor", "product", "fwrev"):
+                if not devInfo[key]:
+                    devInfo[key] = slaveInfo[key]
 
             if (not devInfo["logicalblocksize"] or
                     not devInfo["physicalblocksize"]):
-                try:
-                    logBlkSize, phyBlkSize = getDeviceBlockSizes(slave)
-                    devInfo["logicalblocksize"] = str(logBlkSize)
-                    devInfo["physicalblocksize"] = str(phyBlkSize)
-                except Exception:
-                    log.warn("Problem getting blocksize from device `%s`",
-                             slave, exc_info=True)
+                devInfo["logicalblocksize"] = slaveInfo["logicalblocksize"]
+                devInfo["physicalblocksize"] = slaveInfo["physicalblocksize"]
 
             pathInfo = {}
             pathInfo["physdev"] = slave
             pathInfo["state"] = pathStatuses.get(slave, "failed")
-            pathInfo["capacity"] = str(getDeviceSize(slave))
-            try:
-                hbtl = getHBTL(slave)
-            except OSError as e:
-                if e.errno == errno.ENOENT:
-                    log.warn("Device has no hbtl: %s", slave)
-                    pathInfo["lun"] = 0
-                else:
-                    log.error("Error: %s while trying to get hbtl of device: "
-                              "%s", e, slave)
-                    raise
-            else:
-                pathInfo["lun"] = hbtl.lun
+            pathInfo["capacity"] = slaveInfo["capacity"]
+            pathInfo["lun"] = slaveInfo["lun"]
+            pathInfo["type"] = slaveInfo["type"]
+            devInfo["devtypes"].append(slaveInfo["type"])
 
-            if iscsi.devIsiSCSI(slave):
-                devInfo["devtypes"].append(DEV_ISCSI)
-                pathInfo["type"] = DEV_ISCSI
-                sessionID = iscsi.getiScsiSession(slave)
+            if slaveInfo["type"] == DEV_ISCSI:
+                sessionID = slaveInfo["session"]
                 if sessionID not in knownSessions:
                     # FIXME: This entire part is for BC. It should be moved to
                     # hsm and not preserved for new APIs. New APIs should keep
@@ -483,9 +667,6 @@ def pathListIter(filterGuids=()):
 
                     knownSessions[sessionID] = sessionInfo
                 devInfo["connections"].append(knownSessions[sessionID])
-            else:
-                devInfo["devtypes"].append(DEV_FCP)
-                pathInfo["type"] = DEV_FCP
 
             if devInfo["devtype"] == "":
                 devInfo["devtype"] = pathInfo["type"]
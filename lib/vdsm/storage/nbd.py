@@ -3,6 +3,18 @@
 
 """
 NBD - manage network block devices
+
+Volumes are exported using one of two methods:
+
+- Pool: exports are added to a small pool of long lived qemu-storage-daemon
+  instances using QMP. Every daemon serves all its exports on a single unix
+  socket, using the server id as the export name. Daemons are started on
+  demand and keep running when vdsm is restarted; vdsm recovers the exports
+  when it connects to a running daemon.
+
+- Transient service: every export is served by a new qemu-nbd transient
+  systemd service. Used if the pool is disabled (irs:nbd_pool_size=0) or
+  qemu-storage-daemon is not installed.
 """
 
 from __future__ import absolute_import
@@ -13,7 +25,9 @@ import errno
 import json
 import logging
 import os
+import threading
 import time
+import uuid
 
 from vdsm.common import cmdutils
 from vdsm.common import constants
@@ -22,12 +36,14 @@ from vdsm.common import supervdsm
 from vdsm.common import systemctl
 from vdsm.common import systemd
 from vdsm.common import nbdutils
+from vdsm.common.config import config as vdsm_config
 from vdsm.common.time import monotonic_time
 
 from . import constants as sc
 from . import exception as se
 from . import fileUtils
 from . import qemuimg
+from . import qmp
 from . import transientdisk
 from . sdc import sdCache
 
@@ -38,6 +54,11 @@ OVERLAY = "overlay"
 QEMU_NBD = cmdutils.CommandPath(
     "qemu-nbd", "/usr/local/bin/qemu-nbd", "/usr/bin/qemu-nbd")
 
+QEMU_STORAGE_DAEMON = cmdutils.CommandPath(
+    "qemu-storage-daemon",
+    "/usr/local/bin/qemu-storage-daemon",
+    "/usr/bin/qemu-storage-daemon")
+
 log = logging.getLogger("storage.nbd")
 
 
@@ -130,41 +151,34 @@ def start_server(server_id, config):
         path = vol.volumePath
         format = sc.fmt2str(vol.getFormat())
         is_block = vol.is_block()
+
+    qemu_nbd_config = QemuNBDConfig(
+        format=format,
+        readonly=cfg.readonly,
+        discard=cfg.discard,
+        detect_zeroes=cfg.detect_zeroes,
+        path=path,
+        backing_chain=cfg.backing_chain,
+        is_block=is_block,
+        bitmap=cfg.bitmap)
+
     try:
-        sock = _socket_path(server_id)
-
-        log.info(
-            "Starting transient service %s, serving %s via unix socket %s",
-            _service_name(server_id), path, sock)
-
-        qemu_nbd_config = QemuNBDConfig(
-            format=format,
-            readonly=cfg.readonly,
-            discard=cfg.discard,
-            detect_zeroes=cfg.detect_zeroes,
-            path=path,
-            backing_chain=cfg.backing_chain,
-            is_block=is_block,
-            bitmap=cfg.bitmap)
-
-        start_transient_service(server_id, qemu_nbd_config)
-
-        if not _wait_for_socket(sock, 10.0):
-            raise Timeout("Timeout starting NBD server {}: {}"
-                          .format(server_id, config))
+        if _pool.enabled():
+            return _pool.add_export(server_id, qemu_nbd_config)
+        else:
+            return _start_transient_server(server_id, qemu_nbd_config)
     finally:
         if using_overlay:
-            # When qemu-nbd is ready it has an open file descriptor, and it
-            # does not need the overlay. Removing the overlay now simplifies
-            # cleanup when stopping the service.
+            # When the NBD server is ready it has an open file descriptor, and
+            # it does not need the overlay. Removing the overlay now
+            # simplifies cleanup when stopping the server.
             _remove_overlay(server_id)
 
-    os.chmod(sock, DEFAULT_SOCKET_MODE)
-    unix_address = nbdutils.UnixAddress(sock)
-    return unix_address.url()
-
 
 def stop_server(server_id):
+    if _pool.remove_export(server_id):
+        return
+
     service = _service_name(server_id)
 
     # systemctl.stop() does not have a way to detect that a server was not
@@ -181,6 +195,353 @@ def stop_server(server_id):
     systemctl.stop(service)
 
 
+def server_stats():
+    """
+    Return dict mapping server id to I/O statistics of servers exported by
+    the pool. Servers using a transient service are not reported.
+    """
+    return _pool.stats()
+
+
+def _start_transient_server(server_id, config):
+    sock = _socket_path(server_id)
+
+    log.info(
+        "Starting transient service %s, serving %s via unix socket %s",
+        _service_name(server_id), config.path, sock)
+
+    start_transient_service(server_id, config)
+
+    if not _wait_for_socket(sock, 10.0):
+        raise Timeout("Timeout starting NBD server {}: {}"
+                      .format(server_id, config))
+
+    os.chmod(sock, DEFAULT_SOCKET_MODE)
+    unix_address = nbdutils.UnixAddress(sock)
+    return unix_address.url()
+
+
+class _Export(object):
+
+    def __init__(self, server_id, node_name, daemon):
+        self.server_id = server_id
+        self.node_name = node_name
+        self.daemon = daemon
+
+
+class _Daemon(object):
+    """
+    A qemu-storage-daemon serving exports on a single NBD unix socket,
+    managed over a QMP unix socket.
+
+    This class is not thread safe; the pool serializes access to daemons.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.qmp_socket = _pool_qmp_socket(index)
+        self.nbd_socket = _pool_nbd_socket(index)
+        self._client = None
+
+    @property
+    def connected(self):
+        return self._client is not None
+
+    def connect(self, start=True):
+        """
+        Connect to the daemon, starting the daemon if it is not running and
+        start is True.
+
+        Returns list of (export id, node name) tuples for the exports served
+        by the daemon, or None if the daemon is not running and start is
+        False.
+        """
+        client = qmp.Client(self.qmp_socket)
+        try:
+            client.connect()
+        except (OSError, qmp.ProtocolError) as e:
+            if not start:
+                log.debug("NBD pool daemon %s is not running: %s",
+                          self.index, e)
+                return None
+            log.info("Starting NBD pool daemon %s", self.index)
+            self._start()
+            client.connect()
+
+        self._client = client
+        exports = self.execute("query-block-exports")
+        return [(e["id"], e["node-name"]) for e in exports]
+
+    def execute(self, command, arguments=None):
+        try:
+            return self._client.execute(command, arguments)
+        except (OSError, qmp.ProtocolError):
+            # The daemon was terminated, or the connection is in unknown
+            # state. The next connect() will resync the daemon exports.
+            self.close()
+            raise
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _start(self):
+        # Stale sockets left by a terminated daemon prevent the new daemon
+        # from starting.
+        for path in (self.qmp_socket, self.nbd_socket):
+            try:
+                os.unlink(path)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+
+        _create_rundir()
+        start_pool_daemon(self.index)
+
+        for sock in (self.nbd_socket, self.qmp_socket):
+            if not _wait_for_socket(sock, 10.0):
+                raise Timeout("Timeout starting NBD pool daemon {}"
+                              .format(self.index))
+
+        os.chmod(self.nbd_socket, DEFAULT_SOCKET_MODE)
+
+
+class _Pool(object):
+    """
+    Pool of qemu-storage-daemon instances. Exports are added to the daemon
+    serving the smallest number of exports.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._lock = threading.Lock()
+        self._daemons = [_Daemon(i) for i in range(size)]
+        self._exports = {}
+
+    def enabled(self):
+        if self._size == 0:
+            return False
+        try:
+            QEMU_STORAGE_DAEMON.cmd
+        except OSError:
+            return False
+        return True
+
+    def add_export(self, server_id, config):
+        _verify_path(config.path)
+
+        with self._lock:
+            self._connect(start=True)
+
+            if server_id in self._exports:
+                raise Error("NBD server {} is already running"
+                            .format(server_id))
+
+            daemon = self._select_daemon()
+            node_name = "nbd-" + uuid.uuid4().hex[:24]
+
+            log.info(
+                "Adding export %s to NBD pool daemon %s, serving %s via "
+                "unix socket %s",
+                server_id, daemon.index, config.path, daemon.nbd_socket)
+
+            daemon.execute("blockdev-add", _blockdev_options(
+                node_name, config))
+            try:
+                daemon.execute("block-export-add", _export_options(
+                    server_id, node_name, config))
+            except qmp.CommandError:
+                self._remove_node(daemon, node_name)
+                raise
+
+            self._exports[server_id] = _Export(server_id, node_name, daemon)
+
+        unix_address = nbdutils.UnixAddress(daemon.nbd_socket)
+        return unix_address.url(server_id)
+
+    def remove_export(self, server_id):
+        """
+        Remove export server_id. Returns False if the export is not served by
+        the pool.
+        """
+        if self._size == 0:
+            return False
+
+        with self._lock:
+            self._connect(start=False)
+
+            export = self._exports.get(server_id)
+            if export is None:
+                return False
+
+            daemon = export.daemon
+            log.info("Removing export %s from NBD pool daemon %s",
+                     server_id, daemon.index)
+
+            # Disconnect clients, like stopping a transient service.
+            daemon.execute(
+                "block-export-del", {"id": server_id, "mode": "hard"})
+            self._wait_for_removal(daemon, server_id, 10.0)
+            daemon.execute("blockdev-del", {"node-name": export.node_name})
+
+            del self._exports[server_id]
+
+        return True
+
+    def stats(self):
+        if self._size == 0:
+            return {}
+
+        result = {}
+        with self._lock:
+            self._connect(start=False)
+
+            for daemon in self._daemons:
+                if not daemon.connected:
+                    continue
+                try:
+                    blockstats = daemon.execute(
+                        "query-blockstats", {"query-nodes": True})
+                except (OSError, qmp.Error) as e:
+                    log.warning("Cannot get NBD pool daemon %s stats: %s",
+                                daemon.index, e)
+                    continue
+
+                nodes = {s["node-name"]: s["stats"]
+                         for s in blockstats if "node-name" in s}
+
+                for export in self._exports.values():
+                    if export.daemon is not daemon:
+                        continue
+                    stats = nodes.get(export.node_name)
+                    if stats is None:
+                        continue
+                    result[export.server_id] = {
+                        "daemon": daemon.index,
+                        "read_bytes": stats["rd_bytes"],
+                        "write_bytes": stats["wr_bytes"],
+                        "read_ops": stats["rd_operations"],
+                        "write_ops": stats["wr_operations"],
+                        "flush_ops": stats["flush_operations"],
+                        "discard_bytes": stats.get("unmap_bytes", 0),
+                    }
+
+        return result
+
+    # Must be called when holding the lock.
+
+    def _connect(self, start):
+        for daemon in self._daemons:
+            if daemon.connected:
+                continue
+
+            # Exports known from a previous connection may be gone.
+            for export in list(self._exports.values()):
+                if export.daemon is daemon:
+                    del self._exports[export.server_id]
+
+            try:
+                exports = daemon.connect(start=start)
+            except Exception:
+                log.exception("Cannot connect to NBD pool daemon %s",
+                              daemon.index)
+                continue
+
+            if exports is None:
+                continue
+
+            for server_id, node_name in exports:
+                self._exports[server_id] = _Export(
+                    server_id, node_name, daemon)
+
+            if exports:
+                log.info("Recovered %d exports from NBD pool daemon %s",
+                         len(exports), daemon.index)
+
+    def _select_daemon(self):
+        connected = [d for d in self._daemons if d.connected]
+        if not connected:
+            raise Error("No NBD pool daemon is available")
+
+        load = collections.Counter(e.daemon.index
+                                   for e in self._exports.values())
+        return min(connected, key=lambda d: load[d.index])
+
+    def _remove_node(self, daemon, node_name):
+        try:
+            daemon.execute("blockdev-del", {"node-name": node_name})
+        except (OSError, qmp.Error):
+            log.exception("Error removing node %s from NBD pool daemon %s",
+                          node_name, daemon.index)
+
+    def _wait_for_removal(self, daemon, server_id, timeout):
+        deadline = monotonic_time() + timeout
+        while True:
+            exports = daemon.execute("query-block-exports")
+            if not any(e["id"] == server_id for e in exports):
+                return
+            if monotonic_time() >= deadline:
+                raise Timeout("Timeout removing export {}".format(server_id))
+            time.sleep(0.02)
+
+
+def _blockdev_options(node_name, config):
+    """
+    Return blockdev-add options equivalent to the qemu-nbd options used by
+    start_transient_service().
+    """
+    file_options = {
+        "driver": "host_device" if config.is_block else "file",
+        "filename": config.path,
+        "aio": "native",
+        "cache": {"direct": True, "no-flush": False},
+    }
+
+    options = {
+        "node-name": node_name,
+        "driver": config.format,
+        "read-only": config.readonly,
+        "cache": {"direct": True, "no-flush": False},
+        "file": file_options,
+    }
+
+    if not config.readonly:
+        if config.discard:
+            options["discard"] = "unmap"
+            file_options["discard"] = "unmap"
+
+        if config.detect_zeroes:
+            options["detect-zeroes"] = "unmap" if config.discard else "on"
+
+    if config.format == "qcow2" and not config.backing_chain:
+        options["backing"] = None
+
+    return options
+
+
+def _export_options(server_id, node_name, config):
+    options = {
+        "type": "nbd",
+        "id": server_id,
+        "node-name": node_name,
+        "name": server_id,
+        "writable": not config.readonly,
+    }
+
+    if config.format != "raw":
+        # See start_transient_service() for the reason we do not enable
+        # allocation depth for raw images.
+        options["allocation-depth"] = True
+
+    if config.bitmap:
+        options["bitmaps"] = [config.bitmap]
+
+    return options
+
+
 def _create_overlay(server_id, backing, bitmap, bitmap_chain):
     """
     To export bitmaps from entire chain, we need to create an overlay, and
@@ -475,6 +836,35 @@ def start_transient_service(server_id, config):
         gid=fileUtils.resolveGid(constants.VDSM_GROUP))
 
 
+def start_pool_daemon(index):
+    if os.geteuid() != 0:
+        return supervdsm.getProxy().nbd_start_pool_daemon(index)
+
+    # Anyone running as vdsm can invoke nbd_start_pool_daemon(); the index is
+    # used to create socket paths.
+    if not isinstance(index, int) or index < 0:
+        raise ValueError("Invalid pool daemon index: {!r}".format(index))
+
+    cmd = [
+        str(QEMU_STORAGE_DAEMON),
+        "--chardev",
+        "socket,id=qmp,path={},server=on,wait=off".format(
+            _pool_qmp_socket(index)),
+        "--monitor", "chardev=qmp",
+        "--nbd-server",
+        "addr.type=unix,addr.path={}".format(_pool_nbd_socket(index)),
+    ]
+
+    # Collect the unit if the daemon fails, so we can start it again using
+    # the same name.
+    systemd.run(
+        cmd,
+        unit=_pool_service_name(index),
+        uid=fileUtils.resolveUid(constants.VDSM_USER),
+        gid=fileUtils.resolveGid(constants.VDSM_GROUP),
+        collect=True)
+
+
 def json_uri(config):
     image = {
         "driver": config.format,
@@ -515,6 +905,18 @@ def _socket_path(server_id):
     return os.path.join(RUN_DIR, server_id + ".sock")
 
 
+def _pool_service_name(index):
+    return "vdsm-nbd-pool-{}.service".format(index)
+
+
+def _pool_qmp_socket(index):
+    return os.path.join(RUN_DIR, "pool-{}.qmp".format(index))
+
+
+def _pool_nbd_socket(index):
+    return os.path.join(RUN_DIR, "pool-{}.sock".format(index))
+
+
 def _wait_for_socket(sock, timeout):
     start = monotonic_time()
     elapsed = 0.0
@@ -540,3 +942,6 @@ def _create_rundir():
             raise
     else:
         log.info("Created %s", RUN_DIR)
+
+
+_pool = _Pool(vdsm_config.getint("irs", "nbd_pool_size"))
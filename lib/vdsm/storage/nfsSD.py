@@ -3,6 +3,7 @@
 
 from __future__ import absolute_import
 
+import glob
 import os
 
 from vdsm.storage import clusterlock
@@ -118,6 +119,21 @@ class NfsStorageDomain(fileSD.FileStorageDomain):
 
         raise se.StorageDomainDoesNotExist(sdUUID)
 
+    @staticmethod
+    def findDomainPaths(sdUUIDs):
+        # Gluster and local domains are found by their own storage domain
+        # types, so we scan only the NFS mounts.
+        mntList = []
+        for mnt in glob.glob(os.path.join(sc.REPO_MOUNT_DIR, "*")):
+            name = os.path.basename(mnt)
+            if name in (sd.BLOCKSD_DIR, sd.GLUSTERSD_DIR):
+                continue
+            if name.startswith("_"):
+                continue
+            if mount.isMounted(mnt):
+                mntList.append(mnt)
+        return fileSD.findDomainPaths(sdUUIDs, mntList)
+
     def getRealPath(self):
         try:
             return mount.getMountFromTarget(self.mountpoint).fs_spec
@@ -10,6 +10,7 @@ import re
 from vdsm.common import cmdutils
 from vdsm.common import commands
 from vdsm.common import exception
+from vdsm.common.time import monotonic_time
 from vdsm.common.units import GiB
 from vdsm.config import config
 from vdsm.storage import operation
@@ -245,12 +246,19 @@ def check(image, format=None):
 def convert(srcImage, dstImage, srcFormat=None, dstFormat=None,
             dstQcow2Compat=None, backing=None, backingFormat=None,
             preallocation=None, compressed=False, unordered_writes=False,
-            create=True, bitmaps=False, target_is_zero=False):
+            create=True, bitmaps=False, target_is_zero=False,
+            coroutines=None, rate_limit=None, size=None):
     """
     Arguments:
         unordered_writes (bool): Allow out-of-order writes to the destination.
             This option improves performance, but is only recommended for
             preallocated devices like host devices or other raw block devices.
+        coroutines (int): Number of parallel coroutines used for the copy. If
+            None, use qemu-img default.
+        rate_limit (int): Limit the copy rate to rate_limit bytes per second.
+            If None, the copy rate is not limited.
+        size (int): Number of bytes to copy, used to report the copy
+            throughput.
         create (bool): If True (default) the destination image is created. Must
             be set to False when convert to NBD. If create is False,
             backingFormat, preallocated and dstQcow2Compat are ignored as
@@ -304,6 +312,12 @@ def convert(srcImage, dstImage, srcFormat=None, dstFormat=None,
     if unordered_writes:
         cmd.append('-W')
 
+    if coroutines:
+        cmd.extend(('-m', str(coroutines)))
+
+    if rate_limit:
+        cmd.extend(('-r', str(rate_limit)))
+
     if bitmaps:
         cmd.append('--bitmaps')
         cmd.append('--skip-broken-bitmaps')
@@ -311,10 +325,10 @@ def convert(srcImage, dstImage, srcFormat=None, dstFormat=None,
     cmd.append(srcImage)
     cmd.append(dstImage)
 
-    return ProgressCommand(cmd, cwd=cwdPath)
+    return ProgressCommand(cmd, cwd=cwdPath, size=size)
 
 
-def commit(top, topFormat, base=None):
+def commit(top, topFormat, base=None, size=None):
     cmd = [_qemuimg.cmd, "commit", "-p", "-t", "none"]
 
     if base:
@@ -332,7 +346,7 @@ def commit(top, topFormat, base=None):
 
     # For simplicity, we always run commit in the image directory.
     workdir = os.path.dirname(top)
-    return ProgressCommand(cmd, cwd=workdir)
+    return ProgressCommand(cmd, cwd=workdir, size=size)
 
 
 def map(image):
@@ -357,18 +371,39 @@ def amend(image, compat):
 
 
 class ProgressCommand(object):
+    """
+    Run qemu-img command reporting progress.
+
+    If size is specified, the operation also reports throughput based on
+    the number of bytes processed so far. The operation is considered
+    stalled if progress did not change for stall_timeout seconds.
+    """
 
     REGEXPR = re.compile(br'\s*\(([\d.]+)/100%\)\s*')
 
-    def __init__(self, cmd, cwd=None):
+    def __init__(self, cmd, cwd=None, size=None, stall_timeout=None,
+                 clock=monotonic_time):
         self._operation = operation.Command(cmd, cwd=cwd, warn_stderr=True)
+        self._size = size
+        if stall_timeout is None:
+            stall_timeout = config.getint("irs", "qemuimg_stall_timeout")
+        self._stall_timeout = stall_timeout
+        self._clock = clock
         self._progress = 0.0
+        self._started = None
+        self._updated = None
+        self._finished = None
+        self._stall_reported = False
 
     def run(self):
+        self._started = self._updated = self._clock()
         out = bytearray()
-        for data in self._operation.watch():
-            out += data
-            self._update_progress(out)
+        try:
+            for data in self._operation.watch():
+                out += data
+                self._update_progress(out)
+        finally:
+            self._finished = self._clock()
 
     def abort(self):
         """
@@ -392,6 +427,92 @@ class ProgressCommand(object):
         """
         return self._progress
 
+    @property
+    def elapsed(self):
+        """
+        Returns number of seconds since the operation was started, or None if
+        the operation was not started.
+
+        This method is threadsafe and may be called from any thread.
+        """
+        started = self._started
+        if started is None:
+            return None
+        finished = self._finished
+        if finished is None:
+            finished = self._clock()
+        return finished - started
+
+    @property
+    def throughput(self):
+        """
+        Returns number of bytes processed per second, or None if the size of
+        the operation is not known or the operation was not started.
+
+        This method is threadsafe and may be called from any thread.
+        """
+        if self._size is None:
+            return None
+        elapsed = self.elapsed
+        if not elapsed:
+            return None
+        return int(self._size * self._progress / 100 / elapsed)
+
+    @property
+    def eta(self):
+        """
+        Returns estimated number of seconds until the operation completes,
+        based on the progress rate so far, or None if the operation is not
+        running or did not report any progress yet.
+
+        This method is threadsafe and may be called from any thread.
+        """
+        if self._finished is not None:
+            return None
+        progress = self._progress
+        elapsed = self.elapsed
+        if not elapsed or progress == 0:
+            return None
+        return int(elapsed * (100 - progress) / progress)
+
+    @property
+    def stalled(self):
+        """
+        Returns True if the operation is running, but did not report any
+        progress in the last stall_timeout seconds.
+
+        This method is threadsafe and may be called from any thread.
+        """
+        updated = self._updated
+        if (not self._stall_timeout or updated is None or
+                self._finished is not None):
+            return False
+        stalled_for = self._clock() - updated
+        if stalled_for < self._stall_timeout:
+            return False
+        if not self._stall_reported:
+            self._stall_reported = True
+            _log.warning("Operation %s stalled: no progress for %.0f "
+                         "seconds (progress=%.2f%%)",
+                         self._operation, stalled_for, self._progress)
+        return True
+
+    def info(self):
+        """
+        Returns dict with operation progress, throughput, eta and stalled
+        state. Values that are not available are not reported.
+
+        This method is threadsafe and may be called from any thread.
+        """
+        info = {"progress": self.progress, "stalled": self.stalled}
+        throughput = self.throughput
+        if throughput is not None:
+            info["throughput"] = throughput
+        eta = self.eta
+        if eta is not None:
+            info["eta"] = eta
+        return info
+
     def _update_progress(self, out):
         # Checking the presence of '\r' before splitting will prevent
         # generating the array when it's not needed.
@@ -413,7 +534,14 @@ class ProgressCommand(object):
         if m is None:
             raise ValueError('Unable to parse: "%r"' % last_progress)
 
-        self._progress = float(m.group(1))
+        progress = float(m.group(1))
+        if progress != self._progress:
+            if self._stall_reported:
+                self._stall_reported = False
+                _log.info("Operation %s resumed after %.0f seconds",
+                          self._operation, self._clock() - self._updated)
+            self._updated = self._clock()
+            self._progress = progress
 
 
 def resize(image, newSize, format=None):
@@ -0,0 +1,142 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Cache of qemu-img measure results.
+
+Running qemu-img measure walks the image metadata, which is slow for large
+qcow2 images, and the same unchanged volumes are measured again and again
+when copying images. The cache keeps the results keyed by image path, volume
+generation, image size and image modification time, evicting the least
+recently used results.
+
+The key cannot detect all changes; the generation of a volume changes only
+when the volume is modified by a volume operation, so the key relies on the
+modification time to detect other writes. Results are cached only for file
+volumes not written by a running VM (see volume_generation()). Block volumes
+are never cached, since the modification time of a block device does not
+change when writing to the device, and an internal volume may be written by
+a live merge on the host running the VM. Code modifying volumes must call
+invalidate().
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import collections
+import os
+import threading
+
+from vdsm.common.config import config
+from vdsm.storage import constants as sc
+from vdsm.storage import qemuimg
+
+
+class Cache(object):
+    """
+    LRU cache of results keyed by image path.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, max_entries):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self._misses += 1
+                return None
+            self._entries[key] = value
+            self._hits += 1
+            return value
+
+    def set(self, key, value):
+        if self._max_entries == 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, img_dir):
+        """
+        Drop all entries for images in img_dir.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if os.path.dirname(key[1]) == img_dir:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            calls = self._hits + self._misses
+            hit_ratio = (100 * self._hits / calls) if calls > 0 else 0
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": hit_ratio,
+            }
+
+
+_cache = Cache(config.getint("irs", "qemuimg_cache_size"))
+
+
+def measure(image, generation=None, **kwargs):
+    """
+    Return qemu-img measure results for image. Keyword arguments are passed
+    to qemuimg.measure().
+
+    If generation is None, or image is a block volume, the image is measured
+    without using the cache.
+    """
+    if generation is None or kwargs.get("is_block", False):
+        return qemuimg.measure(image=image, **kwargs)
+
+    st = os.stat(image)
+    key = (("measure", image, generation, st.st_size, st.st_mtime_ns) +
+           tuple(sorted(kwargs.items())))
+    result = _cache.get(key)
+    if result is None:
+        result = qemuimg.measure(image=image, **kwargs)
+        _cache.set(key, result)
+    return dict(result)
+
+
+def invalidate(path):
+    """
+    Invalidate results for path. Must be called after modifying a volume.
+
+    Results for other volumes in the same image are also invalidated, since
+    measuring a volume depends on its backing chain.
+    """
+    _cache.invalidate(os.path.dirname(path))
+
+
+def cache_stats():
+    return _cache.info()
+
+
+def volume_generation(vol):
+    """
+    Return the generation to use when caching results for volume vol, or None
+    if the results must not be cached.
+
+    Leaf volumes may be written by a running VM without changing the volume
+    generation, so their results are never cached.
+    """
+    if vol.isLeaf():
+        return None
+    return vol.getMetaParam(sc.GENERATION)
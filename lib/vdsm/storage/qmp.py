@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+qmp - minimal QEMU Machine Protocol client
+
+Used to manage qemu-storage-daemon instances over a unix socket. See
+https://www.qemu.org/docs/master/interop/qmp-spec.html for the protocol
+specification.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import json
+import logging
+import socket
+
+log = logging.getLogger("storage.qmp")
+
+
+class Error(Exception):
+    """ Base class for QMP errors """
+
+
+class ProtocolError(Error):
+    """ Unexpected message from QMP server """
+
+
+class CommandError(Error):
+    """ QMP command failed """
+
+    def __init__(self, command, error):
+        self.command = command
+        self.error_class = error.get("class")
+        self.desc = error.get("desc")
+
+    def __str__(self):
+        return "QMP command {} failed: {}: {}".format(
+            self.command, self.error_class, self.desc)
+
+
+class Client(object):
+    """
+    Synchronous QMP client.
+
+    Events received while waiting for a command response are logged and
+    dropped.
+
+    This class is not thread safe.
+    """
+
+    def __init__(self, path, timeout=10.0):
+        self._path = path
+        self._timeout = timeout
+        self._sock = None
+        self._file = None
+
+    def connect(self):
+        """
+        Connect to QMP server and negotiate capabilities.
+
+        Raises:
+            OSError if connecting to the server failed.
+            Error if the server does not speak QMP.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self._timeout)
+            sock.connect(self._path)
+            self._sock = sock
+            self._file = sock.makefile("rb")
+
+            greeting = self._read()
+            if "QMP" not in greeting:
+                raise ProtocolError(
+                    "Unexpected greeting: {}".format(greeting))
+
+            self.execute("qmp_capabilities")
+        except:
+            self.close()
+            raise
+
+    def execute(self, command, arguments=None):
+        """
+        Execute command and return the command result.
+
+        Raises:
+            CommandError if the command failed.
+            OSError if communicating with the server failed.
+        """
+        msg = {"execute": command}
+        if arguments:
+            msg["arguments"] = arguments
+
+        log.debug("Sending %s", msg)
+        self._sock.sendall(json.dumps(msg).encode("utf-8") + b"\n")
+
+        while True:
+            reply = self._read()
+            if "event" in reply:
+                log.debug("Dropping event %s", reply)
+                continue
+            if "error" in reply:
+                raise CommandError(command, reply["error"])
+            if "return" in reply:
+                return reply["return"]
+            raise ProtocolError("Unexpected reply: {}".format(reply))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, t, v, tb):
+        self.close()
+
+    def _read(self):
+        line = self._file.readline()
+        if not line:
+            raise ProtocolError("Connection closed by server")
+        try:
+            return json.loads(line)
+        except ValueError:
+            raise ProtocolError("Invalid message: {!r}".format(line))
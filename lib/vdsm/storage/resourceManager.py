@@ -15,6 +15,7 @@ from six.moves import queue
 from vdsm import utils
 from vdsm.common import concurrent
 from vdsm.common.logutils import SimpleLogAdapter
+from vdsm.common.time import monotonic_time
 from vdsm.storage import exception as se
 from vdsm.storage import guarded
 from vdsm.storage import rwlock
@@ -68,6 +69,9 @@ STATUS_FREE = "free"
 STATUS_SHARED = "shared"
 STATUS_LOCKED = "locked"
 
+# Number of lock shards per namespace.
+DEFAULT_SHARDS = 16
+
 
 def _statusFromType(locktype):
     if str(locktype) == SHARED:
@@ -150,6 +154,7 @@ class Request(object):
     full_name = property(lambda self: "%s.%s" % (self._namespace, self._name))
     lockType = property(lambda self: self._lockType)
     syncRoot = property(lambda self: self._syncRoot)
+    created = property(lambda self: self._created)
 
     def __init__(self, namespace, name, lockType, callback):
         self._syncRoot = threading.RLock()
@@ -160,6 +165,7 @@ class Request(object):
         self._isCanceled = False
         self._doneEvent = threading.Event()
         self._callback = callback
+        self._created = monotonic_time()
         self.reqID = str(uuid4())
         self._log = SimpleLogAdapter(
             log, {"ResName": self.full_name, "ReqID": self.reqID})
@@ -321,14 +327,20 @@ class _ResourceManager(object):
     """
     Manages all the resources in the application.
 
+    Resources in a namespace are partitioned into shards by resource name,
+    each protected by its own lock, so requests for different resources
+    rarely contend on the same lock. Looking up a namespace does not take
+    any lock; registering a namespace replaces the namespaces dict.
+
     This class is for internal usage only, clients should use the module
     interface.
     """
     _namespaceValidator = re.compile(r"^[\w\d_-]+$")
     _resourceNameValidator = re.compile(r"^[^\s.]+$")
 
-    def __init__(self):
-        self._syncRoot = rwlock.RWLock()
+    def __init__(self, shards=DEFAULT_SHARDS):
+        self._shards = shards
+        self._registerLock = threading.Lock()
         self._namespaces = {}
 
     def registerNamespace(self, namespace, factory):
@@ -339,35 +351,46 @@ class _ResourceManager(object):
             raise NamespaceRegistered(
                 f"Namespace '{namespace}' already registered")
 
-        with self._syncRoot.exclusive:
+        with self._registerLock:
             if namespace in self._namespaces:
                 raise NamespaceRegistered(
                     f"Namespace '{namespace}' already registered")
 
             log.debug("Registering namespace '%s'", namespace)
 
-            self._namespaces[namespace] = Namespace(factory)
+            namespaces = dict(self._namespaces)
+            namespaces[namespace] = Namespace(factory, self._shards)
+            self._namespaces = namespaces
 
     def getResourceStatus(self, namespace, name):
         if not self._resourceNameValidator.match(name):
             raise se.InvalidResourceName(name)
 
-        with self._syncRoot.shared:
-            try:
-                namespaceObj = self._namespaces[namespace]
-            except KeyError:
-                raise ValueError(
-                    f"Namespace '{namespace}' is not registered "
-                    "with this manager")
-            resources = namespaceObj.resources
-            with namespaceObj.lock:
-                if not namespaceObj.factory.resourceExists(name):
-                    raise KeyError(f"No such resource '{namespace}.{name}'")
+        namespaceObj = self._getNamespace(namespace)
+        shard = namespaceObj.shard(name)
+        with shard.lock:
+            if not namespaceObj.factory.resourceExists(name):
+                raise KeyError(f"No such resource '{namespace}.{name}'")
+
+            if name not in shard.resources:
+                return STATUS_FREE
+
+            return _statusFromType(shard.resources[name].currentLock)
 
-                if name not in resources:
-                    return STATUS_FREE
+    def stats(self):
+        """
+        Return lock wait and hold times per namespace.
+        """
+        return {name: namespaceObj.stats()
+                for name, namespaceObj in self._namespaces.items()}
 
-                return _statusFromType(resources[name].currentLock)
+    def _getNamespace(self, namespace):
+        try:
+            return self._namespaces[namespace]
+        except KeyError:
+            raise ValueError(
+                f"Namespace '{namespace}' is not registered "
+                "with this manager")
 
     def _switchLockType(self, resourceInfo, newLockType):
         switchLock = (resourceInfo.currentLock != newLockType)
@@ -404,6 +427,10 @@ class _ResourceManager(object):
                 log.warning("Couldn't close resource '%s'.",
                             resourceInfo.full_name, exc_info=True)
 
+    def _grant(self, shard, request):
+        request.grant()
+        shard.stats.waited(monotonic_time() - request.created)
+
     def acquireResource(self, namespace, name, lockType, timeout=None):
         """
         Acquire a resource synchronously.
@@ -454,16 +481,11 @@ class _ResourceManager(object):
         request = Request(namespace, name, lockType, callback)
         log.debug("Trying to register resource '%s' for lock type '%s'",
                   full_name, lockType)
-        with utils.RollbackContext() as contextCleanup, self._syncRoot.shared:
-            try:
-                namespaceObj = self._namespaces[namespace]
-            except KeyError:
-                raise ValueError(
-                    f"Namespace '{namespace}' is not registered "
-                    "with this manager")
-
-            resources = namespaceObj.resources
-            with namespaceObj.lock:
+        with utils.RollbackContext() as contextCleanup:
+            namespaceObj = self._getNamespace(namespace)
+            shard = namespaceObj.shard(name)
+            resources = shard.resources
+            with shard.lock:
                 try:
                     resource = resources[name]
                 except KeyError:
@@ -478,7 +500,7 @@ class _ResourceManager(object):
                                   "and queue is empty, Joining current "
                                   "shared lock (%d active users)",
                                   full_name, resource.activeUsers)
-                        request.grant()
+                        self._grant(shard, request)
                         contextCleanup.defer(request.emit,
                                              ResourceRef(namespace, name,
                                                          resource.realObj,
@@ -491,12 +513,8 @@ class _ResourceManager(object):
                               full_name, len(resource.queue))
                     return RequestRef(request)
 
-                # TODO : Creating the object inside the namespace lock causes
-                #        the entire namespace to lock and might cause
-                #        performance issues. As this is no currently a problem
-                #        I left it as it is to keep the code simple. If there
-                #        is a bottleneck in the resource framework, its
-                #        probably here.
+                # Creating the object inside the shard lock blocks only
+                # requests for resources in the same shard.
                 try:
                     obj = namespaceObj.factory.createResource(name, lockType)
                 except:
@@ -513,7 +531,7 @@ class _ResourceManager(object):
                 log.debug("Resource '%s' is free. Now locking as '%s' "
                           "(1 active user)",
                           full_name, request.lockType)
-                request.grant()
+                self._grant(shard, request)
                 contextCleanup.defer(request.emit,
                                      ResourceRef(namespace, name,
                                                  resource.realObj,
@@ -528,16 +546,11 @@ class _ResourceManager(object):
         full_name = "%s.%s" % (namespace, name)
 
         log.debug("Trying to release resource '%s'", full_name)
-        with utils.RollbackContext() as contextCleanup, self._syncRoot.shared:
-            try:
-                namespaceObj = self._namespaces[namespace]
-            except KeyError:
-                raise ValueError(
-                    f"Namespace '{namespace}' is not registered "
-                    "with this manager")
-            resources = namespaceObj.resources
-
-            with namespaceObj.lock:
+        with utils.RollbackContext() as contextCleanup:
+            shard = self._getNamespace(namespace).shard(name)
+            resources = shard.resources
+
+            with shard.lock:
                 try:
                     resource = resources[name]
                 except KeyError:
@@ -560,6 +573,7 @@ class _ResourceManager(object):
                     if len(resource.queue) == 0:
                         self._freeResource(resources[name])
                         del resources[name]
+                        shard.stats.held(monotonic_time() - resource.lockedAt)
                         log.debug("No one is waiting for resource '%s', "
                                   "Clearing records.", full_name)
                         return
@@ -589,7 +603,7 @@ class _ResourceManager(object):
                             nextRequest.cancel()
                             continue
 
-                        nextRequest.grant()
+                        self._grant(shard, nextRequest)
                         contextCleanup.defer(
                             partial(nextRequest.emit,
                                     ResourceRef(namespace, name,
@@ -619,7 +633,7 @@ class _ResourceManager(object):
 
                     nextRequest = resource.queue.pop()
                     try:
-                        nextRequest.grant()
+                        self._grant(shard, nextRequest)
                         contextCleanup.defer(
                             partial(nextRequest.emit,
                                     ResourceRef(namespace, name,
@@ -633,15 +647,82 @@ class _ResourceManager(object):
                               nextRequest, resource.activeUsers)
 
 
+class LockStats(object):
+    """
+    Lock wait and hold times.
+
+    Wait time is the time from registering a request until the request is
+    granted. Hold time is the time from locking a free resource until the
+    resource is free again.
+
+    Must be modified with the shard lock held.
+    """
+
+    def __init__(self):
+        self.granted = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.released = 0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+
+    def waited(self, seconds):
+        self.granted += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def held(self, seconds):
+        self.released += 1
+        self.hold_total += seconds
+        self.hold_max = max(self.hold_max, seconds)
+
+    def add(self, other):
+        self.granted += other.granted
+        self.wait_total += other.wait_total
+        self.wait_max = max(self.wait_max, other.wait_max)
+        self.released += other.released
+        self.hold_total += other.hold_total
+        self.hold_max = max(self.hold_max, other.hold_max)
+
+    def info(self):
+        return {
+            "granted": self.granted,
+            "wait_total": self.wait_total,
+            "wait_max": self.wait_max,
+            "released": self.released,
+            "hold_total": self.hold_total,
+            "hold_max": self.hold_max,
+        }
+
+
+class Shard(object):
+    """
+    Shard struct
+    """
+    def __init__(self):
+        self.resources = {}
+        self.lock = threading.Lock()
+        self.stats = LockStats()
+
+
 class Namespace(object):
     """
     Namespace struct
     """
-    def __init__(self, factory):
-        self.resources = {}
-        self.lock = threading.Lock()  # rwlock.RWLock()
+    def __init__(self, factory, shards=DEFAULT_SHARDS):
+        self.shards = [Shard() for _ in range(shards)]
         self.factory = factory
 
+    def shard(self, name):
+        return self.shards[hash(name) % len(self.shards)]
+
+    def stats(self):
+        total = LockStats()
+        for shard in self.shards:
+            with shard.lock:
+                total.add(shard.stats)
+        return total.info()
+
 
 class ResourceInfo(object):
     """
@@ -655,6 +736,7 @@ class ResourceInfo(object):
         self.namespace = namespace
         self.name = name
         self.full_name = "%s.%s" % (namespace, name)
+        self.lockedAt = monotonic_time()
 
 
 class Owner(object):
@@ -829,6 +911,13 @@ def releaseResource(namespace, name):
     _manager.releaseResource(namespace, name)
 
 
+def stats():
+    """
+    Return lock wait and hold times per namespace.
+    """
+    return _manager.stats()
+
+
 def getNamespace(*args):
     """
     Format namespace stirng from sequence of names.
@@ -429,6 +429,13 @@ class StorageDomainManifest(object):
     def getImageDir(self, imgUUID):
         return os.path.join(self.domaindir, DOMAIN_IMAGES, imgUUID)
 
+    def invalidate_image(self, imgUUID):
+        """
+        Must be called after adding, removing or renaming image volumes, to
+        invalidate cached volumes info. Storage domains caching volumes info
+        should override this.
+        """
+
     def getIsoDomainImagesDir(self):
         """
         Get 'images' directory from Iso domain
@@ -1046,8 +1053,11 @@ class StorageDomain(object):
     def getAllImages(self):
         return self._manifest.getAllImages()
 
-    def getAllVolumes(self):
-        return self._manifest.getAllVolumes()
+    def getAllVolumes(self, imgUUID=None):
+        return self._manifest.getAllVolumes(imgUUID)
+
+    def invalidate_image(self, imgUUID):
+        self._manifest.invalidate_image(imgUUID)
 
     def dump(self, full=False):
         return self._manifest.dump(full=full)
@@ -1480,6 +1490,14 @@ class StorageDomain(object):
     def findDomainPath(sdUUID):
         raise NotImplementedError
 
+    @staticmethod
+    def findDomainPaths(sdUUIDs):
+        """
+        Look up many domains at once, returning dict mapping sdUUID to
+        domain path for the domains found.
+        """
+        raise NotImplementedError
+
     def getMetadata(self):
         return self._manifest.getMetadata()
 
@@ -10,7 +10,12 @@ from __future__ import absolute_import
 import logging
 import threading
 
+from six.moves import queue
+
 from vdsm import utils
+from vdsm.common import concurrent
+from vdsm.common.config import config
+from vdsm.common.time import monotonic_time
 from vdsm.storage import exception as se
 from vdsm.storage import lvm
 from vdsm.storage import misc
@@ -46,7 +51,10 @@ class StorageDomainCache:
     STORAGE_STALE = 1
     STORAGE_REFRESHING = 2
 
-    def __init__(self):
+    def __init__(self, lookup_timeout=None):
+        if lookup_timeout is None:
+            lookup_timeout = config.getint("irs", "domain_lookup_timeout")
+        self._lookup_timeout = lookup_timeout
         self._syncroot = threading.Condition()
         self.__domainCache = {}
         self.__inProgress = set()
@@ -139,34 +147,133 @@ class StorageDomainCache:
         return findMethod(sdUUID)
 
     def _findUnfetchedDomain(self, sdUUID):
+        self.log.info("Looking up domain %s", sdUUID)
+        with utils.stopwatch(
+                "Looking up domain {}".format(sdUUID),
+                level=logging.INFO,
+                log=self.log):
+            domains = self._findUnfetchedDomains([sdUUID])
+
+        try:
+            return domains[sdUUID]
+        except KeyError:
+            raise se.StorageDomainDoesNotExist(sdUUID)
+
+    def _findUnfetchedDomains(self, sdUUIDs):
+        """
+        Look up domains in all storage backends concurrently, scanning every
+        backend once for all domains.
+
+        Returns as soon as all domains were found, or all backends finished
+        the lookup. A backend that does not finish within the lookup timeout
+        (e.g. a hung NFS mount) is left behind; its lookup continues in the
+        background and its results are dropped.
+
+        Returns dict mapping sdUUID to domain for the domains found.
+        """
+        backends = self._backends()
+        results = queue.Queue()
+
+        for name, domClass in backends:
+            t = concurrent.thread(
+                self._lookupBackend,
+                args=(name, domClass, sdUUIDs, results),
+                name="sdc/" + name,
+                log=self.log)
+            t.start()
+
+        pending = set(sdUUIDs)
+        running = set(name for name, _ in backends)
+        found = {}
+        deadline = monotonic_time() + self._lookup_timeout
+
+        while pending and running:
+            timeout = deadline - monotonic_time()
+            if timeout <= 0:
+                break
+            try:
+                name, domains = results.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            running.discard(name)
+            for sdUUID, domain in domains.items():
+                if sdUUID in pending:
+                    pending.discard(sdUUID)
+                    found[sdUUID] = domain
+
+        if pending and running:
+            self.log.warning(
+                "Timeout looking up domains %s, storage backends %s did not "
+                "respond within %s seconds",
+                sorted(pending), sorted(running), self._lookup_timeout)
+
+        return found
+
+    def _lookupBackend(self, name, domClass, sdUUIDs, results):
+        domains = {}
+        try:
+            with utils.stopwatch(
+                    "Looking up domains in {} storage".format(name),
+                    level=logging.INFO,
+                    log=self.log):
+                paths = domClass.findDomainPaths(sdUUIDs)
+                for sdUUID, path in paths.items():
+                    try:
+                        domains[sdUUID] = domClass(path)
+                    except Exception:
+                        self.log.error(
+                            "Error while producing domain `%s`",
+                            sdUUID, exc_info=True)
+        except Exception:
+            self.log.error(
+                "Error while looking for domains %s in %s storage",
+                sdUUIDs, name, exc_info=True)
+        finally:
+            results.put((name, domains))
+
+    def _backends(self):
         from vdsm.storage import blockSD
         from vdsm.storage import glusterSD
         from vdsm.storage import localFsSD
         from vdsm.storage import nfsSD
 
-        # The order is somewhat important, it's ordered
-        # by how quickly get can find the domain. For instance
-        # if an nfs mount is unavailable we will get stuck
-        # until it times out, this should affect fetching
-        # of block\local domains. If for any case in the future
-        # this changes, please update the order.
+        return (
+            ("block", blockSD.BlockStorageDomain),
+            ("gluster", glusterSD.GlusterStorageDomain),
+            ("localfs", localFsSD.LocalFsStorageDomain),
+            ("nfs", nfsSD.NfsStorageDomain),
+        )
 
-        self.log.info("Looking up domain %s", sdUUID)
+    def prefetch(self, sdUUIDs):
+        """
+        Look up domains missing in the cache with a single scan of every
+        storage backend, and add the domains found to the cache.
+
+        Use before producing many domains; otherwise every unknown domain is
+        looked up separately.
+        """
+        with self._syncroot:
+            missing = [sdUUID for sdUUID in sdUUIDs
+                       if sdUUID not in self.__domainCache and
+                       sdUUID not in self.__inProgress and
+                       sdUUID not in self.knownSDs]
+        if not missing:
+            return
+
+        if self.__staleStatus != self.STORAGE_UPDATED:
+            self.refreshStorage()
+
+        self.log.info("Looking up domains %s", missing)
         with utils.stopwatch(
-                "Looking up domain {}".format(sdUUID),
+                "Looking up {} domains".format(len(missing)),
                 level=logging.INFO,
                 log=self.log):
-            for mod in (blockSD, glusterSD, localFsSD, nfsSD):
-                try:
-                    return mod.findDomain(sdUUID)
-                except se.StorageDomainDoesNotExist:
-                    pass
-                except Exception:
-                    self.log.error(
-                        "Error while looking for domain `%s`",
-                        sdUUID, exc_info=True)
-
-        raise se.StorageDomainDoesNotExist(sdUUID)
+            domains = self._findUnfetchedDomains(missing)
+
+        with self._syncroot:
+            for sdUUID, domain in domains.items():
+                self.__domainCache.setdefault(sdUUID, domain)
 
     def getUUIDs(self):
         from vdsm.storage import blockSD
@@ -12,6 +12,7 @@ from vdsm import utils
 
 from vdsm.common import properties
 from vdsm.storage import constants as sc
+from vdsm.storage import copyscheduler
 from vdsm.storage import exception as se
 from vdsm.storage import guarded
 from vdsm.storage import qemuimg
@@ -40,16 +41,28 @@ class Job(base.Job):
             destination, host_id, job_id=job_id)
         self._source = _create_endpoint(
             source, host_id, job_id=job_id, dest=self._dest)
-        self._operation = None
+        self._copy = None
         self._copy_bitmaps = copy_bitmaps
 
     @property
     def progress(self):
-        return getattr(self._operation, 'progress', None)
+        return getattr(self._copy, 'progress', None)
+
+    @property
+    def throughput(self):
+        return getattr(self._copy, 'throughput', None)
+
+    @property
+    def eta(self):
+        return getattr(self._copy, 'eta', None)
+
+    @property
+    def stalled(self):
+        return getattr(self._copy, 'stalled', None)
 
     def _abort(self):
-        if self._operation:
-            self._operation.abort()
+        if self._copy:
+            self._copy.cancel()
 
     def _validate_copy_bitmaps(self, src_format, dst_format):
         if self._copy_bitmaps and qemuimg.FORMAT.RAW in (
@@ -78,8 +91,15 @@ class Job(base.Job):
 
                 self._validate_copy_bitmaps(src_format, dst_format)
 
-                with self._dest.volume_operation():
-                    self._operation = qemuimg.convert(
+                self._copy = copyscheduler.copy(
+                    domains=(self._source.sd_id, self._dest.sd_id),
+                    src_type=self._source.storage_type,
+                    dst_type=self._dest.storage_type)
+
+                # Wait until the copy is admitted before starting the volume
+                # operation.
+                with self._copy, self._dest.volume_operation():
+                    operation = qemuimg.convert(
                         self._source.path,
                         self._dest.path,
                         srcFormat=src_format,
@@ -92,12 +112,15 @@ class Job(base.Job):
                         create=self._dest.requires_create,
                         bitmaps=self._copy_bitmaps,
                         target_is_zero=self._dest.zero_initialized,
+                        coroutines=self._copy.coroutines,
+                        rate_limit=self._copy.rate_limit,
+                        size=self._source.capacity,
                     )
                     with utils.stopwatch(
                             "Copy volume {}".format(self._source.path),
                             level=logging.INFO,
                             log=log):
-                        self._operation.run()
+                        self._copy.run(operation)
 
 
 def _create_endpoint(params, host_id, job_id=None, dest=None):
@@ -198,6 +221,15 @@ class CopyDataDivEndpoint(properties.Owner):
     def zero_initialized(self):
         return self.volume.zero_initialized()
 
+    @property
+    def storage_type(self):
+        dom = sdCache.produce_manifest(self.sd_id)
+        return copyscheduler.storage_type(dom)
+
+    @property
+    def capacity(self):
+        return self.volume.getCapacity()
+
     @property
     def volume(self):
         if self._vol is None:
@@ -292,10 +324,24 @@ class CopyDataExternalEndpoint(properties.Owner):
     def zero_initialized(self):
         return self.is_zero
 
+    @property
+    def storage_type(self):
+        return copyscheduler.NETWORK
+
+    @property
+    def capacity(self):
+        # Not available for external volumes.
+        return None
+
     @property
     def img_id(self):
         return None
 
+    @property
+    def sd_id(self):
+        # External volumes are not stored in a storage domain.
+        return None
+
     @contextmanager
     def volume_operation(self):
         dom = sdCache.produce_manifest(self.lease.sd_id)
@@ -35,6 +35,18 @@ class Job(base.Job):
     def progress(self):
         return getattr(self.operation, 'progress', None)
 
+    @property
+    def throughput(self):
+        return getattr(self.operation, 'throughput', None)
+
+    @property
+    def eta(self):
+        return getattr(self.operation, 'eta', None)
+
+    @property
+    def stalled(self):
+        return getattr(self.operation, 'stalled', None)
+
     def _run(self):
         self.log.info("Merging subchain %s", self.subchain)
         with guarded.context(self.subchain.locks):
@@ -49,7 +61,8 @@ class Job(base.Job):
                 self.operation = qemuimg.commit(
                     top_vol_path,
                     topFormat=sc.fmt2str(self.subchain.top_vol.getFormat()),
-                    base=base_vol_path)
+                    base=base_vol_path,
+                    size=self.subchain.top_vol.getCapacity())
                 self.operation.run()
 
                 if (self.subchain.base_vol.getFormat() == sc.COW_FORMAT and
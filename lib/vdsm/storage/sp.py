@@ -32,6 +32,7 @@ from vdsm.storage import mount
 from vdsm.storage import resourceManager as rm
 from vdsm.storage import sd
 from vdsm.storage import spwd
+from vdsm.storage import taskjournal
 from vdsm.storage import xlease
 from vdsm.storage.formatconverter import DefaultFormatConverter
 from vdsm.storage.sdc import sdCache
@@ -91,6 +92,7 @@ class StoragePool(object):
         self.hsmMailer = None
         self.spmMailer = None
         self.masterDomain = None
+        self.tasksDir = None
         self.spmRole = SPM_FREE
         self.domainMonitor = domainMonitor
         self._upgradeCallback = partial(StoragePool._upgradePoolDomain,
@@ -437,6 +439,11 @@ class StoragePool(object):
 
             self._set_insecure()
 
+            # Another host may modify the tasks journal when it becomes the
+            # SPM.
+            if self.tasksDir is not None:
+                taskjournal.drop(self.tasksDir)
+
             try:
                 self.cleanupMasterMount()
             except:
@@ -49,6 +49,7 @@ from vdsm.storage import exception as se
 from vdsm.storage import constants as sc
 from vdsm.storage import outOfProcess as oop
 from vdsm.storage import resourceManager as rm
+from vdsm.storage import taskjournal
 
 
 KEY_SEPARATOR = "="
@@ -481,6 +482,7 @@ class Task:
         self.persistPolicy = TaskPersistType.none
         self.cleanPolicy = TaskCleanType.auto
         self.store = None
+        self.journal = None
         self.defaultException = None
 
         self.state = State(State.init)
@@ -496,6 +498,7 @@ class Task:
             self._abort_callbacks.add(abort_callback)
         self._aborting = False
         self._forceAbort = False
+        self._progress_operation = None
         self.ref = 0
 
         self.recoveries = []
@@ -509,20 +512,24 @@ class Task:
         self.log = SimpleLogAdapter(self.log, {"Task": self.id})
 
     def __del__(self):
-        def finalize(log, owner, taskDir):
+        def finalize(log, owner, taskDir, journal, taskID):
             log.warn("Task was autocleaned")
             owner.releaseAll()
-            if taskDir is not None:
+            if journal is not None:
+                journal.remove(taskID)
+            elif taskDir is not None:
                 getProcPool().fileUtils.cleanupdir(taskDir)
 
         if not self.state.isDone():
             taskDir = None
+            journal = None
             if (self.cleanPolicy == TaskCleanType.auto and
                     self.store is not None):
                 taskDir = os.path.join(self.store, self.id)
+                journal = self.journal
             t = concurrent.thread(
                 finalize,
-                args=(self.log, self.resOwner, taskDir),
+                args=(self.log, self.resOwner, taskDir, journal, self.id),
                 name="task/" + self.id[:8])
             t.start()
 
@@ -688,6 +695,61 @@ class Task:
             cls.log.error("Unexpected error", exc_info=True)
             raise se.TaskMetaDataSaveError(filename)
 
+    @classmethod
+    def _toDict(cls, obj, fields):
+        return {field: six.text_type(getattr(obj, field)) for field in fields}
+
+    @classmethod
+    def _fromDict(cls, d, obj, fields):
+        for field, value in d.items():
+            if field not in fields:
+                cls.log.warning("Task._fromDict: ignoring field %s", field)
+                continue
+            setattr(obj, field, fields[field](value))
+
+    def _snapshot(self):
+        """
+        Return the task metadata as a dict, for saving in the journal.
+        """
+        self.njobs = len(self.jobs)
+        self.nrecoveries = len(self.recoveries)
+        snapshot = {
+            "task": self._toDict(self, Task.fields),
+            "jobs": [self._toDict(j, Job.fields) for j in self.jobs],
+            "recoveries": [self._toDict(r, Recovery.fields)
+                           for r in self.recoveries],
+        }
+        if self.state == State.finished:
+            snapshot["result"] = self._toDict(self.result, TaskResult.fields)
+        return snapshot
+
+    def _loadSnapshot(self, snapshot):
+        if self.state != State.init:
+            raise se.TaskMetaDataLoadError("task %s - can't load self: "
+                                           "not in init state" % self)
+        oldid = self.id
+        try:
+            self._fromDict(snapshot["task"], self, Task.fields)
+            if self.id != oldid:
+                raise ValueError("snapshot id does not match (%s != %s)" %
+                                 (self.id, oldid))
+            if "result" in snapshot:
+                self._fromDict(snapshot["result"], self.result,
+                               TaskResult.fields)
+            for d in snapshot["jobs"]:
+                job = Job("load", None)
+                self._fromDict(d, job, Job.fields)
+                job.setOwnerTask(self)
+                self.jobs.append(job)
+            for d in snapshot["recoveries"]:
+                rec = Recovery("load", "load", "load", "load", "")
+                self._fromDict(d, rec, Recovery.fields)
+                rec.setOwnerTask(self)
+                self.recoveries.append(rec)
+        except Exception as e:
+            self.log.error("Unexpected error", exc_info=True)
+            raise se.TaskMetaDataLoadError("task %s: %s" % (oldid, e))
+
     def _loadTaskMetaFile(self, taskDir):
         taskFile = os.path.join(taskDir, self.id + TASK_EXT)
         self._loadMetaFile(taskFile, self, Task.fields)
@@ -757,6 +819,9 @@ class Task:
             self.recoveries[rn].setOwnerTask(self)
 
     def _save(self, storPath):
+        if self.journal is not None:
+            self.journal.save(self.id, self._snapshot())
+            return
         origTaskDir = os.path.join(storPath, self.id)
         if not getProcPool().os.path.exists(origTaskDir):
             raise se.TaskDirError("_save: no such task dir '%s'" % origTaskDir)
@@ -790,6 +855,9 @@ class Task:
         getProcPool().fileUtils.fsyncPath(origTaskDir)
 
     def _clean(self, storPath):
+        if self.journal is not None:
+            self.journal.remove(self.id)
+            return
         taskDir = os.path.join(storPath, self.id)
         getProcPool().fileUtils.cleanupdir(taskDir)
 
@@ -1094,13 +1162,15 @@ class Task:
         self.setCleanPolicy(cleanPolicy)
         if self.persistPolicy != TaskPersistType.none and not self.store:
             raise se.TaskPersistError("no store defined")
-        taskDir = os.path.join(self.store, self.id)
-        try:
-            getProcPool().fileUtils.createdir(taskDir)
-        except Exception as e:
-            self.log.error("Unexpected error", exc_info=True)
-            raise se.TaskPersistError("%s: cannot access/create taskdir"
-                                      " %s: %s" % (self, taskDir, e))
+        self.journal = taskjournal.get(self.store)
+        if self.journal is None:
+            taskDir = os.path.join(self.store, self.id)
+            try:
+                getProcPool().fileUtils.createdir(taskDir)
+            except Exception as e:
+                self.log.error("Unexpected error", exc_info=True)
+                raise se.TaskPersistError("%s: cannot access/create taskdir"
+                                          " %s: %s" % (self, taskDir, e))
         if (self.persistPolicy == TaskPersistType.auto and
                 self.state != State.init):
             self.persist()
@@ -1146,6 +1216,24 @@ class Task:
         t._load(store, ext)
         return t
 
+    @classmethod
+    def loadSnapshot(cls, taskid, snapshot):
+        """
+        Load task from a journal snapshot.
+        """
+        t = Task(taskid)
+        t._loadSnapshot(snapshot)
+        return t
+
+    @classmethod
+    def removeTaskDirs(cls, store, taskid):
+        """
+        Remove task directories in the legacy layout.
+        """
+        for ext in ("", TEMP_EXT, BACKUP_EXT):
+            getProcPool().fileUtils.cleanupdir(
+                os.path.join(store, taskid + ext))
+
     @threadlocal_task
     def prepare(self, func, *args, **kwargs):
         message = self.error
@@ -1220,6 +1308,27 @@ class Task:
             with self._abort_lock:
                 self._abort_callbacks.discard(callback)
 
+    @contextmanager
+    def progress_operation(self, operation):
+        """
+        Report operation progress in the task info while the context is
+        active. operation must implement info(), see
+        qemuimg.ProgressCommand.info().
+        """
+        self._progress_operation = operation
+        try:
+            yield
+        finally:
+            self._progress_operation = None
+
+    def _progress_info(self):
+        operation = self._progress_operation
+        if operation is None:
+            return {}
+        info = operation.info()
+        info["progress"] = int(info["progress"])
+        return info
+
     def _execute_abort_callbacks(self):
         with self._abort_lock:
             self._aborting = True
@@ -1296,7 +1405,9 @@ class Task:
         return str(self.state)
 
     def getInfo(self):
-        return dict(id=self.id, verb=self.name)
+        info = dict(id=self.id, verb=self.name)
+        info.update(self._progress_info())
+        return info
 
     def deprecated_getStatus(self):
         oReturn = {}
@@ -1316,7 +1427,7 @@ class Task:
         return oReturn
 
     def getDetails(self):
-        return {
+        details = {
             "id": self.id,
             "verb": self.name,
             "state": str(self.state),
@@ -1325,6 +1436,8 @@ class Task:
             "result": self.result.result,
             "tag": self.tag
         }
+        details.update(self._progress_info())
+        return details
 
     def getID(self):
         return self.id
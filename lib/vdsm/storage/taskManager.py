@@ -8,8 +8,9 @@ import threading
 
 from vdsm.config import config
 from vdsm.storage import exception as se
+from vdsm.storage import taskjournal
+from vdsm.storage import taskpool
 from vdsm.storage.task import Task, Job, TaskCleanType
-from vdsm.storage.threadPool import ThreadPool
 
 
 class TaskManager:
@@ -17,9 +18,17 @@ class TaskManager:
 
     def __init__(self,
                  tpSize=config.getint('irs', 'thread_pool_size'),
-                 waitTimeout=3,
-                 maxTasks=config.getint('irs', 'max_tasks')):
-        self.tp = ThreadPool("tasks", tpSize, waitTimeout, maxTasks)
+                 waitTimeout=60,
+                 maxTasks=config.getint('irs', 'max_tasks'),
+                 limits=None):
+        if limits is None:
+            limits = taskpool.parse_limits(config.get('irs', 'task_limits'))
+        self.tp = taskpool.TaskPool(
+            "tasks",
+            max_workers=tpSize,
+            max_tasks=maxTasks,
+            idle_timeout=waitTimeout,
+            limits=limits)
         self._tasks = {}
         self._unqueuedTasks = []
         self._lock = threading.Lock()
@@ -40,7 +49,7 @@ class TaskManager:
             self._tasks[task.id] = task
 
         try:
-            if not self.tp.queueTask(task.id, method):
+            if not self.tp.queueTask(task.id, method, group=task.name):
                 self.log.error("unable to queue task: %s", task.dumpTask())
                 with self._lock:
                     del self._tasks[task.id]
@@ -193,9 +202,36 @@ class TaskManager:
         if not os.path.exists(store):
             self.log.debug("task dump path %s does not exist.", store)
             return
+
+        # Another host may have modified the journal since it was loaded.
+        journal = taskjournal.reload(store)
+        journalTasks = journal.tasks() if journal is not None else {}
+
+        for taskID, snapshot in journalTasks.items():
+            self.log.debug("Loading journaled task %s", taskID)
+            try:
+                t = Task.loadSnapshot(taskID, snapshot)
+                t.setPersistence(store,
+                                 str(t.persistPolicy),
+                                 str(t.cleanPolicy))
+                self._unqueuedTasks.append(t)
+            except Exception:
+                self.log.error("taskManager: Skipping journaled task: %s",
+                               taskID,
+                               exc_info=True)
+                continue
+
         # taskID is the root part of each (root.ext) entry in the dump task dir
-        tasksIDs = set(os.path.splitext(tid)[0] for tid in os.listdir(store))
+        tasksIDs = set(os.path.splitext(tid)[0] for tid in os.listdir(store)
+                       if not taskjournal.is_journal_file(tid))
         for taskID in tasksIDs:
+            if taskID in journalTasks:
+                # Task was migrated to the journal, but removing the task
+                # directories failed.
+                self.log.debug("Removing migrated task %s", taskID)
+                Task.removeTaskDirs(store, taskID)
+                continue
+
             self.log.debug("Loading dumped task %s", taskID)
             try:
                 t = Task.loadTask(store, taskID)
@@ -209,6 +245,17 @@ class TaskManager:
                                exc_info=True)
                 continue
 
+            if journal is not None:
+                self.log.info("Migrating task %s to journal", taskID)
+                try:
+                    t.persist()
+                    Task.removeTaskDirs(store, taskID)
+                except Exception:
+                    # The task directories are kept, so we can try again
+                    # on the next SPM start.
+                    self.log.error("taskManager: Error migrating task %s",
+                                   taskID, exc_info=True)
+
     def recoverDumpedTasks(self):
         for task in self._unqueuedTasks[:]:
             self.queueRecovery(task)
@@ -0,0 +1,282 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+taskjournal - append-only persistence for storage tasks
+
+Persisting a task in the legacy layout rewrites a directory of small files
+(.task, .job.N, .recover.N, .result) on every state transition. With many
+concurrent tasks on the SPM, this is a lot of small synchronous writes on
+the master file system.
+
+The journal keeps all tasks in a single file in the tasks directory. Saving
+a task appends a record with a snapshot of the task, and removing a task
+appends a removal record. Records appended concurrently by multiple threads
+are written and synced together (group commit). The thread appending the
+first record of a batch writes the batch after the previous batch was
+written, so a thread never writes more than one batch. When the journal
+contains too many stale records, it is compacted by writing the snapshots
+of the live tasks to a new file and renaming it over the journal.
+
+Every record is a json object on a single line. When replaying the
+journal, the last record for a task wins. A record that was not written
+completely because of a crash is ignored and truncated; the task state
+before this record is used instead, like the backup directory in the legacy
+layout.
+
+The journal is replayed from storage when the SPM starts, since another
+host may have modified it while this host was not the SPM, and is dropped
+when the SPM stops.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import json
+import logging
+import os
+import threading
+
+from vdsm.config import config
+from vdsm.storage import exception as se
+
+JOURNAL_NAME = "tasks.journal"
+TEMP_EXT = ".tmp"
+
+# Time to wait until records appended by another thread are written.
+WAIT_TIMEOUT = 60
+
+OP_SAVE = "save"
+OP_REMOVE = "remove"
+
+log = logging.getLogger("storage.taskjournal")
+
+_lock = threading.Lock()
+_journals = {}
+
+
+def get(store):
+    """
+    Return the journal for tasks directory store, or None if the journal is
+    disabled.
+    """
+    if not config.getboolean("irs", "task_journal"):
+        return None
+    with _lock:
+        journal = _journals.get(store)
+        if journal is None:
+            journal = Journal(
+                store,
+                compact_records=config.getint(
+                    "irs", "task_journal_compact_records"))
+            _journals[store] = journal
+        return journal
+
+
+def reload(store):
+    """
+    Replay the journal in tasks directory store from storage, replacing the
+    cached journal. Return the journal, or None if the journal is disabled.
+    """
+    if not config.getboolean("irs", "task_journal"):
+        return None
+    journal = Journal(
+        store,
+        compact_records=config.getint("irs", "task_journal_compact_records"))
+    with _lock:
+        _journals[store] = journal
+    return journal
+
+
+def drop(store):
+    """
+    Drop the cached journal for tasks directory store. Must be called when
+    the tasks directory is released, since other hosts may modify it.
+    """
+    with _lock:
+        _journals.pop(store, None)
+
+
+def is_journal_file(name):
+    """
+    Return True if name is a journal file in the tasks directory.
+    """
+    return name.startswith(JOURNAL_NAME)
+
+
+class _Batch(object):
+
+    def __init__(self):
+        self.records = []
+        self.done = threading.Event()
+        self.error = None
+
+
+class Journal(object):
+    """
+    Append-only journal of task snapshots.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, store, compact_records=1000, timeout=WAIT_TIMEOUT):
+        self.path = os.path.join(store, JOURNAL_NAME)
+        self._compact_records = compact_records
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        # Held by the thread writing a batch.
+        self._write_lock = threading.Lock()
+        self._batch = _Batch()
+        self._tasks, self._records = self._replay()
+
+    def tasks(self):
+        """
+        Return dict of task snapshots keyed by task id.
+        """
+        with self._lock:
+            return dict(self._tasks)
+
+    def save(self, task_id, snapshot):
+        """
+        Append snapshot of task task_id to the journal, returning when the
+        record is synced to storage.
+
+        Raises se.TaskPersistError if writing the record failed.
+        """
+        self._append({"op": OP_SAVE, "id": task_id, "task": snapshot})
+
+    def remove(self, task_id):
+        """
+        Append removal of task task_id to the journal, returning when the
+        record is synced to storage.
+
+        Raises se.TaskPersistError if writing the record failed.
+        """
+        self._append({"op": OP_REMOVE, "id": task_id})
+
+    def _append(self, record):
+        line = json.dumps(record).encode("utf-8") + b"\n"
+
+        with self._lock:
+            if record["op"] == OP_SAVE:
+                self._tasks[record["id"]] = record["task"]
+            else:
+                self._tasks.pop(record["id"], None)
+
+            batch = self._batch
+            # The first thread appending to the batch writes it, other
+            # threads wait until the batch is written.
+            leader = not batch.records
+            batch.records.append(line)
+
+        if leader:
+            self._flush()
+
+        if not batch.done.wait(self._timeout):
+            raise se.TaskPersistError(
+                "Timeout writing to journal {}".format(self.path))
+
+        if batch.error is not None:
+            raise se.TaskPersistError(
+                "Error writing to journal {}: {}".format(
+                    self.path, batch.error))
+
+    def _flush(self):
+        # Wait until the previous batch is written. Records appended
+        # meanwhile are written with ours.
+        with self._write_lock:
+            with self._lock:
+                # Only the leader replaces the batch, so this is our batch.
+                batch = self._batch
+                self._batch = _Batch()
+                compact = (self._records + len(batch.records) >
+                           max(self._compact_records, 4 * len(self._tasks)))
+                if compact:
+                    tasks = dict(self._tasks)
+
+            try:
+                if compact:
+                    # The snapshots include the records in this batch.
+                    self._compact(tasks)
+                else:
+                    self._write(batch.records)
+            except Exception as e:
+                log.exception("Error writing journal %s", self.path)
+                batch.error = e
+            finally:
+                batch.done.set()
+
+    def _write(self, records):
+        created = not os.path.exists(self.path)
+        with open(self.path, "ab") as f:
+            f.write(b"".join(records))
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            _fsync_dir(os.path.dirname(self.path))
+        with self._lock:
+            self._records += len(records)
+
+    def _compact(self, tasks):
+        log.debug("Compacting journal %s (%d records, %d tasks)",
+                  self.path, self._records, len(tasks))
+        tmp = self.path + TEMP_EXT
+        records = [
+            json.dumps({"op": OP_SAVE, "id": task_id, "task": snapshot})
+            .encode("utf-8") + b"\n"
+            for task_id, snapshot in tasks.items()]
+        with open(tmp, "wb") as f:
+            f.write(b"".join(records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp, self.path)
+        _fsync_dir(os.path.dirname(self.path))
+        with self._lock:
+            self._records = len(records)
+
+    def _replay(self):
+        tasks = {}
+        records = 0
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return tasks, records
+
+        lines = data.split(b"\n")
+        # The last line is empty if the last record was written completely.
+        if lines[-1]:
+            log.warning("Truncating incomplete record in journal %s: %r",
+                        self.path, lines[-1])
+            # The next record must start on a new line.
+            self._truncate(len(data) - len(lines[-1]))
+        for line in lines[:-1]:
+            records += 1
+            try:
+                record = json.loads(line.decode("utf-8"))
+                op = record["op"]
+                task_id = record["id"]
+                if op == OP_SAVE:
+                    tasks[task_id] = record["task"]
+                elif op == OP_REMOVE:
+                    tasks.pop(task_id, None)
+                else:
+                    raise ValueError("Unknown op {!r}".format(op))
+            except (ValueError, KeyError, TypeError) as e:
+                log.warning("Ignoring invalid record in journal %s: %r: %s",
+                            self.path, line, e)
+
+        return tasks, records
+
+    def _truncate(self, size):
+        with open(self.path, "r+b") as f:
+            f.truncate(size)
+            os.fsync(f.fileno())
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,268 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+taskpool - thread pool for running storage tasks
+
+The pool starts worker threads on demand, up to max_workers, and idle
+workers exit after idle_timeout seconds. Tasks may be assigned to a group
+(e.g. the task verb) with a concurrency limit; when a group reaches its
+limit, its queued tasks wait while tasks in other groups run.
+
+The pool records queue depth, queue time and run time of tasks, reported
+by the health monitor.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import collections
+import logging
+import threading
+import weakref
+
+from vdsm.common import concurrent
+from vdsm.common.time import monotonic_time
+
+# Histogram buckets upper bounds in seconds.
+BUCKETS = (0.01, 0.1, 1, 10, 60, 600, 3600)
+
+log = logging.getLogger("storage.taskpool")
+
+_pools = weakref.WeakSet()
+
+
+def stats():
+    """
+    Return dict of stats for all pools, keyed by pool name.
+    """
+    return {pool.name: pool.stats() for pool in list(_pools)}
+
+
+def parse_limits(s):
+    """
+    Parse concurrency limits string in the format "group:limit,...".
+
+    Raises ValueError if the string is invalid.
+    """
+    limits = {}
+    for item in s.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        group, limit = item.split(":")
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError("Invalid limit for group {}: {}".format(
+                group, limit))
+        limits[group.strip()] = limit
+    return limits
+
+
+class Histogram(object):
+    """
+    Histogram of durations in seconds.
+
+    Not thread safe; must be used with the pool lock held.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._count = 0
+        self._total = 0.0
+
+    def add(self, value):
+        for i, bound in enumerate(self._buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self._buckets)
+        self._counts[i] += 1
+        self._count += 1
+        self._total += value
+
+    def info(self):
+        buckets = {str(bound): count
+                   for bound, count in zip(self._buckets, self._counts)}
+        buckets["+Inf"] = self._counts[-1]
+        return {
+            "count": self._count,
+            "total": self._total,
+            "buckets": buckets,
+        }
+
+
+class _Item(object):
+
+    def __init__(self, id, cmd, args, group):
+        self.id = id
+        self.cmd = cmd
+        self.args = args
+        self.group = group
+        self.queued = monotonic_time()
+
+
+class TaskPool(object):
+    """
+    Thread pool growing with demand, with per group concurrency limits.
+    """
+
+    def __init__(self, name, max_workers, max_tasks=100, idle_timeout=60,
+                 limits=None):
+        log.debug("Creating pool %s (max_workers=%s, max_tasks=%s, "
+                  "idle_timeout=%s, limits=%s)",
+                  name, max_workers, max_tasks, idle_timeout, limits)
+        self.name = name
+        self._max_workers = max_workers
+        self._max_tasks = max_tasks
+        self._idle_timeout = idle_timeout
+        self._limits = limits or {}
+        self._cond = threading.Condition(threading.Lock())
+        self._queue = collections.deque()
+        self._running = collections.Counter()
+        self._threads = set()
+        self._idle = 0
+        self._starting = 0
+        self._worker_id = 0
+        self._stopping = False
+        self._queue_time = Histogram()
+        self._run_time = Histogram()
+        _pools.add(self)
+
+    def queueTask(self, id, task, args=None, group=None):
+        """
+        Queue callable task, called as task(args) in a worker thread. If group
+        is specified and has a concurrency limit, the task waits until the
+        number of running tasks in the group is under the limit.
+
+        Returns False if the pool is stopping or the queue is full.
+        """
+        if not callable(task):
+            return False
+
+        with self._cond:
+            if self._stopping:
+                return False
+
+            if len(self._queue) >= self._max_tasks:
+                log.warning("Pool %s queue is full, rejecting task %s",
+                            self.name, id)
+                return False
+
+            self._queue.append(_Item(id, task, args, group))
+
+            # A notified idle worker is counted in _idle until it wakes up
+            # and takes a task, so during a burst of tasks we must compare
+            # with the queue size, not with zero.
+            available = self._idle + self._starting
+            if (len(self._queue) > available and
+                    len(self._threads) < self._max_workers):
+                self._add_worker()
+            else:
+                self._cond.notify()
+
+        return True
+
+    def joinAll(self, waitForThreads=True):
+        """
+        Stop the pool. Running tasks are not interrupted, and queued tasks
+        are dropped.
+        """
+        with self._cond:
+            self._stopping = True
+            self._queue.clear()
+            self._cond.notify_all()
+            threads = list(self._threads)
+
+        if waitForThreads:
+            for t in threads:
+                t.join()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": len(self._threads),
+                "idle": self._idle,
+                "queued": len(self._queue),
+                "running": sum(self._running.values()),
+                "groups": {group: count
+                           for group, count in self._running.items()
+                           if count},
+                "queue_time": self._queue_time.info(),
+                "run_time": self._run_time.info(),
+            }
+
+    # Private
+
+    def _add_worker(self):
+        # Must be called with the lock held.
+        name = "%s/%d" % (self.name, self._worker_id)
+        self._worker_id += 1
+        t = concurrent.thread(self._run, name=name, log=log)
+        self._threads.add(t)
+        self._starting += 1
+        t.start()
+
+    def _run(self):
+        with self._cond:
+            self._starting -= 1
+        try:
+            while True:
+                item = self._next_item()
+                if item is None:
+                    return
+                self._run_item(item)
+        finally:
+            with self._cond:
+                self._threads.discard(threading.current_thread())
+
+    def _next_item(self):
+        """
+        Return next runnable item, or None if this worker should exit.
+        """
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+
+                item = self._pop_runnable()
+                if item is not None:
+                    self._running[item.group] += 1
+                    self._queue_time.add(monotonic_time() - item.queued)
+                    return item
+
+                self._idle += 1
+                try:
+                    notified = self._cond.wait(self._idle_timeout)
+                finally:
+                    self._idle -= 1
+
+                if not notified and not self._queue:
+                    return None
+
+    def _pop_runnable(self):
+        for i, item in enumerate(self._queue):
+            limit = self._limits.get(item.group)
+            if limit is None or self._running[item.group] < limit:
+                del self._queue[i]
+                return item
+        return None
+
+    def _run_item(self, item):
+        start = monotonic_time()
+        try:
+            log.info("START task %s (cmd=%r, args=%r)",
+                     item.id, item.cmd, item.args)
+            item.cmd(item.args)
+            log.info("FINISH task %s", item.id)
+        except Exception:
+            log.exception("FINISH task %s failed (cmd=%r, args=%r)",
+                          item.id, item.cmd, item.args)
+        finally:
+            with self._cond:
+                self._run_time.add(monotonic_time() - start)
+                self._running[item.group] -= 1
+                # A queued task in this group may be runnable now.
+                if item.group in self._limits and self._queue:
+                    self._cond.notify_all()
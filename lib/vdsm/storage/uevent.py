@@ -0,0 +1,197 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+uevent - monitor kernel device events
+
+The kernel broadcasts device events (uevents) to the NETLINK_KOBJECT_UEVENT
+multicast group. The same events are processed by udev, but sysfs is
+updated before the event is sent, so listening to the kernel events is
+enough for keeping sysfs based caches up to date.
+
+Receiving kernel events does not require root.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import collections
+import errno
+import logging
+import socket
+import threading
+
+from vdsm.common import concurrent
+from vdsm.common.time import monotonic_time
+
+# Not defined in the socket module.
+NETLINK_KOBJECT_UEVENT = 15
+
+# Multicast group of kernel events. Group 2 is used by udev for events
+# after processing udev rules, in libudev specific format.
+KERNEL_GROUP = 1
+
+RECV_SIZE = 16 * 1024
+RCVBUF_SIZE = 1024 * 1024
+
+# Time to wait for events before checking if the monitor was stopped.
+POLL_INTERVAL = 1.0
+
+# Sequence number of the last event sent by the kernel.
+SEQNUM_PATH = "/sys/kernel/uevent_seqnum"
+
+log = logging.getLogger("storage.uevent")
+
+Event = collections.namedtuple("Event", "action,devpath,subsystem,env")
+
+
+def parse(data):
+    """
+    Parse kernel uevent message:
+
+        ACTION@DEVPATH\\0KEY=VALUE\\0KEY=VALUE\\0...
+
+    Returns Event, or None if the message is not a kernel event.
+    """
+    fields = data.decode("utf-8", errors="replace").split("\0")
+    if "@" not in fields[0]:
+        return None
+
+    env = {}
+    for field in fields[1:]:
+        key, sep, value = field.partition("=")
+        if sep:
+            env[key] = value
+
+    if "ACTION" not in env or "DEVPATH" not in env:
+        return None
+
+    return Event(
+        action=env["ACTION"],
+        devpath=env["DEVPATH"],
+        subsystem=env.get("SUBSYSTEM"),
+        env=env)
+
+
+class Monitor(object):
+    """
+    Call on_event(event) for every kernel event in subsystems. If events
+    were lost because the receive buffer overflowed, call on_overflow().
+
+    Callbacks are called in the monitor thread and must not block.
+    """
+
+    def __init__(self, on_event, on_overflow, subsystems=("block",)):
+        self._on_event = on_event
+        self._on_overflow = on_overflow
+        self._subsystems = frozenset(subsystems)
+        self._done = threading.Event()
+        self._cond = threading.Condition(threading.Lock())
+        self._seqnum = 0
+        self._running = False
+        self._sock = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """
+        Start monitoring. Events happening after this call returns are
+        reported.
+
+        Raises OSError if the netlink socket cannot be opened.
+        """
+        self._sock = socket.socket(
+            socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        try:
+            self._sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_SIZE)
+            self._sock.bind((0, KERNEL_GROUP))
+            self._sock.settimeout(POLL_INTERVAL)
+            # Events sent before we bound the socket are not interesting.
+            self._seqnum = read_seqnum()
+        except BaseException:
+            self._sock.close()
+            self._sock = None
+            raise
+
+        self._done.clear()
+        self._running = True
+        self._thread = concurrent.thread(self._run, name="uevent", log=log)
+        self._thread.start()
+
+    def stop(self):
+        self._done.set()
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def sync(self, timeout=POLL_INTERVAL):
+        """
+        Wait until all events sent by the kernel before this call were
+        handled.
+
+        Returns True if the events were handled, False if the monitor is
+        not running or the events were not received within timeout.
+        """
+        target = read_seqnum()
+        deadline = monotonic_time() + timeout
+        with self._cond:
+            while self._seqnum < target:
+                if not self.running:
+                    return False
+                remaining = deadline - monotonic_time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        log.debug("Monitoring %s events", sorted(self._subsystems))
+        try:
+            while not self._done.is_set():
+                try:
+                    data = self._sock.recv(RECV_SIZE)
+                except socket.timeout:
+                    continue
+                except OSError as e:
+                    if e.errno != errno.ENOBUFS:
+                        raise
+                    log.warning("Kernel events were lost")
+                    # Events up to seqnum were lost, later events will be
+                    # received.
+                    seqnum = read_seqnum()
+                    self._on_overflow()
+                    self._update_seqnum(seqnum)
+                    continue
+
+                event = parse(data)
+                if event is None:
+                    continue
+
+                if event.subsystem in self._subsystems:
+                    self._on_event(event)
+
+                seqnum = event.env.get("SEQNUM")
+                if seqnum is not None:
+                    self._update_seqnum(int(seqnum))
+        finally:
+            self._sock.close()
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+            log.debug("Monitoring stopped")
+
+    def _update_seqnum(self, seqnum):
+        with self._cond:
+            if seqnum > self._seqnum:
+                self._seqnum = seqnum
+                self._cond.notify_all()
+
+
+def read_seqnum():
+    with open(SEQNUM_PATH) as f:
+        return int(f.read())
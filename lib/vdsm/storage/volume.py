@@ -20,6 +20,7 @@ from vdsm.storage import exception as se
 from vdsm.storage import fileUtils
 from vdsm.storage import guarded
 from vdsm.storage import qemuimg
+from vdsm.storage import qemuimgcache
 from vdsm.storage import resourceManager as rm
 from vdsm.storage import task
 from vdsm.storage import utils as su
@@ -316,6 +317,8 @@ class VolumeManifest(object):
         volParams['descr'] = self.getDescription()
         volParams['legality'] = self.getLegality()
         volParams['block'] = self.is_block()
+        volParams['voltype'] = self.getVolType()
+        volParams['generation'] = self.getMetaParam(sc.GENERATION)
         return volParams
 
     def getVmVolumeInfo(self):
@@ -705,9 +708,14 @@ class VolumeManifest(object):
         if set_illegal:
             self.setLegality(sc.ILLEGAL_VOL)
 
-        yield
-        # Note: We intentionally do not use a try block here because we don't
-        # want the following code to run if there was an error.
+        try:
+            yield
+        finally:
+            # The operation may have modified the volume data, even if it
+            # failed.
+            qemuimgcache.invalidate(self.getVolumePath())
+        # Note: We intentionally do not use an except block here because we
+        # don't want the following code to run if there was an error.
         #
         # IMPORTANT: In order to provide an atomic state change, both legality
         # and the generation must be updated together in one write.
@@ -1330,6 +1338,8 @@ class Volume(object):
             cls.log.error("Unexpected error", exc_info=True)
             raise se.VolumeCreationError("Volume creation %s failed: %s" %
                                          (volUUID, e))
+        finally:
+            dom.invalidate_image(imgUUID)
 
         # Remove the rollback for the halfbaked volume
         vars.task.replaceRecoveries(
@@ -1425,6 +1435,7 @@ class Volume(object):
                 "Volume", "extendSizeFinalize",
                 [self.sdUUID, self.imgUUID, self.volUUID]))
             self._extendSize(new_capacity)
+            qemuimgcache.invalidate(self.getVolumePath())
 
         self.syncMetadata()  # update the metadata
 
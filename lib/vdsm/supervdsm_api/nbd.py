@@ -12,3 +12,8 @@ from . import expose
 @expose
 def nbd_start_transient_service(server_id, config):
     return nbd.start_transient_service(server_id, config)
+
+
+@expose
+def nbd_start_pool_daemon(index):
+    return nbd.start_pool_daemon(index)
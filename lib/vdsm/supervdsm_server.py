@@ -18,7 +18,6 @@ import syslog
 
 from contextlib import closing
 from functools import wraps
-from multiprocessing import connection
 from multiprocessing import Pipe
 from multiprocessing import Process
 
@@ -28,10 +27,12 @@ from vdsm.common import commands
 from vdsm.common import concurrent
 from vdsm.common import constants
 from vdsm.common import lockfile
+from vdsm.common import muxrpc
 from vdsm.common import sigutils
 
 try:
     from vdsm.gluster import listPublicFunctions
+    from vdsm.gluster import inventory as gluster_inventory
     _glusterEnabled = True
 except ImportError:
     _glusterEnabled = False
@@ -46,13 +47,11 @@ from vdsm.storage.fileUtils import chown, resolveGid, resolveUid
 from vdsm.storage.fileUtils import validateAccess as _validateAccess
 from vdsm.storage.iscsi import getDevIscsiInfo as _getdeviSCSIinfo
 from vdsm.storage.iscsi import readSessionInfo as _readSessionInfo
-from vdsm.common.supervdsm import _SuperVdsmManager
 
 from vdsm.network.initializer import init_privileged_network_components
 
 from vdsm.config import config
 
-_AUTHKEY = b""
 RUN_AS_TIMEOUT = config.getint("irs", "process_pool_timeout")
 
 _running = True
@@ -271,11 +270,8 @@ def main(args):
             signal.signal(signal.SIGTERM, terminate)
             signal.signal(signal.SIGINT, terminate)
 
-            log.debug("Creating remote object manager")
-            manager = _SuperVdsmManager(address=address, authkey=_AUTHKEY)
-            manager.register('instance', callable=_SuperVdsm)
-
-            server = manager.get_server()
+            log.debug("Creating supervdsm server")
+            server = muxrpc.Server(address, _SuperVdsm())
             server_thread = concurrent.thread(server.serve_forever)
             server_thread.start()
 
@@ -284,6 +280,9 @@ def main(args):
             if args.enable_network:
                 init_privileged_network_components()
 
+            if args.enable_gluster and constants.GLUSTER_MGMT_ENABLED:
+                gluster_inventory.start()
+
             log.debug("Started serving super vdsm object")
 
             while _running:
@@ -295,8 +294,7 @@ def main(args):
             log.debug("Terminated normally")
         finally:
             try:
-                with connection.Client(address, authkey=_AUTHKEY) as conn:
-                    server.shutdown(conn)
+                server.stop()
                 server_thread.join()
             except Exception:
                 # We ignore any errors here to avoid a situation where systemd
@@ -18,7 +18,6 @@ from vdsm.common import conv
 from vdsm.common import exception
 from vdsm.common import logutils
 from vdsm.common import response
-from vdsm import sslutils
 from vdsm import utils
 from vdsm import jsonrpcvdscli
 from vdsm.config import config
@@ -258,8 +257,6 @@ class SourceThread(object):
         return self.status
 
     def _createClient(self, port):
-        sslctx = sslutils.create_ssl_context()
-
         def is_ipv6_address(a):
             return (':' in a) and a.startswith('[') and a.endswith(']')
 
@@ -268,8 +265,9 @@ class SourceThread(object):
         else:
             host = self.remoteHost
 
-        client_socket = utils.create_connected_socket(host, int(port), sslctx)
-        return self._vm.cif.createStompClient(client_socket)
+        # Connections to the destination are shared by concurrent and
+        # subsequent migrations; closing the client returns it to the pool.
+        return self._vm.cif.destination_clients.get(host, int(port))
 
     def _setupVdsConnection(self):
         if self.hibernating:
@@ -472,6 +472,7 @@ class HostMonitor(object):
         if self._cif and _METRICS_ENABLED:
             stats = hostapi.get_stats(self._cif, self._samples.stats())
             hostapi.send_metrics(stats)
+            hostapi.send_rpc_metrics(self._cif)
 
 
 def _translate(bulk_stats):
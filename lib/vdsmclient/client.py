@@ -265,7 +265,7 @@ def find_schema(gluster_enabled=False):
 
 def create_namespaces(schema):
     namespaces = {}
-    for method in schema.get_methods:
+    for method in schema.method_names:
         namespace, command_name = method.split('.', 1)
         if namespace not in namespaces:
             namespaces[namespace] = []
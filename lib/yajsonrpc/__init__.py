@@ -16,6 +16,7 @@ from vdsm.common.time import monotonic_time, event_time
 from vdsm.common.password import protect_passwords, unprotect_passwords
 
 from yajsonrpc import exception
+from yajsonrpc import rpcstats
 
 __all__ = ["betterAsyncore", "stompserver", "stomp"]
 
@@ -177,13 +178,15 @@ class Notification(object):
 
 
 class _JsonRpcServeRequestContext(object):
-    def __init__(self, client, server_address, context):
+    def __init__(self, client, server_address, context, stats=None):
         self._requests = []
         self._client = client
+        self._stats = stats
         self._server_address = server_address
         self._context = context
         self._counter = 0
         self._requests = {}
+        self._methods = {}
         self._responses = []
 
     def setRequests(self, requests):
@@ -191,6 +194,7 @@ class _JsonRpcServeRequestContext(object):
             if not request.isNotification():
                 self._counter += 1
                 self._requests[request.id] = request
+                self._methods[request.id] = request.method
 
         self.sendReply()
 
@@ -213,12 +217,16 @@ class _JsonRpcServeRequestContext(object):
         encodedObjects = []
         for response in self._responses:
             try:
-                encodedObjects.append(response.encode())
+                encoded = response.encode()
             except:  # Error encoding data
                 response = JsonRpcResponse(None,
                                            exception.JsonRpcInternalError(),
                                            response.id)
-                encodedObjects.append(response.encode())
+                encoded = response.encode()
+            encodedObjects.append(encoded)
+            method = self._methods.get(response.id)
+            if self._stats is not None and method is not None:
+                self._stats.add_response_size(method, len(encoded))
 
         if len(encodedObjects) == 1:
             data = encodedObjects[0]
@@ -263,10 +271,10 @@ class JsonRpcServer(object):
 
     """
     Creates new JsonrRpcServer by providing a bridge, timeout in seconds
-    which defining how often we should log connections stats and thread
-    factory.
+    which defining how often we should log connections stats, thread
+    factory and rpcstats.RpcStats instance collecting calls statistics.
     """
-    def __init__(self, bridge, timeout, cif, threadFactory=None):
+    def __init__(self, bridge, timeout, cif, threadFactory=None, stats=None):
         self._bridge = bridge
         self._cif = cif
         self._workQueue = queue.Queue()
@@ -274,6 +282,13 @@ class JsonRpcServer(object):
         self._timeout = timeout
         self._next_report = monotonic_time() + self._timeout
         self._counter = 0
+        if stats is None:
+            stats = rpcstats.RpcStats(_SLOW_CALL_THRESHOLD)
+        self._stats = stats
+
+    @property
+    def stats(self):
+        return self._stats
 
     def queueRequest(self, req):
         self._workQueue.put_nowait(req)
@@ -292,17 +307,21 @@ class JsonRpcServer(object):
             self._counter = 0
 
     def _serveRequest(self, ctx, req):
-        start_time = monotonic_time()
-        response = self._handle_request(req, ctx)
-        duration = monotonic_time() - start_time
+        call = self._stats.start_call(req.method)
+        try:
+            response = self._handle_request(req, ctx)
+        except Exception:
+            self._stats.end_call(call, error=True)
+            raise
         error = getattr(response, "error", None)
+        duration = self._stats.end_call(call, error=error)
         if error is not None:
             self.log.info("RPC call %s failed (error %s) in %.2f seconds",
                           req.method, error.code, duration)
-        elif duration > _SLOW_CALL_THRESHOLD:
+        elif duration > self._stats.slow_call_threshold:
             self.log.info("RPC call %s took more than %.2f seconds "
-                          "to succeed: %.2f", req.method, _SLOW_CALL_THRESHOLD,
-                          duration)
+                          "to succeed: %.2f", req.method,
+                          self._stats.slow_call_threshold, duration)
         if response is not None:
             ctx.requestDone(response)
 
@@ -364,7 +383,8 @@ class JsonRpcServer(object):
 
     def _parseMessage(self, obj):
         client, server_address, context, msg = obj
-        ctx = _JsonRpcServeRequestContext(client, server_address, context)
+        ctx = _JsonRpcServeRequestContext(client, server_address, context,
+                                          self._stats)
 
         try:
             rawRequests = json.loads(msg)
@@ -400,6 +420,13 @@ class JsonRpcServer(object):
                 ctx.addResponse(JsonRpcResponse(
                     None, exception.JsonRpcInternalError(), None))
 
+        # The size of each request in a batch is not known, so we account
+        # an equal part of the message to each request.
+        if requests:
+            size = len(msg) // len(rawRequests)
+            for request in requests:
+                self._stats.add_request_size(request.method, size)
+
         ctx.setRequests(requests)
 
         # No request was built successfully or is only notifications
@@ -10,19 +10,31 @@ from __future__ import division
 
 import asyncore
 import errno
+import heapq
+import itertools
 import logging
+import selectors
 import socket
 import ssl
+import threading
 
 import six
 
 from vdsm import sslutils
 from vdsm.common.eventfd import EventFD
+from vdsm.common.time import monotonic_time
 
 
 _BLOCKING_IO_ERRORS = (errno.EAGAIN, errno.EALREADY, errno.EINPROGRESS,
                        errno.EWOULDBLOCK)
 
+# SSL may need to read or write on the underlying socket to complete any
+# operation (e.g. renegotiation), both mean "try again later".
+_SSL_RETRY_ERRORS = (ssl.SSL_ERROR_WANT_READ, ssl.SSL_ERROR_WANT_WRITE)
+
+# Maximum time to wait for events before checking all dispatchers again.
+_MAX_TIMEOUT = 30.0
+
 
 class Dispatcher(asyncore.dispatcher):
 
@@ -119,7 +131,7 @@ class Dispatcher(asyncore.dispatcher):
             else:
                 return data
         except sslutils.SSLError as e:
-            if e.errno == ssl.SSL_ERROR_WANT_READ:
+            if e.errno in _SSL_RETRY_ERRORS:
                 return None
             self._log.debug('SSL error receiving from %s: %s', self, e)
             self.handle_close()
@@ -137,13 +149,20 @@ class Dispatcher(asyncore.dispatcher):
                 raise
 
     def send(self, data):
+        """
+        Send as much of data as the socket accepts without blocking, and
+        return the number of bytes sent.
+
+        When 0 is returned, the caller must retry later with the same data;
+        SSL requires the retry of a partial write to use the same bytes.
+        """
         try:
             result = self.socket.send(data)
             if result == -1:
                 return 0
             return result
         except sslutils.SSLError as e:
-            if e.errno == ssl.SSL_ERROR_WANT_WRITE:
+            if e.errno in _SSL_RETRY_ERRORS:
                 return 0
             self._log.debug('SSL error sending to %s: %s ', self, e)
             self.handle_close()
@@ -213,17 +232,80 @@ class AsyncoreEvent(asyncore.file_dispatcher):
         asyncore.file_dispatcher.close(self)
 
 
+class _ChannelMap(dict):
+    """
+    Map file descriptors to dispatchers, remembering which descriptors were
+    added or removed since the reactor last looked at the map.
+
+    Dispatchers add and remove themselves from the map (see
+    asyncore.dispatcher.add_channel and del_channel), possibly from other
+    threads, so the reactor updates the selector lazily. on_change is called
+    after every change, so the reactor can wake up to apply it.
+    """
+
+    def __init__(self, on_change):
+        dict.__init__(self)
+        self.changed = set()
+        self._on_change = on_change
+
+    def __setitem__(self, fd, dispatcher):
+        dict.__setitem__(self, fd, dispatcher)
+        self.changed.add(fd)
+        self._on_change()
+
+    def __delitem__(self, fd):
+        dict.__delitem__(self, fd)
+        self.changed.add(fd)
+        self._on_change()
+
+    def pop(self, fd, *default):
+        self.changed.add(fd)
+        try:
+            return dict.pop(self, fd, *default)
+        finally:
+            self._on_change()
+
+    def clear(self):
+        self.changed.update(self)
+        dict.clear(self)
+        self._on_change()
+
+
 class Reactor(object):
     """
     map dictionary maps sock.fileno() to channels to watch. We add channels to
     it by running add_dispatcher and removing by remove_dispatcher.
-    It is used by asyncore loop to know which channels events to track.
+
+    Channels are watched using a selector (epoll on Linux). Registrations are
+    kept between iterations and modified only when a channel readable() or
+    writable() state changes.
+
+    A channel state is checked only when it may have changed: after handling
+    its events, when the timeout returned by its next_check_interval()
+    expires, when it is added to the map, or when the reactor is woken up for
+    it. Timeouts are kept in a heap, so idle channels do not cost anything
+    per iteration.
 
     We use eventfd as mechanism to trigger processing when needed.
     """
 
-    def __init__(self):
-        self._map = {}
+    _log = logging.getLogger("vds.reactor")
+
+    def __init__(self, clock=monotonic_time):
+        self._clock = clock
+        self._wakeupEvent = None
+        self._thread_id = None
+        self._map = _ChannelMap(self._map_changed)
+        self._selector = selectors.DefaultSelector()
+        # Heap of (deadline, seq, fd). Entries are invalidated by replacing
+        # the channel deadline in self._deadlines.
+        self._timers = []
+        self._deadlines = {}
+        self._seq = itertools.count()
+        self._dirty = set()
+        # Channels woken up by other threads, and whether all channels were.
+        self._woken = set()
+        self._wake_all = False
         self._is_running = False
         self._wakeupEvent = AsyncoreEvent(self._map)
 
@@ -231,30 +313,183 @@ class Reactor(object):
         return Dispatcher(impl=impl, sock=sock, map=self._map)
 
     def process_requests(self):
+        self._thread_id = threading.get_ident()
         self._is_running = True
-        while self._is_running:
-            asyncore.loop(
-                timeout=self._get_timeout(self._map),
-                use_poll=True,
-                map=self._map,
-                count=1,
-            )
+        try:
+            while self._is_running:
+                self._process_once()
+        finally:
+            for dispatcher in list(six.viewvalues(self._map)):
+                dispatcher.close()
 
-        for dispatcher in list(six.viewvalues(self._map)):
-            dispatcher.close()
+            self._map.clear()
+            self._update_registrations()
 
-        self._map.clear()
+    def _process_once(self):
+        self._update_registrations()
+        self._update_channels()
+        ready = self._selector.select(self._get_timeout())
+        self._process_events(ready)
+        self._process_timers()
 
-    def _get_timeout(self, map):
-        timeout = 30.0
-        for disp in list(six.viewvalues(self._map)):
-            if hasattr(disp, "next_check_interval"):
-                interval = disp.next_check_interval()
-                if interval is not None and interval >= 0:
-                    timeout = min(interval, timeout)
-        return timeout
+    def _map_changed(self):
+        """
+        Called when dispatchers are added to or removed from the map. When
+        called from another thread, wake up the reactor to watch the new
+        dispatchers now, instead of after the next event or timeout.
+        """
+        if (self._thread_id is None or
+                threading.get_ident() == self._thread_id):
+            return
+        event = self._wakeupEvent
+        if event is None or event.closing:
+            return
+        try:
+            event.set()
+        except OSError:
+            # The event was closed by the reactor thread.
+            pass
+
+    def _update_registrations(self):
+        """
+        Apply changes in the channel map to the selector.
+        """
+        while self._map.changed:
+            fd = self._map.changed.pop()
+            self._unregister(fd)
+            self._deadlines.pop(fd, None)
+            if fd in self._map:
+                self._dirty.add(fd)
+
+    def _update_channels(self):
+        """
+        Update the events and the timeout of channels which state may have
+        changed since the last iteration.
+        """
+        dirty = self._dirty
+        self._dirty = set()
+        for fd in dirty:
+            dispatcher = self._map.get(fd)
+            if dispatcher is not None:
+                self._update_channel(fd, dispatcher)
+
+    def _update_channel(self, fd, dispatcher):
+        interval = None
+        if hasattr(dispatcher, "next_check_interval"):
+            interval = dispatcher.next_check_interval()
+
+        events = 0
+        if dispatcher.readable():
+            events |= selectors.EVENT_READ
+        if dispatcher.writable() and not dispatcher.accepting:
+            events |= selectors.EVENT_WRITE
+
+        # The calls above may close the dispatcher, removing it from the map.
+        if self._map.get(fd) is not dispatcher:
+            return
+
+        self._register(fd, events)
+
+        if interval is None or interval < 0:
+            interval = _MAX_TIMEOUT
+        deadline = self._clock() + min(interval, _MAX_TIMEOUT)
+
+        # Checking a channel too early is harmless, so we keep an earlier
+        # timer instead of adding a new one on every update.
+        current = self._deadlines.get(fd)
+        if current is None or deadline < current:
+            self._deadlines[fd] = deadline
+            heapq.heappush(self._timers, (deadline, next(self._seq), fd))
 
-    def wakeup(self):
+    def _register(self, fd, events):
+        try:
+            key = self._selector.get_key(fd)
+        except KeyError:
+            key = None
+
+        try:
+            if key is None:
+                if events:
+                    self._selector.register(fd, events)
+            elif not events:
+                self._selector.unregister(fd)
+            elif key.events != events:
+                self._selector.modify(fd, events)
+        except OSError as e:
+            # The channel was closed by another thread; it will be removed
+            # from the map soon.
+            self._log.debug("Cannot watch channel %d: %s", fd, e)
+
+    def _unregister(self, fd):
+        try:
+            self._selector.unregister(fd)
+        except KeyError:
+            pass
+
+    def _get_timeout(self):
+        if self._dirty:
+            return 0
+
+        timers = self._timers
+        while timers:
+            deadline, _, fd = timers[0]
+            if self._deadlines.get(fd) == deadline:
+                return max(deadline - self._clock(), 0)
+            heapq.heappop(timers)
+
+        return _MAX_TIMEOUT
+
+    def _process_events(self, ready):
+        wakeup_fd = self._wakeupEvent._fileno
+        woken = False
+
+        for key, events in ready:
+            fd = key.fd
+            dispatcher = self._map.get(fd)
+            if dispatcher is None:
+                continue
+
+            if fd == wakeup_fd:
+                woken = True
+
+            self._dirty.add(fd)
+            try:
+                if events & selectors.EVENT_READ:
+                    dispatcher.handle_read_event()
+                if (events & selectors.EVENT_WRITE and
+                        self._map.get(fd) is dispatcher):
+                    dispatcher.handle_write_event()
+            except asyncore.ExitNow:
+                raise
+            except Exception:
+                dispatcher.handle_error()
+
+        if woken:
+            if self._wake_all:
+                self._wake_all = False
+                self._dirty.update(self._map)
+            while self._woken:
+                self._dirty.add(self._woken.pop())
+
+    def _process_timers(self):
+        now = self._clock()
+        timers = self._timers
+        while timers and timers[0][0] <= now:
+            deadline, _, fd = heapq.heappop(timers)
+            if self._deadlines.get(fd) == deadline:
+                del self._deadlines[fd]
+                self._dirty.add(fd)
+
+    def wakeup(self, dispatcher=None):
+        """
+        Wake up the reactor to check the state of dispatcher, or of all
+        dispatchers if dispatcher is not specified.
+        """
+        fd = getattr(dispatcher, "_fileno", None)
+        if fd is None:
+            self._wake_all = True
+        else:
+            self._woken.add(fd)
         self._wakeupEvent.set()
 
     def stop(self):
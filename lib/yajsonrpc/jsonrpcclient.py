@@ -47,6 +47,9 @@ class _JsonRpcClientRequestContext(object):
     def ids(self):
         return six.iterkeys(self._responses)
 
+    def hasRequests(self):
+        return len(self._responses) > 0
+
     def encode(self):
         return ("[" +
                 ", ".join(r.encode() for r in self._requests) +
@@ -74,9 +77,17 @@ class JsonRpcClient(object):
             return response.result
 
     def call(self, *reqs, **kwargs):
+        """
+        Send reqs in one batch and wait for all the responses.
+
+        This method is thread safe; requests sent by other threads are
+        pipelined on the same transport while waiting. Returns None if
+        the responses did not arrive within timeout.
+        """
         flow_id = kwargs.pop('flow_id', None)
         call = self.call_async(flow_id, *reqs)
-        call.wait(kwargs.get('timeout', CALL_TIMEOUT))
+        if not call.wait(kwargs.get('timeout', CALL_TIMEOUT)):
+            self._cancel(reqs)
         return call.responses
 
     def call_async(self, flow_id, *reqs):
@@ -88,21 +99,42 @@ class JsonRpcClient(object):
         ctx = _JsonRpcClientRequestContext(reqs, cb)
         with self._lock:
             for rid in ctx.ids():
-                try:
-                    self._runningRequests[rid]
-                except KeyError:
-                    pass
-                else:
+                if rid in self._runningRequests:
                     raise ValueError("Request id already in use %s", rid)
 
+            for rid in ctx.ids():
                 self._runningRequests[rid] = ctx
 
-        self._transport.send(ctx.encode(), flow_id=flow_id)
-
-        # All notifications
-        if ctx.isDone():
+        try:
+            self._transport.send(ctx.encode(), flow_id=flow_id)
+        except Exception:
+            self._cancel(reqs)
+            raise
+
+        # All notifications. If the batch contains requests, the responses
+        # may already be processed by the transport thread, which also
+        # finalizes the context.
+        if not ctx.hasRequests():
             self._finalizeCtx(ctx)
 
+    def _cancel(self, reqs):
+        """
+        Stop waiting for responses to reqs, so late responses are dropped
+        instead of keeping the request context forever.
+        """
+        with self._lock:
+            for req in reqs:
+                if req.id is not None:
+                    self._runningRequests.pop(req.id, None)
+
+    @property
+    def pending_requests(self):
+        """
+        Return the number of requests waiting for a response.
+        """
+        with self._lock:
+            return len(self._runningRequests)
+
     def subscribe(self, queue_name, event_queue=None):
         """
         Subscribe to a queue and listen for messages.
@@ -185,7 +217,14 @@ class JsonRpcClient(object):
                     "Got an error from server without an ID (%s)",
                     resp.error,
                 )
-            ctx = self._runningRequests.pop(resp.id)
+            ctx = self._runningRequests.pop(resp.id, None)
+
+        if ctx is None:
+            self.log.warning(
+                "Ignoring response to unknown or timed out request %s",
+                resp.id,
+            )
+            return
 
         ctx.addResponse(resp)
 
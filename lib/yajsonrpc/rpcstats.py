@@ -0,0 +1,265 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+In-process statistics about JSON-RPC calls served by JsonRpcServer.
+
+For every verb we keep the number of calls, errors and calls in flight, a
+latency histogram and the total size of requests and responses. Calls
+running longer than a threshold are kept with the traceback of the thread
+serving them, captured while the call was still running.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import collections
+import logging
+import threading
+
+from vdsm.common import concurrent
+from vdsm.common.time import monotonic_time
+
+log = logging.getLogger("jsonrpc.RpcStats")
+
+# Upper bounds of the latency histogram buckets in seconds. Calls slower
+# than the last bound are counted in an overflow bucket.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0)
+
+# Verbs are named by clients; to keep the registry bounded, verbs seen after
+# this limit are accounted together.
+MAX_VERBS = 1000
+OTHER_VERBS = "other"
+
+
+class Histogram(object):
+    """
+    Histogram with fixed buckets.
+
+    Percentiles are estimated using the upper bound of the bucket, or the
+    maximum value for the overflow bucket.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        for i, bound in enumerate(self._buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self._buckets)
+        self._counts[i] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        if self.count == 0:
+            return 0.0
+        rank = self.count * p / 100
+        seen = 0
+        for i, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank and count:
+                if i == len(self._buckets):
+                    return self.max
+                return min(self._buckets[i], self.max)
+        return self.max
+
+    def info(self):
+        avg = self.total / self.count if self.count else 0.0
+        buckets = {}
+        for bound, count in zip(self._buckets, self._counts):
+            buckets[str(bound)] = count
+        buckets["inf"] = self._counts[-1]
+        return {
+            "avg": avg,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "histogram": buckets,
+        }
+
+
+class _VerbStats(object):
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.latency = Histogram()
+
+    def info(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "latency": self.latency.info(),
+        }
+
+
+class _Call(object):
+
+    def __init__(self, method, start):
+        self.method = method
+        self.start = start
+        self.ident = threading.current_thread().ident
+        self.slow = None
+        self.check = None
+        self.done = False
+
+
+class RpcStats(object):
+    """
+    Registry of JSON-RPC calls statistics.
+
+    If a scheduler is specified, calls running longer than
+    slow_call_threshold seconds are captured with the traceback of the
+    thread serving them. Without a scheduler, slow calls are captured
+    without a traceback when they finish.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, slow_call_threshold=1.0, max_slow_calls=20,
+                 scheduler=None, clock=monotonic_time):
+        self._slow_call_threshold = slow_call_threshold
+        self._scheduler = scheduler
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._verbs = {}
+        self._slow_calls = collections.deque(maxlen=max_slow_calls)
+
+    @property
+    def slow_call_threshold(self):
+        return self._slow_call_threshold
+
+    def start_call(self, method):
+        """
+        Account a call starting in the current thread, and return a call
+        object that must be passed to end_call().
+        """
+        call = _Call(method, self._clock())
+        with self._lock:
+            self._verb(method).in_flight += 1
+        if self._scheduler is not None:
+            call.check = self._scheduler.schedule(
+                self._slow_call_threshold, lambda: self._capture(call))
+        return call
+
+    def end_call(self, call, error=None):
+        """
+        Account a call that finished, with error if the call failed.
+        """
+        if call.check is not None:
+            call.check.cancel()
+        duration = self._clock() - call.start
+        with self._lock:
+            call.done = True
+            stats = self._verb(call.method)
+            stats.in_flight -= 1
+            stats.calls += 1
+            if error is not None:
+                stats.errors += 1
+            stats.latency.add(duration)
+            if call.slow is None and duration > self._slow_call_threshold:
+                call.slow = self._add_slow_call(call, None)
+            if call.slow is not None:
+                call.slow["duration"] = duration
+                call.slow["running"] = False
+        return duration
+
+    def add_request_size(self, method, size):
+        with self._lock:
+            self._verb(method).request_bytes += size
+
+    def add_response_size(self, method, size):
+        with self._lock:
+            self._verb(method).response_bytes += size
+
+    def info(self):
+        """
+        Return statistics per verb and the latest slow calls.
+        """
+        now = self._clock()
+        with self._lock:
+            verbs = {name: stats.info()
+                     for name, stats in self._verbs.items()}
+            slow_calls = []
+            for slow in self._slow_calls:
+                slow = dict(slow)
+                if slow["running"]:
+                    slow["duration"] = now - slow.pop("start")
+                else:
+                    del slow["start"]
+                slow_calls.append(slow)
+        return {
+            "verbs": verbs,
+            "slow_call_threshold": self._slow_call_threshold,
+            "slow_calls": slow_calls,
+        }
+
+    def report(self, prefix):
+        """
+        Return statistics as flat metrics names and values.
+        """
+        report = {}
+        with self._lock:
+            for name, stats in self._verbs.items():
+                verb_prefix = "%s.%s" % (prefix, name)
+                latency = stats.latency
+                report[verb_prefix + ".calls"] = stats.calls
+                report[verb_prefix + ".errors"] = stats.errors
+                report[verb_prefix + ".in_flight"] = stats.in_flight
+                report[verb_prefix + ".request_bytes"] = stats.request_bytes
+                report[verb_prefix + ".response_bytes"] = \
+                    stats.response_bytes
+                report[verb_prefix + ".latency.max"] = latency.max
+                report[verb_prefix + ".latency.p50"] = latency.percentile(50)
+                report[verb_prefix + ".latency.p99"] = latency.percentile(99)
+        return report
+
+    def _capture(self, call):
+        try:
+            trace = concurrent.format_traceback(call.ident)
+        except KeyError:
+            trace = "(traceback not available)"
+        with self._lock:
+            if call.done:
+                return
+            call.slow = self._add_slow_call(call, trace)
+        log.warning("RPC call %s running for more than %.2f seconds, "
+                    "traceback:\n%s", call.method, self._slow_call_threshold,
+                    trace)
+
+    def _add_slow_call(self, call, trace):
+        # Must be called when holding the lock.
+        slow = {
+            "method": call.method,
+            "start": call.start,
+            "running": True,
+            "traceback": trace,
+        }
+        self._slow_calls.append(slow)
+        return slow
+
+    def _verb(self, method):
+        # Must be called when holding the lock.
+        try:
+            return self._verbs[method]
+        except KeyError:
+            if len(self._verbs) >= MAX_VERBS:
+                method = OTHER_VERBS
+            return self._verbs.setdefault(method, _VerbStats())
@@ -340,6 +340,9 @@ class AsyncDispatcher(object):
         Returns Ture if there are messages to be sent
         def has_outgoing_messages(self)
 
+        Returns the number of frames waiting to be sent
+        def pending_frames(self)
+
         Queues a frame to be sent
         def queue_frame(self, frame)
 
@@ -488,7 +491,9 @@ class AsyncDispatcher(object):
                 except IndexError:
                     return
 
-                self._outbuf = frame.encode()
+                # Use a memoryview to avoid copying the rest of the frame
+                # after partial writes.
+                self._outbuf = memoryview(frame.encode())
 
             data = self._outbuf
             numSent = dispatcher.send(data)
@@ -600,7 +605,11 @@ class StompConnection(object):
 
     def send_raw(self, msg):
         self._async_client.queue_frame(msg)
-        self._reactor.wakeup()
+        self._reactor.wakeup(self._dispatcher)
+
+    @property
+    def pending_frames(self):
+        return self._async_client.pending_frames
 
     def setTimeout(self, timeout):
         self._dispatcher.socket.settimeout(timeout)
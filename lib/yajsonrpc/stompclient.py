@@ -7,12 +7,13 @@ from __future__ import division
 import logging
 import six
 from collections import deque
-from threading import Event
+from threading import Condition, Event, Lock
 from uuid import uuid4
 
 from vdsm import utils
 from vdsm.common import concurrent
 from vdsm.common import pki
+from vdsm.common.time import monotonic_time
 from vdsm.sslutils import SSLSocket, SSLContext
 from yajsonrpc.stomp import \
     AckMode, \
@@ -70,6 +71,10 @@ class AsyncClient(object):
     def has_outgoing_messages(self):
         return (len(self._outbox) > 0)
 
+    @property
+    def pending_frames(self):
+        return len(self._outbox)
+
     @property
     def nr_retries(self):
         return self._nr_retries
@@ -272,7 +277,7 @@ class StompClient(object):
 
     def subscribe(self, *args, **kwargs):
         sub = self._aclient.subscribe(*args, **kwargs)
-        self._reactor.wakeup()
+        self._reactor.wakeup(self._stompConn.dispatcher)
         return sub
 
     def unsubscribe(self, sub):
@@ -290,13 +295,222 @@ class StompClient(object):
             message,
             headers
         )
-        self._reactor.wakeup()
+        self._reactor.wakeup(self._stompConn.dispatcher)
 
     def close(self):
         self._stompConn.close()
         if self._owns_reactor:
             self._reactor.stop()
 
+    def is_closed(self):
+        return self._stompConn.is_closed()
+
+
+class _PooledConnection(object):
+
+    def __init__(self, now):
+        # None until the connection is established.
+        self.client = None
+        self.users = 0
+        self.last_used = now
+
+
+class _PooledStompClient(object):
+    """
+    A StompClient borrowed from a ClientPool. Closing it returns the
+    connection to the pool instead of closing it.
+    """
+
+    def __init__(self, pool, key, connection):
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._connection.client, name)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool._release(self._key, self._connection)
+
+
+class ClientPool(object):
+    """
+    Reusable STOMP connections per destination.
+
+    JsonRpcClient pipelines requests, so many clients, each subscribed to
+    its own response queue, can share one connection to the same
+    destination. The pool keeps up to max_connections connections per
+    destination and hands out the least used one, opening a new connection
+    only when all existing connections are in use.
+
+    Connections closed by the peer are dropped, and unused connections are
+    closed after idle_timeout seconds. If scheduler is specified, the pool
+    checks for idle connections every idle_timeout seconds while it has
+    connections; otherwise they are checked only when getting a client.
+
+    connect is called as connect(host, port) and must return a connected
+    StompClient.
+    """
+    log = logging.getLogger("jsonrpc.ClientPool")
+
+    def __init__(self, connect, max_connections=1, idle_timeout=60,
+                 scheduler=None, clock=monotonic_time):
+        self._connect = connect
+        self._max_connections = max_connections
+        self._idle_timeout = idle_timeout
+        self._scheduler = scheduler
+        self._clock = clock
+        self._cond = Condition(Lock())
+        self._connections = {}
+        self._evict_call = None
+
+    def get(self, host, port):
+        """
+        Return a StompClient connected to host:port. The caller must close
+        the returned client when done, returning the connection to the
+        pool.
+        """
+        key = (host, port)
+        with self._cond:
+            evicted = self._evict()
+        # Closing may block, do not delay callers waiting for a slot.
+        self._close_all(evicted)
+
+        with self._cond:
+            while True:
+                connection = self._find(key)
+                if connection is not None:
+                    connection.users += 1
+                    return _PooledStompClient(self, key, connection)
+                conns = self._connections.setdefault(key, [])
+                if len(conns) < self._max_connections:
+                    # Reserve a slot, so concurrent callers do not open
+                    # more than max_connections connections.
+                    connection = _PooledConnection(self._clock())
+                    connection.users += 1
+                    conns.append(connection)
+                    self._schedule_evict()
+                    break
+                # All connections are being established.
+                self._cond.wait()
+
+        # Connecting may block, do not delay users of other destinations.
+        self.log.debug("Opening new connection to %s:%s", host, port)
+        try:
+            client = self._connect(host, port)
+        except BaseException:
+            with self._cond:
+                self._remove(key, connection)
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            connection.client = client
+            self._cond.notify_all()
+        return _PooledStompClient(self, key, connection)
+
+    def stats(self):
+        """
+        Return the number of connections and users per destination.
+        """
+        with self._cond:
+            return {
+                "%s:%s" % key: {
+                    "connections": len(conns),
+                    "users": sum(c.users for c in conns),
+                }
+                for key, conns in six.iteritems(self._connections)
+            }
+
+    def close(self):
+        with self._cond:
+            connections = self._connections
+            self._connections = {}
+            if self._evict_call is not None:
+                self._evict_call.cancel()
+                self._evict_call = None
+        for conns in six.itervalues(connections):
+            for connection in conns:
+                if connection.client is not None:
+                    self._close(connection)
+
+    def _find(self, key):
+        conns = [c for c in self._connections.get(key, ())
+                 if c.client is not None]
+        if not conns:
+            return None
+        connection = min(conns, key=lambda c: c.users)
+        if (connection.users > 0 and
+                len(self._connections[key]) < self._max_connections):
+            return None
+        return connection
+
+    def _release(self, key, connection):
+        with self._cond:
+            connection.users -= 1
+            connection.last_used = self._clock()
+            detached = connection not in self._connections.get(key, ())
+        if detached and connection.users == 0:
+            self._close(connection)
+
+    def _remove(self, key, connection):
+        conns = self._connections.get(key)
+        if conns is not None and connection in conns:
+            conns.remove(connection)
+            if not conns:
+                del self._connections[key]
+
+    def _schedule_evict(self):
+        if self._scheduler is not None and self._evict_call is None:
+            self._evict_call = self._scheduler.schedule(
+                self._idle_timeout, self._evict_idle)
+
+    def _evict_idle(self):
+        with self._cond:
+            self._evict_call = None
+            evicted = self._evict()
+            if self._connections:
+                self._schedule_evict()
+        self._close_all(evicted)
+
+    def _evict(self):
+        """
+        Drop closed and idle connections, and return the dropped connections
+        which must be closed by the caller, without holding the lock.
+        """
+        evicted = []
+        now = self._clock()
+        for key, conns in list(six.iteritems(self._connections)):
+            for connection in list(conns):
+                if connection.client is None:
+                    continue  # Being established.
+                closed = connection.client.is_closed()
+                idle = (connection.users == 0 and
+                        now - connection.last_used > self._idle_timeout)
+                if closed or idle:
+                    self.log.debug("Dropping %s connection to %s:%s",
+                                   "closed" if closed else "idle", *key)
+                    conns.remove(connection)
+                    # Connections still in use are closed on release.
+                    if connection.users == 0:
+                        evicted.append(connection)
+            if not conns:
+                del self._connections[key]
+        return evicted
+
+    def _close_all(self, connections):
+        for connection in connections:
+            self._close(connection)
+
+    def _close(self, connection):
+        try:
+            connection.client.close()
+        except Exception:
+            self.log.exception("Error closing pooled connection")
+
 
 class ClientRpcTransportAdapter(object):
     def __init__(self, request_queue, response_queue, client):
@@ -8,12 +8,16 @@ import logging
 from collections import deque
 import functools
 
+from vdsm import throttledlog
 from vdsm.config import config
 from . import JsonRpcServer
 from . import stomp, stompclient
 from .betterAsyncore import Dispatcher, Reactor
 
 
+throttledlog.throttle("dropped_events", 100)
+
+
 def parseHeartBeatHeader(v):
     try:
         x, y = v.split(",", 1)
@@ -64,6 +68,10 @@ class StompAdapterImpl(object):
     def has_outgoing_messages(self):
         return (len(self._outbox) > 0)
 
+    @property
+    def pending_frames(self):
+        return len(self._outbox)
+
     def peek_message(self):
         return self._outbox[0]
 
@@ -281,6 +289,16 @@ class StompServer(object):
         self._messageHandler = None
         self._sub_map = subscriptions
         self._req_dest = {}
+        self._max_pending_frames = config.getint(
+            'rpc', 'event_max_pending_frames')
+        self._dropped_events = 0
+
+    @property
+    def dropped_events(self):
+        """
+        Number of events dropped because a subscriber was not reading.
+        """
+        return self._dropped_events
 
     def add_client(self, sock):
         adapter = StompAdapterImpl(self._reactor, self._sub_map,
@@ -293,18 +311,27 @@ class StompServer(object):
     """
     def send(self, message, destination=stomp.SUBSCRIPTION_ID_RESPONSE):
         resp = json.loads(message)
-        if not isinstance(resp, dict):
+        # A batch request is answered with a list of responses, sent as one
+        # message to the destination of the batch.
+        if isinstance(resp, list) and resp and \
+                all(isinstance(r, dict) for r in resp):
+            response_ids = [r.get("id") for r in resp]
+        elif isinstance(resp, dict):
+            # pylint: disable=no-member
+            response_ids = [resp.get("id")]
+        else:
             raise ValueError(
                 'Provided message %s failed parsing to dictionary' % message)
-        # pylint: disable=no-member
-        response_id = resp.get("id")
 
-        try:
-            destination = self._req_dest[response_id]
-            del self._req_dest[response_id]
-        except KeyError:
-            # we could have no reply-to or we could send events (no message id)
-            pass
+        for response_id in response_ids:
+            try:
+                destination = self._req_dest.pop(response_id)
+            except KeyError:
+                # we could have no reply-to or we could send events (no
+                # message id)
+                pass
+
+        is_event = response_ids == [None]
 
         try:
             connections = self._sub_map[destination]
@@ -324,8 +351,22 @@ class StompServer(object):
                 message
             )
             # we need to check whether the channel is not closed
-            if not connection.client.is_closed():
-                connection.client.send_raw(res)
+            if connection.client.is_closed():
+                continue
+
+            # Responses are always sent, but a subscriber that does not read
+            # its events must not make us buffer events forever.
+            if (is_event and connection.client.pending_frames >=
+                    self._max_pending_frames):
+                self._dropped_events += 1
+                throttledlog.log(
+                    "dropped_events", logging.WARNING,
+                    "Subscriber %s has %d pending frames, dropped %d "
+                    "events so far", connection.id,
+                    connection.client.pending_frames, self._dropped_events)
+                continue
+
+            connection.client.send_raw(res)
 
 
 def StompListener(reactor, server, acceptHandler, connected_socket):
@@ -4,6 +4,7 @@
 from __future__ import absolute_import
 from __future__ import division
 import socket
+import threading
 from contextlib import closing
 
 from vdsm.common import concurrent
@@ -11,6 +12,10 @@ from yajsonrpc.betterAsyncore import AsyncoreEvent, Reactor
 
 from testlib import VdsmTestCase as TestCaseBase
 
+# Dispatchers are served immediately; this only limits waiting in case of
+# failure.
+TIMEOUT = 5
+
 
 class TestEvent(TestCaseBase):
 
@@ -53,3 +58,80 @@ class TestReactor(TestCaseBase):
 
         self.assertTrue(disp.closing)
         self.assertFalse(reactor._wakeupEvent.closing)
+
+    def test_wakeup_dispatcher(self):
+        reactor = Reactor()
+        thread = concurrent.thread(reactor.process_requests,
+                                   name='test reactor')
+        thread.start()
+        s1, s2 = socket.socketpair()
+        try:
+            with closing(s2):
+                impl = WritingImpl()
+                disp = reactor.create_dispatcher(s1, impl=impl)
+                # Let the reactor check the dispatcher before it has data.
+                self.assertTrue(impl.checked.wait(TIMEOUT))
+                impl.data = b"ping"
+                reactor.wakeup(disp)
+                self.assertTrue(impl.sent.wait(TIMEOUT))
+                self.assertEqual(s2.recv(4), b"ping")
+        finally:
+            reactor.stop()
+            thread.join(timeout=1)
+
+    def test_next_check_interval(self):
+        reactor = Reactor()
+        thread = concurrent.thread(reactor.process_requests,
+                                   name='test reactor')
+        thread.start()
+        s1, s2 = socket.socketpair()
+        try:
+            with closing(s2):
+                impl = CheckingImpl(checks=3)
+                reactor.create_dispatcher(s1, impl=impl)
+                # No events on the socket, only the timeouts returned by
+                # next_check_interval() trigger the checks.
+                self.assertTrue(impl.done.wait(TIMEOUT))
+        finally:
+            reactor.stop()
+            thread.join(timeout=1)
+
+
+class WritingImpl(object):
+
+    def __init__(self):
+        self.data = b""
+        self.checked = threading.Event()
+        self.sent = threading.Event()
+
+    def readable(self, dispatcher):
+        return False
+
+    def writable(self, dispatcher):
+        self.checked.set()
+        return bool(self.data)
+
+    def handle_write(self, dispatcher):
+        sent = dispatcher.send(self.data)
+        self.data = self.data[sent:]
+        if not self.data:
+            self.sent.set()
+
+
+class CheckingImpl(object):
+
+    def __init__(self, checks):
+        self.checks = checks
+        self.done = threading.Event()
+
+    def readable(self, dispatcher):
+        return True
+
+    def writable(self, dispatcher):
+        return False
+
+    def next_check_interval(self):
+        self.checks -= 1
+        if self.checks == 0:
+            self.done.set()
+        return 0.05
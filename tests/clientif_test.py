@@ -16,6 +16,7 @@ from unittest import mock
 
 from vdsm import clientIF
 from vdsm.common import libvirtconnection, response
+from vdsm.rpc.notifications import EventAggregator
 from vdsm.virt import recovery
 from vdsm.virt.vm import VolumeError
 
@@ -48,6 +49,7 @@ class FakeClientIF(clientIF.clientIF):
         self.vmRequests = {}
         self.servers = {}
         self._recovery = False
+        self._events = EventAggregator(self._send_notification, None, 0)
 
     def createVm(self, vmParams, vmRecover=False):
         self.vmRequests[vmParams['vmId']] = (vmParams, vmRecover)
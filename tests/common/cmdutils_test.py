@@ -105,6 +105,10 @@ class ExecCmdTest(TestCaseBase):
         self.assertEqual(rc, 0)
         self.assertEqual(out, b'hello\n')
 
+    def test_exec_cmd_with_timeout(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            cmdutils.exec_cmd(('sleep', '10'), timeout=0.2)
+
 
 class TestError(TestCaseBase):
 
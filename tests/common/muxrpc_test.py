@@ -0,0 +1,315 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import errno
+import os
+import threading
+
+import pytest
+
+from vdsm.common import concurrent
+from vdsm.common import muxrpc
+from vdsm.common import supervdsm
+
+TIMEOUT = 5
+
+
+class Service(object):
+
+    def __init__(self):
+        self.released = threading.Event()
+        self.started = threading.Event()
+
+    def ping(self):
+        return True
+
+    def echo(self, *args, **kwargs):
+        return args, kwargs
+
+    def fail(self, message):
+        raise ValueError(message)
+
+    def block(self):
+        self.started.set()
+        if not self.released.wait(TIMEOUT):
+            raise RuntimeError("Timeout waiting for release")
+        return "released"
+
+    def unpicklable(self):
+        return threading.Lock()
+
+    def _private(self):
+        return "private"
+
+
+class Server(object):
+
+    def __init__(self, address, service):
+        self.address = address
+        self.service = service
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._server = muxrpc.Server(self.address, self.service)
+        self._thread = concurrent.thread(self._server.serve_forever)
+        self._thread.start()
+
+    def stop(self):
+        self._server.stop()
+        self._thread.join()
+        os.unlink(self.address)
+
+
+@pytest.fixture
+def service():
+    service = Service()
+    yield service
+    service.released.set()
+
+
+@pytest.fixture
+def server(tmpdir, service):
+    server = Server(str(tmpdir.join("sock")), service)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = muxrpc.Client(server.address)
+    yield client
+    client.close()
+
+
+def test_call(client):
+    assert client.call("ping")
+
+
+def test_arguments(client):
+    res = client.call("echo", args=(1, "two"), kwargs={"three": [3]})
+    assert res == ((1, "two"), {"three": [3]})
+
+
+def test_error(client):
+    with pytest.raises(ValueError) as e:
+        client.call("fail", args=("message",))
+    assert str(e.value) == "message"
+
+
+def test_missing_method(client):
+    with pytest.raises(AttributeError):
+        client.call("missing")
+
+
+def test_private_method(client):
+    with pytest.raises(AttributeError):
+        client.call("_private")
+
+
+def test_unpicklable_result(client):
+    with pytest.raises(muxrpc.RemoteError):
+        client.call("unpicklable")
+
+
+def test_concurrent_calls(client, service):
+    blocked = client.submit("block")
+    assert service.started.wait(TIMEOUT)
+    # Calls do not wait for the blocked call.
+    for i in range(10):
+        assert client.call("ping", timeout=TIMEOUT)
+    assert not blocked.done()
+    service.released.set()
+    assert blocked.result(TIMEOUT) == "released"
+
+
+def test_concurrent_waiters(client):
+    results = {}
+
+    def run(n):
+        results[n] = [client.call("echo", args=(n, i), timeout=TIMEOUT)
+                      for i in range(100)]
+
+    threads = [concurrent.thread(run, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for n in range(8):
+        assert results[n] == [((n, i), {}) for i in range(100)]
+
+
+def test_connection_reused(client):
+    client.call("ping")
+    client.call("ping")
+    assert len(client._connections) == 1
+
+
+def test_connections_opened_when_busy(client, service):
+    client.call("ping")
+    calls = [client.submit("block") for i in range(3)]
+    assert len(client._connections) == 3
+
+    service.released.set()
+    for call in calls:
+        assert call.result(TIMEOUT) == "released"
+
+    # The connections are kept for the next calls.
+    assert len(client._idle) == 3
+    client.call("ping")
+    assert len(client._connections) == 3
+
+
+def test_idle_connections_closed(server):
+    client = muxrpc.Client(server.address, idle_timeout=0)
+    try:
+        client.call("ping")
+        conn = next(iter(client._connections))
+        client.call("ping")
+        assert client._connections
+        assert conn not in client._connections
+    finally:
+        client.close()
+
+
+def test_server_restarted(server, client):
+    client.call("ping")
+    server.stop()
+    server.start()
+    # The idle connection was closed by the server, the call is sent on a
+    # new connection.
+    assert client.call("ping", timeout=TIMEOUT)
+
+
+def test_timeout(client, service):
+    call = client.submit("block")
+    with pytest.raises(muxrpc.Timeout):
+        call.result(0.1)
+    # The call was cancelled, waiting again raises.
+    with pytest.raises(muxrpc.Cancelled):
+        call.result(TIMEOUT)
+
+    # The result of the cancelled call is dropped.
+    service.released.set()
+    assert client.call("ping", timeout=TIMEOUT)
+
+
+def test_cancel(client, service):
+    call = client.submit("block")
+    assert call.cancel()
+    with pytest.raises(muxrpc.Cancelled):
+        call.result(TIMEOUT)
+    assert not call.cancel()
+
+
+def test_cancel_while_waiting(client, service):
+    call = client.submit("block")
+    assert service.started.wait(TIMEOUT)
+    errors = []
+
+    def wait():
+        try:
+            call.result(TIMEOUT)
+        except muxrpc.Cancelled as e:
+            errors.append(e)
+
+    waiter = concurrent.thread(wait)
+    waiter.start()
+    assert call.cancel()
+    waiter.join()
+    assert len(errors) == 1
+
+
+def test_cancel_returned(client):
+    call = client.submit("ping")
+    assert call.result(TIMEOUT)
+    assert not call.cancel()
+    assert call.result(TIMEOUT)
+
+
+def test_server_stopped(server, client, service):
+    call = client.submit("block")
+    assert service.started.wait(TIMEOUT)
+    server.stop()
+    with pytest.raises(muxrpc.ConnectionClosed):
+        call.result(TIMEOUT)
+
+    # Connection cannot be opened.
+    with pytest.raises(OSError):
+        client.call("ping")
+
+    # Client reconnects when the server is back.
+    server.start()
+    assert client.call("ping", timeout=TIMEOUT)
+
+
+def test_accept_out_of_files(tmpdir, service, monkeypatch):
+    server = muxrpc.Server(str(tmpdir.join("sock")), service)
+    sock = server._sock
+    sleeps = []
+
+    class OutOfFiles(object):
+
+        def accept(self):
+            if len(sleeps) == 3:
+                server.stop()
+                raise OSError(errno.EINVAL, "Invalid argument")
+            raise OSError(errno.EMFILE, "Too many open files")
+
+        def close(self):
+            sock.close()
+
+        def shutdown(self, how):
+            sock.shutdown(how)
+
+    server._sock = OutOfFiles()
+    monkeypatch.setattr(muxrpc.time, "sleep", sleeps.append)
+    server.serve_forever()
+
+    # Wait before accepting again instead of spinning.
+    assert sleeps == [muxrpc.ACCEPT_RETRY_DELAY] * 3
+
+
+def test_client_closed(client):
+    client.call("ping")
+    client.close()
+    with pytest.raises(muxrpc.ConnectionClosed):
+        client.call("ping")
+
+
+class TestSuperVdsmProxy:
+
+    @pytest.fixture
+    def proxy(self, monkeypatch, server):
+        monkeypatch.setattr(supervdsm, "ADDRESS", server.address)
+        proxy = supervdsm.SuperVdsmProxy()
+        yield proxy
+        proxy._client.close()
+
+    def test_call(self, proxy):
+        assert proxy.ping()
+        assert proxy.echo(1, b=2) == ((1,), {"b": 2})
+
+    def test_error(self, proxy):
+        with pytest.raises(ValueError):
+            proxy.fail("message")
+
+    def test_submit(self, proxy, service):
+        call = proxy.block.submit()
+        with pytest.raises(muxrpc.Timeout):
+            call.result(0.1)
+
+    def test_broken_communication(self, proxy, server, service):
+        call = proxy.block.submit()
+        assert service.started.wait(TIMEOUT)
+        server.stop()
+        with pytest.raises(muxrpc.ConnectionClosed):
+            call.result(TIMEOUT)
+        with pytest.raises(RuntimeError):
+            proxy.ping()
+        server.start()
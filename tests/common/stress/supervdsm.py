@@ -0,0 +1,165 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Benchmark for the supervdsm transport.
+
+Starts a server in a child process, and calls a trivial function from
+multiple threads, reporting the number of calls per second for every
+concurrency level. The multiprocessing manager transport used by supervdsm
+before muxrpc can be measured for comparison.
+
+Usage:
+
+    $ PYTHONPATH=lib python3 tests/common/stress/supervdsm.py \\
+        --concurrency 1 16 64 --seconds 5
+
+Compare with the multiprocessing manager transport:
+
+    $ PYTHONPATH=lib python3 tests/common/stress/supervdsm.py \\
+        --transport manager
+
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from multiprocessing.managers import BaseManager
+
+from vdsm.common import muxrpc
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument(
+    "-t", "--transport",
+    choices=("muxrpc", "manager"),
+    default="muxrpc",
+    help="Transport to benchmark (default muxrpc)")
+
+parser.add_argument(
+    "-c", "--concurrency",
+    type=int,
+    nargs="+",
+    default=[1, 16, 64],
+    help="Number of calling threads (default 1 16 64)")
+
+parser.add_argument(
+    "-s", "--seconds",
+    type=float,
+    default=5.0,
+    help="Duration of every run in seconds (default 5)")
+
+parser.add_argument(
+    "--payload",
+    type=int,
+    default=64,
+    help="Size of call argument and result in bytes (default 64)")
+
+
+class Service:
+
+    def echo(self, data):
+        return data
+
+
+class Manager(BaseManager):
+    pass
+
+
+def serve_muxrpc(address):
+    muxrpc.Server(address, Service()).serve_forever()
+
+
+def serve_manager(address):
+    manager = Manager(address=address, authkey=b"")
+    manager.register("instance", callable=Service)
+    manager.get_server().serve_forever()
+
+
+def muxrpc_caller(address):
+    client = muxrpc.Client(address)
+    return lambda data: client.call("echo", args=(data,))
+
+
+def manager_caller(address):
+    manager = Manager(address=address, authkey=b"")
+    manager.register("instance")
+    manager.connect()
+    # Like supervdsm, all threads share the same proxy.
+    proxy = manager.instance()
+    return proxy.echo
+
+
+def wait_for_server(address):
+    deadline = time.monotonic() + 10
+    while True:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(address)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+        finally:
+            s.close()
+
+
+def run(call, concurrency, seconds, data):
+    done = threading.Event()
+    counts = []
+
+    def worker():
+        count = 0
+        while not done.is_set():
+            call(data)
+            count += 1
+        counts.append(count)
+
+    threads = [threading.Thread(target=worker, daemon=True)
+               for _ in range(concurrency)]
+
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+
+    time.sleep(seconds)
+    done.set()
+
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    return sum(counts) / elapsed
+
+
+args = parser.parse_args()
+
+if args.transport == "muxrpc":
+    serve, make_caller = serve_muxrpc, muxrpc_caller
+else:
+    serve, make_caller = serve_manager, manager_caller
+
+tmpdir = tempfile.mkdtemp()
+address = os.path.join(tmpdir, "sock")
+
+server = multiprocessing.Process(target=serve, args=(address,), daemon=True)
+server.start()
+try:
+    wait_for_server(address)
+    call = make_caller(address)
+    data = b"x" * args.payload
+    for concurrency in args.concurrency:
+        rate = run(call, concurrency, args.seconds, data)
+        print("{}: concurrency {:>3}: {:.0f} calls/s".format(
+            args.transport, concurrency, rate))
+finally:
+    server.terminate()
+    server.join()
+    os.unlink(address)
+    os.rmdir(tmpdir)
@@ -53,3 +53,9 @@ def test_accounting():
         'b',
     ]
     assert cmd == res
+
+
+def test_collect():
+    cmd = systemd.wrap(['a', 'b'], unit='unit', collect=True)
+    res = [systemd.SYSTEMD_RUN, '--unit=unit', '--collect', 'a', 'b']
+    assert cmd == res
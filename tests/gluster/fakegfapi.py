@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Stand-in for the gfapi library, serving volumes kept in memory.
+
+Install it with monkeypatch.setattr(gfapi, '_lib', FakeGfapi()).
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import ctypes
+import itertools
+
+from vdsm.gluster import gfapi
+
+
+class Volume(object):
+
+    def __init__(self, blocks=1000, bfree=600, entries=()):
+        self.started = True
+        self.generation = 0
+        self.blocks = blocks
+        self.bfree = bfree
+        self.entries = [b".", b".."] + list(entries)
+
+    def restart(self):
+        """
+        Make the handles initialized before the restart fail.
+        """
+        self.generation += 1
+
+
+class FakeGfapi(object):
+
+    def __init__(self):
+        self.volumes = {}
+        # fs -> [volume name, generation, initialized]
+        self.handles = {}
+        # fd -> list of remaining entries
+        self.dirs = {}
+        self.inits = 0
+        self.finis = 0
+        self._ids = itertools.count(1)
+
+    def glfs_new(self, name):
+        fs = next(self._ids)
+        self.handles[fs] = [name.decode('utf-8'), None, False]
+        return fs
+
+    def glfs_set_volfile_server(self, fs, protocol, host, port):
+        return 0
+
+    def glfs_init(self, fs):
+        handle = self.handles[fs]
+        volume = self.volumes.get(handle[0])
+        if volume is None:
+            return -1
+        if not volume.started:
+            return 1
+        handle[1] = volume.generation
+        handle[2] = True
+        self.inits += 1
+        return 0
+
+    def glfs_fini(self, fs):
+        del self.handles[fs]
+        self.finis += 1
+        return 0
+
+    def glfs_statvfs(self, fs, path, buf):
+        volume = self._volume(fs)
+        if volume is None:
+            return -1
+        statvfs = buf._obj
+        statvfs.f_bsize = statvfs.f_frsize = 4096
+        statvfs.f_blocks = volume.blocks
+        statvfs.f_bfree = statvfs.f_bavail = volume.bfree
+        return 0
+
+    def glfs_opendir(self, fs, path):
+        volume = self._volume(fs)
+        if volume is None:
+            return None
+        fd = next(self._ids)
+        self.dirs[fd] = list(volume.entries)
+        return fd
+
+    def glfs_readdir(self, fd):
+        entries = self.dirs[fd]
+        if not entries:
+            return ctypes.POINTER(gfapi.DirentStruct)()
+        return ctypes.pointer(gfapi.DirentStruct(d_name=entries.pop(0)))
+
+    def glfs_closedir(self, fd):
+        del self.dirs[fd]
+        return 0
+
+    def _volume(self, fs):
+        name, generation, initialized = self.handles[fs]
+        assert initialized, "Using uninitialized handle %s" % fs
+        volume = self.volumes.get(name)
+        if (volume is None or not volume.started or
+                volume.generation != generation):
+            return None
+        return volume
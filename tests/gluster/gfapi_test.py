@@ -0,0 +1,276 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import os
+import time
+
+import pytest
+
+from testlib import make_config
+from vdsm.common import concurrent
+from vdsm.gluster import exception as ge
+from vdsm.gluster import gfapi
+
+from . fakegfapi import FakeGfapi
+from . fakegfapi import Volume
+
+IDLE_TIMEOUT = 600
+
+
+class FakeTime(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProcess(object):
+    """
+    Helper process running in a thread, connected with pipes.
+    """
+
+    pid = 42
+
+    def __init__(self, pool):
+        r, w = os.pipe()
+        self.stdin = os.fdopen(w, 'wb')
+        infile = os.fdopen(r, 'rb')
+        r, w = os.pipe()
+        self.stdout = os.fdopen(r, 'rb')
+        self._outfile = os.fdopen(w, 'wb')
+        self._thread = concurrent.thread(
+            gfapi._serve, args=(infile, self._outfile, pool))
+        self._thread.start()
+
+    def terminate(self):
+        # The helper cannot send replies, like a terminated process.
+        self._outfile.close()
+
+    def wait(self):
+        self._thread.join()
+        return 0
+
+
+class Helpers(object):
+
+    def __init__(self, new_pool=False):
+        self.new_pool = new_pool
+        self.started = []
+
+    def __call__(self):
+        pool = gfapi._HandlePool() if self.new_pool else gfapi._pool
+        proc = FakeProcess(pool)
+        self.started.append(proc)
+        return proc
+
+    def close(self):
+        for proc in self.started:
+            proc.stdin.close()
+            proc.wait()
+
+
+@pytest.fixture
+def helpers(monkeypatch):
+    helpers = Helpers()
+    monkeypatch.setattr(gfapi, '_helper', gfapi._Helper(start=helpers))
+    yield helpers
+    helpers.close()
+
+
+@pytest.fixture
+def lib(monkeypatch, helpers):
+    lib = FakeGfapi()
+    lib.volumes['gv1'] = Volume()
+    monkeypatch.setattr(gfapi, '_lib', lib)
+    monkeypatch.setattr(gfapi, '_pool', gfapi._HandlePool())
+    monkeypatch.setattr(gfapi, 'config', make_config(
+        [('gluster', 'gfapi_idle_timeout', str(IDLE_TIMEOUT))]))
+    yield lib
+    helpers.close()
+    gfapi._pool.clear()
+    assert lib.handles == {}
+    assert lib.dirs == {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(gfapi, 'monotonic_time', clock)
+    return clock
+
+
+def test_statvfs(lib):
+    res = gfapi.volumeStatvfs('gv1')
+    assert res.f_bsize == 4096
+    assert res.f_blocks == 1000
+    assert res.f_bfree == 600
+
+
+def test_handle_reused(lib):
+    for i in range(3):
+        gfapi.volumeStatvfsGet('gv1')
+        gfapi.checkVolumeEmpty('gv1')
+    assert lib.inits == 1
+    assert lib.finis == 0
+
+
+def test_handle_per_volume(lib):
+    lib.volumes['gv2'] = Volume()
+    gfapi.volumeStatvfsGet('gv1')
+    gfapi.volumeStatvfsGet('gv2')
+    gfapi.volumeStatvfsGet('gv1', host='host1')
+    assert lib.inits == 3
+
+
+def test_handle_checked_out(lib):
+    def nested(fs, volumeId):
+        inner = gfapi._pool.call(lambda fs, volumeId: fs, volumeId,
+                                 gfapi.GLUSTER_VOL_HOST,
+                                 gfapi.GLUSTER_VOL_PORT,
+                                 gfapi.GLUSTER_VOL_PROTOCOL)
+        assert inner != fs
+
+    gfapi._pool.call(nested, 'gv1', gfapi.GLUSTER_VOL_HOST,
+                     gfapi.GLUSTER_VOL_PORT, gfapi.GLUSTER_VOL_PROTOCOL)
+    assert lib.inits == 2
+
+    # Both handles are kept for the next operations.
+    gfapi.volumeStatvfsGet('gv1')
+    gfapi.volumeStatvfsGet('gv1')
+    assert lib.inits == 2
+
+
+def test_idle_handle_expired(lib, clock):
+    gfapi.volumeStatvfsGet('gv1')
+    clock.now += IDLE_TIMEOUT - 1
+    gfapi.volumeStatvfsGet('gv1')
+    assert lib.inits == 1
+
+    clock.now += IDLE_TIMEOUT
+    gfapi.volumeStatvfsGet('gv1')
+    assert lib.inits == 2
+    assert lib.finis == 1
+
+
+def test_idle_handles_of_other_volumes_expired(lib, clock):
+    lib.volumes['gv2'] = Volume()
+    gfapi.volumeStatvfsGet('gv1')
+    clock.now += IDLE_TIMEOUT
+    gfapi.volumeStatvfsGet('gv2')
+    assert lib.finis == 1
+    assert [name for name, _, _ in lib.handles.values()] == ['gv2']
+
+
+def test_idle_handle_expired_without_operations(lib, clock, monkeypatch):
+    monkeypatch.setattr(gfapi, 'EXPIRE_INTERVAL', 0.01)
+    gfapi.volumeStatvfsGet('gv1')
+    clock.now += IDLE_TIMEOUT
+
+    # Released by the helper, even if the volume is not used anymore.
+    deadline = time.monotonic() + 5
+    while lib.finis == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert lib.finis == 1
+    assert lib.handles == {}
+
+
+def test_restarted_volume(lib):
+    gfapi.volumeStatvfsGet('gv1')
+    lib.volumes['gv1'].restart()
+    gfapi.volumeStatvfsGet('gv1')
+    gfapi.checkVolumeEmpty('gv1')
+    assert lib.inits == 2
+    assert lib.finis == 1
+
+
+def test_stopped_volume(lib):
+    gfapi.volumeStatvfsGet('gv1')
+    lib.volumes['gv1'].started = False
+    with pytest.raises(ge.GlfsInitException):
+        gfapi.volumeStatvfsGet('gv1')
+    assert lib.handles == {}
+
+
+def test_missing_volume(lib):
+    with pytest.raises(ge.GlfsInitException):
+        gfapi.volumeStatvfsGet('gv2')
+    assert lib.handles == {}
+
+
+def test_max_idle_handles(lib):
+    def nested(depth):
+        def func(fs, volumeId):
+            if depth:
+                gfapi._pool.call(nested(depth - 1), volumeId,
+                                 gfapi.GLUSTER_VOL_HOST,
+                                 gfapi.GLUSTER_VOL_PORT,
+                                 gfapi.GLUSTER_VOL_PROTOCOL)
+        return func
+
+    gfapi._pool.call(nested(gfapi.MAX_IDLE_HANDLES), 'gv1',
+                     gfapi.GLUSTER_VOL_HOST, gfapi.GLUSTER_VOL_PORT,
+                     gfapi.GLUSTER_VOL_PROTOCOL)
+    assert lib.inits == gfapi.MAX_IDLE_HANDLES + 1
+    assert len(lib.handles) == gfapi.MAX_IDLE_HANDLES
+
+
+@pytest.mark.parametrize("entries, expected", [
+    ([], True),
+    ([b".trashcan"], True),
+    ([b".trashcan", b"images"], False),
+    ([b"images"], False),
+])
+def test_volume_empty(lib, entries, expected):
+    lib.volumes['gv1'] = Volume(entries=entries)
+    assert gfapi.volumeEmptyCheck('gv1') == expected
+
+
+def test_helper_reused(lib, helpers):
+    gfapi.volumeStatvfsGet('gv1')
+    gfapi.checkVolumeEmpty('gv1')
+    assert len(helpers.started) == 1
+
+
+def test_helper_replaced(lib, helpers, monkeypatch):
+    monkeypatch.setattr(gfapi, 'MAX_HELPER_INITS', 1)
+    helpers.new_pool = True
+    gfapi.volumeStatvfsGet('gv1')
+
+    # The retired helper releases its handles and exits.
+    helpers.started[0].wait()
+    assert lib.finis == 1
+
+    gfapi.volumeStatvfsGet('gv1')
+    assert len(helpers.started) == 2
+
+
+def test_helper_terminated(lib, helpers, monkeypatch):
+    started = []
+
+    def terminate(fs, volumeId):
+        started.append(volumeId)
+        helpers.started[-1].terminate()
+        return True
+
+    monkeypatch.setitem(gfapi._OPS, 'empty', terminate)
+    with pytest.raises(ge.GlusterLibgfapiException):
+        gfapi.checkVolumeEmpty('gv1')
+    assert started == ['gv1']
+
+    # The next operation starts a new helper.
+    res = gfapi.volumeStatvfsGet('gv1')
+    assert res.f_blocks == 1000
+    assert len(helpers.started) == 2
+
+
+def test_helper_error(lib):
+    lib.volumes['gv1'].started = False
+    with pytest.raises(ge.GlfsInitException) as e:
+        gfapi.volumeStatvfsGet('gv1')
+    assert e.value.rc == 1
+    assert e.value.err == ["Volume:gv1 is stopped."]
@@ -0,0 +1,141 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import pytest
+
+from testlib import make_config
+from vdsm.gluster import inventory
+from vdsm.storage import uevent
+
+TTL = 60
+
+
+class FakeMonitor(object):
+
+    def __init__(self):
+        self.running = True
+        self.synced = True
+
+    def sync(self):
+        return self.synced
+
+    def stop(self):
+        self.running = False
+
+
+class FakeTime(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class Reader(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [{'name': 'sda', 'call': self.calls}]
+
+
+@pytest.fixture
+def inv(monkeypatch):
+    monkeypatch.setattr(inventory, 'config', make_config(
+        [('gluster', 'storage_devices_cache_ttl', str(TTL))]))
+    inv = inventory.Inventory()
+    inv._monitor = FakeMonitor()
+    return inv
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(inventory, 'monotonic_time', clock)
+    return clock
+
+
+def test_cached(inv):
+    read = Reader()
+    assert inv.get('devices', read) == [{'name': 'sda', 'call': 1}]
+    assert inv.get('devices', read) == [{'name': 'sda', 'call': 1}]
+    assert read.calls == 1
+
+
+def test_parts_cached_separately(inv):
+    devices = Reader()
+    lvm = Reader()
+    inv.get('devices', devices)
+    inv.get('lvm', lvm)
+    inv.get('devices', devices)
+    inv.get('lvm', lvm)
+    assert devices.calls == 1
+    assert lvm.calls == 1
+
+
+def test_copy_returned(inv):
+    read = Reader()
+    inv.get('devices', read)[0]['name'] = 'modified'
+    assert inv.get('devices', read)[0]['name'] == 'sda'
+
+
+def test_expired(inv, clock):
+    read = Reader()
+    inv.get('devices', read)
+    clock.now += TTL - 1
+    inv.get('devices', read)
+    assert read.calls == 1
+    clock.now += 1
+    inv.get('devices', read)
+    assert read.calls == 2
+
+
+def test_invalidated_by_device_event(inv):
+    read = Reader()
+    inv.get('devices', read)
+    event = uevent.Event(
+        action='change', devpath='/devices/virtual/block/dm-3',
+        subsystem='block', env={})
+    inv._on_event(event)
+    assert inv.get('devices', read) == [{'name': 'sda', 'call': 2}]
+
+
+def test_invalidated_while_reading(inv):
+    def read():
+        inv.invalidate()
+        return []
+
+    inv.get('devices', read)
+    assert inv.get('devices', Reader()) == [{'name': 'sda', 'call': 1}]
+
+
+def test_monitor_not_running(inv):
+    inv._monitor.running = False
+    read = Reader()
+    inv.get('devices', read)
+    inv.get('devices', read)
+    assert read.calls == 2
+
+
+def test_monitor_not_synced(inv):
+    read = Reader()
+    inv.get('devices', read)
+    inv._monitor.synced = False
+    inv.get('devices', read)
+    assert read.calls == 2
+    assert not inv.enabled
+
+
+def test_disabled(inv, monkeypatch):
+    monkeypatch.setattr(inventory, 'config', make_config(
+        [('gluster', 'storage_devices_cache_ttl', '0')]))
+    read = Reader()
+    inv.get('devices', read)
+    inv.get('devices', read)
+    assert read.calls == 2
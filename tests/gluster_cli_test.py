@@ -7,10 +7,13 @@ from __future__ import division
 import sys
 import six
 
+from monkeypatch import MonkeyPatchScope
 from testlib import VdsmTestCase as TestCaseBase
+from testlib import make_config
 from testValidation import skipif
 from vdsm.gluster import cli as gcli
 from vdsm.gluster import exception
+from vdsm.gluster import tasks as gtasks
 import xml.etree.ElementTree as etree
 import glusterTestData
 
@@ -1381,3 +1384,154 @@ class GlusterCliTests(TestCaseBase):
         globalVolumeOptions = gcli._parseGlobalVolumeOptions(tree)
         self.assertEqual(globalVolumeOptions,
                          glusterTestData.GLUSTER_GLOBAL_VOLUME_OPTIONS)
+
+
+_SNAPSHOT_VOLUME_INFO = b"""\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cliOutput>
+  <opRet>0</opRet>
+  <opErrno>0</opErrno>
+  <opErrstr/>
+  <volInfo>
+    <volumes>
+      <volume>
+        <name>gv1</name>
+        <id>b3114c71-741b-4c6f-a39e-80384c4ea3cf</id>
+        <statusStr>Started</statusStr>
+        <brickCount>1</brickCount>
+        <distCount>1</distCount>
+        <replicaCount>1</replicaCount>
+        <disperseCount>0</disperseCount>
+        <arbiterCount>0</arbiterCount>
+        <redundancyCount>0</redundancyCount>
+        <typeStr>Distribute</typeStr>
+        <transport>0</transport>
+        <bricks>
+          <brick>bricknode1:/gfs/b1<name>bricknode1:/gfs/b1</name>
+            <isArbiter>0</isArbiter>
+            <hostUuid>04eb591b-2fd3-489e-a22c-5d342a3c713d</hostUuid>
+          </brick>
+        </bricks>
+        <options/>
+      </volume>
+      <volume>
+        <name>gv2</name>
+        <id>b444ed94-f346-4cda-bd55-0282f21d22db</id>
+        <statusStr>Stopped</statusStr>
+        <brickCount>1</brickCount>
+        <distCount>1</distCount>
+        <replicaCount>1</replicaCount>
+        <disperseCount>0</disperseCount>
+        <arbiterCount>0</arbiterCount>
+        <redundancyCount>0</redundancyCount>
+        <typeStr>Distribute</typeStr>
+        <transport>1</transport>
+        <bricks>
+          <brick>bricknode1:/gfs/b2<name>bricknode1:/gfs/b2</name>
+            <isArbiter>0</isArbiter>
+            <hostUuid>04eb591b-2fd3-489e-a22c-5d342a3c713d</hostUuid>
+          </brick>
+        </bricks>
+        <options>
+          <option>
+            <name>auth.allow</name>
+            <value>*</value>
+          </option>
+        </options>
+      </volume>
+    </volumes>
+  </volInfo>
+</cliOutput>
+"""
+
+_SNAPSHOT_FAILED = b"""\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cliOutput>
+  <opRet>-1</opRet>
+  <opErrno>30800</opErrno>
+  <opErrstr>No volumes present</opErrstr>
+</cliOutput>
+"""
+
+
+class GlusterStatusSnapshotTests(TestCaseBase):
+
+    def setUp(self):
+        with open("glusterVolumeTasks.xml", "rb") as f:
+            self.status = f.read()
+        self.commands = []
+
+    def _run(self, cmd):
+        self.commands.append(cmd[2:])
+        if cmd[3] == "info":
+            return _SNAPSHOT_VOLUME_INFO
+        if cmd[3:5] == ["status", "all"]:
+            return self.status
+        return _SNAPSHOT_FAILED
+
+    def _scope(self, ttl='10'):
+        return MonkeyPatchScope([
+            (gcli, "_statusSnapshot", gcli._StatusSnapshot()),
+            (gcli.commands, "run", self._run),
+            (gcli, "_getGlusterVolCmd",
+             lambda: ["gluster", "--mode=script", "volume"]),
+            (gcli, "_getLocalIpAddress", lambda: "192.0.2.1"),
+            (gcli, "config",
+             make_config([("gluster", "status_cache_ttl", ttl)])),
+        ])
+
+    def test_iterXmlVolumes(self):
+        trees = gcli._iterXmlVolumes(self.status, 'volStatus/volumes/volume')
+        tasks = {}
+        for tree in trees:
+            tasks.update(gcli._parseVolumeTasks(tree))
+        self.assertEqual(tasks, glusterTestData.GLUSTER_VOLUME_TASKS)
+
+    def test_iterXmlVolumesFailed(self):
+        with self.assertRaises(exception.GlusterCmdFailedException):
+            list(gcli._iterXmlVolumes(_SNAPSHOT_FAILED,
+                                      'volInfo/volumes/volume'))
+
+    def test_verbs_share_snapshot(self):
+        with self._scope():
+            volumes = gcli.volumeInfo()
+            self.assertEqual(
+                volumes,
+                gcli._parseVolumeInfo(etree.fromstring(_SNAPSHOT_VOLUME_INFO)))
+            self.assertEqual(list(gcli.volumeInfo('gv2')), ['gv2'])
+            self.assertEqual(gcli.volumeTasks(),
+                             glusterTestData.GLUSTER_VOLUME_TASKS)
+            self.assertEqual(gcli.volumeStatus('gv1')['name'], 'gv1')
+        self.assertEqual(len(self.commands), 3)
+
+    def test_missing_volume_runs_command(self):
+        with self._scope():
+            with self.assertRaises(
+                    exception.GlusterVolumeStatusFailedException):
+                gcli.volumeStatus('gv4', option='detail')
+        self.assertEqual(self.commands[-1],
+                         ["volume", "status", "gv4", "detail", "--xml"])
+
+    def test_refresh(self):
+        with self._scope():
+            gcli.volumeInfo()
+            gcli.volumeInfo(refresh=True)
+        self.assertEqual(len(self.commands), 6)
+
+    def test_tasks_list_refresh(self):
+        with self._scope():
+            gtasks.tasksList(['missing'])
+            gtasks.tasksList(['missing'], refresh=True)
+        self.assertEqual(len(self.commands), 6)
+
+    def test_invalidated_by_modifying_command(self):
+        with self._scope():
+            gcli.volumeInfo()
+            gcli.volumeStart('gv2')
+            gcli.volumeInfo()
+        self.assertEqual(len(self.commands), 7)
+
+    def test_disabled(self):
+        with self._scope(ttl='0'):
+            gcli.volumeInfo()
+        self.assertEqual(self.commands, [["volume", "info", "--xml"]])
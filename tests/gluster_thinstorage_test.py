@@ -146,3 +146,48 @@ class GlusterStorageDevTest(TestCaseBase):
         with MonkeyPatchScope([(commands, "run", fake_run)]):
             actual = thinstorage.vdoVolumeList()
             self.assertEqual(expected, actual)
+
+    @MonkeyPatch(thinstorage, '_lvmCommandPath', _fake_vdoCommandPath)
+    def test_lvm_report_per_volume_group(self):
+        data = {
+            "report": [
+                {
+                    "vg": [{"vg_name": "vg0"}],
+                    "pv": [{"pv_name": "/dev/sdb1", "vg_name": "vg0"}],
+                    "lv": [
+                        {
+                            "lv_size": "53687091200",
+                            "data_percent": "",
+                            "lv_name": "engine",
+                            "vg_name": "vg0",
+                            "pool_lv": ""
+                        }
+                    ]
+                },
+                {
+                    "vg": [{"vg_name": ""}],
+                    "pv": [{"pv_name": "/dev/sdc", "vg_name": ""}],
+                    "lv": []
+                }
+            ]
+        }
+
+        with MonkeyPatchScope([(commands, "run",
+                                partial(fake_json_call, data))]):
+            self.assertEqual(
+                [
+                    {"pv_name": "/dev/sdb1", "vg_name": "vg0"},
+                    {"pv_name": "/dev/sdc", "vg_name": ""}
+                ],
+                thinstorage.physicalVolumeList())
+            self.assertEqual(
+                [
+                    {
+                        "lv_size": 53687091200,
+                        "lv_free": 0,
+                        "lv_name": "engine",
+                        "vg_name": "vg0",
+                        "pool_lv": ""
+                    }
+                ],
+                thinstorage.logicalVolumeList())
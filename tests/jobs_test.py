@@ -63,6 +63,33 @@ class ProgressingJob(jobs.Job):
         self._progress = value
 
 
+class TelemetryJob(jobs.Job):
+
+    def __init__(self):
+        jobs.Job.__init__(self, str(uuid.uuid4()))
+        self.telemetry = None
+
+    @property
+    def throughput(self):
+        return getattr(self.telemetry, 'throughput', None)
+
+    @property
+    def eta(self):
+        return getattr(self.telemetry, 'eta', None)
+
+    @property
+    def stalled(self):
+        return getattr(self.telemetry, 'stalled', None)
+
+
+class Telemetry(object):
+
+    def __init__(self, throughput, eta, stalled):
+        self.throughput = throughput
+        self.eta = eta
+        self.stalled = stalled
+
+
 class StuckJob(TestingJob):
 
     def __init__(self):
@@ -260,6 +287,20 @@ class JobsTests(VdsmTestCase):
             job.progress = i
             self.assertEqual(i, job.info()['progress'])
 
+    def test_job_get_telemetry(self):
+        job = TelemetryJob()
+
+        # Job not running yet, no telemetry.
+        info = job.info()
+        for key in ('throughput', 'eta', 'stalled'):
+            self.assertNotIn(key, info)
+
+        job.telemetry = Telemetry(throughput=1024, eta=30, stalled=False)
+        info = job.info()
+        self.assertEqual(1024, info['throughput'])
+        self.assertEqual(30, info['eta'])
+        self.assertEqual(False, info['stalled'])
+
     def test_job_get_error(self):
         job = TestingJob()
         self.assertIsNone(job.error)
@@ -3,6 +3,7 @@
 
 from __future__ import absolute_import
 from __future__ import division
+import json
 import uuid
 from contextlib import contextmanager
 from six.moves import queue
@@ -41,6 +42,23 @@ class _TransportMock(object):
         pass
 
 
+# Records requests sent by the client, so tests can reply to them.
+class _RequestTransportMock(_TransportMock):
+    def __init__(self):
+        super(_RequestTransportMock, self).__init__()
+        self.sent = []
+
+    def send(self, data, destination=None, flow_id=None):
+        self.sent.append(json.loads(data))
+
+    def reply(self, responses):
+        self._message_handler(json.dumps(responses))
+
+
+def _response(req):
+    return {"jsonrpc": "2.0", "id": req["id"], "result": req["params"]}
+
+
 class _FakeEventSchema(object):
     def verify_event_params(self, *args, **kwargs):
         pass
@@ -95,3 +113,55 @@ class JsonRpcClientTests(VdsmTestCase):
             msg = '{ "key": "value", "array": [2,1,3,4] }'
             with self.assertRaises(JsonRpcInvalidRequestError):
                 self.transport.send(msg, queue_name)
+
+
+class JsonRpcClientPipeliningTests(VdsmTestCase):
+
+    def setUp(self):
+        self.transport = _RequestTransportMock()
+        self.client = yajsonrpc.jsonrpcclient.JsonRpcClient(self.transport)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_pipelined_calls(self):
+        calls = [
+            self.client.call_async(
+                None, yajsonrpc.JsonRpcRequest("echo", [i], str(i)))
+            for i in range(3)
+        ]
+        self.assertEqual(self.client.pending_requests, 3)
+
+        # Reply out of order, one response per message.
+        for batch in reversed(self.transport.sent):
+            self.transport.reply([_response(batch[0])])
+
+        for i, call in enumerate(calls):
+            self.assertTrue(call.wait(0))
+            self.assertEqual(call.responses[0].result, [i])
+        self.assertEqual(self.client.pending_requests, 0)
+
+    def test_batch_call(self):
+        reqs = [yajsonrpc.JsonRpcRequest("echo", [i], str(i))
+                for i in range(3)]
+        call = self.client.call_async(None, *reqs)
+
+        # Whole batch sent in one message.
+        self.assertEqual(len(self.transport.sent), 1)
+        batch = self.transport.sent[0]
+        self.assertEqual(len(batch), 3)
+
+        self.transport.reply([_response(req) for req in reversed(batch)])
+
+        self.assertTrue(call.wait(0))
+        results = {resp.id: resp.result for resp in call.responses}
+        self.assertEqual(results, {"0": [0], "1": [1], "2": [2]})
+
+    def test_timed_out_call_is_dropped(self):
+        req = yajsonrpc.JsonRpcRequest("echo", [], "timeout")
+        self.assertIsNone(self.client.call(req, timeout=0.01))
+        self.assertEqual(self.client.pending_requests, 0)
+
+        # A late response is ignored.
+        self.transport.reply([_response(self.transport.sent[0][0])])
+        self.assertEqual(self.client.pending_requests, 0)
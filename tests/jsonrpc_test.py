@@ -46,3 +46,56 @@ class ServerTests(VdsmTestCase):
         self.assertEqual({"reason": "Too many tasks",
                           "resource": "test",
                           "current_tasks": 0}, reason)
+
+    def test_stats(self):
+        client = FakeClient()
+        server = JsonRpcServer(FakeBridge(), 0, FakeClientIF())
+        msg = (b'[{"jsonrpc":"2.0","method":"Test.echo",'
+               b'"params":{"text":"hello"},"id":"1"},'
+               b'{"jsonrpc":"2.0","method":"Test.fail","params":{},"id":"2"}]')
+        server._parseMessage((client, None, None, msg))
+
+        self.assertEqual(len(client.sent), 1)
+        verbs = server.stats.info()["verbs"]
+
+        echo = verbs["Test.echo"]
+        self.assertEqual(echo["calls"], 1)
+        self.assertEqual(echo["errors"], 0)
+        self.assertEqual(echo["in_flight"], 0)
+        self.assertEqual(echo["request_bytes"], len(msg) // 2)
+        self.assertGreater(echo["response_bytes"], 0)
+
+        fail = verbs["Test.fail"]
+        self.assertEqual(fail["calls"], 1)
+        self.assertEqual(fail["errors"], 1)
+
+
+class FakeClient(object):
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+
+class FakeClientIF(object):
+    ready = True
+
+
+class FakeBridge(object):
+
+    def dispatch(self, method):
+        return {"Test.echo": self.echo, "Test.fail": self.fail}[method]
+
+    def register_server_address(self, server_address):
+        pass
+
+    def unregister_server_address(self):
+        pass
+
+    def echo(self, text):
+        return text
+
+    def fail(self):
+        raise exception.GeneralException("Test failure")
@@ -95,6 +95,14 @@ class StorageDomain():
             return {'status': {'code': -1, 'message': 'Fail'}}
 
 
+class NBD():
+    ctorArgs = []
+
+    def get_stats(self):
+        return {'status': {'code': 0, 'message': 'Done'},
+                'result': {'server-id': {'read_ops': 1}}}
+
+
 def getFakeAPI():
     spec = importlib.machinery.ModuleSpec("vdsm.API", None)
     _newAPI = importlib.util.module_from_spec(spec)
@@ -103,6 +111,7 @@ def getFakeAPI():
     setattr(_newAPI, 'Global', Host)
     setattr(_newAPI, 'StorageDomain', StorageDomain)
     setattr(_newAPI, 'VM', VM)
+    setattr(_newAPI, 'NBD', NBD)
 
     # Copy required API objects to our version of API
     for name in _COPIED_API_OBJECTS:
@@ -190,3 +199,10 @@ class BridgeTests(TestCaseBase):
 
         self.assertEqual(bridge.dispatch('Host.getDeviceList')(**params),
                          [])
+
+    @MonkeyPatch(DynamicBridge, '_get_api_instance', _get_api_instance)
+    def testNBDGetStats(self):
+        bridge = DynamicBridge()
+
+        self.assertEqual(bridge.dispatch('NBD.get_stats')(),
+                         {'server-id': {'read_ops': 1}})
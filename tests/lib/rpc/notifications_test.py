@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import pytest
+
+from vdsm.rpc import notifications
+
+
+class FakeCall(object):
+
+    def __init__(self, callable):
+        self.callable = callable
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeScheduler(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def schedule(self, delay, callable):
+        call = FakeCall(callable)
+        self.calls.append(call)
+        return call
+
+    def run(self):
+        calls = self.calls
+        self.calls = []
+        for call in calls:
+            if not call.cancelled:
+                call.callable()
+
+
+class Sender(object):
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event_id, params):
+        self.events.append((event_id, params))
+
+
+@pytest.fixture
+def scheduler():
+    return FakeScheduler()
+
+
+@pytest.fixture
+def sender():
+    return Sender()
+
+
+@pytest.fixture
+def aggregator(sender, scheduler):
+    return notifications.EventAggregator(
+        sender, scheduler, window=0.1, max_merged=2)
+
+
+@pytest.mark.parametrize("event_id, etype", [
+    ("|virt|VM_status|vm-id", "|virt|VM_status|"),
+    ("|jobs|status|job-id", "|jobs|status|"),
+    ("|net|host_conn|no_id", "|net|host_conn|"),
+])
+def test_event_type(event_id, etype):
+    assert notifications.event_type(event_id) == etype
+
+
+def test_no_window(sender, scheduler):
+    aggregator = notifications.EventAggregator(sender, scheduler, window=0)
+    aggregator.notify("|jobs|status|job", {"id": "job"})
+    assert sender.events == [("|jobs|status|job", {"id": "job"})]
+    assert scheduler.calls == []
+
+
+def test_send_after_window(aggregator, sender, scheduler):
+    aggregator.notify("|jobs|status|job", {"id": "job"})
+    assert sender.events == []
+    assert len(scheduler.calls) == 1
+
+    scheduler.run()
+    assert sender.events == [("|jobs|status|job", {"id": "job"})]
+
+
+def test_schedule_once_per_window(aggregator, scheduler):
+    aggregator.notify("|jobs|status|job1", {"id": "job1"})
+    aggregator.notify("|jobs|status|job2", {"id": "job2"})
+    assert len(scheduler.calls) == 1
+
+
+def test_coalesce_same_event(aggregator, sender, scheduler):
+    aggregator.notify("|jobs|status|job", {"status": "running"})
+    aggregator.notify("|jobs|status|job", {"status": "done"})
+    scheduler.run()
+
+    assert sender.events == [("|jobs|status|job", {"status": "done"})]
+    stats = aggregator.stats()
+    assert stats["received"] == 2
+    assert stats["coalesced"] == 1
+    assert stats["sent"] == 1
+
+
+def test_merge_vm_status(aggregator, sender, scheduler):
+    aggregator.notify("|virt|VM_status|vm1", {"vm1": {"status": "Paused"}})
+    aggregator.notify("|jobs|status|job", {"id": "job"})
+    aggregator.notify("|virt|VM_status|vm2", {"vm2": {"status": "Paused"}})
+    scheduler.run()
+
+    assert sender.events == [
+        ("|virt|VM_status|vm1", {
+            "vm1": {"status": "Paused"},
+            "vm2": {"status": "Paused"},
+        }),
+        ("|jobs|status|job", {"id": "job"}),
+    ]
+    assert aggregator.stats()["merged"] == 1
+
+
+def test_max_merged(aggregator, sender, scheduler):
+    for i in range(5):
+        vm_id = "vm%d" % i
+        aggregator.notify("|virt|VM_status|" + vm_id, {vm_id: {}})
+    scheduler.run()
+
+    assert sender.events == [
+        ("|virt|VM_status|vm0", {"vm0": {}, "vm1": {}}),
+        ("|virt|VM_status|vm2", {"vm2": {}, "vm3": {}}),
+        ("|virt|VM_status|vm4", {"vm4": {}}),
+    ]
+
+
+def test_flush(aggregator, sender, scheduler):
+    aggregator.notify("|jobs|status|job", {"id": "job"})
+    aggregator.flush()
+    assert sender.events == [("|jobs|status|job", {"id": "job"})]
+
+    # The scheduled flush was cancelled.
+    scheduler.run()
+    assert len(sender.events) == 1
+
+
+def test_send_error(aggregator, scheduler):
+    def fail(event_id, params):
+        raise RuntimeError("send failed")
+
+    aggregator = notifications.EventAggregator(fail, scheduler, window=0)
+    aggregator.notify("|jobs|status|job", {"id": "job"})
+    assert aggregator.stats()["sent"] == 0
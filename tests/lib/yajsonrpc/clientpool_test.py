@@ -0,0 +1,264 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import threading
+
+import pytest
+
+from vdsm.common import concurrent
+from yajsonrpc.stompclient import ClientPool
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCall(object):
+
+    def __init__(self, callable):
+        self.callable = callable
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeScheduler(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def schedule(self, delay, callable):
+        call = FakeCall(callable)
+        self.calls.append(call)
+        return call
+
+    def run(self):
+        calls = self.calls
+        self.calls = []
+        for call in calls:
+            if not call.cancelled:
+                call.callable()
+
+
+class FakeStompClient(object):
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.closed = False
+        self.sent = []
+
+    def send(self, message, destination=None, headers=None):
+        self.sent.append(message)
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def pool(clock):
+    pool = ClientPool(FakeStompClient, max_connections=2, idle_timeout=10,
+                      clock=clock)
+    yield pool
+    pool.close()
+
+
+def test_reuse_released_connection(pool):
+    client = pool.get("host", 54321)
+    client.send("message")
+    conn = client._connection.client
+    assert conn.sent == ["message"]
+    client.close()
+
+    client = pool.get("host", 54321)
+    assert client._connection.client is conn
+    assert not conn.closed
+
+
+def test_close_does_not_close_connection(pool):
+    client = pool.get("host", 54321)
+    conn = client._connection.client
+    client.close()
+    # Closing twice must not release twice.
+    client.close()
+    assert not conn.closed
+    assert pool.stats() == {"host:54321": {"connections": 1, "users": 0}}
+
+
+def test_max_connections(pool):
+    clients = [pool.get("host", 54321) for i in range(4)]
+    conns = {id(c._connection) for c in clients}
+    assert len(conns) == 2
+    assert pool.stats() == {"host:54321": {"connections": 2, "users": 4}}
+
+
+def test_connections_per_destination(pool):
+    c1 = pool.get("host1", 54321)
+    c2 = pool.get("host2", 54321)
+    assert c1._connection is not c2._connection
+    assert c1.host == "host1"
+    assert c2.host == "host2"
+
+
+def test_drop_idle_connection(pool, clock):
+    client = pool.get("host", 54321)
+    conn = client._connection.client
+    client.close()
+
+    clock.now += 11
+    client = pool.get("host", 54321)
+    assert conn.closed
+    assert client._connection.client is not conn
+
+
+def test_keep_used_connection(pool, clock):
+    client = pool.get("host", 54321)
+    conn = client._connection.client
+
+    clock.now += 11
+    other = pool.get("host", 54321)
+    assert not conn.closed
+    assert pool.stats() == {"host:54321": {"connections": 2, "users": 2}}
+    client.close()
+    other.close()
+
+
+def test_drop_closed_connection(pool):
+    client = pool.get("host", 54321)
+    conn = client._connection.client
+    conn.closed = True
+
+    other = pool.get("host", 54321)
+    assert other._connection.client is not conn
+    assert pool.stats() == {"host:54321": {"connections": 1, "users": 1}}
+
+
+def test_close_detached_connection_on_release(pool, clock):
+    client = pool.get("host", 54321)
+    conn = client._connection.client
+    conn.closed = True
+    pool.get("host", 54321)
+    conn.closed = False
+
+    client.close()
+    assert conn.closed
+
+
+def test_close(pool):
+    client = pool.get("host", 54321)
+    conn = client._connection.client
+    pool.close()
+    assert conn.closed
+    assert pool.stats() == {}
+
+
+def test_scheduled_evict(clock):
+    scheduler = FakeScheduler()
+    pool = ClientPool(FakeStompClient, idle_timeout=10, scheduler=scheduler,
+                      clock=clock)
+    client = pool.get("host", 54321)
+    conn = client._connection.client
+    client.close()
+    assert len(scheduler.calls) == 1
+
+    # Connection is not idle yet, check again later.
+    scheduler.run()
+    assert not conn.closed
+    assert len(scheduler.calls) == 1
+
+    clock.now += 11
+    scheduler.run()
+    assert conn.closed
+    assert pool.stats() == {}
+    # Nothing to check until a new connection is opened.
+    assert scheduler.calls == []
+
+
+@pytest.mark.parametrize("scheduled", [True, False])
+def test_evict_closes_without_lock(clock, scheduled):
+    scheduler = FakeScheduler()
+    pool = ClientPool(FakeStompClient, idle_timeout=10, scheduler=scheduler,
+                      clock=clock)
+    client = pool.get("host", 54321)
+    conn = client._connection.client
+    client.close()
+
+    locked = []
+
+    def close():
+        # Closing may block, callers waiting for a slot must not wait.
+        locked.append(not pool._cond.acquire(False))
+        if not locked[-1]:
+            pool._cond.release()
+        conn.closed = True
+
+    conn.close = close
+    clock.now += 11
+    if scheduled:
+        scheduler.run()
+    else:
+        pool.get("host", 54321)
+    assert locked == [False]
+
+
+def test_close_cancels_scheduled_evict(clock):
+    scheduler = FakeScheduler()
+    pool = ClientPool(FakeStompClient, idle_timeout=10, scheduler=scheduler,
+                      clock=clock)
+    pool.get("host", 54321)
+    pool.close()
+    assert scheduler.calls[0].cancelled
+
+
+def test_concurrent_connect_reserves_slot(clock):
+    connecting = threading.Event()
+    release = threading.Event()
+
+    def connect(host, port):
+        connecting.set()
+        assert release.wait(5)
+        return FakeStompClient(host, port)
+
+    pool = ClientPool(connect, max_connections=1, clock=clock)
+    clients = []
+    t = concurrent.thread(lambda: clients.append(pool.get("host", 54321)))
+    t.start()
+    try:
+        assert connecting.wait(5)
+        waiter = concurrent.thread(
+            lambda: clients.append(pool.get("host", 54321)))
+        waiter.start()
+    finally:
+        release.set()
+        t.join()
+    waiter.join()
+
+    assert clients[0]._connection is clients[1]._connection
+    assert pool.stats() == {"host:54321": {"connections": 1, "users": 2}}
+
+
+def test_failed_connect_releases_slot(clock):
+    def connect(host, port):
+        raise OSError("Connection refused")
+
+    pool = ClientPool(connect, max_connections=1, clock=clock)
+    with pytest.raises(OSError):
+        pool.get("host", 54321)
+    assert pool.stats() == {}
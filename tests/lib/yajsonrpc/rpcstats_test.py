@@ -0,0 +1,206 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+from fakelib import FakeScheduler
+
+from yajsonrpc import rpcstats
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_histogram_empty():
+    h = rpcstats.Histogram()
+    info = h.info()
+    assert info["avg"] == 0.0
+    assert info["max"] == 0.0
+    assert info["p99"] == 0.0
+    assert sum(info["histogram"].values()) == 0
+
+
+def test_histogram_buckets():
+    h = rpcstats.Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 2.0):
+        h.add(value)
+    info = h.info()
+    assert info["histogram"] == {"0.1": 2, "1.0": 1, "inf": 1}
+    assert info["avg"] == 2.6 / 4
+    assert info["max"] == 2.0
+
+
+def test_histogram_percentile():
+    h = rpcstats.Histogram(buckets=(0.1, 1.0))
+    for i in range(98):
+        h.add(0.05)
+    h.add(0.5)
+    h.add(3.0)
+    # Percentiles are bucket upper bounds, but never more than max.
+    assert h.percentile(50) == 0.1
+    assert h.percentile(99) == 1.0
+    assert h.percentile(100) == 3.0
+
+
+def test_histogram_percentile_max():
+    h = rpcstats.Histogram(buckets=(0.1, 1.0))
+    h.add(0.05)
+    assert h.percentile(50) == 0.05
+
+
+def test_call():
+    clock = FakeClock()
+    stats = rpcstats.RpcStats(clock=clock)
+
+    call = stats.start_call("Host.getStats")
+    assert stats.info()["verbs"]["Host.getStats"]["in_flight"] == 1
+
+    clock.now += 0.5
+    assert stats.end_call(call) == 0.5
+
+    verb = stats.info()["verbs"]["Host.getStats"]
+    assert verb["calls"] == 1
+    assert verb["errors"] == 0
+    assert verb["in_flight"] == 0
+    assert verb["latency"]["max"] == 0.5
+    assert verb["latency"]["histogram"]["0.5"] == 1
+
+
+def test_errors():
+    stats = rpcstats.RpcStats(clock=FakeClock())
+    stats.end_call(stats.start_call("VM.create"), error="error")
+    stats.end_call(stats.start_call("VM.create"))
+
+    verb = stats.info()["verbs"]["VM.create"]
+    assert verb["calls"] == 2
+    assert verb["errors"] == 1
+
+
+def test_payload_sizes():
+    stats = rpcstats.RpcStats(clock=FakeClock())
+    stats.add_request_size("Host.getStats", 100)
+    stats.add_request_size("Host.getStats", 100)
+    stats.add_response_size("Host.getStats", 4096)
+
+    verb = stats.info()["verbs"]["Host.getStats"]
+    assert verb["request_bytes"] == 200
+    assert verb["response_bytes"] == 4096
+
+
+def test_slow_call_without_scheduler():
+    clock = FakeClock()
+    stats = rpcstats.RpcStats(slow_call_threshold=1.0, clock=clock)
+
+    call = stats.start_call("Host.getStats")
+    clock.now += 0.5
+    stats.end_call(call)
+
+    call = stats.start_call("Image.upload")
+    clock.now += 2.0
+    stats.end_call(call)
+
+    assert stats.info()["slow_calls"] == [{
+        "method": "Image.upload",
+        "duration": 2.0,
+        "running": False,
+        "traceback": None,
+    }]
+
+
+def test_slow_call_traceback():
+    clock = FakeClock()
+    scheduler = FakeScheduler()
+    stats = rpcstats.RpcStats(
+        slow_call_threshold=1.0, scheduler=scheduler, clock=clock)
+
+    call = stats.start_call("Image.upload")
+    delay, capture = scheduler.calls[0]
+    assert delay == 1.0
+
+    # The scheduler captures the call while it is still running.
+    clock.now += 1.0
+    capture()
+
+    slow_call, = stats.info()["slow_calls"]
+    assert slow_call["method"] == "Image.upload"
+    assert slow_call["running"]
+    assert slow_call["duration"] == 1.0
+    assert "test_slow_call_traceback" in slow_call["traceback"]
+
+    clock.now += 2.0
+    stats.end_call(call)
+
+    slow_call, = stats.info()["slow_calls"]
+    assert not slow_call["running"]
+    assert slow_call["duration"] == 3.0
+
+
+def test_fast_call_not_captured():
+    clock = FakeClock()
+    scheduler = FakeScheduler()
+    stats = rpcstats.RpcStats(
+        slow_call_threshold=1.0, scheduler=scheduler, clock=clock)
+
+    call = stats.start_call("Host.getStats")
+    stats.end_call(call)
+
+    # The call finished before the scheduled capture ran.
+    delay, capture = scheduler.calls[0]
+    capture()
+
+    assert stats.info()["slow_calls"] == []
+
+
+def test_max_slow_calls():
+    clock = FakeClock()
+    stats = rpcstats.RpcStats(
+        slow_call_threshold=1.0, max_slow_calls=2, clock=clock)
+
+    for method in ("A.a", "B.b", "C.c"):
+        call = stats.start_call(method)
+        clock.now += 2.0
+        stats.end_call(call)
+
+    methods = [c["method"] for c in stats.info()["slow_calls"]]
+    assert methods == ["B.b", "C.c"]
+
+
+def test_max_verbs(monkeypatch):
+    monkeypatch.setattr(rpcstats, "MAX_VERBS", 2)
+    stats = rpcstats.RpcStats(clock=FakeClock())
+
+    for method in ("A.a", "B.b", "C.c", "D.d"):
+        stats.end_call(stats.start_call(method))
+
+    verbs = stats.info()["verbs"]
+    assert sorted(verbs) == ["A.a", "B.b", rpcstats.OTHER_VERBS]
+    assert verbs[rpcstats.OTHER_VERBS]["calls"] == 2
+    assert verbs[rpcstats.OTHER_VERBS]["in_flight"] == 0
+
+
+def test_report():
+    clock = FakeClock()
+    stats = rpcstats.RpcStats(clock=clock)
+    call = stats.start_call("Host.getStats")
+    clock.now += 0.2
+    stats.end_call(call, error="error")
+    stats.add_request_size("Host.getStats", 100)
+    stats.add_response_size("Host.getStats", 1000)
+
+    report = stats.report("hosts.vdsm.rpc")
+    prefix = "hosts.vdsm.rpc.Host.getStats"
+    assert report[prefix + ".calls"] == 1
+    assert report[prefix + ".errors"] == 1
+    assert report[prefix + ".in_flight"] == 0
+    assert report[prefix + ".request_bytes"] == 100
+    assert report[prefix + ".response_bytes"] == 1000
+    assert report[prefix + ".latency.max"] == 0.2
+    assert report[prefix + ".latency.p50"] == 0.2
+    assert report[prefix + ".latency.p99"] == 0.2
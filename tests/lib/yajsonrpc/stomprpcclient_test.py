@@ -6,13 +6,16 @@ from __future__ import division
 
 import logging
 import time
+import uuid
 
 from contextlib import contextmanager
 from unittest import mock
 
+import pytest
+
 from six.moves import queue
 
-from integration.jsonRpcHelper import constructClient
+from integration.jsonRpcHelper import constructAcceptor, constructClient
 from integration.sslhelper import generate_key_cert_pair, create_ssl_context
 
 from testlib import \
@@ -26,14 +29,19 @@ from vdsm.client import \
     _Client, \
     ServerError, \
     TimeoutError
+from vdsm import utils
+from vdsm.common import concurrent
 
 from yajsonrpc import stompclient
+from yajsonrpc.stomp import SUBSCRIPTION_ID_REQUEST
 
 from yajsonrpc.exception import \
     JsonRpcMethodNotFoundError, \
     JsonRpcInternalError
 from vdsm.common import exception
 
+log = logging.getLogger("test")
+
 CALL_TIMEOUT = 3
 EVENT_TIMEOUT = 3
 EVENT_TOPIC = "test.events"
@@ -78,7 +86,7 @@ class _Bridge(object):
 
 
 class _FakeSchema(object):
-    get_methods = [
+    method_names = [
         "Test.echo",
         "Test.slowCall",
         "Test.sendEvent"
@@ -97,20 +105,24 @@ class _MockedClient(_Client):
         self._event_schema = _FakeEventSchema()
 
 
+@contextmanager
+def _create_client(log):
+    bridge = _Bridge()
+    with generate_key_cert_pair() as key_cert_pair:
+        key_file, cert_file = key_cert_pair
+        ssl_ctx = create_ssl_context(key_file, cert_file)
+        with constructClient(log, bridge, ssl_ctx) as clientFactory:
+            json_client = clientFactory()
+            try:
+                yield _MockedClient(json_client, CALL_TIMEOUT, False)
+            finally:
+                json_client.close()
+
+
 class VdsmClientTests(VdsmTestCase):
 
-    @contextmanager
     def _create_client(self):
-        bridge = _Bridge()
-        with generate_key_cert_pair() as key_cert_pair:
-            key_file, cert_file = key_cert_pair
-            ssl_ctx = create_ssl_context(key_file, cert_file)
-            with constructClient(self.log, bridge, ssl_ctx) as clientFactory:
-                json_client = clientFactory()
-                try:
-                    yield _MockedClient(json_client, CALL_TIMEOUT, False)
-                finally:
-                    json_client.close()
+        return _create_client(self.log)
 
     def _get_with_timeout(self, event_queue):
         try:
@@ -148,6 +160,27 @@ class VdsmClientTests(VdsmTestCase):
                 ex.exception.code, JsonRpcMethodNotFoundError("").code)
             self.assertIn("missingMethod", ex.exception.resp_msg)
 
+    @broken_on_ci("Fails randomly in CI", name="TRAVIS_CI")
+    def test_batch(self):
+        with self._create_client() as client:
+            res = client.batch([
+                ("Test.echo", {"text": "first"}),
+                ("Test.echo", {"text": "second"}),
+            ])
+
+            self.assertEqual(res, ["first", "second"])
+
+    @broken_on_ci("Fails randomly in CI", name="TRAVIS_CI")
+    def test_batch_failing_call(self):
+        with self._create_client() as client:
+            with self.assertRaises(ServerError) as ex:
+                client.batch([
+                    ("Test.echo", {"text": "first"}),
+                    ("Test.failingCall", {}),
+                ])
+
+            self.assertEqual(ex.exception.cmd, "Test.failingCall")
+
     def test_missing_namespace(self):
         with self._create_client() as client:
             with self.assertRaises(AttributeError):
@@ -274,3 +307,95 @@ class VdsmClientTests(VdsmTestCase):
                 self._get_with_timeout(event_queue),
                 None
             )
+
+
+@pytest.mark.slow
+@pytest.mark.stress
+@pytest.mark.parametrize("concurrency", [1, 16, 128])
+def test_pipelined_calls_benchmark(concurrency):
+    """
+    Measure calls/sec when concurrency threads share one connection.
+    """
+    calls_per_thread = 2000 // concurrency
+    errors = []
+
+    with _create_client(log) as client:
+        def worker():
+            try:
+                for i in range(calls_per_thread):
+                    client.Test.echo(text="ping")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [concurrent.thread(worker) for i in range(concurrency)]
+        start = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+
+    assert not errors
+    total = calls_per_thread * concurrency
+    log.info("concurrency=%d calls=%d elapsed=%.3f calls/sec=%.1f",
+             concurrency, total, elapsed, total / elapsed)
+
+
+@pytest.mark.slow
+@pytest.mark.stress
+@pytest.mark.parametrize("clients", [1, 50, 500])
+def test_connected_clients_benchmark(clients):
+    """
+    Measure reactor CPU usage while clients are idle, and call latency, with
+    many connected clients.
+
+    Like engines, every client uses its own response queue.
+    """
+    idle_time = 2.0
+    calls = 200
+    bridge = _Bridge()
+
+    with generate_key_cert_pair() as key_cert_pair:
+        key_file, cert_file = key_cert_pair
+        ssl_ctx = create_ssl_context(key_file, cert_file)
+        with constructAcceptor(log, ssl_ctx, bridge) as acceptor:
+            reactor = acceptor._handlers[0]._reactor
+
+            def create_client():
+                sock = utils.create_connected_socket(
+                    acceptor._host, acceptor._port, sslctx=ssl_ctx,
+                    timeout=CALL_TIMEOUT)
+                json_client = stompclient.StompRpcClient(
+                    reactor.createClient(sock),
+                    SUBSCRIPTION_ID_REQUEST,
+                    str(uuid.uuid4()))
+                return _MockedClient(json_client, CALL_TIMEOUT, False)
+
+            vdsm_clients = []
+            try:
+                for i in range(clients):
+                    client = create_client()
+                    vdsm_clients.append(client)
+                    client.Test.echo(text="ping")
+
+                start_cpu = time.process_time()
+                start = time.monotonic()
+                time.sleep(idle_time)
+                idle_cpu = ((time.process_time() - start_cpu) /
+                            (time.monotonic() - start))
+
+                latencies = []
+                for i in range(calls):
+                    start = time.monotonic()
+                    client.Test.echo(text="ping")
+                    latencies.append(time.monotonic() - start)
+            finally:
+                for client in vdsm_clients:
+                    client.close()
+
+    latencies.sort()
+    log.info("clients=%d idle_cpu=%.1f%% latency avg=%.3fms p50=%.3fms "
+             "p99=%.3fms", clients, idle_cpu * 100,
+             sum(latencies) / calls * 1000,
+             latencies[calls // 2] * 1000,
+             latencies[calls * 99 // 100] * 1000)
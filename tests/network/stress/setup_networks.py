@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Benchmark for generating and applying the nmstate state of setupNetworks.
+
+Attaches many VLAN networks to a bond using a stubbed nmstate, keeping the
+applied state in memory, and reports the time spent in each phase and the
+number of interfaces sent to nmstate. Every size is set up twice; the second
+setup does not change anything and should not send any interface.
+
+Usage:
+
+    $ PYTHONPATH=lib python3 tests/network/stress/setup_networks.py \\
+        --networks 10,100,500
+
+"""
+
+import argparse
+import copy
+import time
+
+from vdsm.network import nmstate
+from vdsm.network.nmstate import api
+
+BOND = 'bond0'
+NICS = ('eth0', 'eth1')
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument(
+    "-n",
+    "--networks",
+    default="10,100,500",
+    help="Comma separated number of networks to set up (default 10,100,500)",
+)
+
+parser.add_argument(
+    "--bridged",
+    action="store_true",
+    help="Set up bridged networks (default bridgeless)",
+)
+
+
+class FakeNmstate:
+    """
+    Stub nmstate keeping the applied state in memory.
+    """
+
+    def __init__(self):
+        self.interfaces = {}
+        self.applied = []
+        for nic in NICS:
+            self.interfaces[nic] = {
+                nmstate.Interface.NAME: nic,
+                nmstate.Interface.TYPE: nmstate.InterfaceType.ETHERNET,
+                nmstate.Interface.STATE: nmstate.InterfaceState.UP,
+                nmstate.Interface.MTU: 1500,
+            }
+        self.interfaces[BOND] = {
+            nmstate.Interface.NAME: BOND,
+            nmstate.Interface.TYPE: nmstate.InterfaceType.BOND,
+            nmstate.Interface.STATE: nmstate.InterfaceState.UP,
+            nmstate.Interface.MTU: 1500,
+            nmstate.BondSchema.CONFIG_SUBTREE: {
+                nmstate.BondSchema.MODE: '802.3ad',
+                nmstate.BondSchema.PORT: list(NICS),
+            },
+        }
+
+    def show(self):
+        return {
+            nmstate.Interface.KEY: copy.deepcopy(
+                list(self.interfaces.values())
+            ),
+            nmstate.DNS.KEY: {},
+            nmstate.Route.KEY: {},
+            nmstate.RouteRule.KEY: {},
+        }
+
+    def apply(self, desired_state, verify_change=True):
+        ifstates = desired_state.get(nmstate.Interface.KEY, ())
+        self.applied.append(len(ifstates))
+        for ifstate in ifstates:
+            name = ifstate[nmstate.Interface.NAME]
+            if ifstate.get(nmstate.Interface.STATE) == (
+                nmstate.InterfaceState.ABSENT
+            ):
+                self.interfaces.pop(name, None)
+            else:
+                current = self.interfaces.setdefault(name, {})
+                _merge(current, copy.deepcopy(ifstate))
+
+
+class FakeRunningConfig:
+    networks = {}
+    bonds = {}
+    devices = {}
+
+
+def _merge(current, desired):
+    for key, value in desired.items():
+        if isinstance(value, dict) and isinstance(current.get(key), dict):
+            _merge(current[key], value)
+        else:
+            current[key] = value
+
+
+def networks_config(count, bridged):
+    return {
+        'net{}'.format(i): {
+            'bonding': BOND,
+            'vlan': i + 1,
+            'bridged': bridged,
+            'switch': 'legacy',
+            'defaultRoute': False,
+            'mtu': 1500,
+        }
+        for i in range(count)
+    }
+
+
+def setup(fake, networks):
+    start = time.monotonic()
+    current_state = api.get_current_state()
+    show_done = time.monotonic()
+
+    desired_state = api.generate_state(networks, {}, current_state)
+    generate_done = time.monotonic()
+
+    desired_state = nmstate.minimize_state(desired_state, current_state)
+    minimize_done = time.monotonic()
+
+    if desired_state:
+        api.setup(desired_state, verify_change=True)
+    else:
+        fake.applied.append(0)
+    apply_done = time.monotonic()
+
+    return {
+        "show": show_done - start,
+        "generate": generate_done - show_done,
+        "minimize": minimize_done - generate_done,
+        "apply": apply_done - minimize_done,
+    }
+
+
+def run(count, bridged):
+    fake = FakeNmstate()
+    api.state_show = fake.show
+    api.state_apply = fake.apply
+    api.RunningConfig = FakeRunningConfig
+    FakeRunningConfig.networks = {}
+
+    networks = networks_config(count, bridged)
+    for setup_run in ("create", "reapply"):
+        times = setup(fake, networks)
+        FakeRunningConfig.networks = networks
+        print(
+            "{:>6} {:>8} {:>8.3f} {:>8.3f} {:>8.3f} {:>8.3f} {:>8}".format(
+                count,
+                setup_run,
+                times["show"],
+                times["generate"],
+                times["minimize"],
+                times["apply"],
+                fake.applied[-1],
+            )
+        )
+
+
+args = parser.parse_args()
+
+print(
+    "{:>6} {:>8} {:>8} {:>8} {:>8} {:>8} {:>8}".format(
+        "nets", "run", "show", "generate", "minimize", "apply", "ifaces"
+    )
+)
+
+for count in args.networks.split(","):
+    run(int(count), args.bridged)
@@ -0,0 +1,113 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import pytest
+
+from vdsm.network.link import stats as link_stats
+from vdsm.network.netlink import libnl
+
+UP = libnl.IfaceStatus.IFF_UP | libnl.IfaceStatus.IFF_RUNNING
+
+LINKS = [
+    {'name': 'eth0', 'flags': UP, 'master': 'bond0'},
+    {'name': 'eth1', 'flags': UP, 'master': 'bond0'},
+    {'name': 'bond0', 'flags': UP, 'type': 'bond'},
+    {'name': 'bond0.10', 'flags': UP, 'type': 'vlan', 'device': 'bond0'},
+    {'name': 'eth2', 'flags': 0},
+]
+
+
+def _link(properties, n):
+    link = dict(properties)
+    link['stats'] = {
+        'rx_bytes': n,
+        'tx_bytes': n + 1,
+        'rx_dropped': n + 2,
+        'tx_dropped': n + 3,
+        'rx_errors': n + 4,
+        'tx_errors': n + 5,
+    }
+    return link
+
+
+class FakeSpeed(object):
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, properties):
+        self.calls.append(properties['name'])
+        return 1000, 'full'
+
+
+@pytest.fixture
+def speed_cache(monkeypatch):
+    cache = link_stats._SpeedCache()
+    # Simulate a running monitor.
+    cache._monitor = object()
+    cache._running = True
+    monkeypatch.setattr(link_stats, '_speed_cache', cache)
+    monkeypatch.setattr(
+        link_stats.nl_link,
+        'iter_links',
+        lambda with_stats: [_link(p, n) for n, p in enumerate(LINKS)],
+    )
+    return cache
+
+
+@pytest.fixture
+def speed(monkeypatch):
+    fake = FakeSpeed()
+    monkeypatch.setattr(link_stats, '_speed_duplex', fake)
+    return fake
+
+
+def test_report(speed_cache, speed):
+    stats = link_stats.report()
+    assert set(stats) == {link['name'] for link in LINKS}
+    assert stats['eth1'] == {
+        'name': 'eth1',
+        'rx': 1,
+        'tx': 2,
+        'state': 'up',
+        'rxDropped': 3,
+        'txDropped': 4,
+        'rxErrors': 5,
+        'txErrors': 6,
+        'speed': 1000,
+        'duplex': 'full',
+    }
+    assert stats['eth2']['state'] == 'down'
+
+
+def test_speed_cached(speed_cache, speed):
+    link_stats.report()
+    link_stats.report()
+    assert sorted(speed.calls) == sorted(link['name'] for link in LINKS)
+
+
+@pytest.mark.parametrize(
+    'event_link, refreshed',
+    [
+        ('eth2', ['eth2']),
+        ('eth0', ['eth0', 'bond0']),
+        ('bond0', ['bond0', 'bond0.10']),
+        ('bond0.10', ['bond0.10']),
+    ],
+)
+def test_link_event(speed_cache, speed, event_link, refreshed):
+    link_stats.report()
+    del speed.calls[:]
+
+    speed_cache.invalidate(event_link)
+    link_stats.report()
+    assert sorted(speed.calls) == sorted(refreshed)
+
+
+def test_monitor_not_running(speed_cache, speed):
+    speed_cache._running = False
+    link_stats.report()
+    link_stats.report()
+    assert len(speed.calls) == 2 * len(LINKS)
@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import pytest
+
+from vdsm.network.lldp import TlvReportLldpError
+from vdsm.network.lldp import info as lldp_info
+
+TTL_TLV = {
+    'type': lldp_info.TTL_TLV_TYPE,
+    'name': 'Time to Live',
+    'properties': {'time to live': '120'},
+}
+
+
+class FakeInfo(object):
+    def __init__(self):
+        self.calls = []
+        self.failing = set()
+
+    def __call__(self, device):
+        self.calls.append(device)
+        if device in self.failing:
+            raise TlvReportLldpError(1, '', 'error', device)
+        return {'enabled': True, 'tlvs': [TTL_TLV]}
+
+
+class FakeTime(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    collector = lldp_info._Collector()
+    # Simulate a running monitor.
+    collector._monitor = object()
+    collector._running = True
+    monkeypatch.setattr(lldp_info, '_collector', collector)
+    return collector
+
+
+@pytest.fixture
+def get_info(monkeypatch):
+    fake = FakeInfo()
+    monkeypatch.setattr(lldp_info, '_get_info', fake)
+    return fake
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(lldp_info, 'monotonic_time', fake)
+    return fake
+
+
+def test_get_info(collector, get_info, clock):
+    info = lldp_info.get_info({'devices': ['eth0', 'eth1']})
+    assert list(info) == ['eth0', 'eth1']
+    assert info['eth0'] == {'enabled': True, 'tlvs': [TTL_TLV]}
+    assert sorted(get_info.calls) == ['eth0', 'eth1']
+
+
+def test_cached_until_ttl(collector, get_info, clock):
+    lldp_info.get_info({'devices': ['eth0', 'eth1']})
+    clock.now = 119
+    lldp_info.get_info({'devices': ['eth0']})
+    assert len(get_info.calls) == 2
+
+    clock.now = 120
+    lldp_info.get_info({'devices': ['eth0']})
+    assert len(get_info.calls) == 3
+
+
+def test_default_ttl(collector, get_info, clock, monkeypatch):
+    monkeypatch.setattr(
+        lldp_info, '_get_info', lambda device: {'enabled': False, 'tlvs': []}
+    )
+    collector.get(['eth0'])
+    assert collector._entries['eth0'][0] == lldp_info.DEFAULT_TTL
+
+
+def test_event_invalidates(collector, get_info, clock):
+    lldp_info.get_info({'devices': ['eth0', 'eth1']})
+    assert collector.invalidate('eth0')
+    assert not collector.invalidate('eth2')
+    lldp_info.get_info({'devices': ['eth0', 'eth1']})
+    assert get_info.calls[2:] == ['eth0']
+
+
+def test_refresh_in_background(collector, get_info, clock):
+    lldp_info.get_info({'devices': ['eth0']})
+    collector.invalidate('eth0')
+    collector._refresh_device('eth0')
+    lldp_info.get_info({'devices': ['eth0']})
+    assert get_info.calls == ['eth0', 'eth0']
+
+
+def test_concurrent_invalidation_discards_value(
+    collector, get_info, monkeypatch
+):
+    def info_changed(device):
+        collector.invalidate(device)
+        return {'enabled': False, 'tlvs': []}
+
+    monkeypatch.setattr(lldp_info, '_get_info', info_changed)
+    collector.get(['eth0'])
+    assert collector._entries == {}
+
+
+def test_failure_caches_other_devices(collector, get_info, clock):
+    get_info.failing.add('eth1')
+    with pytest.raises(TlvReportLldpError):
+        lldp_info.get_info({'devices': ['eth0', 'eth1']})
+    assert set(collector._entries) == {'eth0'}
+
+
+def test_not_cached_without_monitor(collector, get_info, clock):
+    collector._running = False
+    lldp_info.get_info({'devices': ['eth0']})
+    lldp_info.get_info({'devices': ['eth0']})
+    assert get_info.calls == ['eth0', 'eth0']
@@ -4,8 +4,12 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import subprocess
 from unittest import mock
 
+import pytest
+
+from vdsm.network.lldp import TlvReportLldpError
 from vdsm.network.lldpad import lldptool
 
 
@@ -164,7 +168,9 @@ class TestLldpadReport(object):
     ]
 
     @mock.patch.object(
-        lldptool.cmd, 'exec_sync', lambda x: (0, LLDP_CHASSIS_ID_TLV, '')
+        lldptool.cmd,
+        'exec_sync',
+        lambda x, timeout=None: (0, LLDP_CHASSIS_ID_TLV, ''),
     )
     def test_get_single_lldp_tlv(self):
         expected = [self.TLVS_REPORT[0]]
@@ -173,7 +179,7 @@ class TestLldpadReport(object):
     @mock.patch.object(
         lldptool.cmd,
         'exec_sync',
-        lambda x: (0, LLDP_MANAGEMENT_ADDRESS_TLV, ''),
+        lambda x, timeout=None: (0, LLDP_MANAGEMENT_ADDRESS_TLV, ''),
     )
     def test_get_management_address_tlv_without_oid(self):
         expected = [
@@ -191,7 +197,19 @@ class TestLldpadReport(object):
         assert expected == lldptool.get_tlvs('iface0')
 
     @mock.patch.object(
-        lldptool.cmd, 'exec_sync', lambda x: (0, LLDP_MULTIPLE_TLVS, '')
+        lldptool.cmd,
+        'exec_sync',
+        lambda x, timeout=None: (0, LLDP_MULTIPLE_TLVS, ''),
     )
     def test_get_multiple_lldp_tlvs(self):
         assert self.TLVS_REPORT == lldptool.get_tlvs('iface0')
+
+
+class TestLldptoolTimeout(object):
+    def test_get_tlvs_timeout(self):
+        def exec_sync(cmds, timeout=None):
+            raise subprocess.TimeoutExpired(cmds, timeout)
+
+        with mock.patch.object(lldptool.cmd, 'exec_sync', exec_sync):
+            with pytest.raises(TlvReportLldpError):
+                lldptool.get_tlvs('iface0', timeout=1)
@@ -3,6 +3,7 @@
 
 from __future__ import absolute_import
 from __future__ import division
+import errno
 import os
 import io
 from unittest import mock
@@ -14,12 +15,22 @@ from vdsm.network import netinfo
 from vdsm.network.ip.address import prefix2netmask
 from vdsm.network.link import nic
 from vdsm.network.link.bond import Bond, bond_speed
+from vdsm.network.netinfo import cache
 from vdsm.network.netinfo.cache import get
 
 from vdsm.network import nmstate
 from vdsm.network.nmstate import api
 
 
+@pytest.fixture(autouse=True)
+def netinfo_model(monkeypatch):
+    # Build the report from scratch in every test, without monitoring events.
+    model = cache._Model()
+    monkeypatch.setattr(model, 'start', lambda: None)
+    monkeypatch.setattr(cache, '_model', model)
+    return model
+
+
 @pytest.fixture
 def current_state_mock():
     with mock.patch.object(api, 'state_show') as state:
@@ -341,3 +352,181 @@ class TestNetinfo(object):
         assert expected == netinfo.bonding.parse_bond_options(
             'mode=4 miimon=100'
         )
+
+
+class Readers(object):
+    def __init__(self, monkeypatch):
+        self.calls = []
+        for name in ('getIpAddrs', 'get_routes'):
+            monkeypatch.setattr(cache, name, self._reader(name))
+        monkeypatch.setattr(
+            cache.nmstate, 'get_current_state', self._reader('state')
+        )
+
+    def _reader(self, name):
+        def read():
+            self.calls.append(name)
+            return name
+
+        return read
+
+
+def _link(name, index, link_type, master=None):
+    return ipwrapper.Link(
+        address='',
+        index=index,
+        linkType=link_type,
+        mtu=1500,
+        name=name,
+        qdisc='',
+        state='up',
+        master=master,
+    )
+
+
+class FakeLinks(object):
+    def __init__(self, monkeypatch, links):
+        self.links = {link.name: link for link in links}
+        self.device_info = []
+        monkeypatch.setattr(ipwrapper, 'getLinks', self.getLinks)
+        monkeypatch.setattr(ipwrapper, 'getLink', self.getLink)
+        monkeypatch.setattr(cache, '_device_info', self._device_info)
+
+    def getLinks(self):
+        return list(self.links.values())
+
+    def getLink(self, name):
+        try:
+            return self.links[name]
+        except KeyError:
+            raise IOError(errno.ENODEV, 'No such device')
+
+    def _device_info(self, dev):
+        self.device_info.append(dev.name)
+        if dev.isBOND():
+            slaves = [
+                link.name
+                for link in self.links.values()
+                if link.master == dev.name
+            ]
+            return 'bondings', {'slaves': slaves}
+        return 'nics', {'hwaddr': dev.address}
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def running_model(netinfo_model):
+    # Simulate running events monitor.
+    netinfo_model._running = True
+    return netinfo_model
+
+
+def test_model_cached(monkeypatch, running_model):
+    readers = Readers(monkeypatch)
+    assert running_model.update() == ('getIpAddrs', 'get_routes', 'state')
+    running_model.update()
+    assert readers.calls == ['getIpAddrs', 'get_routes', 'state']
+
+
+@pytest.mark.parametrize(
+    'event, refreshed',
+    [
+        ({'event': 'new_addr'}, ['getIpAddrs', 'state']),
+        ({'event': 'del_route'}, ['get_routes']),
+        ({'event': 'new_link', 'name': 'eth0'}, ['state']),
+    ],
+)
+def test_model_event(monkeypatch, running_model, event, refreshed):
+    readers = Readers(monkeypatch)
+    running_model.update()
+    del readers.calls[:]
+
+    running_model._handle_event(event)
+    running_model.update()
+    assert readers.calls == refreshed
+
+
+def test_model_invalidate(monkeypatch, running_model):
+    readers = Readers(monkeypatch)
+    running_model.update()
+    del readers.calls[:]
+
+    cache.invalidate()
+    running_model.update()
+    assert readers.calls == ['getIpAddrs', 'get_routes', 'state']
+
+
+def test_model_state_expires(monkeypatch, running_model):
+    clock = FakeClock()
+    monkeypatch.setattr(running_model, '_clock', clock)
+    readers = Readers(monkeypatch)
+    running_model.update()
+    del readers.calls[:]
+
+    clock.now += cache.STATE_TTL - 1
+    running_model.update()
+    assert readers.calls == []
+
+    # DNS changes do not trigger events, so the state is read again.
+    clock.now += 1
+    running_model.update()
+    assert readers.calls == ['state']
+
+
+def test_model_not_running(monkeypatch, netinfo_model):
+    readers = Readers(monkeypatch)
+    netinfo_model.update()
+    netinfo_model.update()
+    assert len(readers.calls) == 6
+
+
+def test_model_devices(monkeypatch, running_model):
+    links = FakeLinks(
+        monkeypatch,
+        [
+            _link('eth0', 1, 'nic', master='bond0'),
+            _link('eth1', 2, 'nic', master='bond0'),
+            _link('eth2', 3, 'nic'),
+            _link('bond0', 4, 'bond'),
+        ],
+    )
+    devices = dict((dev.name, info) for dev, info in running_model.devices())
+    assert devices['bond0'] == ('bondings', {'slaves': ['eth0', 'eth1']})
+    assert sorted(links.device_info) == ['bond0', 'eth0', 'eth1', 'eth2']
+
+    # Nothing changed.
+    del links.device_info[:]
+    running_model.devices()
+    assert links.device_info == []
+
+    # Slave removed from bond.
+    links.links['eth1'] = _link('eth1', 2, 'nic')
+    running_model._handle_event({'event': 'new_link', 'name': 'eth1'})
+    devices = dict((dev.name, info) for dev, info in running_model.devices())
+    assert devices['bond0'] == ('bondings', {'slaves': ['eth0']})
+    assert sorted(links.device_info) == ['bond0', 'eth1']
+
+    # Link removed.
+    del links.device_info[:]
+    del links.links['eth2']
+    running_model._handle_event({'event': 'del_link', 'name': 'eth2'})
+    devices = dict((dev.name, info) for dev, info in running_model.devices())
+    assert 'eth2' not in devices
+    assert links.device_info == []
+
+
+def test_model_link_renamed(monkeypatch, running_model):
+    links = FakeLinks(monkeypatch, [_link('eth0', 1, 'nic')])
+    running_model.devices()
+
+    del links.links['eth0']
+    links.links['lan0'] = _link('lan0', 1, 'nic')
+    running_model._handle_event({'event': 'new_link', 'name': 'lan0'})
+    assert [dev.name for dev, _ in running_model.devices()] == ['lan0']
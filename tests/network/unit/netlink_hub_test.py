@@ -0,0 +1,125 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import sys
+import threading
+
+import pytest
+
+from vdsm.network.netlink import hub
+from vdsm.network.netlink import monitor
+
+EVENTS = [
+    {'event': 'new_link', 'name': 'eth0'},
+    {'event': 'new_addr', 'label': 'eth0', 'address': '192.0.2.1/24'},
+    {'event': 'new_link', 'name': 'eth1'},
+    {'event': 'del_link', 'name': 'eth1'},
+]
+
+
+def _subscription(names=None, types=None, maxsize=hub.DEFAULT_MAXSIZE):
+    return hub.Subscription(hub._OBJECT, (), names, types, maxsize)
+
+
+class TestSubscription(object):
+    def test_batch_shared(self):
+        sub = _subscription()
+        sub._put(EVENTS)
+        batch = sub.get_batch(0)
+        assert batch is EVENTS
+
+    def test_filter_by_name(self):
+        sub = _subscription(names=('eth0',))
+        sub._put(EVENTS)
+        assert sub.get_batch(0) == EVENTS[:2]
+
+    def test_filter_by_type(self):
+        sub = _subscription(types=('new_link',))
+        sub._put(EVENTS)
+        assert sub.get_batch(0) == [EVENTS[0], EVENTS[2]]
+
+    def test_filtered_out_batch(self):
+        sub = _subscription(names=('eth2',))
+        sub._put(EVENTS)
+        assert sub.get_batch(0) == []
+
+    def test_overflow(self):
+        sub = _subscription(maxsize=5)
+        sub._put(EVENTS)
+        sub._put(EVENTS[:1])
+        sub._put(EVENTS)
+        assert sub.get_batch(0) == [{'event': hub.OVERFLOW, 'dropped': 9}]
+        assert sub.dropped == 9
+
+        sub._put(EVENTS)
+        assert sub.get_batch(0) is EVENTS
+
+    def test_events_after_overflow(self):
+        sub = _subscription(maxsize=4)
+        sub._put(EVENTS)
+        sub._put_overflow()
+        sub._put(EVENTS)
+        assert sub.get_batch(0) == [{'event': hub.OVERFLOW, 'dropped': 4}]
+        assert sub.get_batch(0) is EVENTS
+
+    def test_iteration_ends_when_closed(self):
+        sub = _subscription()
+        sub._put(EVENTS)
+        received = []
+
+        def consume():
+            for event in sub:
+                received.append(event)
+                if len(received) == len(EVENTS):
+                    sub.close()
+
+        t = threading.Thread(target=consume)
+        t.start()
+        t.join(5)
+        assert not t.is_alive()
+        assert received == EVENTS
+
+    def test_reader_error(self):
+        sub = _subscription()
+        sub._put(EVENTS)
+        try:
+            raise IOError('reader failed')
+        except IOError:
+            sub._put_error(sys.exc_info())
+        assert sub.get_batch(0) is EVENTS
+        with pytest.raises(monitor.MonitorError):
+            sub.get_batch(0)
+
+
+class TestReader(object):
+    def test_dispatch(self):
+        reader = hub._Reader(hub._OBJECT, frozenset(['link']))
+        all_events = _subscription()
+        eth1 = _subscription(names=('eth1',))
+        reader.add(all_events)
+        reader.add(eth1)
+        for event in EVENTS:
+            reader.put(monitor.Event(monitor.EventType.DATA, event))
+        reader._overrun = True
+        reader._dispatch()
+
+        overflow = {'event': hub.OVERFLOW, 'dropped': 0}
+        assert all_events.get_batch(0) == [overflow]
+        assert all_events.get_batch(0) == EVENTS
+        assert eth1.get_batch(0) == [overflow]
+        assert eth1.get_batch(0) == EVENTS[2:]
+
+    def test_stopping_reader_replaced(self, monkeypatch):
+        monkeypatch.setattr(hub, '_readers', {})
+        key = (hub._OBJECT, frozenset(['link']))
+        reader = hub._attach(_subscription(), key)
+        reader._stopping = True
+        assert hub._attach(_subscription(), key) is not reader
+
+
+def test_invalid_groups():
+    with pytest.raises(AttributeError):
+        hub.object_subscription(groups=('no-such-group',))
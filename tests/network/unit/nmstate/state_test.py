@@ -0,0 +1,125 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import copy
+
+from vdsm.network import nmstate
+from vdsm.network.nmstate.state import CurrentState
+
+from .testlib import (
+    IFACE0,
+    IFACE1,
+    IPv4_ADDRESS1,
+    IPv4_PREFIX1,
+    MAC_ADDRESS,
+    MTU_2000,
+    VLAN101,
+    VLAN102,
+    create_ethernet_iface_state,
+    create_ipv4_state,
+    create_vlan_iface_state,
+)
+
+
+def _current_state(*ifstates):
+    return CurrentState(
+        {
+            nmstate.Interface.KEY: list(ifstates),
+            nmstate.DNS.KEY: {},
+            nmstate.Route.KEY: {},
+            nmstate.RouteRule.KEY: {},
+        }
+    )
+
+
+def _current_ifstate(ifstate):
+    current = copy.deepcopy(ifstate)
+    current[nmstate.Interface.MAC] = MAC_ADDRESS
+    return current
+
+
+def _vlan_with_ip(vlan):
+    ifstate = create_vlan_iface_state(IFACE0, vlan)
+    ifstate.update(create_ipv4_state(IPv4_ADDRESS1, IPv4_PREFIX1))
+    return ifstate
+
+
+def test_minimize_unchanged_interfaces():
+    vlan101 = _vlan_with_ip(VLAN101)
+    vlan102 = create_vlan_iface_state(IFACE0, VLAN102)
+    current_state = _current_state(
+        _current_ifstate(vlan101), _current_ifstate(vlan102)
+    )
+    desired_state = {nmstate.Interface.KEY: [vlan101, vlan102]}
+
+    assert nmstate.minimize_state(desired_state, current_state) == {}
+
+
+def test_minimize_keeps_changed_interfaces():
+    vlan101 = _vlan_with_ip(VLAN101)
+    vlan102 = create_vlan_iface_state(IFACE0, VLAN102)
+    current_state = _current_state(
+        _current_ifstate(vlan101),
+        _current_ifstate(create_vlan_iface_state(IFACE0, VLAN102)),
+    )
+    vlan102[nmstate.Interface.MTU] = MTU_2000
+    desired_state = {nmstate.Interface.KEY: [vlan101, vlan102]}
+
+    assert nmstate.minimize_state(desired_state, current_state) == {
+        nmstate.Interface.KEY: [vlan102]
+    }
+
+
+def test_minimize_keeps_new_interfaces():
+    vlan101 = _vlan_with_ip(VLAN101)
+    desired_state = {nmstate.Interface.KEY: [vlan101]}
+    assert nmstate.minimize_state(desired_state, _current_state()) == (
+        desired_state
+    )
+
+
+def test_minimize_keeps_changed_address_list():
+    vlan101 = _vlan_with_ip(VLAN101)
+    current = _current_ifstate(vlan101)
+    current[nmstate.Interface.IPV4][nmstate.InterfaceIP.ADDRESS].append(
+        {
+            nmstate.InterfaceIP.ADDRESS_IP: '192.0.2.2',
+            nmstate.InterfaceIP.ADDRESS_PREFIX_LENGTH: IPv4_PREFIX1,
+        }
+    )
+    desired_state = {nmstate.Interface.KEY: [vlan101]}
+    current_state = _current_state(current)
+
+    assert nmstate.minimize_state(desired_state, current_state) == (
+        desired_state
+    )
+
+
+def test_minimize_absent_interfaces():
+    absent = {
+        nmstate.Interface.NAME: IFACE0 + '.' + str(VLAN101),
+        nmstate.Interface.STATE: nmstate.InterfaceState.ABSENT,
+    }
+    removed = {
+        nmstate.Interface.NAME: IFACE1 + '.' + str(VLAN101),
+        nmstate.Interface.STATE: nmstate.InterfaceState.ABSENT,
+    }
+    current_state = _current_state(
+        _current_ifstate(create_vlan_iface_state(IFACE1, VLAN101))
+    )
+    desired_state = {nmstate.Interface.KEY: [absent, removed]}
+
+    assert nmstate.minimize_state(desired_state, current_state) == {
+        nmstate.Interface.KEY: [removed]
+    }
+
+
+def test_minimize_keeps_other_state():
+    eth0 = create_ethernet_iface_state(IFACE0)
+    dns = {nmstate.DNS.CONFIG: {nmstate.DNS.SERVER: ['192.0.2.53']}}
+    current_state = _current_state(_current_ifstate(eth0))
+    desired_state = {nmstate.Interface.KEY: [eth0], nmstate.DNS.KEY: dns}
+
+    assert nmstate.minimize_state(desired_state, current_state) == {
+        nmstate.DNS.KEY: dns
+    }
@@ -0,0 +1,258 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import binascii
+import errno
+import struct
+
+import pytest
+
+from vdsm.network import tc
+from vdsm.network.tc import _netlink
+from vdsm.network.tc import cls
+from vdsm.network.tc import filter as tc_filter
+from vdsm.network.tc import qdisc
+
+IFINDEX = 6
+
+# tcmsg and attributes sent by tc for the same requests, on a device with
+# ifindex 6.
+TC_HFSC_QDISC_ADD = (
+    '000000000600000000008913ffffffff00000000090001006866736300000000'
+    '0600020088130000'
+)
+TC_HFSC_CLASS_ADD = (
+    '00000000060000000a008913000089130000000009000100686673630000000034'
+    '000200100001000000000000000000c80000001000020064000000500000009001'
+    '0000100003000000000000000000e8030000'
+)
+TC_U32_FILTER_REPLACE = (
+    '0000000006000000000000000000891300038813080001007533320030000200'
+    '0800010088130000240005000100010000000000000000000000000000000000'
+    '000000000000000000000000'
+)
+TC_BASIC_FILTER_REPLACE = (
+    '0000000006000000000000000000891300030a000a000100626173696300000044'
+    '0002003800020008000100010000002c0002002800010000000400000000000c00'
+    '01002e100000001000000800020000000000080003000a000000080001000a0089'
+    '13'
+)
+TC_FILTER_DELETE = '0000000006000000000000000000891300000a00'
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    sent = []
+    monkeypatch.setattr(_netlink, '_execute', sent.extend)
+    monkeypatch.setattr(
+        _netlink, 'ifindex_of', lambda dev, command=(): IFINDEX
+    )
+    return sent
+
+
+def _payload(request):
+    return request.encode(1)[16:]
+
+
+def _dumped(request):
+    """Returns the request as a message dumped by the kernel"""
+    msg = _netlink._parse_tcmsg(_payload(request), IFINDEX)
+    return msg._replace(dev='dev0')
+
+
+class TestRequests(object):
+    def test_hfsc_qdisc_add(self, requests):
+        qdisc.add('dev0', 'hfsc', handle='0x1389:', default='0x1388')
+        (request,) = requests
+        assert request.msg_type == _netlink.RTM_NEWQDISC
+        assert request.flags == _netlink.NLM_F_CREATE | _netlink.NLM_F_EXCL
+        assert _payload(request) == binascii.unhexlify(TC_HFSC_QDISC_ADD)
+
+    def test_hfsc_class_add(self, requests):
+        cls.add(
+            'dev0',
+            'hfsc',
+            '1389:',
+            '1389:a',
+            ls={'m1': 100, 'd': 10, 'm2': 400},
+            ul={'m2': 8000},
+            rt={'m2': 1600},
+        )
+        (request,) = requests
+        assert _payload(request) == binascii.unhexlify(TC_HFSC_CLASS_ADD)
+
+    def test_u32_filter_replace(self, requests):
+        tc_filter.replace(
+            'dev0',
+            parent='1389:',
+            protocol='all',
+            pref=5000,
+            u32=['match', 'u8', '0', '0', 'flowid', '0x1388'],
+        )
+        (request,) = requests
+        assert _payload(request) == binascii.unhexlify(TC_U32_FILTER_REPLACE)
+
+    def test_basic_filter_replace(self, requests):
+        tc_filter.replace(
+            'dev0',
+            parent='1389:',
+            protocol='all',
+            pref=10,
+            basic=['match', 'meta(vlan eq 10)', 'flowid', '1389:a'],
+        )
+        (request,) = requests
+        assert _payload(request) == binascii.unhexlify(TC_BASIC_FILTER_REPLACE)
+
+    def test_filter_delete(self, requests):
+        tc_filter.delete('dev0', 10, parent='1389:')
+        (request,) = requests
+        assert request.msg_type == _netlink.RTM_DELTFILTER
+        assert _payload(request) == binascii.unhexlify(TC_FILTER_DELETE)
+
+    def test_unsupported_filter(self, requests):
+        with pytest.raises(ValueError):
+            tc_filter.replace('dev0', fw=['classid', '1:1'])
+        assert requests == []
+
+
+class TestDecoding(object):
+    def test_fq_codel_qdisc(self, requests):
+        qdisc.add(
+            'dev0',
+            'fq_codel',
+            parent='1389:a',
+            handle='a:',
+            limit='10240p',
+            flows='1024',
+            quantum='1514',
+            target='5ms',
+            interval='100ms',
+            ecn='1',
+        )
+        msg = _dumped(requests[0])
+        assert qdisc._decoders['fq_codel'](
+            msg.attrs[_netlink.TCA_OPTIONS]
+        ) == {
+            'limit': 10240,
+            'flows': 1024,
+            'quantum': 1514,
+            'target': 5000,
+            'interval': 100000,
+            'ecn': True,
+        }
+
+    def test_hfsc_class(self, requests):
+        qos = {'ls': {'m1': 100, 'd': 10, 'm2': 400}, 'ul': {'m2': 8000}}
+        cls.add('dev0', 'hfsc', '1389:', '1389:a', **qos)
+        msg = _dumped(requests[0])
+        decoded = cls._decoders['hfsc'](msg.attrs[_netlink.TCA_OPTIONS])
+        assert cls._adapt_qos_options_link_share_for_reporting(
+            {'hfsc': decoded}
+        ) == {'hfsc': {'ls': qos['ls'], 'ul': {'m1': 0, 'd': 0, 'm2': 8000}}}
+
+    def test_u32_filter(self, requests):
+        tc_filter.replace(
+            'dev0',
+            parent='ffff:',
+            protocol='ip',
+            pref=49152,
+            handle='800::800',
+            u32=['match', 'u16', '0x800', '0xffff', 'at', '12'],
+            actions=[['action', 'mirred', 'egress', 'mirror', 'dev', 'lo']],
+        )
+        msg = _dumped(requests[0])
+        u32 = tc_filter._decode_u32(msg)
+        assert u32['fh'] == '800::800'
+        assert u32['order'] == 0x800
+        assert u32['match'] == {
+            'value': 0x08000000,
+            'mask': 0xFFFF0000,
+            'offset': 12,
+        }
+        (action,) = u32['actions']
+        assert action['kind'] == 'mirred'
+        assert action['action'] == 'egress_mirror'
+        assert action['op'] == 'pipe'
+
+    def test_basic_filter(self, requests):
+        tc_filter.replace(
+            'dev0',
+            parent='1389:',
+            protocol='all',
+            pref=168,
+            handle='0x1',
+            basic=['match', 'meta(vlan eq 168)', 'flowid', '1389:a8'],
+        )
+        assert tc_filter._decode_basic(_dumped(requests[0])) == {
+            'flowid': '1389:a8',
+            'handle': '0x1',
+            'mask': 0,
+            'module': 'meta',
+            'object': 'vlan',
+            'relation': 'eq',
+            'value': 168,
+        }
+
+
+class TestBatch(object):
+    def test_requests_sent_together(self, monkeypatch, requests):
+        executed = []
+        monkeypatch.setattr(_netlink, '_execute', executed.append)
+        with tc.batch():
+            qdisc.add('dev0', 'ingress')
+            with tc.batch():
+                tc_filter.delete('dev0', 10)
+            assert executed == []
+        assert len(executed) == 1
+        assert [r.msg_type for r in executed[0]] == [
+            _netlink.RTM_NEWQDISC,
+            _netlink.RTM_DELTFILTER,
+        ]
+
+    def test_requests_dropped_on_error(self, monkeypatch, requests):
+        executed = []
+        monkeypatch.setattr(_netlink, '_execute', executed.append)
+        with pytest.raises(RuntimeError):
+            with tc.batch():
+                qdisc.add('dev0', 'ingress')
+                raise RuntimeError()
+        assert executed == []
+        qdisc.add('dev0', 'ingress')
+        assert len(executed) == 1
+
+
+class TestErrors(object):
+    def test_extended_ack_message(self):
+        message = b'Exclusivity flag on, cannot modify\0'
+        tlv = struct.pack('=HH', 4 + len(message), 1) + message
+        payload = (
+            struct.pack('=i', -errno.EEXIST)
+            + struct.pack('=IHHII', 16, 36, 0, 1, 0)
+            + tlv
+        )
+        flags = _netlink.NLM_F_CAPPED | _netlink.NLM_F_ACK_TLVS
+        assert _netlink._parse_error(flags, payload) == (
+            errno.EEXIST,
+            'Exclusivity flag on, cannot modify',
+        )
+
+    def test_ack(self):
+        assert _netlink._parse_error(0, struct.pack('=i', 0)) == (0, None)
+
+
+@pytest.mark.parametrize(
+    'handle, value',
+    [
+        ('root', _netlink.TC_H_ROOT),
+        ('ffff:fff1', _netlink.TC_H_INGRESS),
+        ('1389:', 0x13890000),
+        ('1389:a8', 0x138900A8),
+        (':a8', 0xA8),
+    ],
+)
+def test_handle(handle, value):
+    assert _netlink.parse_handle(handle) == value
+    assert _netlink.format_handle(value) == handle
@@ -0,0 +1,189 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import threading
+
+import pytest
+
+from vdsm.common import exception
+from vdsm.common.units import MiB
+from vdsm.storage import copyscheduler
+
+
+class FakeOperation(object):
+
+    def __init__(self):
+        self.progress = 0.0
+        self.throughput = None
+        self.eta = None
+        self.stalled = False
+        self.elapsed = None
+        self.aborted = False
+
+    def run(self):
+        self.progress = 100.0
+        self.elapsed = 2.0
+        self.throughput = 50 * MiB
+        self.eta = 0
+
+    def abort(self):
+        self.aborted = True
+
+
+def test_no_limits():
+    s = copyscheduler.CopyScheduler()
+    with s.copy(("sd-1", "sd-2"), copyscheduler.FILE, copyscheduler.FILE):
+        with s.copy(("sd-1", "sd-2"), copyscheduler.FILE, copyscheduler.FILE):
+            assert s.info() == {
+                "running": 2,
+                "waiting": 0,
+                "domains": {"sd-1": 2, "sd-2": 2},
+            }
+    assert s.info() == {"running": 0, "waiting": 0, "domains": {}}
+
+
+def test_ignore_none_domains():
+    s = copyscheduler.CopyScheduler(max_domain_copies=1)
+    copy = s.copy(("sd-1", None), copyscheduler.NETWORK, copyscheduler.FILE)
+    assert copy.domains == frozenset(["sd-1"])
+    with copy:
+        assert s.info()["domains"] == {"sd-1": 1}
+
+
+def test_rate_limit():
+    s = copyscheduler.CopyScheduler(
+        max_domain_copies=4, domain_bandwidth=400 * MiB)
+    with s.copy(("sd-1",), copyscheduler.FILE, copyscheduler.FILE) as copy:
+        assert copy.rate_limit == 100 * MiB
+
+
+def test_no_rate_limit():
+    s = copyscheduler.CopyScheduler(max_domain_copies=4)
+    with s.copy(("sd-1",), copyscheduler.FILE, copyscheduler.FILE) as copy:
+        assert copy.rate_limit is None
+
+
+def test_bandwidth_requires_domain_limit():
+    with pytest.raises(ValueError):
+        copyscheduler.CopyScheduler(domain_bandwidth=400 * MiB)
+
+
+@pytest.mark.parametrize("src_type,dst_type,coroutines", [
+    (copyscheduler.BLOCK, copyscheduler.BLOCK, 16),
+    (copyscheduler.BLOCK, copyscheduler.FILE, 8),
+    (copyscheduler.NETWORK, copyscheduler.BLOCK, 4),
+])
+def test_coroutines(src_type, dst_type, coroutines):
+    s = copyscheduler.CopyScheduler(coroutines={
+        copyscheduler.BLOCK: 16,
+        copyscheduler.FILE: 8,
+        copyscheduler.NETWORK: 4,
+    })
+    with s.copy(("sd-1",), src_type, dst_type) as copy:
+        assert copy.coroutines == coroutines
+
+
+def test_coroutines_default():
+    s = copyscheduler.CopyScheduler(coroutines={copyscheduler.BLOCK: 0})
+    with s.copy(("sd-1",), copyscheduler.BLOCK, copyscheduler.FILE) as copy:
+        assert copy.coroutines is None
+
+
+@pytest.mark.parametrize("limits,domains", [
+    ({"max_copies": 1}, ("sd-2",)),
+    ({"max_domain_copies": 1}, ("sd-1",)),
+])
+def test_wait_for_running_copy(limits, domains):
+    s = copyscheduler.CopyScheduler(**limits)
+    admitted = threading.Event()
+
+    def run():
+        with s.copy(domains, copyscheduler.FILE, copyscheduler.FILE):
+            admitted.set()
+
+    with s.copy(("sd-1",), copyscheduler.FILE, copyscheduler.FILE):
+        t = threading.Thread(target=run)
+        t.start()
+        assert not admitted.wait(0.2)
+        assert s.info()["waiting"] == 1
+
+    t.join()
+    assert admitted.is_set()
+
+    assert s.info() == {"running": 0, "waiting": 0, "domains": {}}
+
+
+def test_other_domain_not_blocked():
+    s = copyscheduler.CopyScheduler(max_domain_copies=1)
+    with s.copy(("sd-1",), copyscheduler.FILE, copyscheduler.FILE):
+        with s.copy(("sd-2",), copyscheduler.FILE, copyscheduler.FILE):
+            assert s.info()["running"] == 2
+
+
+def test_cancel_waiting_copy():
+    s = copyscheduler.CopyScheduler(max_copies=1)
+    copy = s.copy(("sd-1",), copyscheduler.FILE, copyscheduler.FILE)
+    result = []
+
+    def run():
+        try:
+            with copy:
+                result.append("admitted")
+        except exception.ActionStopped:
+            result.append("cancelled")
+
+    with s.copy(("sd-2",), copyscheduler.FILE, copyscheduler.FILE):
+        t = threading.Thread(target=run)
+        t.start()
+        try:
+            copy.cancel()
+        finally:
+            t.join()
+
+    assert result == ["cancelled"]
+    assert s.info() == {"running": 0, "waiting": 0, "domains": {}}
+
+
+def test_cancel_before_run():
+    s = copyscheduler.CopyScheduler()
+    operation = FakeOperation()
+    with s.copy(("sd-1",), copyscheduler.FILE, copyscheduler.FILE) as copy:
+        copy.cancel()
+        with pytest.raises(exception.ActionStopped):
+            copy.run(operation)
+    assert operation.progress == 0.0
+    assert s.info()["running"] == 0
+
+
+def test_cancel_running_copy():
+    s = copyscheduler.CopyScheduler()
+    operation = FakeOperation()
+    with s.copy(("sd-1",), copyscheduler.FILE, copyscheduler.FILE) as copy:
+        copy.run(operation)
+        copy.cancel()
+    assert operation.aborted
+
+
+def test_progress():
+    s = copyscheduler.CopyScheduler()
+    operation = FakeOperation()
+    with s.copy(("sd-1",), copyscheduler.FILE, copyscheduler.FILE) as copy:
+        assert copy.progress is None
+        copy.run(operation)
+        assert copy.progress == 100.0
+
+
+def test_telemetry():
+    s = copyscheduler.CopyScheduler()
+    operation = FakeOperation()
+    with s.copy(("sd-1",), copyscheduler.FILE, copyscheduler.FILE) as copy:
+        assert copy.throughput is None
+        assert copy.eta is None
+        assert copy.stalled is None
+        copy.run(operation)
+        assert copy.throughput == 50 * MiB
+        assert copy.eta == 0
+        assert copy.stalled is False
@@ -0,0 +1,291 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import glob
+import os
+import uuid
+
+import pytest
+
+from vdsm.storage import fileindex
+from vdsm.storage import outOfProcess as oop
+
+SD_ID = str(uuid.uuid4())
+
+
+class CountingGlob(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def glob(self, pattern):
+        self.calls += 1
+        return glob.glob(pattern)
+
+
+class CountingOS(object):
+
+    def __init__(self):
+        self.path = os.path
+        self.calls = 0
+
+    def stat(self, path):
+        self.calls += 1
+        return os.stat(path)
+
+
+class FakeIOP(object):
+
+    def __init__(self):
+        self.os = CountingOS()
+        self.glob = CountingGlob()
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def iop(monkeypatch):
+    iop = FakeIOP()
+    monkeypatch.setattr(oop, "getProcessPool", lambda name: iop)
+    return iop
+
+
+@pytest.fixture
+def images_dir(tmpdir):
+    return str(tmpdir.mkdir("images"))
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def index(images_dir, clock):
+    return fileindex.VolumeIndex(SD_ID, images_dir, check_interval=60,
+                                 clock=clock)
+
+
+def add_volume(images_dir, img_id, vol_id):
+    img_dir = os.path.join(images_dir, img_id)
+    if not os.path.isdir(img_dir):
+        os.mkdir(img_dir)
+    for ext in ("", ".meta", ".lease"):
+        open(os.path.join(img_dir, vol_id + ext), "w").close()
+
+
+def remove_volume(images_dir, img_id, vol_id):
+    img_dir = os.path.join(images_dir, img_id)
+    for ext in ("", ".meta", ".lease"):
+        os.unlink(os.path.join(img_dir, vol_id + ext))
+
+
+def touch(path):
+    # Ensure a new mtime regardless of the file system mtime granularity.
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def keep_mtime(path):
+    st = os.stat(path)
+    return lambda: os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def normalize(volumes):
+    return {img_id: sorted(vol_ids) for img_id, vol_ids in volumes.items()}
+
+
+def test_empty(iop, index):
+    assert index.images() == set()
+    assert index.volumes() == {}
+
+
+def test_volumes(iop, images_dir, index):
+    img1 = str(uuid.uuid4())
+    img2 = str(uuid.uuid4())
+    add_volume(images_dir, img1, "vol-1")
+    add_volume(images_dir, img1, "vol-2")
+    add_volume(images_dir, img2, "vol-3")
+
+    assert index.images() == {img1, img2}
+    assert normalize(index.volumes()) == {
+        img1: ["vol-1", "vol-2"],
+        img2: ["vol-3"],
+    }
+
+
+def test_unchanged(iop, images_dir, index):
+    img1 = str(uuid.uuid4())
+    img2 = str(uuid.uuid4())
+    add_volume(images_dir, img1, "vol-1")
+    add_volume(images_dir, img2, "vol-2")
+    # Directories are trusted after seeing the same mtime twice.
+    index.volumes()
+    index.volumes()
+    globs = iop.glob.calls
+    stats = iop.os.calls
+
+    # Nothing changed, only the images directory is checked.
+    assert normalize(index.volumes()) == {img1: ["vol-1"], img2: ["vol-2"]}
+    assert iop.glob.calls == globs
+    assert iop.os.calls == stats + 1
+
+
+def test_add_image(iop, images_dir, index):
+    img1 = str(uuid.uuid4())
+    add_volume(images_dir, img1, "vol-1")
+    index.volumes()
+    index.volumes()
+
+    img2 = str(uuid.uuid4())
+    add_volume(images_dir, img2, "vol-2")
+    touch(images_dir)
+
+    assert normalize(index.volumes()) == {img1: ["vol-1"], img2: ["vol-2"]}
+
+
+def test_remove_image(iop, images_dir, index):
+    img1 = str(uuid.uuid4())
+    img2 = str(uuid.uuid4())
+    add_volume(images_dir, img1, "vol-1")
+    add_volume(images_dir, img2, "vol-2")
+    index.volumes()
+    index.volumes()
+
+    remove_volume(images_dir, img2, "vol-2")
+    os.rmdir(os.path.join(images_dir, img2))
+    touch(images_dir)
+
+    assert index.images() == {img1}
+    assert normalize(index.volumes()) == {img1: ["vol-1"]}
+
+
+def test_removed_image_volumes(iop, images_dir, index):
+    img = str(uuid.uuid4())
+    removed = "_remove_me_" + str(uuid.uuid4())
+    add_volume(images_dir, img, "vol-1")
+    add_volume(images_dir, removed, "vol-2")
+
+    # Removed images are reported until they are purged.
+    assert index.images() == {img, removed}
+    assert normalize(index.volumes()) == {
+        img: ["vol-1"],
+        removed: ["vol-2"],
+    }
+
+
+def test_invalidate(iop, images_dir, index):
+    img = str(uuid.uuid4())
+    add_volume(images_dir, img, "vol-1")
+    index.volumes()
+    index.volumes()
+
+    # Simulate a change in the same mtime granularity.
+    restore_mtime = keep_mtime(os.path.join(images_dir, img))
+    add_volume(images_dir, img, "vol-2")
+    restore_mtime()
+
+    assert normalize(index.volumes()) == {img: ["vol-1"]}
+
+    index.invalidate(img)
+    assert normalize(index.volumes()) == {img: ["vol-1", "vol-2"]}
+
+
+def test_trusted_after_two_refreshes(iop, images_dir, index):
+    img = str(uuid.uuid4())
+    add_volume(images_dir, img, "vol-1")
+    index.volumes()
+
+    # Image modified after the first listing, in the same mtime granularity.
+    restore_mtime = keep_mtime(os.path.join(images_dir, img))
+    add_volume(images_dir, img, "vol-2")
+    restore_mtime()
+
+    assert normalize(index.volumes()) == {img: ["vol-1", "vol-2"]}
+
+
+def test_changed_by_other_host(iop, images_dir, index, clock):
+    img = str(uuid.uuid4())
+    add_volume(images_dir, img, "vol-1")
+    index.volumes()
+    index.volumes()
+
+    # Image changed by another host, not invalidated.
+    add_volume(images_dir, img, "vol-2")
+    touch(os.path.join(images_dir, img))
+
+    # Detected on the next check of all image directories.
+    clock.now += 59
+    assert normalize(index.volumes()) == {img: ["vol-1"]}
+    clock.now += 1
+    assert normalize(index.volumes()) == {img: ["vol-1", "vol-2"]}
+
+
+def test_image_changed_by_other_host(iop, images_dir, index, clock):
+    img = str(uuid.uuid4())
+    other = str(uuid.uuid4())
+    add_volume(images_dir, img, "vol-1")
+    add_volume(images_dir, other, "vol-2")
+    index.volumes()
+    index.volumes()
+
+    # Both images changed by another host, not invalidated.
+    add_volume(images_dir, img, "vol-3")
+    touch(os.path.join(images_dir, img))
+    add_volume(images_dir, other, "vol-4")
+    touch(os.path.join(images_dir, other))
+
+    # Looking up an image checks only this image directory.
+    assert normalize(index.volumes(img)) == {
+        img: ["vol-1", "vol-3"],
+        other: ["vol-2"],
+    }
+
+    # Other images are detected on the next check of all image directories.
+    clock.now += 60
+    assert normalize(index.volumes()) == {
+        img: ["vol-1", "vol-3"],
+        other: ["vol-2", "vol-4"],
+    }
+
+
+def test_check(iop, images_dir, clock):
+    img = str(uuid.uuid4())
+    add_volume(images_dir, img, "vol-1")
+    index = fileindex.VolumeIndex(SD_ID, images_dir, check=True, clock=clock)
+    index.volumes()
+    index.volumes()
+    before = fileindex.cache_stats()["inconsistencies"]
+
+    restore_mtime = keep_mtime(os.path.join(images_dir, img))
+    add_volume(images_dir, img, "vol-2")
+    restore_mtime()
+
+    # The index missed the change, but check mode returns the scan result.
+    assert normalize(index.volumes()) == {img: ["vol-1", "vol-2"]}
+    assert fileindex.cache_stats()["inconsistencies"] == before + 1
+
+
+def test_stats(iop, images_dir, index):
+    img = str(uuid.uuid4())
+    add_volume(images_dir, img, "vol-1")
+    index.volumes()
+    index.volumes()
+    before = fileindex.cache_stats()
+
+    index.volumes()
+
+    after = fileindex.cache_stats()
+    # Images directory and image directory unchanged.
+    assert after["hits"] == before["hits"] + 2
+    assert after["misses"] == before["misses"]
@@ -31,7 +31,9 @@ class FileStorageDomainManifest(fileSD.FileStorageDomainManifest):
     def __init__(self, domainpath, oop):
         self.mountpoint = os.path.dirname(domainpath)
         self.sdUUID = os.path.basename(domainpath)
+        self.domaindir = domainpath
         self._oop = oop
+        self._volume_index = None
 
     @property
     def oop(self):
@@ -216,6 +218,17 @@ class TestScanDomains(VdsmTestCase):
             self.assertEqual(list(fileSD.scanDomains()),
                              [(nfs_sd.uuid, nfs_sd.dom_dir)])
 
+    def test_find_domain_paths(self):
+        with fake_repo() as repo:
+            sd1 = add_filesd(repo, "server1:/path", str(uuid.uuid4()))
+            sd2 = add_filesd(repo, "server2:/path", str(uuid.uuid4()))
+            sd3 = add_filesd(repo, "server3:/path", str(uuid.uuid4()))
+            mnt_list = [sd1.mountpoint, sd2.mountpoint, sd3.mountpoint]
+            found = fileSD.findDomainPaths(
+                [sd1.uuid, sd3.uuid, str(uuid.uuid4())], mnt_list)
+            self.assertEqual(found, {sd1.uuid: sd1.dom_dir,
+                                     sd3.uuid: sd3.dom_dir})
+
 
 @expandPermutations
 class TestVolumeOperations(VdsmTestCase):
@@ -8,6 +8,7 @@ import pytest
 
 from vdsm.common import cmdutils
 from vdsm.storage import multipath
+from vdsm.storage import uevent
 
 from . marks import requires_root
 
@@ -144,3 +145,110 @@ def test_scsi_id_fails(fake_scsi_id):
 
     scsi_serial = multipath.get_scsi_serial("fake_device")
     assert scsi_serial == ""
+
+
+class FakeMonitor(object):
+
+    def __init__(self, synced=True):
+        self.running = True
+        self.synced = synced
+
+    def sync(self):
+        return self.synced
+
+    def stop(self):
+        self.running = False
+
+
+class Reader(object):
+
+    def __init__(self, cacheable=True):
+        self.cacheable = cacheable
+        self.calls = 0
+
+    def __call__(self, name):
+        self.calls += 1
+        return {"name": name, "call": self.calls}, self.cacheable
+
+
+@pytest.fixture
+def inventory():
+    inventory = multipath.Inventory()
+    inventory._monitor = FakeMonitor()
+    return inventory
+
+
+def test_inventory_cache(inventory):
+    read = Reader()
+    assert inventory.get("sdb", read) == {"name": "sdb", "call": 1}
+    assert inventory.get("sdb", read) == {"name": "sdb", "call": 1}
+    assert inventory.get("sdc", read) == {"name": "sdc", "call": 2}
+
+    stats = inventory.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["devices"] == 2
+
+
+def test_inventory_disabled():
+    inventory = multipath.Inventory()
+    read = Reader()
+    inventory.get("sdb", read)
+    inventory.get("sdb", read)
+    assert read.calls == 2
+    assert not inventory.stats()["enabled"]
+
+
+def test_inventory_not_cacheable(inventory):
+    read = Reader(cacheable=False)
+    inventory.get("sdb", read)
+    inventory.get("sdb", read)
+    assert read.calls == 2
+
+
+@pytest.mark.parametrize("action", ["add", "remove", "change"])
+def test_inventory_event(inventory, action):
+    read = Reader()
+    inventory.get("sdb", read)
+    inventory.get("sdc", read)
+
+    event = uevent.Event(
+        action=action,
+        devpath="/devices/virtual/block/sdb",
+        subsystem="block",
+        env={"DEVNAME": "sdb"})
+    inventory._on_event(event)
+
+    assert inventory.get("sdb", read)["call"] == 3
+    assert inventory.get("sdc", read)["call"] == 2
+
+
+def test_inventory_invalidate_all(inventory):
+    read = Reader()
+    inventory.get("sdb", read)
+    inventory.get("sdc", read)
+    inventory.invalidate()
+    assert inventory.get("sdb", read)["call"] == 3
+    assert inventory.get("sdc", read)["call"] == 4
+
+
+def test_inventory_invalidate_while_reading(inventory):
+    def read(name):
+        # Device changed while we read it.
+        inventory.invalidate(name)
+        return {}, True
+
+    inventory.get("sdb", read)
+    assert inventory.stats()["devices"] == 0
+
+
+def test_inventory_sync_timeout(inventory):
+    read = Reader()
+    inventory.get("sdb", read)
+    inventory._monitor.synced = False
+
+    # Devices are read again, but the cache is kept enabled.
+    assert inventory.sync()
+    assert inventory.enabled
+    assert inventory.get("sdb", read)["call"] == 2
+    assert inventory.get("sdb", read)["call"] == 2
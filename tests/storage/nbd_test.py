@@ -840,8 +840,8 @@ def test_server_socket_mode(nbd_env):
     }
 
     with nbd_server(config) as nbd_url:
-        # Remove "nbd:unix:" from nbd_url.
-        socket = nbd_url[9:]
+        # Remove "nbd:unix:" and ":exportname=..." from nbd_url.
+        socket = nbd_url[9:].split(":exportname=")[0]
 
         actual_mode = stat.S_IMODE(os.stat(socket).st_mode)
         assert oct(actual_mode) == oct(0o660)
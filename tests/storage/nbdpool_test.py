@@ -0,0 +1,320 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Tests for the NBD qemu-storage-daemon pool, using fake daemons.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import errno
+import os
+
+import pytest
+
+from vdsm.storage import constants as sc
+from vdsm.storage import nbd
+from vdsm.storage import qmp
+
+
+class FakeDaemon(object):
+
+    def __init__(self):
+        self.running = True
+        self.nodes = {}
+        self.exports = {}
+        self.fail_export_add = False
+
+    def execute(self, command, arguments):
+        if command == "query-block-exports":
+            return [{"id": export_id, "node-name": node_name,
+                     "type": "nbd", "shutting-down": False}
+                    for export_id, node_name in self.exports.items()]
+
+        if command == "blockdev-add":
+            self.nodes[arguments["node-name"]] = arguments
+            return {}
+
+        if command == "block-export-add":
+            if self.fail_export_add:
+                raise qmp.CommandError(
+                    command, {"class": "GenericError", "desc": "Failed"})
+            self.exports[arguments["id"]] = arguments["node-name"]
+            return {}
+
+        if command == "block-export-del":
+            del self.exports[arguments["id"]]
+            return {}
+
+        if command == "blockdev-del":
+            del self.nodes[arguments["node-name"]]
+            return {}
+
+        if command == "query-blockstats":
+            return [{
+                "node-name": node_name,
+                "stats": {
+                    "rd_bytes": 1024,
+                    "wr_bytes": 2048,
+                    "rd_operations": 1,
+                    "wr_operations": 2,
+                    "flush_operations": 3,
+                    "unmap_bytes": 4096,
+                },
+            } for node_name in self.nodes]
+
+        raise qmp.CommandError(
+            command, {"class": "CommandNotFound", "desc": command})
+
+
+class FakeClient(object):
+
+    daemons = {}
+
+    def __init__(self, path):
+        self.path = path
+        self.daemon = None
+
+    def connect(self):
+        daemon = self.daemons.get(self.path)
+        if daemon is None or not daemon.running:
+            raise OSError(errno.ECONNREFUSED, "Connection refused")
+        self.daemon = daemon
+
+    def execute(self, command, arguments=None):
+        if not self.daemon.running:
+            raise qmp.ProtocolError("Connection closed by server")
+        return self.daemon.execute(command, arguments)
+
+    def close(self):
+        self.daemon = None
+
+
+@pytest.fixture
+def pool_env(tmpdir, monkeypatch):
+    monkeypatch.setattr(nbd, "RUN_DIR", str(tmpdir))
+    monkeypatch.setattr(FakeClient, "daemons", {})
+    monkeypatch.setattr(qmp, "Client", FakeClient)
+
+    started = []
+
+    def start_pool_daemon(index):
+        started.append(index)
+        for path in (nbd._pool_qmp_socket(index),
+                     nbd._pool_nbd_socket(index)):
+            open(path, "w").close()
+        FakeClient.daemons[nbd._pool_qmp_socket(index)] = FakeDaemon()
+
+    monkeypatch.setattr(nbd, "start_pool_daemon", start_pool_daemon)
+
+    class env:
+        pass
+
+    env.started = started
+    env.daemons = FakeClient.daemons
+    env.pool = nbd._Pool(2)
+
+    return env
+
+
+def make_config(**kw):
+    config = dict(
+        format="qcow2",
+        readonly=False,
+        discard=False,
+        detect_zeroes=False,
+        path=os.path.join(sc.REPO_MOUNT_DIR, "server:_path", "volume"),
+        backing_chain=True,
+        is_block=False,
+        bitmap=None)
+    config.update(kw)
+    return nbd.QemuNBDConfig(**config)
+
+
+def daemon(env, index):
+    return env.daemons[nbd._pool_qmp_socket(index)]
+
+
+def test_add_export(pool_env):
+    url = pool_env.pool.add_export("server-1", make_config())
+
+    assert url == "nbd:unix:{}:exportname=server-1".format(
+        nbd._pool_nbd_socket(0))
+
+    # Daemons are started on first use.
+    assert pool_env.started == [0, 1]
+
+    d = daemon(pool_env, 0)
+    node_name = d.exports["server-1"]
+    assert d.nodes[node_name]["file"]["filename"] == make_config().path
+
+
+def test_add_export_balance(pool_env):
+    for i in range(4):
+        pool_env.pool.add_export("server-{}".format(i), make_config())
+
+    assert sorted(daemon(pool_env, 0).exports) == ["server-0", "server-2"]
+    assert sorted(daemon(pool_env, 1).exports) == ["server-1", "server-3"]
+
+
+def test_add_export_exists(pool_env):
+    pool_env.pool.add_export("server-1", make_config())
+    with pytest.raises(nbd.Error):
+        pool_env.pool.add_export("server-1", make_config())
+
+
+def test_add_export_invalid_path(pool_env):
+    config = make_config(path="/outside/repository")
+    with pytest.raises(nbd.InvalidPath):
+        pool_env.pool.add_export("server-1", config)
+    assert pool_env.started == []
+
+
+def test_add_export_failure_removes_node(pool_env):
+    pool_env.pool.add_export("server-1", make_config())
+    daemon(pool_env, 1).fail_export_add = True
+
+    with pytest.raises(qmp.CommandError):
+        pool_env.pool.add_export("server-2", make_config())
+
+    assert daemon(pool_env, 1).nodes == {}
+    assert daemon(pool_env, 1).exports == {}
+
+
+def test_remove_export(pool_env):
+    pool_env.pool.add_export("server-1", make_config())
+    assert pool_env.pool.remove_export("server-1")
+
+    d = daemon(pool_env, 0)
+    assert d.exports == {}
+    assert d.nodes == {}
+
+    # Removing again is handled by the caller.
+    assert not pool_env.pool.remove_export("server-1")
+
+
+def test_remove_export_does_not_start_daemons(pool_env):
+    assert not pool_env.pool.remove_export("server-1")
+    assert pool_env.started == []
+
+
+def test_recover_exports(pool_env):
+    pool_env.pool.add_export("server-1", make_config())
+    pool_env.pool.add_export("server-2", make_config())
+
+    # Simulate vdsm restart while the daemons keep running.
+    pool = nbd._Pool(2)
+
+    assert pool.remove_export("server-2")
+    assert daemon(pool_env, 1).exports == {}
+    assert pool_env.started == [0, 1]
+
+    stats = pool.stats()
+    assert list(stats) == ["server-1"]
+
+
+def test_restart_daemon(pool_env):
+    pool_env.pool.add_export("server-1", make_config())
+    pool_env.pool.add_export("server-2", make_config())
+
+    # Daemon 1 was terminated, its exports are gone.
+    daemon(pool_env, 1).running = False
+
+    with pytest.raises(qmp.ProtocolError):
+        pool_env.pool.remove_export("server-2")
+
+    # The next export restarts the daemon.
+    pool_env.pool.add_export("server-3", make_config())
+    assert pool_env.started == [0, 1, 1]
+    assert list(daemon(pool_env, 1).exports) == ["server-3"]
+
+    assert not pool_env.pool.remove_export("server-2")
+
+
+def test_stats(pool_env):
+    pool_env.pool.add_export("server-1", make_config())
+    assert pool_env.pool.stats() == {
+        "server-1": {
+            "daemon": 0,
+            "read_bytes": 1024,
+            "write_bytes": 2048,
+            "read_ops": 1,
+            "write_ops": 2,
+            "flush_ops": 3,
+            "discard_bytes": 4096,
+        }
+    }
+
+
+def test_disabled():
+    pool = nbd._Pool(0)
+    assert not pool.enabled()
+    assert not pool.remove_export("server-1")
+    assert pool.stats() == {}
+
+
+def test_blockdev_options():
+    config = make_config(format="raw", is_block=True)
+    assert nbd._blockdev_options("node-1", config) == {
+        "node-name": "node-1",
+        "driver": "raw",
+        "read-only": False,
+        "cache": {"direct": True, "no-flush": False},
+        "file": {
+            "driver": "host_device",
+            "filename": config.path,
+            "aio": "native",
+            "cache": {"direct": True, "no-flush": False},
+        },
+    }
+
+
+@pytest.mark.parametrize("discard,detect_zeroes", [
+    (True, "unmap"),
+    (False, "on"),
+])
+def test_blockdev_options_detect_zeroes(discard, detect_zeroes):
+    config = make_config(discard=discard, detect_zeroes=True)
+    options = nbd._blockdev_options("node-1", config)
+    assert options["detect-zeroes"] == detect_zeroes
+    if discard:
+        assert options["discard"] == "unmap"
+        assert options["file"]["discard"] == "unmap"
+    else:
+        assert "discard" not in options
+
+
+def test_blockdev_options_readonly():
+    config = make_config(readonly=True, discard=True, detect_zeroes=True)
+    options = nbd._blockdev_options("node-1", config)
+    assert options["read-only"]
+    assert "discard" not in options
+    assert "detect-zeroes" not in options
+
+
+def test_blockdev_options_no_backing_chain():
+    config = make_config(backing_chain=False)
+    options = nbd._blockdev_options("node-1", config)
+    assert options["backing"] is None
+
+
+def test_export_options():
+    config = make_config(readonly=True, bitmap="bitmap-1")
+    assert nbd._export_options("server-1", "node-1", config) == {
+        "type": "nbd",
+        "id": "server-1",
+        "node-name": "node-1",
+        "name": "server-1",
+        "writable": False,
+        "allocation-depth": True,
+        "bitmaps": ["bitmap-1"],
+    }
+
+
+def test_export_options_raw():
+    config = make_config(format="raw")
+    options = nbd._export_options("server-1", "node-1", config)
+    assert options["writable"]
+    assert "allocation-depth" not in options
+    assert "bitmaps" not in options
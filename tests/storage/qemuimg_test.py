@@ -1035,6 +1035,37 @@ class TestConvertUnorderedWrites:
         qemuio.verify_pattern(dst, qemuimg.FORMAT.RAW, offset=top_offset)
 
 
+class TestConvertTuning:
+
+    @pytest.mark.parametrize("coroutines,rate_limit", [
+        (None, None),
+        (4, None),
+        (None, 100 * MiB),
+        (16, 100 * MiB),
+    ])
+    def test_copy(self, tmpdir, coroutines, rate_limit):
+        src = str(tmpdir.join("src"))
+        dst = str(tmpdir.join("dst"))
+        offset = 4 * 64 * KiB
+
+        op = qemuimg.create(
+            src, size=10 * 64 * KiB, format=qemuimg.FORMAT.QCOW2,
+            qcow2Compat="1.1")
+        op.run()
+        qemuio.write_pattern(src, qemuimg.FORMAT.QCOW2, offset=offset)
+
+        op = qemuimg.convert(
+            src,
+            dst,
+            srcFormat=qemuimg.FORMAT.QCOW2,
+            dstFormat=qemuimg.FORMAT.RAW,
+            coroutines=coroutines,
+            rate_limit=rate_limit)
+        op.run()
+
+        qemuio.verify_pattern(dst, qemuimg.FORMAT.RAW, offset=offset)
+
+
 class TestConvertPreallocation:
 
     @pytest.mark.parametrize("preallocation", [
@@ -1238,6 +1269,113 @@ class TestProgressCommand:
             p._update_progress(out)
         assert p.progress == 42.0
 
+    def test_telemetry_not_started(self):
+        p = qemuimg.ProgressCommand([], size=100 * MiB)
+        assert p.elapsed is None
+        assert p.throughput is None
+        assert p.eta is None
+        assert not p.stalled
+        assert p.info() == {"progress": 0.0, "stalled": False}
+
+    def test_telemetry_running(self):
+        clock = FakeClock()
+        p = qemuimg.ProgressCommand(
+            [], size=100 * MiB, stall_timeout=60, clock=clock)
+        infos = []
+
+        def watch():
+            clock.now += 10
+            yield b"    (25.00/100%)\r"
+            infos.append(p.info())
+            clock.now += 10
+            yield b"    (50.00/100%)\r"
+            infos.append(p.info())
+
+        p._operation = FakeCommand(watch)
+        p.run()
+
+        assert infos == [
+            {"progress": 25.0, "throughput": 25 * MiB // 10, "eta": 30,
+             "stalled": False},
+            {"progress": 50.0, "throughput": 50 * MiB // 20, "eta": 20,
+             "stalled": False},
+        ]
+
+        # Finished operation reports final throughput and no eta.
+        clock.now += 100
+        assert p.elapsed == 20
+        assert p.throughput == 50 * MiB // 20
+        assert p.eta is None
+        assert not p.stalled
+
+    def test_telemetry_unknown_size(self):
+        clock = FakeClock()
+        p = qemuimg.ProgressCommand([], clock=clock)
+        infos = []
+
+        def watch():
+            clock.now += 10
+            yield b"    (25.00/100%)\r"
+            infos.append(p.info())
+
+        p._operation = FakeCommand(watch)
+        p.run()
+
+        assert infos == [{"progress": 25.0, "eta": 30, "stalled": False}]
+
+    def test_stalled(self):
+        clock = FakeClock()
+        p = qemuimg.ProgressCommand([], stall_timeout=60, clock=clock)
+        stalled = []
+
+        def watch():
+            clock.now += 10
+            yield b"    (10.00/100%)\r"
+            clock.now += 59
+            stalled.append(p.stalled)
+            clock.now += 1
+            stalled.append(p.stalled)
+            # Repeated progress does not reset the stall.
+            yield b"    (10.00/100%)\r"
+            stalled.append(p.stalled)
+            yield b"    (11.00/100%)\r"
+            stalled.append(p.stalled)
+
+        p._operation = FakeCommand(watch)
+        p.run()
+
+        assert stalled == [False, True, True, False]
+
+    def test_stall_detection_disabled(self):
+        clock = FakeClock()
+        p = qemuimg.ProgressCommand([], stall_timeout=0, clock=clock)
+        stalled = []
+
+        def watch():
+            clock.now += 3600
+            stalled.append(p.stalled)
+            yield b"    (10.00/100%)\r"
+
+        p._operation = FakeCommand(watch)
+        p.run()
+
+        assert stalled == [False]
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCommand:
+
+    def __init__(self, watch):
+        self.watch = watch
+
 
 class TestCommit:
 
@@ -0,0 +1,156 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import os
+
+import pytest
+
+from vdsm.storage import constants as sc
+from vdsm.storage import qemuimg
+from vdsm.storage import qemuimgcache
+
+
+class FakeQemuImg(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def measure(self, image, **kwargs):
+        self.calls.append(("measure", image, kwargs))
+        return {"required": 393216, "fully-allocated": 1074135040}
+
+
+class FakeVolume(object):
+
+    def __init__(self, voltype, generation):
+        self.voltype = voltype
+        self.generation = generation
+
+    def isLeaf(self):
+        return self.voltype == sc.type2name(sc.LEAF_VOL)
+
+    def getMetaParam(self, key):
+        assert key == sc.GENERATION
+        return self.generation
+
+
+@pytest.fixture
+def fake_qemuimg(monkeypatch):
+    fake = FakeQemuImg()
+    monkeypatch.setattr(qemuimg, "measure", fake.measure)
+    monkeypatch.setattr(qemuimgcache, "_cache", qemuimgcache.Cache(2))
+    return fake
+
+
+@pytest.fixture
+def image(tmpdir):
+    img_dir = tmpdir.mkdir("img")
+    path = str(img_dir.join("vol-1"))
+    with open(path, "wb") as f:
+        f.truncate(1024**2)
+    return path
+
+
+def test_measure_cached(fake_qemuimg, image):
+    kw = dict(format="qcow2", output_format="qcow2")
+    first = qemuimgcache.measure(image, generation=0, **kw)
+    second = qemuimgcache.measure(image, generation=0, **kw)
+    assert first == second
+    assert len(fake_qemuimg.calls) == 1
+
+    # Modifying the result must not modify the cache.
+    first["required"] = 0
+    assert qemuimgcache.measure(image, generation=0, **kw) == second
+
+    assert qemuimgcache.cache_stats()["hits"] == 2
+
+
+def test_measure_different_arguments(fake_qemuimg, image):
+    qemuimgcache.measure(image, generation=0, output_format="qcow2")
+    qemuimgcache.measure(image, generation=0, output_format="raw")
+    assert len(fake_qemuimg.calls) == 2
+
+
+def test_measure_no_generation(fake_qemuimg, image):
+    qemuimgcache.measure(image)
+    qemuimgcache.measure(image)
+    assert len(fake_qemuimg.calls) == 2
+    assert qemuimgcache.cache_stats()["entries"] == 0
+
+
+def test_measure_block_not_cached(fake_qemuimg, image):
+    # Writing to a block device does not change its modification time.
+    qemuimgcache.measure(image, generation=0, is_block=True)
+    qemuimgcache.measure(image, generation=0, is_block=True)
+    assert len(fake_qemuimg.calls) == 2
+    assert qemuimgcache.cache_stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("modify", [
+    # Volume operation completed.
+    lambda path: 1,
+    # Volume extended.
+    lambda path: os.truncate(path, 2 * 1024**2),
+    # Volume modified.
+    lambda path: os.utime(path, ns=(0, 0)),
+])
+def test_key_changed(fake_qemuimg, image, modify):
+    qemuimgcache.measure(image, generation=0)
+    generation = modify(image) or 0
+    qemuimgcache.measure(image, generation=generation)
+    assert len(fake_qemuimg.calls) == 2
+
+
+def test_invalidate_image(fake_qemuimg, image):
+    other = os.path.join(os.path.dirname(image), "vol-2")
+    open(other, "w").close()
+
+    qemuimgcache.measure(image, generation=0)
+    qemuimgcache.measure(other, generation=0)
+
+    # Modifying a volume invalidates the entire image.
+    qemuimgcache.invalidate(other)
+    assert qemuimgcache.cache_stats()["entries"] == 0
+
+    qemuimgcache.measure(image, generation=0)
+    assert len(fake_qemuimg.calls) == 3
+
+
+def test_lru_eviction(fake_qemuimg, tmpdir):
+    paths = []
+    for i in range(3):
+        path = str(tmpdir.join("vol-{}".format(i)))
+        open(path, "w").close()
+        paths.append(path)
+
+    qemuimgcache.measure(paths[0], generation=0)
+    qemuimgcache.measure(paths[1], generation=0)
+
+    # Using paths[0] makes paths[1] the least recently used entry.
+    qemuimgcache.measure(paths[0], generation=0)
+    qemuimgcache.measure(paths[2], generation=0)
+
+    del fake_qemuimg.calls[:]
+    qemuimgcache.measure(paths[0], generation=0)
+    qemuimgcache.measure(paths[1], generation=0)
+    assert fake_qemuimg.calls == [("measure", paths[1], {})]
+
+
+def test_cache_disabled(fake_qemuimg, image, monkeypatch):
+    monkeypatch.setattr(qemuimgcache, "_cache", qemuimgcache.Cache(0))
+    qemuimgcache.measure(image, generation=0)
+    qemuimgcache.measure(image, generation=0)
+    assert len(fake_qemuimg.calls) == 2
+
+
+@pytest.mark.parametrize("voltype,generation", [
+    (sc.type2name(sc.LEAF_VOL), None),
+    (sc.type2name(sc.INTERNAL_VOL), 3),
+    (sc.type2name(sc.SHARED_VOL), 3),
+])
+def test_volume_generation(voltype, generation):
+    vol = FakeVolume(voltype, 3)
+    assert qemuimgcache.volume_generation(vol) == generation
@@ -0,0 +1,159 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import json
+import os
+import socket
+
+import pytest
+
+from vdsm.common import concurrent
+from vdsm.storage import qmp
+
+GREETING = {"QMP": {"version": {}, "capabilities": []}}
+
+
+class FakeServer(object):
+    """
+    Serve a single QMP connection, replying with canned replies.
+    """
+
+    def __init__(self, path, replies, greeting=GREETING):
+        self.path = path
+        self.replies = replies
+        self.greeting = greeting
+        self.received = []
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(path)
+        self._sock.listen(1)
+        self._thread = concurrent.thread(self._serve)
+        self._thread.start()
+
+    def close(self):
+        self._thread.join()
+        self._sock.close()
+
+    def _serve(self):
+        conn, _ = self._sock.accept()
+        with conn, conn.makefile("rwb") as f:
+            self._send(f, self.greeting)
+            for reply in self.replies:
+                line = f.readline()
+                if not line:
+                    break
+                self.received.append(json.loads(line))
+                for msg in reply:
+                    self._send(f, msg)
+
+    def _send(self, f, msg):
+        f.write(json.dumps(msg).encode("utf-8") + b"\n")
+        f.flush()
+
+
+@pytest.fixture
+def qmp_path(tmpdir):
+    return os.path.join(str(tmpdir), "qmp.sock")
+
+
+def test_execute(qmp_path):
+    server = FakeServer(qmp_path, [
+        [{"return": {}}],
+        [{"return": [{"id": "export-1", "node-name": "node-1"}]}],
+    ])
+    try:
+        with qmp.Client(qmp_path) as client:
+            client.connect()
+            res = client.execute("query-block-exports")
+    finally:
+        server.close()
+
+    assert res == [{"id": "export-1", "node-name": "node-1"}]
+    assert server.received == [
+        {"execute": "qmp_capabilities"},
+        {"execute": "query-block-exports"},
+    ]
+
+
+def test_execute_arguments(qmp_path):
+    server = FakeServer(qmp_path, [
+        [{"return": {}}],
+        [{"return": {}}],
+    ])
+    try:
+        with qmp.Client(qmp_path) as client:
+            client.connect()
+            client.execute("blockdev-del", {"node-name": "node-1"})
+    finally:
+        server.close()
+
+    assert server.received[1] == {
+        "execute": "blockdev-del",
+        "arguments": {"node-name": "node-1"},
+    }
+
+
+def test_skip_events(qmp_path):
+    server = FakeServer(qmp_path, [
+        [{"return": {}}],
+        [
+            {"event": "BLOCK_EXPORT_DELETED", "data": {"id": "export-1"}},
+            {"return": {}},
+        ],
+    ])
+    try:
+        with qmp.Client(qmp_path) as client:
+            client.connect()
+            assert client.execute(
+                "block-export-del", {"id": "export-1"}) == {}
+    finally:
+        server.close()
+
+
+def test_command_error(qmp_path):
+    server = FakeServer(qmp_path, [
+        [{"return": {}}],
+        [{"error": {"class": "GenericError", "desc": "Node not found"}}],
+    ])
+    try:
+        with qmp.Client(qmp_path) as client:
+            client.connect()
+            with pytest.raises(qmp.CommandError) as e:
+                client.execute("blockdev-del", {"node-name": "missing"})
+    finally:
+        server.close()
+
+    assert e.value.error_class == "GenericError"
+    assert e.value.desc == "Node not found"
+
+
+def test_invalid_greeting(qmp_path):
+    server = FakeServer(qmp_path, [], greeting={"invalid": {}})
+    try:
+        client = qmp.Client(qmp_path)
+        with pytest.raises(qmp.ProtocolError):
+            client.connect()
+    finally:
+        server.close()
+
+
+def test_connection_closed(qmp_path):
+    server = FakeServer(qmp_path, [
+        [{"return": {}}],
+    ])
+    try:
+        with qmp.Client(qmp_path) as client:
+            client.connect()
+            # Depending on timing, we may fail to send or to receive.
+            with pytest.raises((OSError, qmp.ProtocolError)):
+                client.execute("query-block-exports")
+    finally:
+        server.close()
+
+
+def test_not_running(qmp_path):
+    client = qmp.Client(qmp_path)
+    with pytest.raises(OSError):
+        client.connect()
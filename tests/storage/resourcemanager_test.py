@@ -447,6 +447,50 @@ class TestResourceManager:
         with pytest.raises(KeyError):
             status = rm._getResourceStatus("null", "resource")
 
+    def testStats(self, tmp_manager):
+        exclusive = rm.acquireResource("storage", "resource", rm.EXCLUSIVE)
+        # Keep the reference, or it is released when garbage collected.
+        refs = []
+        req = rm._registerResource(
+            "storage", "resource", rm.SHARED,
+            lambda req, res: refs.append(res))
+        time.sleep(0.1)
+        exclusive.release()
+        assert req.granted()
+        refs[0].release()
+
+        stats = rm.stats()["storage"]
+        assert stats["granted"] == 2
+        assert stats["wait_max"] >= 0.1
+        assert stats["released"] == 1
+        assert stats["hold_max"] >= 0.1
+        assert stats["hold_total"] == stats["hold_max"]
+
+        assert rm.stats()["string"] == {
+            "granted": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+            "released": 0,
+            "hold_total": 0.0,
+            "hold_max": 0.0,
+        }
+
+    def testShards(self, tmp_manager):
+        names = ["resource-%d" % i for i in range(rm.DEFAULT_SHARDS * 4)]
+        resources = [rm.acquireResource("storage", name, rm.EXCLUSIVE)
+                     for name in names]
+        try:
+            namespace = rm._manager._namespaces["storage"]
+            used = [shard for shard in namespace.shards if shard.resources]
+            assert len(used) > 1
+            assert sum(len(shard.resources) for shard in used) == len(names)
+        finally:
+            for res in resources:
+                res.release()
+
+        for name in names:
+            assert rm._getResourceStatus("storage", name) == rm.STATUS_FREE
+
     def testAcquireNonExistingResource(self, tmp_manager):
         with pytest.raises(KeyError):
             rm.acquireResource("null", "resource", rm.EXCLUSIVE)
@@ -0,0 +1,132 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import threading
+
+import pytest
+
+from vdsm.storage import exception as se
+from vdsm.storage import sdc
+
+
+class FakeDomain(object):
+
+    def __init__(self, path):
+        self.path = path
+
+
+def fake_backend(paths, event=None, error=None):
+
+    class Backend(FakeDomain):
+
+        lookups = []
+
+        @staticmethod
+        def findDomainPaths(sdUUIDs):
+            Backend.lookups.append(list(sdUUIDs))
+            if event is not None:
+                event.wait()
+            if error is not None:
+                raise error
+            return {sd_id: paths[sd_id] for sd_id in sdUUIDs
+                    if sd_id in paths}
+
+    return Backend
+
+
+@pytest.fixture
+def hung():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def make_cache(monkeypatch, backends, lookup_timeout=10):
+    cache = sdc.StorageDomainCache(lookup_timeout=lookup_timeout)
+    monkeypatch.setattr(cache, "_backends", lambda: backends)
+    monkeypatch.setattr(cache, "refreshStorage", lambda: None)
+    return cache
+
+
+def test_find_domain(monkeypatch):
+    block = fake_backend({"sd-1": "vg-1"})
+    nfs = fake_backend({"sd-2": "/mnt/server:_path/sd-2"})
+    cache = make_cache(monkeypatch, (("block", block), ("nfs", nfs)))
+
+    dom = cache._findUnfetchedDomain("sd-2")
+    assert isinstance(dom, nfs)
+    assert dom.path == "/mnt/server:_path/sd-2"
+
+
+def test_find_domain_missing(monkeypatch):
+    block = fake_backend({})
+    nfs = fake_backend({})
+    cache = make_cache(monkeypatch, (("block", block), ("nfs", nfs)))
+
+    with pytest.raises(se.StorageDomainDoesNotExist):
+        cache._findUnfetchedDomain("sd-1")
+
+
+def test_find_domain_backend_error(monkeypatch):
+    block = fake_backend({}, error=RuntimeError("lvm failed"))
+    nfs = fake_backend({"sd-1": "/mnt/server:_path/sd-1"})
+    cache = make_cache(monkeypatch, (("block", block), ("nfs", nfs)))
+
+    dom = cache._findUnfetchedDomain("sd-1")
+    assert isinstance(dom, nfs)
+
+
+def test_find_domain_hung_backend(monkeypatch, hung):
+    block = fake_backend({"sd-1": "vg-1"})
+    nfs = fake_backend({}, event=hung)
+    cache = make_cache(monkeypatch, (("nfs", nfs), ("block", block)))
+
+    # The first positive result is returned without waiting for the hung
+    # backend.
+    dom = cache._findUnfetchedDomain("sd-1")
+    assert isinstance(dom, block)
+
+
+def test_find_domain_hung_backend_timeout(monkeypatch, hung):
+    block = fake_backend({})
+    nfs = fake_backend({}, event=hung)
+    cache = make_cache(
+        monkeypatch, (("block", block), ("nfs", nfs)), lookup_timeout=0.2)
+
+    with pytest.raises(se.StorageDomainDoesNotExist):
+        cache._findUnfetchedDomain("sd-1")
+
+
+def test_prefetch(monkeypatch):
+    block = fake_backend({"sd-1": "vg-1", "sd-2": "vg-2"})
+    nfs = fake_backend({"sd-3": "/mnt/server:_path/sd-3"})
+    cache = make_cache(monkeypatch, (("block", block), ("nfs", nfs)))
+
+    cache.prefetch(["sd-1", "sd-2", "sd-3", "sd-4"])
+
+    # Single lookup per backend for all domains.
+    assert block.lookups == [["sd-1", "sd-2", "sd-3", "sd-4"]]
+    assert nfs.lookups == [["sd-1", "sd-2", "sd-3", "sd-4"]]
+
+    # Domains found are cached.
+    assert cache.produce("sd-1").path == "vg-1"
+    assert cache.produce("sd-3").path == "/mnt/server:_path/sd-3"
+    assert len(block.lookups) == 1
+
+    # Missing domains are looked up again when produced.
+    with pytest.raises(se.StorageDomainDoesNotExist):
+        cache.produce("sd-4")
+    assert len(block.lookups) == 2
+
+
+def test_prefetch_cached(monkeypatch):
+    block = fake_backend({"sd-1": "vg-1"})
+    cache = make_cache(monkeypatch, (("block", block),))
+
+    cache.produce("sd-1")
+    cache.prefetch(["sd-1"])
+
+    assert block.lookups == [["sd-1"]]
@@ -112,7 +112,7 @@ class FakeDomainManifest(object):
         pass
 
     @recorded
-    def getAllVolumes(self):
+    def getAllVolumes(self, imgUUID=None):
         pass
 
     @recorded
@@ -719,7 +719,7 @@ class DomainTestMixin(object):
         ['deleteImage', 3],
         ['purgeImage', 4],
         ['getAllImages', 0],
-        ['getAllVolumes', 0],
+        ['getAllVolumes', 1],
         ['getReservedId', 0],
         ['acquireHostId', 2],
         ['releaseHostId', 3],
@@ -4,13 +4,18 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import os
+
 from contextlib import contextmanager
 
 from vdsm.common import concurrent
 from vdsm.storage import outOfProcess as oop
+from vdsm.storage import taskjournal
 from vdsm.storage.task import Job, Recovery, Task, TaskCleanType,\
     TaskPersistType, TaskRecoveryType
 
+from testlib import make_config
+
 from . storagetestlib import Callable
 
 
@@ -65,6 +70,32 @@ def test_task_prepare():
     assert c.is_finished()
 
 
+class FakeOperation(object):
+
+    def info(self):
+        return {"progress": 42.5, "throughput": 1024, "eta": 30,
+                "stalled": False}
+
+
+def test_task_progress_operation():
+    t = Task(id="task-id", name="copyImage")
+    assert t.getInfo() == {"id": "task-id", "verb": "copyImage"}
+
+    with t.progress_operation(FakeOperation()):
+        assert t.getInfo() == {
+            "id": "task-id",
+            "verb": "copyImage",
+            "progress": 42,
+            "throughput": 1024,
+            "eta": 30,
+            "stalled": False,
+        }
+        assert t.getDetails()["progress"] == 42
+
+    assert t.getInfo() == {"id": "task-id", "verb": "copyImage"}
+    assert "progress" not in t.getDetails()
+
+
 def test_task_abort():
     # Run async task
     c = Callable(hang_timeout=WAIT_TIMEOUT)
@@ -217,6 +248,40 @@ def test_task_save_load(tmpdir, add_recovery):
     }
 
 
+def test_task_journal(tmpdir, monkeypatch):
+    monkeypatch.setattr(taskjournal, "config", make_config([
+        ("irs", "task_journal", "true"),
+    ]))
+    monkeypatch.setattr(taskjournal, "_journals", {})
+    store = str(tmpdir)
+
+    t = Task(id="task-id")
+    t.setPersistence(store, cleanPolicy=TaskCleanType.manual)
+
+    # No task directory with the journal.
+    assert os.listdir(store) == []
+
+    def prepare():
+        t.pushRecovery(Recovery("name", "module", "Object", "function",
+                                ["arg1", "arg2"]))
+        return {"uuid": "result"}
+
+    t.prepare(prepare)
+    assert os.listdir(store) == [taskjournal.JOURNAL_NAME]
+
+    # Load task from a replayed journal.
+    journal = taskjournal.Journal(store)
+    loaded = Task.loadSnapshot("task-id", journal.tasks()["task-id"])
+    assert loaded.getState() == "finished"
+    assert loaded.cleanPolicy == TaskCleanType.manual
+    assert [str(r) for r in loaded.recoveries] == [
+        str(r) for r in t.recoveries]
+
+    # Cleaning the task removes it from the journal.
+    t.clean()
+    assert taskjournal.Journal(store).tasks() == {}
+
+
 def test_recovery_list():
     # Check push pop single recovery
     t = Task(id="task-id")
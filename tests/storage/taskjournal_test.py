@@ -0,0 +1,243 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import os
+import threading
+import time
+
+import pytest
+
+from vdsm.storage import exception as se
+from vdsm.storage import taskjournal
+
+from testlib import make_config
+
+
+def snapshot(state):
+    return {"task": {"state": state}, "jobs": [], "recoveries": []}
+
+
+def test_empty(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir))
+    assert journal.tasks() == {}
+    assert not os.path.exists(journal.path)
+
+
+def test_save_replay(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir))
+    journal.save("task-1", snapshot("preparing"))
+    journal.save("task-2", snapshot("preparing"))
+    journal.save("task-1", snapshot("running"))
+
+    assert journal.tasks() == {
+        "task-1": snapshot("running"),
+        "task-2": snapshot("preparing"),
+    }
+
+    replayed = taskjournal.Journal(str(tmpdir))
+    assert replayed.tasks() == journal.tasks()
+
+
+def test_remove(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir))
+    journal.save("task-1", snapshot("running"))
+    journal.save("task-2", snapshot("running"))
+    journal.remove("task-1")
+
+    replayed = taskjournal.Journal(str(tmpdir))
+    assert replayed.tasks() == {"task-2": snapshot("running")}
+
+
+def test_incomplete_record(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir))
+    journal.save("task-1", snapshot("preparing"))
+
+    # Simulate a crash while appending a record.
+    with open(journal.path, "ab") as f:
+        f.write(b'{"op": "save", "id": "task-1", "task": {"ta')
+
+    replayed = taskjournal.Journal(str(tmpdir))
+    assert replayed.tasks() == {"task-1": snapshot("preparing")}
+
+
+def test_save_after_incomplete_record(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir))
+    journal.save("task-1", snapshot("preparing"))
+    with open(journal.path, "ab") as f:
+        f.write(b'{"op": "save", "id": "task-2", "task": {"ta')
+
+    # The incomplete record is truncated, so the next record is not
+    # appended to it.
+    journal = taskjournal.Journal(str(tmpdir))
+    journal.save("task-3", snapshot("running"))
+
+    replayed = taskjournal.Journal(str(tmpdir))
+    assert replayed.tasks() == {
+        "task-1": snapshot("preparing"),
+        "task-3": snapshot("running"),
+    }
+
+
+def test_invalid_record(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir))
+    journal.save("task-1", snapshot("preparing"))
+    with open(journal.path, "ab") as f:
+        f.write(b'{"op": "invalid", "id": "task-1"}\n')
+        f.write(b'garbage\n')
+    journal.save("task-2", snapshot("running"))
+
+    replayed = taskjournal.Journal(str(tmpdir))
+    assert replayed.tasks() == {
+        "task-1": snapshot("preparing"),
+        "task-2": snapshot("running"),
+    }
+
+
+def test_compact(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir), compact_records=10)
+    for i in range(5):
+        journal.save("task-{}".format(i), snapshot("running"))
+    for i in range(10):
+        journal.save("task-0", snapshot("running-{}".format(i)))
+    for i in range(1, 5):
+        journal.remove("task-{}".format(i))
+
+    with open(journal.path, "rb") as f:
+        records = f.read().splitlines()
+    assert len(records) <= 10
+
+    replayed = taskjournal.Journal(str(tmpdir))
+    assert replayed.tasks() == {"task-0": snapshot("running-9")}
+    assert not os.path.exists(journal.path + taskjournal.TEMP_EXT)
+
+
+def test_concurrent_save(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir))
+    errors = []
+
+    def save(n):
+        try:
+            for i in range(20):
+                journal.save("task-{}".format(n), snapshot(str(i)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    expected = {"task-{}".format(n): snapshot("19") for n in range(8)}
+    assert journal.tasks() == expected
+    assert taskjournal.Journal(str(tmpdir)).tasks() == expected
+
+
+def test_leader_writes_one_batch(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir))
+    writing = threading.Event()
+    resume = threading.Event()
+    writes = []
+    write = journal._write
+
+    def blocking_write(records):
+        writes.append((threading.current_thread().name, len(records)))
+        if len(writes) == 1:
+            writing.set()
+            resume.wait(5)
+        write(records)
+
+    journal._write = blocking_write
+
+    first = threading.Thread(
+        target=journal.save, args=("task-1", snapshot("1")), name="first")
+    first.start()
+    assert writing.wait(5)
+
+    # Appended while the first batch is written.
+    others = [
+        threading.Thread(
+            target=journal.save, args=(task_id, snapshot("1")), name=task_id)
+        for task_id in ("task-2", "task-3")]
+    for t in others:
+        t.start()
+    while len(journal._batch.records) < 2:
+        time.sleep(0.01)
+
+    resume.set()
+    first.join()
+    for t in others:
+        t.join()
+
+    # The second batch is written by its first thread, not by the thread
+    # writing the first batch.
+    assert len(writes) == 2
+    assert writes[0] == ("first", 1)
+    assert writes[1][0] in ("task-2", "task-3")
+    assert writes[1][1] == 2
+    assert len(taskjournal.Journal(str(tmpdir)).tasks()) == 3
+
+
+def test_write_error(tmpdir):
+    journal = taskjournal.Journal(str(tmpdir.join("missing")))
+    with pytest.raises(se.TaskPersistError):
+        journal.save("task-1", snapshot("running"))
+
+
+@pytest.mark.parametrize("enabled", ["true", "false"])
+def test_get(tmpdir, monkeypatch, enabled):
+    monkeypatch.setattr(taskjournal, "config", make_config([
+        ("irs", "task_journal", enabled),
+    ]))
+    monkeypatch.setattr(taskjournal, "_journals", {})
+    store = str(tmpdir)
+    journal = taskjournal.get(store)
+    if enabled == "true":
+        assert journal.path == os.path.join(store, taskjournal.JOURNAL_NAME)
+        assert taskjournal.get(store) is journal
+    else:
+        assert journal is None
+
+
+@pytest.mark.parametrize("name,result", [
+    (taskjournal.JOURNAL_NAME, True),
+    (taskjournal.JOURNAL_NAME + taskjournal.TEMP_EXT, True),
+    ("0d9d5b0a-ec4c-4ad0-bf43-6e5e3bd2cc4c", False),
+    ("0d9d5b0a-ec4c-4ad0-bf43-6e5e3bd2cc4c.backup", False),
+])
+def test_is_journal_file(name, result):
+    assert taskjournal.is_journal_file(name) == result
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(taskjournal, "config", make_config([
+        ("irs", "task_journal", "true"),
+    ]))
+    monkeypatch.setattr(taskjournal, "_journals", {})
+
+
+def test_reload(tmpdir, enabled):
+    store = str(tmpdir)
+    journal = taskjournal.get(store)
+    journal.save("task-1", snapshot("running"))
+
+    # Another host modified the journal while it was the SPM.
+    other = taskjournal.Journal(store)
+    other.remove("task-1")
+    other.save("task-2", snapshot("running"))
+
+    reloaded = taskjournal.reload(store)
+    assert reloaded.tasks() == {"task-2": snapshot("running")}
+    assert taskjournal.get(store) is reloaded
+
+
+def test_drop(tmpdir, enabled):
+    store = str(tmpdir)
+    journal = taskjournal.get(store)
+    taskjournal.drop(store)
+    assert taskjournal.get(store) is not journal
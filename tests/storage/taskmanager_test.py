@@ -4,12 +4,19 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import os
+
 from contextlib import contextmanager
 
+import pytest
+
 from vdsm.storage import outOfProcess as oop
 from vdsm.storage import task
+from vdsm.storage import taskjournal
 from vdsm.storage import taskManager
 
+from testlib import make_config
+
 from . storagetestlib import Callable
 
 
@@ -32,7 +39,30 @@ def task_manager(workers=1):
         oop.stop()
 
 
-def test_persistent_job(tmpdir, add_recovery):
+def use_journal(monkeypatch, enabled):
+    monkeypatch.setattr(taskjournal, "config", make_config([
+        ("irs", "task_journal", "true" if enabled else "false"),
+    ]))
+    monkeypatch.setattr(taskjournal, "_journals", {})
+
+
+def start_persistent_job(store, add_recovery):
+    """
+    Simulate SPM starting a persistent job and fencing out.
+    """
+    with task_manager() as tm:
+        c = Callable(hang_timeout=WAIT_TIMEOUT)
+        t = task.Task(id="task-id", abort_callback=c.finish)
+        r = add_recovery(t, "fakerecovery", ["arg1", "arg2", "arg3"])
+        t.prepare(tm.scheduleJob, "tag", store, t, "job", c)
+        c.wait_until_running()
+        t.store = None
+    return r
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_persistent_job(tmpdir, add_recovery, monkeypatch, journal):
+    use_journal(monkeypatch, journal)
     store = str(tmpdir)
     # Simulate SPM starting a persistent job and fencing out
     with task_manager() as tm:
@@ -71,6 +101,27 @@ def test_persistent_job(tmpdir, add_recovery):
         t.getState() == "recovered"
 
 
+def test_migrate_to_journal(tmpdir, add_recovery, monkeypatch):
+    store = str(tmpdir)
+
+    # Task persisted in the legacy layout.
+    use_journal(monkeypatch, False)
+    r = start_persistent_job(store, add_recovery)
+    assert "task-id" in os.listdir(store)
+
+    # Starting SPM with the journal migrates the task.
+    use_journal(monkeypatch, True)
+    with task_manager() as tm:
+        tm.loadDumpedTasks(store)
+        assert os.listdir(store) == [taskjournal.JOURNAL_NAME]
+        assert "task-id" in taskjournal.get(store).tasks()
+
+        tm.recoverDumpedTasks()
+        t = tm._getTask("task-id")
+        assert t.wait(timeout=WAIT_TIMEOUT), "Task is not finished"
+        assert r.args == ("arg1", "arg2", "arg3")
+
+
 def test_revert_task(add_recovery):
     with task_manager() as tm:
         # Create a task
@@ -0,0 +1,236 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import threading
+import time
+
+from contextlib import contextmanager
+
+import pytest
+
+from vdsm.storage import taskpool
+
+TIMEOUT = 5
+
+
+class Blocker(object):
+    """
+    Task blocking until released, recording running tasks.
+    """
+
+    def __init__(self):
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.done = 0
+
+    def __call__(self, args):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.started.release()
+        try:
+            assert self.release.wait(TIMEOUT)
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.done += 1
+
+    def wait_started(self, count):
+        for _ in range(count):
+            assert self.started.acquire(timeout=TIMEOUT)
+
+
+@contextmanager
+def task_pool(**kwargs):
+    pool = taskpool.TaskPool("test", **kwargs)
+    try:
+        yield pool
+    finally:
+        pool.joinAll(waitForThreads=True)
+
+
+def wait_for(predicate):
+    deadline = time.monotonic() + TIMEOUT
+    while not predicate():
+        assert time.monotonic() < deadline, "Timeout waiting for condition"
+        time.sleep(0.01)
+
+
+def test_run_task():
+    result = []
+    done = threading.Event()
+
+    def task(args):
+        result.append(args)
+        done.set()
+
+    with task_pool(max_workers=2) as pool:
+        assert pool.queueTask("task-1", task, args="args")
+        assert done.wait(TIMEOUT)
+
+    assert result == ["args"]
+
+
+def test_not_callable():
+    with task_pool(max_workers=1) as pool:
+        assert not pool.queueTask("task-1", None)
+
+
+def test_workers_start_on_demand():
+    blocker = Blocker()
+    with task_pool(max_workers=3) as pool:
+        assert pool.stats()["workers"] == 0
+
+        for i in range(5):
+            assert pool.queueTask("task-{}".format(i), blocker)
+
+        blocker.wait_started(3)
+        stats = pool.stats()
+        assert stats["workers"] == 3
+        assert stats["running"] == 3
+        assert stats["queued"] == 2
+
+        blocker.release.set()
+        wait_for(lambda: blocker.done == 5)
+
+    assert blocker.max_running == 3
+
+
+def test_burst_with_idle_worker():
+    blocker = Blocker()
+    with task_pool(max_workers=4) as pool:
+        pool.queueTask("task-0", lambda args: None)
+        wait_for(lambda: pool.stats()["idle"] == 1)
+
+        # The idle worker takes one task, and new workers are started for
+        # the rest.
+        for i in range(1, 4):
+            assert pool.queueTask("task-{}".format(i), blocker)
+
+        blocker.wait_started(3)
+        assert pool.stats()["workers"] == 3
+
+        blocker.release.set()
+        wait_for(lambda: blocker.done == 3)
+
+
+def test_idle_workers_exit():
+    blocker = Blocker()
+    blocker.release.set()
+    with task_pool(max_workers=2, idle_timeout=0.05) as pool:
+        for i in range(2):
+            pool.queueTask("task-{}".format(i), blocker)
+        wait_for(lambda: blocker.done == 2)
+        wait_for(lambda: pool.stats()["workers"] == 0)
+
+
+def test_queue_full():
+    blocker = Blocker()
+    with task_pool(max_workers=1, max_tasks=1) as pool:
+        assert pool.queueTask("task-1", blocker)
+        blocker.wait_started(1)
+        assert pool.queueTask("task-2", blocker)
+        assert not pool.queueTask("task-3", blocker)
+        blocker.release.set()
+
+
+def test_group_limit():
+    copy = Blocker()
+    delete = Blocker()
+    limits = {"copyImage": 1}
+    with task_pool(max_workers=4, limits=limits) as pool:
+        for i in range(3):
+            pool.queueTask("copy-{}".format(i), copy, group="copyImage")
+        copy.wait_started(1)
+
+        # Copies over the limit wait, but other groups are not blocked.
+        for i in range(2):
+            pool.queueTask("delete-{}".format(i), delete, group="deleteImage")
+        delete.wait_started(2)
+
+        stats = pool.stats()
+        assert stats["groups"] == {"copyImage": 1, "deleteImage": 2}
+        assert stats["queued"] == 2
+
+        delete.release.set()
+        copy.release.set()
+        wait_for(lambda: copy.done == 3 and delete.done == 2)
+
+    assert copy.max_running == 1
+
+
+def test_join_all():
+    blocker = Blocker()
+    with task_pool(max_workers=1) as pool:
+        pool.queueTask("task-1", blocker)
+        pool.queueTask("task-2", blocker)
+        blocker.wait_started(1)
+        blocker.release.set()
+        pool.joinAll(waitForThreads=True)
+
+        # Queued tasks are dropped, running tasks complete.
+        assert blocker.done == 1
+        assert pool.stats()["workers"] == 0
+        assert not pool.queueTask("task-3", blocker)
+
+
+def test_task_error():
+    done = threading.Event()
+
+    def fail(args):
+        raise RuntimeError("task failed")
+
+    with task_pool(max_workers=1) as pool:
+        pool.queueTask("task-1", fail)
+        pool.queueTask("task-2", lambda args: done.set())
+        assert done.wait(TIMEOUT)
+
+
+def test_stats():
+    blocker = Blocker()
+    blocker.release.set()
+    with task_pool(max_workers=1) as pool:
+        for i in range(3):
+            pool.queueTask("task-{}".format(i), blocker)
+        wait_for(lambda: pool.stats()["run_time"]["count"] == 3)
+
+        stats = pool.stats()
+        assert stats["queue_time"]["count"] == 3
+        assert sum(stats["run_time"]["buckets"].values()) == 3
+        assert taskpool.stats()["test"] == stats
+
+
+def test_histogram():
+    h = taskpool.Histogram(buckets=(1, 10))
+    for value in (0.5, 1, 5, 100):
+        h.add(value)
+    assert h.info() == {
+        "count": 4,
+        "total": 106.5,
+        "buckets": {"1": 2, "10": 1, "+Inf": 1},
+    }
+
+
+@pytest.mark.parametrize("s,limits", [
+    ("", {}),
+    ("copyImage:4", {"copyImage": 4}),
+    (" copyImage:4, deleteImage:8 ,", {"copyImage": 4, "deleteImage": 8}),
+])
+def test_parse_limits(s, limits):
+    assert taskpool.parse_limits(s) == limits
+
+
+@pytest.mark.parametrize("s", [
+    "copyImage",
+    "copyImage:four",
+    "copyImage:0",
+])
+def test_parse_limits_invalid(s):
+    with pytest.raises(ValueError):
+        taskpool.parse_limits(s)
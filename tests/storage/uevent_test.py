@@ -0,0 +1,54 @@
+# SPDX-FileCopyrightText: Red Hat, Inc.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import absolute_import
+from __future__ import division
+
+import pytest
+
+from vdsm.storage import uevent
+
+
+def test_parse():
+    data = (b"change@/devices/virtual/block/dm-3\0"
+            b"ACTION=change\0"
+            b"DEVPATH=/devices/virtual/block/dm-3\0"
+            b"SUBSYSTEM=block\0"
+            b"MAJOR=253\0"
+            b"MINOR=3\0"
+            b"DEVNAME=dm-3\0"
+            b"DEVTYPE=disk\0"
+            b"SEQNUM=4242\0")
+    event = uevent.parse(data)
+    assert event.action == "change"
+    assert event.devpath == "/devices/virtual/block/dm-3"
+    assert event.subsystem == "block"
+    assert event.env["DEVNAME"] == "dm-3"
+    assert event.env["SEQNUM"] == "4242"
+
+
+@pytest.mark.parametrize("data", [
+    # udev events are sent to another group, but we should not break if we
+    # get one.
+    b"libudev\0\xfe\xed\xca\xfe",
+    # Missing required keys.
+    b"add@/devices/virtual/block/dm-3\0SUBSYSTEM=block\0",
+])
+def test_parse_invalid(data):
+    assert uevent.parse(data) is None
+
+
+def test_sync_not_running(monkeypatch):
+    monkeypatch.setattr(uevent, "read_seqnum", lambda: 10)
+    monitor = uevent.Monitor(lambda e: None, lambda: None)
+    assert not monitor.sync(timeout=0.1)
+
+
+def test_sync(monkeypatch):
+    monkeypatch.setattr(uevent, "read_seqnum", lambda: 10)
+    monitor = uevent.Monitor(lambda e: None, lambda: None)
+    monitor._running = True
+    monitor._update_seqnum(9)
+    assert not monitor.sync(timeout=0.1)
+    monitor._update_seqnum(10)
+    assert monitor.sync(timeout=0.1)
@@ -29,6 +29,7 @@ from nose import core
 from nose import result
 
 import vdsm
+import vdsm.config
 
 from vdsm.common import cache
 from vdsm.common import osutils
@@ -4,6 +4,7 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import io
 import json
 import logging
 import pickle
@@ -14,12 +15,14 @@ from textwrap import dedent
 from unittest import mock
 
 from nose.plugins.attrib import attr
+from vdsm.api import schema_to_pickle
 from vdsm.api import vdsmapi
 from vdsm.api.schema_inconsistency_formatter \
     import SchemaInconsistencyFormatter
 from yajsonrpc.exception import JsonRpcErrorBase
 
 from testlib import VdsmTestCase as TestCaseBase
+from testlib import temporaryPath
 from testValidation import xfail
 
 try:
@@ -722,6 +725,79 @@ class SchemaTypeTest(TestCaseBase):
         self.assertEqual(vdsmapi.SchemaType.VDSM_API.path(), expected_path)
 
 
+class FakeSchemaType(object):
+
+    def __init__(self, path):
+        self._path = path
+
+    def path(self):
+        return self._path
+
+
+@attr(type='unit')
+class IndexedSchemaTests(TestCaseBase):
+
+    SCHEMA_YAML = dedent("""
+        types:
+            Name: &Name
+                name: Name
+                sourcetype: string
+                type: alias
+
+        Namespace.first:
+            description: First method
+            params:
+            -   name: name
+                type: *Name
+
+        Namespace.second:
+            description: Second method
+        """)
+
+    def _indexed_schema(self):
+        data = io.BytesIO()
+        schema_to_pickle.dump_indexed_schema(
+            yaml.safe_load(self.SCHEMA_YAML), data)
+        return data.getvalue()
+
+    def test_method_names(self):
+        with temporaryPath(data=self._indexed_schema()) as path:
+            schema = vdsmapi.Schema((FakeSchemaType(path),), False)
+            self.assertEqual(
+                sorted(schema.method_names),
+                ["Namespace.first", "Namespace.second"])
+
+    def test_lookup(self):
+        with temporaryPath(data=self._indexed_schema()) as path:
+            schema = vdsmapi.Schema((FakeSchemaType(path),), True)
+            rep = vdsmapi.MethodRep("Namespace", "first")
+            self.assertEqual(
+                schema.get_method_description(rep), "First method")
+            self.assertEqual(schema.get_arg_names(rep), ["name"])
+            self.assertEqual(schema.get_type("Name")["type"], "alias")
+            schema.verify_args(rep, {"name": "value"})
+            with self.assertRaises(JsonRpcErrorBase):
+                schema.verify_args(rep, {"name": 42})
+
+    def test_same_as_plain_pickle(self):
+        plain = pickle.dumps(yaml.safe_load(self.SCHEMA_YAML))
+        with temporaryPath(data=plain) as plain_path, \
+                temporaryPath(data=self._indexed_schema()) as indexed_path:
+            plain_schema = vdsmapi.Schema(
+                (FakeSchemaType(plain_path),), False)
+            indexed_schema = vdsmapi.Schema(
+                (FakeSchemaType(indexed_path),), False)
+            self.assertEqual(
+                indexed_schema.get_methods, plain_schema.get_methods)
+            self.assertEqual(indexed_schema.get_types, plain_schema.get_types)
+
+    def test_missing_method(self):
+        with temporaryPath(data=self._indexed_schema()) as path:
+            schema = vdsmapi.Schema((FakeSchemaType(path),), False)
+            with self.assertRaises(vdsmapi.MethodNotFound):
+                schema.get_method(vdsmapi.MethodRep("Namespace", "missing"))
+
+
 @attr(type='unit')
 class MethodArgumentsParsingTests(TestCaseBase):
 